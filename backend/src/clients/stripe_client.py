@@ -30,6 +30,7 @@ class StripeClient:
         source: str,
         description: str,
         metadata: Dict[str, Any] = None,
+        idempotency_key: str = None,
     ) -> Dict[str, Any]:
         """
         Creates a charge using the Stripe API.
@@ -40,6 +41,7 @@ class StripeClient:
             source: The token or source ID representing the payment method.
             description: A description for the charge.
             metadata: Optional metadata to attach to the charge.
+            idempotency_key: Optional key making retries of this charge safe.
 
         Returns:
             A dictionary representing the successful charge object.
@@ -75,6 +77,7 @@ class StripeClient:
                 source=source,
                 description=description,
                 metadata=metadata or {},
+                idempotency_key=idempotency_key,
             )
             logger.info(f"Stripe charge successful: {charge.id}")
             return charge.to_dict()
@@ -1,10 +1,7 @@
 from .aml_engine import AMLEngine
-from .audit_service import ComplianceAuditService
-from .compliance_engine import ComplianceEngine
 from .data_protection import DataProtectionService
 from .kyc_service import KYCService
 from .regulatory_framework import RegulatoryFramework
-from .reporting_service import ComplianceReportingService
 
 """
 Global Compliance Module
@@ -16,13 +13,10 @@ Supports EU, APAC, and other regulatory requirements with automated monitoring a
 
 
 __all__ = [
-    "ComplianceEngine",
     "RegulatoryFramework",
     "AMLEngine",
     "KYCService",
     "DataProtectionService",
-    "ComplianceReportingService",
-    "ComplianceAuditService",
 ]
 
 __version__ = "1.0.0"
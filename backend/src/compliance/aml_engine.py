@@ -3,9 +3,11 @@ import re
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Tuple
 from sqlalchemy.orm import Session
 
+from .name_screening import NameScreeningIndex, name_match_score
+
 "\nAML Engine\n==========\n\nAdvanced Anti-Money Laundering engine for financial compliance.\nProvides comprehensive AML screening, monitoring, and reporting capabilities.\n"
 
 
@@ -135,7 +137,11 @@ class AMLEngine:
         self._adverse_media_sources = []
         self._transaction_patterns = {}
         self._risk_rules = {}
-        self._name_match_threshold = 0.85
+        self._name_match_threshold = self.config.get("name_match_threshold", 0.85)
+        self._fuzzy_name_match_threshold = self.config.get(
+            "fuzzy_name_match_threshold", 0.92
+        )
+        self._screening_indexes = {}
         self._address_match_threshold = 0.8
         self._date_match_threshold = 0.9
         self._initialize_aml_engine()
@@ -144,6 +150,7 @@ class AMLEngine:
         """Initialize the AML engine with default configurations."""
         self._load_sanctions_lists()
         self._load_pep_lists()
+        self._build_screening_indexes()
         self._initialize_transaction_patterns()
         self._initialize_risk_rules()
         self.logger.info("AML engine initialized successfully")
@@ -450,6 +457,54 @@ class AMLEngine:
                 details={"error": str(e)},
             )
 
+    def _build_screening_indexes(self) -> Any:
+        """Index the names of every loaded sanctions and PEP list."""
+        for list_type, sanctions_list in self._sanctions_lists.items():
+            self._screening_index(
+                ("sanctions", list_type),
+                sanctions_list["entries"],
+                self._sanctions_names,
+            )
+        for list_name, pep_list in self._pep_lists.items():
+            self._screening_index(
+                ("pep", list_name), pep_list["entries"], self._pep_names
+            )
+
+    def _screening_index(
+        self,
+        key: Any,
+        entries: List[Dict[str, Any]],
+        names: Callable[[Dict[str, Any]], Iterator[Tuple[str, str]]],
+    ) -> NameScreeningIndex:
+        """Name index of one list, rebuilt when its entries were replaced.
+
+        ``names(entry)`` yields the ``(name, match_type)`` pairs to index for
+        an entry, in the order its matches are reported.
+        """
+        cached = self._screening_indexes.get(key)
+        if cached and cached[0] is entries and cached[1] == len(entries):
+            return cached[2]
+        index = NameScreeningIndex(fuzzy_threshold=self._fuzzy_name_match_threshold)
+        for position, entry in enumerate(entries):
+            for name, match_type in names(entry):
+                index.add(name, (position, match_type))
+        self._screening_indexes[key] = (entries, len(entries), index)
+        return index
+
+    @staticmethod
+    def _sanctions_names(entry: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+        yield entry["name"], "name"
+        for alias in entry.get("aliases", []):
+            yield alias, "alias"
+
+    @staticmethod
+    def _pep_names(entry: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+        for family_member in entry.get("family_members", []):
+            yield family_member, "family_member"
+        for associate in entry.get("close_associates", []):
+            yield associate, "close_associate"
+        yield entry["name"], "direct_pep"
+
     async def _screen_sanctions(self, entity_data: Dict[str, Any]) -> Dict[str, Any]:
         """Screen entity against sanctions lists."""
         name = entity_data.get("name", entity_data.get("full_name", ""))
@@ -457,40 +512,44 @@ class AMLEngine:
         date_of_birth = entity_data.get("date_of_birth", "")
         matches = []
         for list_type, sanctions_list in self._sanctions_lists.items():
-            for entry in sanctions_list["entries"]:
-                match_score = self._calculate_name_match_score(name, entry["name"])
-                for alias in entry.get("aliases", []):
-                    alias_score = self._calculate_name_match_score(name, alias)
-                    match_score = max(match_score, alias_score)
-                if match_score >= self._name_match_threshold:
-                    address_score = 0.0
-                    if address and entry.get("addresses"):
-                        for entry_address in entry["addresses"]:
-                            addr_score = self._calculate_address_match_score(
-                                address, entry_address
-                            )
-                            address_score = max(address_score, addr_score)
-                    date_score = 0.0
-                    if date_of_birth and entry.get("date_of_birth"):
-                        date_score = self._calculate_date_match_score(
-                            date_of_birth, entry["date_of_birth"]
+            entries = sanctions_list["entries"]
+            index = self._screening_index(
+                ("sanctions", list_type), entries, self._sanctions_names
+            )
+            # An entry scores the best of its name and aliases
+            entry_scores = {}
+            for name_id, score in index.query(name, self._name_match_threshold):
+                position = index.payloads[name_id][0]
+                entry_scores[position] = max(score, entry_scores.get(position, 0.0))
+            for position in sorted(entry_scores):
+                entry = entries[position]
+                match_score = entry_scores[position]
+                address_score = 0.0
+                if address and entry.get("addresses"):
+                    for entry_address in entry["addresses"]:
+                        addr_score = self._calculate_address_match_score(
+                            address, entry_address
                         )
-                    matches.append(
-                        {
-                            "list_type": list_type.value,
-                            "entry_id": entry["id"],
-                            "matched_name": entry["name"],
-                            "name_match_score": match_score,
-                            "address_match_score": address_score,
-                            "date_match_score": date_score,
-                            "overall_confidence": (
-                                match_score + address_score + date_score
-                            )
-                            / 3,
-                            "program": entry.get("program"),
-                            "remarks": entry.get("remarks"),
-                        }
+                        address_score = max(address_score, addr_score)
+                date_score = 0.0
+                if date_of_birth and entry.get("date_of_birth"):
+                    date_score = self._calculate_date_match_score(
+                        date_of_birth, entry["date_of_birth"]
                     )
+                matches.append(
+                    {
+                        "list_type": list_type.value,
+                        "entry_id": entry["id"],
+                        "matched_name": entry["name"],
+                        "name_match_score": match_score,
+                        "address_match_score": address_score,
+                        "date_match_score": date_score,
+                        "overall_confidence": (match_score + address_score + date_score)
+                        / 3,
+                        "program": entry.get("program"),
+                        "remarks": entry.get("remarks"),
+                    }
+                )
         return {
             "matches": matches,
             "lists_checked": len(self._sanctions_lists),
@@ -504,53 +563,28 @@ class AMLEngine:
         name = entity_data.get("name", entity_data.get("full_name", ""))
         matches = []
         for list_name, pep_list in self._pep_lists.items():
-            for entry in pep_list["entries"]:
-                match_score = self._calculate_name_match_score(name, entry["name"])
-                for family_member in entry.get("family_members", []):
-                    family_score = self._calculate_name_match_score(name, family_member)
-                    if family_score >= self._name_match_threshold:
-                        matches.append(
-                            {
-                                "list_name": list_name,
-                                "entry_id": entry["id"],
-                                "matched_name": family_member,
-                                "match_type": "family_member",
-                                "match_score": family_score,
-                                "pep_name": entry["name"],
-                                "position": entry["position"],
-                                "country": entry["country"],
-                                "risk_level": entry["risk_level"],
-                            }
-                        )
-                for associate in entry.get("close_associates", []):
-                    associate_score = self._calculate_name_match_score(name, associate)
-                    if associate_score >= self._name_match_threshold:
-                        matches.append(
-                            {
-                                "list_name": list_name,
-                                "entry_id": entry["id"],
-                                "matched_name": associate,
-                                "match_type": "close_associate",
-                                "match_score": associate_score,
-                                "pep_name": entry["name"],
-                                "position": entry["position"],
-                                "country": entry["country"],
-                                "risk_level": entry["risk_level"],
-                            }
-                        )
-                if match_score >= self._name_match_threshold:
-                    matches.append(
-                        {
-                            "list_name": list_name,
-                            "entry_id": entry["id"],
-                            "matched_name": entry["name"],
-                            "match_type": "direct_pep",
-                            "match_score": match_score,
-                            "position": entry["position"],
-                            "country": entry["country"],
-                            "risk_level": entry["risk_level"],
-                        }
-                    )
+            entries = pep_list["entries"]
+            index = self._screening_index(("pep", list_name), entries, self._pep_names)
+            for name_id, score in index.query(name, self._name_match_threshold):
+                position, match_type = index.payloads[name_id]
+                entry = entries[position]
+                match = {
+                    "list_name": list_name,
+                    "entry_id": entry["id"],
+                    "matched_name": index.names[name_id],
+                    "match_type": match_type,
+                    "match_score": score,
+                }
+                if match_type != "direct_pep":
+                    match["pep_name"] = entry["name"]
+                match.update(
+                    {
+                        "position": entry["position"],
+                        "country": entry["country"],
+                        "risk_level": entry["risk_level"],
+                    }
+                )
+                matches.append(match)
         return {"matches": matches, "lists_checked": len(self._pep_lists)}
 
     async def _screen_adverse_media(
@@ -725,19 +759,7 @@ class AMLEngine:
 
     def _calculate_name_match_score(self, name1: str, name2: str) -> float:
         """Calculate name matching score using fuzzy matching."""
-        if not name1 or not name2:
-            return 0.0
-        name1_clean = re.sub("[^a-zA-Z\\s]", "", name1.lower()).strip()
-        name2_clean = re.sub("[^a-zA-Z\\s]", "", name2.lower()).strip()
-        if name1_clean == name2_clean:
-            return 1.0
-        words1 = set(name1_clean.split())
-        words2 = set(name2_clean.split())
-        if not words1 or not words2:
-            return 0.0
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        return len(intersection) / len(union)
+        return name_match_score(name1, name2, self._fuzzy_name_match_threshold)
 
     def _calculate_address_match_score(self, address1: str, address2: str) -> float:
         """Calculate address matching score."""
@@ -897,8 +919,11 @@ class AMLEngine:
     def update_sanctions_lists(
         self, list_type: SanctionsListType, new_data: Dict[str, Any]
     ) -> Any:
-        """Update sanctions lists with new data."""
+        """Update sanctions lists with new data and rebuild its name index."""
         self._sanctions_lists[list_type] = new_data
+        self._screening_index(
+            ("sanctions", list_type), new_data["entries"], self._sanctions_names
+        )
         self.logger.info(f"Updated sanctions list: {list_type.value}")
 
     def get_aml_statistics(self) -> Dict[str, Any]:
@@ -906,6 +931,9 @@ class AMLEngine:
         return {
             "sanctions_lists": len(self._sanctions_lists),
             "pep_lists": len(self._pep_lists),
+            "screening_index_names": sum(
+                (len(index) for _, _, index in self._screening_indexes.values())
+            ),
             "transaction_patterns": len(self._transaction_patterns),
             "last_updated": datetime.utcnow().isoformat(),
         }
@@ -0,0 +1,662 @@
+import math
+import re
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+"\nName Screening Index\n====================\n\nIndexed fuzzy matching of names against sanctions and PEP lists. Each\nlist name is normalised once into its token set, a token-sorted form,\ncharacter trigrams and Double Metaphone keys. A query collects a small\ncandidate set from the postings and scores only those candidates, instead\nof comparing every list name and alias.\n"
+
+_NON_LETTERS = re.compile("[^a-zA-Z\\s]")
+_VOWELS = frozenset("AEIOUY")
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case ASCII letters and whitespace only, as names are compared."""
+    return _NON_LETTERS.sub("", name.lower()).strip()
+
+
+def jaro_winkler(s1: str, s2: str, prefix_weight: float = 0.1) -> float:
+    """Jaro-Winkler similarity of two strings, between 0.0 and 1.0."""
+    if s1 == s2:
+        return 1.0
+    len1, len2 = len(s1), len(s2)
+    if not len1 or not len2:
+        return 0.0
+    window = max(max(len1, len2) // 2 - 1, 0)
+    taken = [False] * len2
+    matched1 = []
+    for i, ch in enumerate(s1):
+        hi = min(i + window + 1, len2)
+        j = s2.find(ch, max(0, i - window), hi)
+        while j != -1 and taken[j]:
+            j = s2.find(ch, j + 1, hi)
+        if j != -1:
+            taken[j] = True
+            matched1.append(ch)
+    matches = len(matched1)
+    if not matches:
+        return 0.0
+    matched2 = [ch for ch, hit in zip(s2, taken) if hit]
+    transpositions = sum(a != b for a, b in zip(matched1, matched2)) // 2
+    jaro = (matches / len1 + matches / len2 + (matches - transpositions) / matches) / 3
+    prefix = 0
+    for a, b in zip(s1[:4], s2[:4]):
+        if a != b:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_weight * (1 - jaro)
+
+
+def double_metaphone(word: str) -> Tuple[str, str]:
+    """Primary and alternate Double Metaphone keys (Lawrence Philips, 2000).
+
+    Keys are cut to four characters, as in the original algorithm.
+    """
+    word = word.upper()
+    length = len(word)
+    if not length:
+        return "", ""
+    last = length - 1
+    padded = word + "     "
+    primary: List[str] = []
+    secondary: List[str] = []
+
+    def add(main: str, alternate: str = None) -> None:
+        primary.append(main)
+        secondary.append(main if alternate is None else alternate)
+
+    def at(start: int, *subs: str) -> bool:
+        return start >= 0 and any(padded.startswith(sub, start) for sub in subs)
+
+    def is_vowel(position: int) -> bool:
+        return 0 <= position < length and word[position] in _VOWELS
+
+    slavo_germanic = any(sub in word for sub in ("W", "K", "CZ", "WITZ"))
+    current = 0
+    if at(0, "GN", "KN", "PN", "WR", "PS"):
+        current = 1
+    if word[0] == "X":
+        add("S")
+        current = 1
+    while current < length:
+        ch = word[current]
+        following = padded[current + 1]
+        if ch in _VOWELS:
+            if current == 0:
+                add("A")
+            current += 1
+        elif ch == "B":
+            add("P")
+            current += 2 if following == "B" else 1
+        elif ch == "C":
+            if (
+                current > 1
+                and not is_vowel(current - 2)
+                and at(current - 1, "ACH")
+                and padded[current + 2] != "I"
+                and (padded[current + 2] != "E" or at(current - 2, "BACHER", "MACHER"))
+            ):
+                add("K")
+                current += 2
+            elif current == 0 and at(current, "CAESAR"):
+                add("S")
+                current += 2
+            elif at(current, "CHIA"):
+                add("K")
+                current += 2
+            elif at(current, "CH"):
+                if current > 0 and at(current, "CHAE"):
+                    add("K", "X")
+                elif (
+                    current == 0
+                    and (
+                        at(current + 1, "HARAC", "HARIS")
+                        or at(current + 1, "HOR", "HYM", "HIA", "HEM")
+                    )
+                    and not at(0, "CHORE")
+                ):
+                    add("K")
+                elif (
+                    at(0, "VAN ", "VON ", "SCH")
+                    or at(current - 2, "ORCHES", "ARCHIT", "ORCHID")
+                    or at(current + 2, "T", "S")
+                    or (
+                        (at(current - 1, "A", "O", "U", "E") or current == 0)
+                        and at(
+                            current + 2,
+                            "L",
+                            "R",
+                            "N",
+                            "M",
+                            "B",
+                            "H",
+                            "F",
+                            "V",
+                            "W",
+                            " ",
+                        )
+                    )
+                ):
+                    add("K")
+                elif current > 0:
+                    if at(0, "MC"):
+                        add("K")
+                    else:
+                        add("X", "K")
+                else:
+                    add("X")
+                current += 2
+            elif at(current, "CZ") and not at(current - 2, "WICZ"):
+                add("S", "X")
+                current += 2
+            elif at(current + 1, "CIA"):
+                add("X")
+                current += 3
+            elif at(current, "CC") and not (current == 1 and word[0] == "M"):
+                if at(current + 2, "I", "E", "H") and not at(current + 2, "HU"):
+                    if (current == 1 and word[0] == "A") or at(
+                        current - 1, "UCCEE", "UCCES"
+                    ):
+                        add("KS")
+                    else:
+                        add("X")
+                    current += 3
+                else:
+                    add("K")
+                    current += 2
+            elif at(current, "CK", "CG", "CQ"):
+                add("K")
+                current += 2
+            elif at(current, "CI", "CE", "CY"):
+                if at(current, "CIO", "CIE", "CIA"):
+                    add("S", "X")
+                else:
+                    add("S")
+                current += 2
+            else:
+                add("K")
+                if at(current + 1, " C", " Q", " G"):
+                    current += 3
+                elif at(current + 1, "C", "K", "Q") and not at(current + 1, "CE", "CI"):
+                    current += 2
+                else:
+                    current += 1
+        elif ch == "D":
+            if at(current, "DG"):
+                if at(current + 2, "I", "E", "Y"):
+                    add("J")
+                    current += 3
+                else:
+                    add("TK")
+                    current += 2
+            elif at(current, "DT", "DD"):
+                add("T")
+                current += 2
+            else:
+                add("T")
+                current += 1
+        elif ch == "F":
+            add("F")
+            current += 2 if following == "F" else 1
+        elif ch == "G":
+            if following == "H":
+                if current > 0 and not is_vowel(current - 1):
+                    add("K")
+                elif current == 0:
+                    add("J" if padded[current + 2] == "I" else "K")
+                elif (
+                    (current > 1 and at(current - 2, "B", "H", "D"))
+                    or (current > 2 and at(current - 3, "B", "H", "D"))
+                    or (current > 3 and at(current - 4, "B", "H"))
+                ):
+                    pass
+                elif (
+                    current > 2
+                    and word[current - 1] == "U"
+                    and at(current - 3, "C", "G", "L", "R", "T")
+                ):
+                    add("F")
+                elif word[current - 1] != "I":
+                    add("K")
+                current += 2
+            elif following == "N":
+                if current == 1 and is_vowel(0) and not slavo_germanic:
+                    add("KN", "N")
+                elif not at(current + 2, "EY") and not slavo_germanic:
+                    add("N", "KN")
+                else:
+                    add("KN")
+                current += 2
+            elif at(current + 1, "LI") and not slavo_germanic:
+                add("KL", "L")
+                current += 2
+            elif current == 0 and (
+                following == "Y"
+                or at(
+                    current + 1,
+                    "ES",
+                    "EP",
+                    "EB",
+                    "EL",
+                    "EY",
+                    "IB",
+                    "IL",
+                    "IN",
+                    "IE",
+                    "EI",
+                    "ER",
+                )
+            ):
+                add("K", "J")
+                current += 2
+            elif (
+                (at(current + 1, "ER") or following == "Y")
+                and not at(0, "DANGER", "RANGER", "MANGER")
+                and not at(current - 1, "E", "I")
+                and not at(current - 1, "RGY", "OGY")
+            ):
+                add("K", "J")
+                current += 2
+            elif at(current + 1, "E", "I", "Y") or at(current - 1, "AGGI", "OGGI"):
+                if at(0, "VAN ", "VON ", "SCH") or at(current + 1, "ET"):
+                    add("K")
+                elif at(current + 1, "IER "):
+                    add("J")
+                else:
+                    add("J", "K")
+                current += 2
+            else:
+                add("K")
+                current += 2 if following == "G" else 1
+        elif ch == "H":
+            if (current == 0 or is_vowel(current - 1)) and is_vowel(current + 1):
+                add("H")
+                current += 2
+            else:
+                current += 1
+        elif ch == "J":
+            if at(current, "JOSE") or at(0, "SAN "):
+                if (current == 0 and padded[current + 4] == " ") or at(0, "SAN "):
+                    add("H")
+                else:
+                    add("J", "H")
+                current += 1
+                continue
+            if current == 0:
+                add("J", "A")
+            elif (
+                is_vowel(current - 1) and not slavo_germanic and following in ("A", "O")
+            ):
+                add("J", "H")
+            elif current == last:
+                add("J", "")
+            elif not at(current + 1, "L", "T", "K", "S", "N", "M", "B", "Z") and not at(
+                current - 1, "S", "K", "L"
+            ):
+                add("J")
+            current += 2 if following == "J" else 1
+        elif ch == "K":
+            add("K")
+            current += 2 if following == "K" else 1
+        elif ch == "L":
+            if following == "L":
+                if (
+                    current == length - 3 and at(current - 1, "ILLO", "ILLA", "ALLE")
+                ) or (
+                    (at(last - 1, "AS", "OS") or at(last, "A", "O"))
+                    and at(current - 1, "ALLE")
+                ):
+                    add("L", "")
+                else:
+                    add("L")
+                current += 2
+            else:
+                add("L")
+                current += 1
+        elif ch == "M":
+            add("M")
+            if (
+                at(current - 1, "UMB")
+                and (current + 1 == last or at(current + 2, "ER"))
+            ) or following == "M":
+                current += 2
+            else:
+                current += 1
+        elif ch == "N":
+            add("N")
+            current += 2 if following == "N" else 1
+        elif ch == "P":
+            if following == "H":
+                add("F")
+                current += 2
+            else:
+                add("P")
+                current += 2 if following in ("P", "B") else 1
+        elif ch == "Q":
+            add("K")
+            current += 2 if following == "Q" else 1
+        elif ch == "R":
+            if (
+                current == last
+                and not slavo_germanic
+                and at(current - 2, "IE")
+                and not at(current - 4, "ME", "MA")
+            ):
+                add("", "R")
+            else:
+                add("R")
+            current += 2 if following == "R" else 1
+        elif ch == "S":
+            if at(current - 1, "ISL", "YSL"):
+                current += 1
+            elif current == 0 and at(current, "SUGAR"):
+                add("X", "S")
+                current += 1
+            elif at(current, "SH"):
+                if at(current + 1, "HEIM", "HOEK", "HOLM", "HOLZ"):
+                    add("S")
+                else:
+                    add("X")
+                current += 2
+            elif at(current, "SIO", "SIA"):
+                if slavo_germanic:
+                    add("S")
+                else:
+                    add("S", "X")
+                current += 3
+            elif (
+                current == 0 and at(current + 1, "M", "N", "L", "W")
+            ) or following == "Z":
+                add("S", "X")
+                current += 2 if following == "Z" else 1
+            elif at(current, "SC"):
+                if padded[current + 2] == "H":
+                    if at(current + 3, "OO", "ER", "EN", "UY", "ED", "EM"):
+                        if at(current + 3, "ER", "EN"):
+                            add("X", "SK")
+                        else:
+                            add("SK")
+                    elif current == 0 and not is_vowel(3) and padded[3] != "W":
+                        add("X", "S")
+                    else:
+                        add("X")
+                elif at(current + 2, "I", "E", "Y"):
+                    add("S")
+                else:
+                    add("SK")
+                current += 3
+            else:
+                if current == last and at(current - 2, "AI", "OI"):
+                    add("", "S")
+                else:
+                    add("S")
+                current += 2 if following in ("S", "Z") else 1
+        elif ch == "T":
+            if at(current, "TION", "TIA", "TCH"):
+                add("X")
+                current += 3
+            elif at(current, "TH", "TTH"):
+                if at(current + 2, "OM", "AM") or at(0, "VAN ", "VON ", "SCH"):
+                    add("T")
+                else:
+                    add("0", "T")
+                current += 2
+            else:
+                add("T")
+                current += 2 if following in ("T", "D") else 1
+        elif ch == "V":
+            add("F")
+            current += 2 if following == "V" else 1
+        elif ch == "W":
+            if at(current, "WR"):
+                add("R")
+                current += 2
+                continue
+            if current == 0 and (is_vowel(current + 1) or at(current, "WH")):
+                if is_vowel(current + 1):
+                    add("A", "F")
+                else:
+                    add("A")
+            if (
+                (current == last and is_vowel(current - 1))
+                or at(current - 1, "EWSKI", "EWSKY", "OWSKI", "OWSKY")
+                or at(0, "SCH")
+            ):
+                add("", "F")
+                current += 1
+            elif at(current, "WICZ", "WITZ"):
+                add("TS", "FX")
+                current += 4
+            else:
+                current += 1
+        elif ch == "X":
+            if not (
+                current == last
+                and (at(current - 3, "IAU", "EAU") or at(current - 2, "AU", "OU"))
+            ):
+                add("KS")
+            current += 2 if following in ("C", "X") else 1
+        elif ch == "Z":
+            if following == "H":
+                add("J")
+                current += 2
+                continue
+            if at(current + 1, "ZO", "ZI", "ZA") or (
+                slavo_germanic and current > 0 and word[current - 1] != "T"
+            ):
+                add("S", "TS")
+            else:
+                add("S")
+            current += 2 if following == "Z" else 1
+        else:
+            current += 1
+    return "".join(primary)[:4], "".join(secondary)[:4]
+
+
+def trigrams(token: str) -> Set[str]:
+    """Character trigrams of ``token``, padded with a space on both sides."""
+    padded = f" {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class NameScreeningIndex:
+    """Candidate-filtered name matching over one screening list.
+
+    ``add`` stores a list name with an arbitrary ``payload`` and indexes it
+    under its tokens. Each distinct token is indexed once more under its
+    character trigrams and Double Metaphone keys. A query scores only the
+    names that can reach the threshold:
+
+    * token overlap (Jaccard) — a name at or above ``threshold`` shares at
+      least one of the query's ``n - ceil(threshold * n) + 1`` rarest
+      tokens, so this part finds exactly what a full scan would;
+    * Jaro-Winkler on the token-sorted names, once it reaches
+      ``fuzzy_threshold`` — candidates are the names holding, for every
+      query token longer than two letters, a token that sounds like it or
+      shares ``min_trigram_similarity`` (Dice) of its trigrams.
+
+    The score of a name is its Jaccard score, raised to its Jaro-Winkler
+    score when that clears ``fuzzy_threshold``; two names that normalise to
+    the same string score 1.0. ``fuzzy_threshold=None`` turns the fuzzy
+    part off and leaves plain token matching.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[Tuple[str, Any]] = (),
+        fuzzy_threshold: Optional[float] = 0.92,
+        min_trigram_similarity: float = 0.6,
+    ) -> Any:
+        self.fuzzy_threshold = fuzzy_threshold
+        self.min_trigram_similarity = min_trigram_similarity
+        self.names: List[str] = []
+        self.payloads: List[Any] = []
+        self._clean: List[str] = []
+        self._tokens: List[frozenset] = []
+        self._sorted: List[str] = []
+        self._blank: List[int] = []
+        self._token_postings: Dict[str, List[int]] = {}
+        self._trigram_tokens: Dict[str, List[str]] = {}
+        self._trigram_counts: Dict[str, int] = {}
+        self._phonetic_tokens: Dict[str, List[str]] = {}
+        for name, payload in names:
+            self.add(name, payload)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, name: str, payload: Any = None) -> Optional[int]:
+        """Index ``name``; returns its id, or None for an empty name."""
+        if not name:
+            return None
+        name_id = len(self.names)
+        clean = normalize_name(name)
+        tokens = frozenset(clean.split())
+        self.names.append(name)
+        self.payloads.append(payload)
+        self._clean.append(clean)
+        self._tokens.append(tokens)
+        self._sorted.append(" ".join(sorted(tokens)))
+        if not clean:
+            # Nothing left to compare, but equal to any other blank name
+            self._blank.append(name_id)
+        for token in tokens:
+            postings = self._token_postings.get(token)
+            if postings is None:
+                postings = self._token_postings[token] = []
+                self._index_token(token)
+            postings.append(name_id)
+        return name_id
+
+    def _index_token(self, token: str) -> None:
+        token_trigrams = trigrams(token)
+        self._trigram_counts[token] = len(token_trigrams)
+        for trigram in token_trigrams:
+            self._trigram_tokens.setdefault(trigram, []).append(token)
+        for key in set(double_metaphone(token)):
+            if key:
+                self._phonetic_tokens.setdefault(key, []).append(token)
+
+    def query(self, name: str, threshold: float = 0.85) -> List[Tuple[int, float]]:
+        """``(name id, score)`` of every indexed name scoring ``threshold`` or
+        more against ``name``, in the order the names were added."""
+        if not name or not self.names:
+            return []
+        clean = normalize_name(name)
+        if not clean:
+            return [(name_id, 1.0) for name_id in self._blank]
+        tokens = frozenset(clean.split())
+        candidates = self._token_candidates(tokens, threshold)
+        fuzzy = set()
+        if self.fuzzy_threshold is not None:
+            fuzzy = self._fuzzy_candidates(tokens)
+        return self._score(clean, tokens, sorted(candidates | fuzzy), fuzzy, threshold)
+
+    def _token_candidates(self, tokens: frozenset, threshold: float) -> Set[int]:
+        """Every name whose Jaccard score can reach ``threshold``.
+
+        Jaccard >= t needs an overlap of at least ``ceil(t * n)`` of the
+        query's ``n`` tokens, so a match shares one of any
+        ``n - ceil(t * n) + 1`` of them; the rarest are used.
+        """
+        postings = self._token_postings
+        required = max(math.ceil(threshold * len(tokens) - 1e-9), 1)
+        prefix = sorted(tokens, key=lambda token: len(postings.get(token, ())))
+        prefix = prefix[: len(tokens) - required + 1]
+        return set(chain.from_iterable(postings.get(token, ()) for token in prefix))
+
+    def similar_tokens(self, token: str) -> Set[str]:
+        """Indexed tokens that sound like ``token`` or share enough trigrams."""
+        similar = {token} if token in self._token_postings else set()
+        phonetic = self._phonetic_tokens
+        for key in set(double_metaphone(token)):
+            similar.update(phonetic.get(key, ()))
+        token_trigrams = trigrams(token)
+        shared = Counter(
+            chain.from_iterable(
+                self._trigram_tokens.get(trigram, ()) for trigram in token_trigrams
+            )
+        )
+        counts = self._trigram_counts
+        # Dice similarity: 2 * shared / (trigrams of one + trigrams of other)
+        cut = self.min_trigram_similarity / 2
+        size = len(token_trigrams)
+        similar.update(
+            other
+            for other, overlap in shared.items()
+            if overlap >= cut * (size + counts[other])
+        )
+        return similar
+
+    def _fuzzy_candidates(self, tokens: frozenset) -> Set[int]:
+        """Names with a token like each of the query's longer tokens.
+
+        Initials and other tokens of one or two letters may go unmatched.
+        The names are gathered from the rarest token's neighbours and the
+        other tokens only filter them, as does length: Jaro similarity is
+        at most ``(2 + shorter / longer) / 3``, and the Winkler prefix bonus
+        at most closes 40% of the remaining gap.
+        """
+        postings = self._token_postings
+        groups = []
+        required = []
+        for token in tokens:
+            similar = self.similar_tokens(token)
+            if similar:
+                groups.append((sum(len(postings[other]) for other in similar), similar))
+            if len(token) > 2:
+                if not similar:
+                    return set()
+                required.append(similar)
+        if not groups:
+            return set()
+        _, rarest = min(groups, key=lambda group: group[0])
+        min_jaro = (self.fuzzy_threshold - 0.4) / 0.6
+        ratio = max(3 * min_jaro - 2 - 1e-9, 0.0)
+        length = len(" ".join(tokens))
+        shortest, longest = length * ratio, length / ratio if ratio else math.inf
+        names = self._tokens
+        sorted_names = self._sorted
+        return {
+            name_id
+            for name_id in chain.from_iterable(postings[other] for other in rarest)
+            if shortest <= len(sorted_names[name_id]) <= longest
+            and all(not similar.isdisjoint(names[name_id]) for similar in required)
+        }
+
+    def _score(
+        self,
+        clean: str,
+        tokens: frozenset,
+        candidates: Iterable[int],
+        fuzzy: Set[int],
+        threshold: float,
+    ) -> List[Tuple[int, float]]:
+        """Jaccard-score every candidate; Jaro-Winkler only the fuzzy ones."""
+        fuzzy_threshold = self.fuzzy_threshold
+        sorted_name = " ".join(sorted(tokens))
+        hits = []
+        for name_id in candidates:
+            if self._clean[name_id] == clean:
+                hits.append((name_id, 1.0))
+                continue
+            other = self._tokens[name_id]
+            if not other:
+                continue
+            overlap = len(tokens & other)
+            score = overlap / (len(tokens) + len(other) - overlap)
+            if score < 1.0 and name_id in fuzzy:
+                similarity = jaro_winkler(sorted_name, self._sorted[name_id])
+                if similarity >= fuzzy_threshold and similarity > score:
+                    score = similarity
+            if score >= threshold:
+                hits.append((name_id, score))
+        return hits
+
+
+def name_match_score(
+    name1: str, name2: str, fuzzy_threshold: Optional[float] = 0.92
+) -> float:
+    """Score of one pair of names, as ``NameScreeningIndex`` scores them."""
+    hits = NameScreeningIndex([(name2, None)], fuzzy_threshold).query(name1, 0.0)
+    return hits[0][1] if hits else 0.0
@@ -23,6 +23,14 @@ class SecurityConfig:
     DEFAULT_RATE_LIMIT = "1000 per hour"
     AUTH_RATE_LIMIT = "10 per minute"
     PAYMENT_RATE_LIMIT = "100 per hour"
+    # Named policies for security.rate_limiter. "lease" enables leased local
+    # quotas of up to that many requests per worker (Redis-backed only).
+    RATE_LIMIT_POLICIES = {
+        "auth": {"limits": {"minute": 5, "hour": 20}},
+        "transaction": {"limits": {"minute": 10, "hour": 100, "day": 500}},
+        "api": {"limits": {"minute": 60, "hour": 1000}, "lease": 10},
+        "admin": {"limits": {"minute": 30, "hour": 200}},
+    }
     ENCRYPTION_KEY = os.environ.get("ENCRYPTION_KEY")
     FIELD_ENCRYPTION_ALGORITHM = "AES-256-GCM"
     SESSION_COOKIE_SECURE = True
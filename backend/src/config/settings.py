@@ -38,6 +38,9 @@ class Config:
     RATELIMIT_STORAGE_URL = REDIS_URL
     RATELIMIT_DEFAULT = SecurityConfig.DEFAULT_RATE_LIMIT
     RATELIMIT_HEADERS_ENABLED = True
+    RATE_LIMIT_POLICIES = SecurityConfig.RATE_LIMIT_POLICIES
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS") or 86400)
+    IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get("IDEMPOTENCY_LOCK_SECONDS") or 60)
     SESSION_TIMEOUT_MINUTES = 30
     SESSION_COOKIE_SECURE = SecurityConfig.SESSION_COOKIE_SECURE
     SESSION_COOKIE_HTTPONLY = SecurityConfig.SESSION_COOKIE_HTTPONLY
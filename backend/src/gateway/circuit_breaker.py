@@ -0,0 +1,320 @@
+from typing import Any
+import asyncio
+import logging
+import threading
+import time
+
+"\nCircuit breakers for calls to external services\n"
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATES = (CLOSED, OPEN, HALF_OPEN)
+
+DEFAULT_CONFIG = {
+    "failure_threshold": 5,
+    "failure_rate_threshold": 0.5,
+    "minimum_calls": None,
+    "window_seconds": 60,
+    "bucket_seconds": 1,
+    "recovery_timeout": 60,
+    "half_open_max_calls": 3,
+    "call_timeout": None,
+}
+
+
+class CircuitBreakerOpenError(Exception):
+    """Raised instead of calling a service whose breaker is rejecting calls"""
+
+    def __init__(self, service_name: Any, retry_after: Any = 0.0) -> Any:
+        super().__init__(f"Circuit breaker open for {service_name}")
+        self.service_name = service_name
+        self.retry_after = retry_after
+
+
+class RollingWindow:
+    """Call outcomes over the last ``window_seconds``, in fixed time buckets.
+
+    Each bucket holds ``[bucket_index, calls, failures, latency_total,
+    latency_max]`` and is reset lazily when the ring wraps around to it, so
+    recording is O(1) and a summary reads ``window / bucket`` buckets.
+    """
+
+    def __init__(self, window_seconds: Any = 60, bucket_seconds: Any = 1) -> Any:
+        self.bucket_seconds = bucket_seconds
+        self.size = max(1, int(window_seconds // bucket_seconds))
+        self.buckets = [[-1, 0, 0, 0.0, 0.0] for _ in range(self.size)]
+
+    def record(self, success: Any, latency: Any, now: Any) -> Any:
+        index = int(now // self.bucket_seconds)
+        bucket = self.buckets[index % self.size]
+        if bucket[0] != index:
+            bucket[:] = [index, 0, 0, 0.0, 0.0]
+        bucket[1] += 1
+        if not success:
+            bucket[2] += 1
+        bucket[3] += latency
+        if latency > bucket[4]:
+            bucket[4] = latency
+
+    def totals(self, now: Any) -> Any:
+        """Return ``(calls, failures, latency_total, latency_max)``"""
+        oldest = int(now // self.bucket_seconds) - self.size
+        calls = failures = 0
+        latency_total = latency_max = 0.0
+        for index, bucket_calls, bucket_failures, total, peak in self.buckets:
+            if index > oldest:
+                calls += bucket_calls
+                failures += bucket_failures
+                latency_total += total
+                latency_max = max(latency_max, peak)
+        return calls, failures, latency_total, latency_max
+
+    def reset(self) -> Any:
+        for bucket in self.buckets:
+            bucket[:] = [-1, 0, 0, 0.0, 0.0]
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker for one external service.
+
+    The breaker opens when, within the rolling window, at least
+    ``failure_threshold`` calls failed, at least ``minimum_calls`` calls were
+    made (defaults to ``failure_threshold``) and the failure rate reached
+    ``failure_rate_threshold``. While open, calls are rejected immediately
+    with ``CircuitBreakerOpenError``. After ``recovery_timeout`` seconds it
+    lets at most ``half_open_max_calls`` concurrent probes through; that many
+    successful probes close it again, and any failed probe re-opens it.
+    All state transitions happen under a single lock.
+    """
+
+    def __init__(self, service_name: Any, config: Any = None) -> Any:
+        self.service_name = service_name
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        if self.config["minimum_calls"] is None:
+            self.config["minimum_calls"] = self.config["failure_threshold"]
+        self.state = CLOSED
+        self.opened_at = None
+        self.last_failure_time = None
+        self.success_count = 0
+        self.window = RollingWindow(
+            self.config["window_seconds"], self.config["bucket_seconds"]
+        )
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0}
+        self.latency_total = 0.0
+        self._half_open_in_flight = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def failure_count(self) -> Any:
+        """Failures recorded in the current rolling window"""
+        with self._lock:
+            return self.window.totals(time.monotonic())[1]
+
+    def call(self, func: Any, *args, **kwargs) -> Any:
+        """Execute function with circuit breaker protection"""
+        generation = self._before_call()
+        start = time.perf_counter()
+        success = None
+        try:
+            result = func(*args, **kwargs)
+            success = True
+            return result
+        except Exception:
+            success = False
+            raise
+        finally:
+            self._finish_call(success, time.perf_counter() - start, generation)
+
+    async def call_async(self, func: Any, *args, **kwargs) -> Any:
+        """Await coroutine function with protection and optional ``call_timeout``"""
+        generation = self._before_call()
+        start = time.perf_counter()
+        success = None
+        try:
+            if self.config["call_timeout"]:
+                result = await asyncio.wait_for(
+                    func(*args, **kwargs), self.config["call_timeout"]
+                )
+            else:
+                result = await func(*args, **kwargs)
+            success = True
+            return result
+        except Exception:
+            success = False
+            raise
+        finally:
+            self._finish_call(success, time.perf_counter() - start, generation)
+
+    def allow_request(self) -> Any:
+        """Whether a call made now would be let through (does not reserve it)"""
+        with self._lock:
+            if self.state == OPEN:
+                return self._recovery_due(time.monotonic())
+            if self.state == HALF_OPEN:
+                return self._half_open_in_flight < self.config["half_open_max_calls"]
+            return True
+
+    def reset(self) -> Any:
+        """Force the breaker closed and forget the rolling window"""
+        with self._lock:
+            self._transition(CLOSED)
+
+    def snapshot(self) -> Any:
+        """Current state, window counters and latency for metrics"""
+        with self._lock:
+            calls, failures, latency_total, latency_max = self.window.totals(
+                time.monotonic()
+            )
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "window_failures": failures,
+                "failure_rate": failures / calls if calls else 0.0,
+                "avg_latency_ms": latency_total / calls * 1000 if calls else 0.0,
+                "max_latency_ms": latency_max * 1000,
+                "half_open_in_flight": self._half_open_in_flight,
+                "latency_seconds_total": self.latency_total,
+                **self.stats,
+            }
+
+    def _before_call(self) -> Any:
+        """Admit or reject a call; returns the generation a probe belongs to"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if not self._recovery_due(now):
+                    self.stats["rejected"] += 1
+                    raise CircuitBreakerOpenError(
+                        self.service_name,
+                        self.opened_at + self.config["recovery_timeout"] - now,
+                    )
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._half_open_in_flight >= self.config["half_open_max_calls"]:
+                    self.stats["rejected"] += 1
+                    raise CircuitBreakerOpenError(self.service_name)
+                self._half_open_in_flight += 1
+                return self._generation
+            return None
+
+    def _finish_call(self, success: Any, latency: Any, generation: Any) -> Any:
+        """Record an outcome, or only free the probe slot of an interrupted call.
+
+        ``success`` is None when the call was cut short by a ``BaseException``
+        such as ``asyncio.CancelledError`` or ``KeyboardInterrupt``; that says
+        nothing about the service, but a half-open probe slot it held must
+        still be given back or the breaker could never admit probes again.
+        """
+        if success is not None:
+            self._after_call(success, latency, generation)
+            return
+        with self._lock:
+            if generation is not None and generation == self._generation:
+                self._half_open_in_flight -= 1
+
+    def _after_call(self, success: Any, latency: Any, generation: Any) -> Any:
+        with self._lock:
+            now = time.monotonic()
+            self.window.record(success, latency, now)
+            self.latency_total += latency
+            self.stats["successes" if success else "failures"] += 1
+            if not success:
+                self.last_failure_time = time.time()
+            if generation is not None:
+                if generation != self._generation:
+                    return
+                self._half_open_in_flight -= 1
+                if not success:
+                    self._transition(OPEN)
+                    return
+                self.success_count += 1
+                if self.success_count >= self.config["half_open_max_calls"]:
+                    self._transition(CLOSED)
+            elif not success and self.state == CLOSED and self._should_trip(now):
+                self._transition(OPEN)
+
+    def _should_trip(self, now: Any) -> Any:
+        calls, failures, _, _ = self.window.totals(now)
+        return (
+            failures >= self.config["failure_threshold"]
+            and calls >= self.config["minimum_calls"]
+            and failures / calls >= self.config["failure_rate_threshold"]
+        )
+
+    def _recovery_due(self, now: Any) -> Any:
+        return now - self.opened_at >= self.config["recovery_timeout"]
+
+    def _transition(self, state: Any) -> Any:
+        if state != self.state:
+            logger.warning(
+                f"Circuit breaker for {self.service_name}: {self.state} -> {state}"
+            )
+        self.state = state
+        self._generation += 1
+        self._half_open_in_flight = 0
+        self.success_count = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        elif state == CLOSED:
+            self.opened_at = None
+            self.window.reset()
+
+
+class CircuitBreakerRegistry:
+    """Process-wide circuit breakers keyed by service name.
+
+    Every caller of a service shares its breaker, so one worker thread
+    seeing a dependency fail protects all the others. Breakers are created
+    lazily from the default config merged with per-service overrides.
+    """
+
+    def __init__(self, default_config: Any = None) -> Any:
+        self._default_config = dict(default_config or {})
+        self._service_configs = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def configure(self, default_config: Any = None, services: Any = None) -> None:
+        """Set defaults and per-service overrides; existing breakers are rebuilt"""
+        with self._lock:
+            if default_config:
+                self._default_config.update(default_config)
+            if services:
+                for service, overrides in services.items():
+                    self._service_configs[service] = dict(overrides or {})
+            self._breakers = {}
+
+    def get(self, service: Any) -> CircuitBreaker:
+        """Shared breaker for ``service``"""
+        breaker = self._breakers.get(service)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(service)
+                if breaker is None:
+                    breaker = CircuitBreaker(
+                        service,
+                        {
+                            **self._default_config,
+                            **self._service_configs.get(service, {}),
+                        },
+                    )
+                    self._breakers[service] = breaker
+        return breaker
+
+    def call(self, service: Any, func: Any, *args, **kwargs) -> Any:
+        return self.get(service).call(func, *args, **kwargs)
+
+    async def call_async(self, service: Any, func: Any, *args, **kwargs) -> Any:
+        return await self.get(service).call_async(func, *args, **kwargs)
+
+    def snapshot(self) -> Any:
+        """``{service: breaker.snapshot()}`` for every known breaker"""
+        with self._lock:
+            services = set(self._breakers) | set(self._service_configs)
+        return {service: self.get(service).snapshot() for service in sorted(services)}
+
+
+circuit_breaker_registry = CircuitBreakerRegistry()
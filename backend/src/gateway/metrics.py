@@ -0,0 +1,419 @@
+from typing import Any
+import bisect
+import glob
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+"\nProcess-lifetime gateway metrics aggregated across workers\n"
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MmapMetricStore:
+    """Per-process file of named float64 slots, memory-mapped.
+
+    Every worker writes only its own ``gateway_<pid>.db`` file in a shared
+    directory; a scrape in any worker sums the files of all workers. The
+    layout is an 8-byte "used bytes" header followed by append-only records
+    of (uint32 key length, padded UTF-8 key, float64 value). The header is
+    written after the record, so concurrent readers never see a partial one.
+    """
+
+    INITIAL_SIZE = 1 << 16
+    HEADER = struct.Struct("q")
+    KEY_LENGTH = struct.Struct("i")
+    VALUE = struct.Struct("d")
+
+    def __init__(self, directory: Any) -> Any:
+        self.pid = os.getpid()
+        self.path = os.path.join(directory, f"gateway_{self.pid}.db")
+        self._file = open(self.path, "a+b")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self._positions = {}
+        self._used = self.HEADER.unpack_from(self._mmap, 0)[0] or self.HEADER.size
+        for key, _, position in self._iter_records(self._mmap, self._used):
+            self._positions[key] = position
+
+    def add(self, key: Any, delta: Any) -> Any:
+        position = self._position(key)
+        value = self.VALUE.unpack_from(self._mmap, position)[0]
+        self.VALUE.pack_into(self._mmap, position, value + delta)
+
+    def set(self, key: Any, value: Any) -> Any:
+        self.VALUE.pack_into(self._mmap, self._position(key), value)
+
+    def close(self) -> Any:
+        self._mmap.close()
+        self._file.close()
+
+    def _position(self, key: Any) -> Any:
+        position = self._positions.get(key)
+        if position is None:
+            position = self._append(key)
+        return position
+
+    def _append(self, key: Any) -> Any:
+        encoded = key.encode("utf-8")
+        padded = encoded + b" " * (-(self.KEY_LENGTH.size + len(encoded)) % 8)
+        record_size = self.KEY_LENGTH.size + len(padded) + self.VALUE.size
+        while self._used + record_size > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self.KEY_LENGTH.pack_into(self._mmap, self._used, len(encoded))
+        self._mmap[
+            self._used
+            + self.KEY_LENGTH.size : self._used
+            + self.KEY_LENGTH.size
+            + len(padded)
+        ] = padded
+        position = self._used + self.KEY_LENGTH.size + len(padded)
+        self.VALUE.pack_into(self._mmap, position, 0.0)
+        self._used += record_size
+        self.HEADER.pack_into(self._mmap, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    @classmethod
+    def _iter_records(cls, data: Any, used: Any) -> Any:
+        offset = cls.HEADER.size
+        while offset < used:
+            key_length = cls.KEY_LENGTH.unpack_from(data, offset)[0]
+            key_start = offset + cls.KEY_LENGTH.size
+            key = bytes(data[key_start : key_start + key_length]).decode("utf-8")
+            position = (
+                key_start + key_length + (-(cls.KEY_LENGTH.size + key_length) % 8)
+            )
+            yield (key, cls.VALUE.unpack_from(data, position)[0], position)
+            offset = position + cls.VALUE.size
+
+    @classmethod
+    def read_directory(cls, directory: Any) -> Any:
+        """Yield ``(pid, key, value)`` for every slot of every worker file"""
+        for path in glob.glob(os.path.join(directory, "gateway_*.db")):
+            try:
+                pid = int(os.path.basename(path)[len("gateway_") : -len(".db")])
+                with open(path, "rb") as f:
+                    data = f.read()
+            except (OSError, ValueError):
+                continue
+            if len(data) < cls.HEADER.size:
+                continue
+            used = cls.HEADER.unpack_from(data, 0)[0]
+            for key, value, _ in cls._iter_records(data, min(used, len(data))):
+                yield (pid, key, value)
+
+
+def _pid_alive(pid: Any) -> Any:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class GatewayMetrics:
+    """Process-lifetime request metrics exported in Prometheus text format.
+
+    ``request_started``/``request_finished`` only touch in-process counters
+    (a few microseconds). Accumulated deltas are flushed to this worker's
+    ``MmapMetricStore`` at most every ``flush_interval`` seconds, and
+    ``render`` merges the files of all workers sharing ``directory``
+    (``GATEWAY_METRICS_DIR``, falling back to ``PROMETHEUS_MULTIPROC_DIR``).
+    The directory should be emptied before the workers start.
+    """
+
+    NAMESPACE = "flowlet_gateway"
+    LIVE_GAUGES = ("requests_in_flight", "circuit_breaker_state")
+    BREAKER_STATES = ("closed", "open", "half_open")
+    BREAKER_OUTCOMES = ("successes", "failures", "rejected")
+
+    def __init__(
+        self,
+        directory: Any = None,
+        flush_interval: Any = 1.0,
+        buckets: Any = LATENCY_BUCKETS,
+    ) -> Any:
+        self.directory = (
+            directory
+            or os.environ.get("GATEWAY_METRICS_DIR")
+            or os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+            or tempfile.mkdtemp(prefix="flowlet-gateway-metrics-")
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._store = None
+        self._reset_pending()
+        self._in_flight = defaultdict(int)
+        self._cache_stats = {}
+        self.cache_stats_provider = None
+        self._breaker_stats = {}
+        self.circuit_breaker_provider = None
+        self._next_flush = time.monotonic() + flush_interval
+
+    def _reset_pending(self) -> Any:
+        self._latency = {}
+        self._statuses = defaultdict(int)
+
+    def request_started(self, route: Any) -> Any:
+        with self._lock:
+            self._in_flight[route] += 1
+
+    def request_finished(
+        self, route: Any, method: Any, status: Any, duration: Any
+    ) -> Any:
+        """Record one finished request; ``duration`` is in seconds"""
+        bucket = bisect.bisect_left(self.buckets, duration)
+        with self._lock:
+            self._in_flight[route] -= 1
+            latency = self._latency.get((route, method))
+            if latency is None:
+                latency = self._latency[(route, method)] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                ]
+            latency[0][bucket] += 1
+            latency[1] += duration
+            self._statuses[(route, method, status)] += 1
+        if time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def update_cache_stats(self, stats: Any) -> Any:
+        """Publish this worker's cumulative cache counters"""
+        with self._lock:
+            self._cache_stats = {
+                event: stats.get(event, 0)
+                for event in (
+                    "local_hits",
+                    "redis_hits",
+                    "misses",
+                    "evictions",
+                    "expirations",
+                    "coalesced",
+                )
+            }
+
+    def update_circuit_breakers(self, snapshot: Any) -> Any:
+        """Publish this worker's breaker states and cumulative counters"""
+        with self._lock:
+            self._breaker_stats = {
+                service: {
+                    "state": stats["state"],
+                    "latency_seconds_total": stats["latency_seconds_total"],
+                    **{outcome: stats[outcome] for outcome in self.BREAKER_OUTCOMES},
+                }
+                for service, stats in snapshot.items()
+            }
+
+    def flush(self) -> Any:
+        """Write pending deltas to this worker's shared-memory file"""
+        if self.cache_stats_provider is not None:
+            self.update_cache_stats(self.cache_stats_provider())
+        if self.circuit_breaker_provider is not None:
+            self.update_circuit_breakers(self.circuit_breaker_provider())
+        with self._lock:
+            self._next_flush = time.monotonic() + self.flush_interval
+            if self._store is None or self._store.pid != os.getpid():
+                if self._store is not None:
+                    # Forked child: the parent's pending data is not ours.
+                    self._reset_pending()
+                    self._in_flight = defaultdict(int)
+                self._store = MmapMetricStore(self.directory)
+            latency, statuses = self._latency, self._statuses
+            self._reset_pending()
+            store = self._store
+            for (route, method), (bucket_counts, total) in latency.items():
+                labels = {"route": route, "method": method}
+                for index, bucket_count in enumerate(bucket_counts):
+                    if bucket_count:
+                        le = (
+                            repr(float(self.buckets[index]))
+                            if index < len(self.buckets)
+                            else "+Inf"
+                        )
+                        store.add(
+                            self._key("request_duration_seconds_bucket", labels, le=le),
+                            bucket_count,
+                        )
+                store.add(
+                    self._key("request_duration_seconds_count", labels),
+                    sum(bucket_counts),
+                )
+                store.add(self._key("request_duration_seconds_sum", labels), total)
+            for (route, method, status), count in statuses.items():
+                store.add(
+                    self._key(
+                        "requests_total",
+                        {"route": route, "method": method, "status": str(status)},
+                    ),
+                    count,
+                )
+            for route, in_flight in self._in_flight.items():
+                store.set(self._key("requests_in_flight", {"route": route}), in_flight)
+            for event, value in self._cache_stats.items():
+                store.set(self._key("cache_events_total", {"event": event}), value)
+            for service, stats in self._breaker_stats.items():
+                for state in self.BREAKER_STATES:
+                    store.set(
+                        self._key(
+                            "circuit_breaker_state",
+                            {"service": service, "state": state},
+                        ),
+                        1.0 if stats["state"] == state else 0.0,
+                    )
+                for outcome in self.BREAKER_OUTCOMES:
+                    store.set(
+                        self._key(
+                            "circuit_breaker_calls_total",
+                            {"service": service, "outcome": outcome},
+                        ),
+                        stats[outcome],
+                    )
+                store.set(
+                    self._key(
+                        "circuit_breaker_latency_seconds_total", {"service": service}
+                    ),
+                    stats["latency_seconds_total"],
+                )
+
+    @staticmethod
+    def _key(name: Any, labels: Any, **extra: Any) -> Any:
+        return json.dumps([name, sorted({**labels, **extra}.items())])
+
+    def collect(self) -> Any:
+        """Merge every worker's file into ``{(name, labels): value}``"""
+        self.flush()
+        merged = defaultdict(float)
+        alive = {}
+        for pid, key, value in MmapMetricStore.read_directory(self.directory):
+            name, labels = json.loads(key)
+            if name in self.LIVE_GAUGES:
+                if pid not in alive:
+                    alive[pid] = _pid_alive(pid)
+                if not alive[pid]:
+                    continue
+            merged[(name, tuple(tuple(label) for label in labels))] += value
+        return merged
+
+    def render(self) -> Any:
+        """Render all workers' metrics in the Prometheus text exposition format"""
+        merged = self.collect()
+        families = defaultdict(list)
+        for (name, labels), value in merged.items():
+            family = name
+            for suffix in ("_bucket", "_count", "_sum"):
+                if name.startswith("request_duration_seconds") and name.endswith(
+                    suffix
+                ):
+                    family = "request_duration_seconds"
+            families[family].append((name, labels, value))
+        hits = sum(
+            value
+            for (name, labels), value in merged.items()
+            if name == "cache_events_total"
+            and dict(labels)["event"] in ("local_hits", "redis_hits")
+        )
+        misses = sum(
+            value
+            for (name, labels), value in merged.items()
+            if name == "cache_events_total" and dict(labels)["event"] == "misses"
+        )
+        if hits + misses:
+            families["cache_hit_ratio"].append(
+                ("cache_hit_ratio", (), hits / (hits + misses))
+            )
+        lines = []
+        for family, help_text, metric_type in (
+            (
+                "request_duration_seconds",
+                "Request latency by route",
+                "histogram",
+            ),
+            ("requests_total", "Requests by route and status", "counter"),
+            ("requests_in_flight", "Requests currently being served", "gauge"),
+            ("cache_events_total", "Gateway cache events", "counter"),
+            ("cache_hit_ratio", "Gateway cache hit ratio", "gauge"),
+            (
+                "circuit_breaker_state",
+                "Workers whose breaker for a service is in each state",
+                "gauge",
+            ),
+            (
+                "circuit_breaker_calls_total",
+                "External service calls by breaker outcome",
+                "counter",
+            ),
+            (
+                "circuit_breaker_latency_seconds_total",
+                "Time spent in external service calls",
+                "counter",
+            ),
+        ):
+            samples = families.get(family)
+            if not samples:
+                continue
+            full_name = f"{self.NAMESPACE}_{family}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            if metric_type == "histogram":
+                lines.extend(self._render_histogram(samples))
+            else:
+                for name, labels, value in sorted(samples):
+                    lines.append(self._sample(name, labels, value))
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, samples: Any) -> Any:
+        """Turn per-bucket counts into cumulative ``le`` buckets"""
+        series = defaultdict(dict)
+        for name, labels, value in samples:
+            labels = dict(labels)
+            le = labels.pop("le", None)
+            series[tuple(sorted(labels.items()))][(name, le)] = value
+        lines = []
+        bounds = [repr(float(b)) for b in self.buckets] + ["+Inf"]
+        for labels, values in sorted(series.items()):
+            cumulative = 0.0
+            for le in bounds:
+                cumulative += values.get(("request_duration_seconds_bucket", le), 0.0)
+                lines.append(
+                    self._sample(
+                        "request_duration_seconds_bucket",
+                        labels + (("le", le),),
+                        cumulative,
+                    )
+                )
+            for suffix in ("_count", "_sum"):
+                name = f"request_duration_seconds{suffix}"
+                lines.append(self._sample(name, labels, values.get((name, None), 0.0)))
+        return lines
+
+    def _sample(self, name: Any, labels: Any, value: Any) -> Any:
+        label_text = ",".join(
+            '{}="{}"'.format(
+                k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            )
+            for k, v in labels
+        )
+        full_name = f"{self.NAMESPACE}_{name}"
+        if label_text:
+            full_name = f"{full_name}{{{label_text}}}"
+        if value == int(value):
+            return f"{full_name} {int(value)}"
+        return f"{full_name} {value!r}"
@@ -1,18 +1,27 @@
 from typing import Any
+import fnmatch
 import hashlib
+import heapq
 import json
 import logging
+import math
 import os
-import statistics
 import threading
 import time
-from collections import defaultdict, deque
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import wraps
 import aiohttp
 import psutil
 import redis
 from flask import g, jsonify, request
+from ..models.database import db
+from ..security.rate_limiter import limiter_registry
+from ..services.wallet_service import BATCH_OPERATION_TYPES, process_batch
+from ..utils.auth import token_required
+from ..utils.idempotency import idempotency_store
+from .circuit_breaker import circuit_breaker_registry
+from .metrics import CONTENT_TYPE_LATEST, GatewayMetrics
 
 
 class PerformanceOptimizedGateway:
@@ -29,6 +38,8 @@ class PerformanceOptimizedGateway:
         self.batch_processor = None
         self.thread_pool = ThreadPoolExecutor(max_workers=20)
         self._setup_redis()
+        self._setup_rate_limiting()
+        self._setup_idempotency()
         self._setup_connection_pool()
         self._setup_caching()
         self._setup_circuit_breakers()
@@ -54,6 +65,21 @@ class PerformanceOptimizedGateway:
             self.app.logger.warning(f"Redis connection failed: {e}")
             self.redis_client = None
 
+    def _setup_rate_limiting(self) -> Any:
+        """Point the shared rate limit policies at the pooled Redis client"""
+        limiter_registry.configure(
+            policies=self.app.config.get("RATE_LIMIT_POLICIES"),
+            redis_client=self.redis_client,
+        )
+
+    def _setup_idempotency(self) -> Any:
+        """Keep idempotency records in the pooled Redis (DB fallback)"""
+        idempotency_store.configure(
+            redis_client=self.redis_client,
+            ttl_seconds=self.app.config.get("IDEMPOTENCY_TTL_SECONDS"),
+            lock_seconds=self.app.config.get("IDEMPOTENCY_LOCK_SECONDS"),
+        )
+
     def _setup_connection_pool(self) -> Any:
         """Setup HTTP connection pool for external API calls"""
         connector = aiohttp.TCPConnector(
@@ -83,23 +109,38 @@ class PerformanceOptimizedGateway:
                 "exchange_rates": 900,
                 "static_data": 3600,
             },
+            "single_flight_timeout": 30,
         }
+        self.cache_manager = CacheManager(self.redis_client, self.cache_config)
 
     def _setup_circuit_breakers(self) -> Any:
         """Setup circuit breakers for external services"""
         self.circuit_breaker_config = {
             "failure_threshold": 5,
+            "failure_rate_threshold": 0.5,
+            "minimum_calls": 10,
+            "window_seconds": 60,
             "recovery_timeout": 60,
             "half_open_max_calls": 3,
+            "call_timeout": 10,
         }
-        services = ["plaid", "stripe", "fraud_detection", "kyc_service"]
+        services = [
+            "plaid",
+            "stripe",
+            "fraud_detection",
+            "kyc_service",
+            "open_banking",
+            "fdx",
+        ]
+        circuit_breaker_registry.configure(
+            self.circuit_breaker_config,
+            {
+                service: self.app.config.get("CIRCUIT_BREAKERS", {}).get(service)
+                for service in services
+            },
+        )
         for service in services:
-            self.circuit_breakers[service] = {
-                "state": "closed",
-                "failure_count": 0,
-                "last_failure_time": None,
-                "success_count": 0,
-            }
+            self.circuit_breakers[service] = circuit_breaker_registry.get(service)
 
     def _setup_request_batching(self) -> Any:
         """Setup request batching for bulk operations"""
@@ -111,16 +152,22 @@ class PerformanceOptimizedGateway:
                 "/api/v1/accounts/batch",
                 "/api/v1/payments/batch",
             ],
+            "max_operations": 500,
+            "result_timeout": 30,
         }
-        self.batch_processor = threading.Thread(
-            target=self._process_batches, daemon=True
+        self.request_batcher = RequestBatcher(
+            self.batch_config, executor=self.thread_pool
         )
-        self.batch_processor.start()
+        self.batch_processor = self.request_batcher.start()
 
     def _setup_performance_monitoring(self) -> Any:
         """Setup real-time performance monitoring"""
         self.monitoring_config = {
             "metrics_retention": 3600,
+            "summary_window": 300,
+            "slice_seconds": 5,
+            "alert_interval": 15,
+            "metrics_flush_interval": 1.0,
             "alert_thresholds": {
                 "response_time_p95": 1000,
                 "error_rate": 0.05,
@@ -128,138 +175,394 @@ class PerformanceOptimizedGateway:
                 "memory_usage": 80,
             },
         }
+        self.performance_monitor = PerformanceMonitor(self.monitoring_config)
+        self.performance_monitor.start()
+        self.metrics = GatewayMetrics(
+            flush_interval=self.monitoring_config["metrics_flush_interval"]
+        )
+        self.metrics.cache_stats_provider = self.cache_manager.get_stats
+        self.metrics.circuit_breaker_provider = circuit_breaker_registry.snapshot
+
+
+class _InFlightLoad:
+    """Pending cache refill shared by every caller waiting on the same key"""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self) -> Any:
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
 
 
 class CacheManager:
-    """Advanced caching manager with intelligent invalidation"""
+    """Two-tier (local LRU + Redis) cache with single-flight refills.
+
+    One instance is shared by every request handled in a worker process. The
+    local tier is an ``OrderedDict`` kept in least-recently-used order and
+    bounded by ``max_cache_size``; Redis acts as the shared second tier.
+
+    Entries can be tagged with the resources they depend on (see
+    ``build_tags``). Both tiers keep a tag -> keys index so ``invalidate_tags``
+    only touches the affected entries.
+    """
+
+    KEY_PREFIX = "cache"
+    TAG_PREFIX = "cache_tag"
 
     def __init__(self, redis_client: Any, config: Any) -> Any:
         self.redis_client = redis_client
         self.config = config
-        self.local_cache = {}
+        self.local_cache = OrderedDict()
         self.cache_stats = defaultdict(int)
+        self._tag_index = defaultdict(set)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._tag_ttl = max(
+            [config["default_ttl"], *config["cache_strategies"].values()]
+        )
 
     def get_cache_key(self, endpoint: Any, params: Any) -> Any:
-        """Generate cache key based on endpoint and parameters"""
+        """Generate cache key based on endpoint and parameters.
+
+        The endpoint stays readable in the key so legacy pattern invalidation
+        (``cache:<endpoint>:*``) keeps working.
+        """
         key_data = f"{endpoint}:{json.dumps(params, sort_keys=True)}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        digest = hashlib.md5(key_data.encode()).hexdigest()
+        return f"{self.KEY_PREFIX}:{endpoint}:{digest}"
 
-    def get(self, key: Any, endpoint_type: Any = "default") -> Any:
-        """Get value from cache with fallback to local cache"""
+    @staticmethod
+    def build_tags(
+        endpoint_type: Any = None,
+        user_id: Any = None,
+        account_id: Any = None,
+        endpoint: Any = None,
+    ) -> Any:
+        """Build the dependency tags for an entry.
+
+        Account tags are emitted both bare and qualified by endpoint type, so a
+        write can drop e.g. only ``account:<id>:account_balance``.
+        """
+        tags = []
+        if user_id is not None:
+            tags.append(f"user:{user_id}")
+        if account_id is not None:
+            tags.append(f"account:{account_id}")
+            if endpoint_type:
+                tags.append(f"account:{account_id}:{endpoint_type}")
+        if endpoint is not None:
+            tags.append(f"endpoint:{endpoint}")
+        return tags
+
+    def get_ttl(self, endpoint_type: Any) -> Any:
+        """Return the TTL in seconds configured for an endpoint type"""
+        return self.config["cache_strategies"].get(
+            endpoint_type, self.config["default_ttl"]
+        )
+
+    def get(self, key: Any, endpoint_type: Any = "default", tags: Any = None) -> Any:
+        """Get value from the local tier with fallback to Redis"""
         try:
-            if self.redis_client:
-                value = self.redis_client.get(key)
-                if value:
-                    self.cache_stats["redis_hits"] += 1
-                    return json.loads(value)
-            if key in self.local_cache:
-                cache_entry = self.local_cache[key]
-                if cache_entry["expires"] > time.time():
-                    self.cache_stats["local_hits"] += 1
-                    return cache_entry["data"]
-                else:
-                    del self.local_cache[key]
-            self.cache_stats["misses"] += 1
+            value = self._get_local(key)
+            if value is not None:
+                self._incr("local_hits")
+                return value
+            value = self._get_redis(key, endpoint_type, tags)
+            if value is not None:
+                self._incr("redis_hits")
+                return value
+            self._incr("misses")
             return None
         except Exception as e:
             logging.error(f"Cache get error: {e}")
             return None
 
-    def set(self, key: Any, value: Any, endpoint_type: Any = "default") -> Any:
-        """Set value in cache with appropriate TTL"""
+    def set(
+        self, key: Any, value: Any, endpoint_type: Any = "default", tags: Any = None
+    ) -> Any:
+        """Set value in both tiers with the endpoint type's TTL"""
         try:
-            ttl = self.config["cache_strategies"].get(
-                endpoint_type, self.config["default_ttl"]
-            )
+            ttl = self.get_ttl(endpoint_type)
+            tags = tuple(tags or ())
             if self.redis_client:
-                self.redis_client.setex(key, ttl, json.dumps(value))
-            self.local_cache[key] = {"data": value, "expires": time.time() + ttl}
-            if len(self.local_cache) > self.config["max_cache_size"]:
-                self._cleanup_local_cache()
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(key, ttl, json.dumps(value))
+                for tag in tags:
+                    tag_key = f"{self.TAG_PREFIX}:{tag}"
+                    pipe.sadd(tag_key, key)
+                    pipe.expire(tag_key, self._tag_ttl)
+                pipe.execute()
+            self._set_local(key, value, ttl, tags)
         except Exception as e:
             logging.error(f"Cache set error: {e}")
 
-    def invalidate_pattern(self, pattern: Any) -> Any:
-        """Invalidate cache entries matching pattern"""
+    def get_or_set(
+        self, key: Any, loader: Any, endpoint_type: Any = "default", tags: Any = None
+    ) -> Any:
+        """Return the cached value for ``key`` or compute it exactly once.
+
+        Concurrent misses on the same key are coalesced: the first caller runs
+        ``loader`` while the others wait for its result instead of hitting the
+        backend themselves. A ``None`` result from ``loader`` is not cached.
+        """
+        value = self.get(key, endpoint_type, tags)
+        if value is not None:
+            return value
+        with self._lock:
+            load = self._inflight.get(key)
+            is_leader = load is None
+            if is_leader:
+                load = _InFlightLoad()
+                self._inflight[key] = load
+            else:
+                self.cache_stats["coalesced"] += 1
+        if not is_leader:
+            if load.event.wait(self.config.get("single_flight_timeout", 30)):
+                if load.error is not None:
+                    raise load.error
+                return load.value
+            self._incr("single_flight_timeouts")
+            return loader()
+        try:
+            value = self._get_local(key)
+            if value is None:
+                self._incr("loads")
+                value = loader()
+                if value is not None:
+                    self.set(key, value, endpoint_type, tags)
+            load.value = value
+            return value
+        except Exception as e:
+            load.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            load.event.set()
+
+    def invalidate(self, key: Any) -> Any:
+        """Remove a single key from both tiers"""
         try:
             if self.redis_client:
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    self.redis_client.delete(*keys)
-            keys_to_delete = [k for k in self.local_cache.keys() if pattern in k]
-            for key in keys_to_delete:
-                del self.local_cache[key]
+                self.redis_client.delete(key)
+            with self._lock:
+                self._remove_local(key)
         except Exception as e:
             logging.error(f"Cache invalidation error: {e}")
 
-    def _cleanup_local_cache(self) -> Any:
-        """Remove expired entries from local cache"""
-        current_time = time.time()
-        expired_keys = [
-            k for k, v in self.local_cache.items() if v["expires"] <= current_time
-        ]
-        for key in expired_keys:
-            del self.local_cache[key]
+    def invalidate_tags(self, *tags: Any) -> Any:
+        """Invalidate every entry recorded under any of ``tags``.
 
+        Cost is proportional to the number of affected entries, not to the
+        size of the keyspace. Returns the number of local entries removed.
+        """
+        removed = 0
+        try:
+            with self._lock:
+                for tag in tags:
+                    for key in list(self._tag_index.get(tag, ())):
+                        removed += self._remove_local(key)
+                self.cache_stats["tag_invalidations"] += removed
+            if self.redis_client and tags:
+                tag_keys = [f"{self.TAG_PREFIX}:{tag}" for tag in tags]
+                pipe = self.redis_client.pipeline(transaction=False)
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                members = set()
+                for tag_members in pipe.execute():
+                    members.update(tag_members or ())
+                self.redis_client.delete(*members, *tag_keys)
+        except Exception as e:
+            logging.error(f"Cache invalidation error: {e}")
+        return removed
 
-class CircuitBreaker:
-    """Circuit breaker implementation for external service calls"""
+    def invalidate_account(self, account_id: Any, *endpoint_types: Any) -> Any:
+        """Invalidate cached entries for an account.
 
-    def __init__(self, service_name: Any, config: Any) -> Any:
-        self.service_name = service_name
-        self.config = config
-        self.state = "closed"
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.success_count = 0
-
-    def call(self, func: Any, *args, **kwargs) -> Any:
-        """Execute function with circuit breaker protection"""
-        if self.state == "open":
-            if self._should_attempt_reset():
-                self.state = "half_open"
-                self.success_count = 0
-            else:
-                raise Exception(f"Circuit breaker open for {self.service_name}")
+        With ``endpoint_types`` only those views of the account (for example
+        ``account_balance``) are dropped; without, everything tagged with it.
+        """
+        if not endpoint_types:
+            return self.invalidate_tags(f"account:{account_id}")
+        return self.invalidate_tags(
+            *(
+                f"account:{account_id}:{endpoint_type}"
+                for endpoint_type in endpoint_types
+            )
+        )
+
+    def invalidate_pattern(self, pattern: Any) -> Any:
+        """Invalidate cache entries matching a glob pattern.
+
+        Fallback for keys written without tags. Redis is walked with
+        incremental SCAN so the server is never blocked the way KEYS does.
+        """
         try:
-            result = func(*args, **kwargs)
-            self._on_success()
-            return result
+            if self.redis_client:
+                batch = []
+                for key in self.redis_client.scan_iter(match=pattern, count=500):
+                    batch.append(key)
+                    if len(batch) >= 500:
+                        self.redis_client.delete(*batch)
+                        batch = []
+                if batch:
+                    self.redis_client.delete(*batch)
+            with self._lock:
+                keys_to_delete = [
+                    k
+                    for k in self.local_cache.keys()
+                    if fnmatch.fnmatchcase(k, pattern)
+                ]
+                for key in keys_to_delete:
+                    self._remove_local(key)
         except Exception as e:
-            self._on_failure()
-            raise e
-
-    def _on_success(self) -> Any:
-        """Handle successful call"""
-        if self.state == "half_open":
-            self.success_count += 1
-            if self.success_count >= self.config["half_open_max_calls"]:
-                self.state = "closed"
-                self.failure_count = 0
-        elif self.state == "closed":
-            self.failure_count = 0
-
-    def _on_failure(self) -> Any:
-        """Handle failed call"""
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-        if self.failure_count >= self.config["failure_threshold"]:
-            self.state = "open"
-
-    def _should_attempt_reset(self) -> Any:
-        """Check if circuit breaker should attempt reset"""
-        if self.last_failure_time is None:
-            return False
-        return time.time() - self.last_failure_time >= self.config["recovery_timeout"]
+            logging.error(f"Cache invalidation error: {e}")
+
+    def get_stats(self) -> Any:
+        """Return hit/miss/eviction counters and the local tier size"""
+        with self._lock:
+            stats = dict(self.cache_stats)
+            stats["local_size"] = len(self.local_cache)
+            stats["tag_count"] = len(self._tag_index)
+        hits = stats.get("local_hits", 0) + stats.get("redis_hits", 0)
+        lookups = hits + stats.get("misses", 0)
+        stats["hit_ratio"] = hits / lookups if lookups else 0.0
+        stats["max_cache_size"] = self.config["max_cache_size"]
+        return stats
+
+    def _incr(self, counter: Any) -> Any:
+        with self._lock:
+            self.cache_stats[counter] += 1
+
+    def _get_local(self, key: Any) -> Any:
+        """Look up the local tier, refreshing LRU order on a hit"""
+        with self._lock:
+            cache_entry = self.local_cache.get(key)
+            if cache_entry is None:
+                return None
+            if cache_entry["expires"] <= time.time():
+                self._remove_local(key)
+                self.cache_stats["expirations"] += 1
+                return None
+            self.local_cache.move_to_end(key)
+            return cache_entry["data"]
+
+    def _get_redis(self, key: Any, endpoint_type: Any, tags: Any) -> Any:
+        """Look up Redis and promote a hit into the local tier"""
+        if not self.redis_client:
+            return None
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.pttl(key)
+        raw_value, pttl = pipe.execute()
+        if not raw_value:
+            return None
+        value = json.loads(raw_value)
+        ttl = self.get_ttl(endpoint_type)
+        if pttl is not None and pttl > 0:
+            ttl = min(ttl, pttl / 1000)
+        self._set_local(key, value, ttl, tuple(tags or ()))
+        return value
+
+    def _set_local(self, key: Any, value: Any, ttl: Any, tags: Any = ()) -> Any:
+        with self._lock:
+            self._remove_local(key)
+            self.local_cache[key] = {
+                "data": value,
+                "expires": time.time() + ttl,
+                "tags": tags,
+            }
+            for tag in tags:
+                self._tag_index[tag].add(key)
+            if len(self.local_cache) > self.config["max_cache_size"]:
+                self._cleanup_local_cache()
+
+    def _remove_local(self, key: Any) -> Any:
+        """Drop a local entry and its tag index references.
+
+        Must be called with ``self._lock`` held. Returns 1 if an entry was
+        removed, else 0.
+        """
+        cache_entry = self.local_cache.pop(key, None)
+        if cache_entry is None:
+            return 0
+        self._unindex(key, cache_entry)
+        return 1
+
+    def _unindex(self, key: Any, cache_entry: Any) -> Any:
+        for tag in cache_entry.get("tags", ()):
+            tagged_keys = self._tag_index.get(tag)
+            if tagged_keys is not None:
+                tagged_keys.discard(key)
+                if not tagged_keys:
+                    del self._tag_index[tag]
+
+    def _cleanup_local_cache(self) -> Any:
+        """Evict least recently used entries until the tier fits its bound.
+
+        Expired entries are otherwise dropped lazily on lookup. Must be called
+        with ``self._lock`` held.
+        """
+        current_time = time.time()
+        while len(self.local_cache) > self.config["max_cache_size"]:
+            key, cache_entry = self.local_cache.popitem(last=False)
+            self._unindex(key, cache_entry)
+            if cache_entry["expires"] <= current_time:
+                self.cache_stats["expirations"] += 1
+            else:
+                self.cache_stats["evictions"] += 1
 
 
 class RequestBatcher:
-    """Batch similar requests for improved performance"""
+    """Micro-batch similar requests and execute each batch in one call.
 
-    def __init__(self, config: Any) -> Any:
+    Requests to a batch endpoint are grouped by endpoint, user and account.
+    A group is flushed when it reaches ``batch_size`` or when its deadline
+    (``batch_timeout`` ms after its first request) passes. A single
+    dispatcher thread watches the deadlines through a heap, and flushed
+    batches run on ``executor``. A handler registered for the endpoint
+    receives the list of request payloads and returns one result per
+    payload; each result is delivered to that request's callback.
+    """
+
+    def __init__(self, config: Any, executor: Any = None) -> Any:
         self.config = config
-        self.pending_batches = defaultdict(list)
-        self.batch_timers = {}
+        self.executor = executor or ThreadPoolExecutor(max_workers=4)
+        self.handlers = {}
+        self.pending_batches = {}
+        self._deadlines = []
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._dispatcher = None
+
+    def register_handler(self, endpoint: Any, handler: Any) -> Any:
+        """Register ``handler(list_of_payloads) -> list_of_results``"""
+        self.handlers[endpoint] = handler
+
+    def start(self) -> Any:
+        """Start the deadline dispatcher thread"""
+        with self._condition:
+            if self._running:
+                return self._dispatcher
+            self._running = True
+            self._dispatcher = threading.Thread(
+                target=self._process_batches, name="request-batcher", daemon=True
+            )
+        self._dispatcher.start()
+        return self._dispatcher
+
+    def stop(self, flush: Any = True) -> Any:
+        """Stop the dispatcher, optionally executing what is still pending"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            pending = list(self.pending_batches) if flush else []
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=1)
+        for batch_key in pending:
+            self._flush(batch_key)
 
     def add_request(self, endpoint: Any, request_data: Any, callback: Any) -> Any:
         """Add request to batch"""
@@ -267,19 +570,30 @@ class RequestBatcher:
             callback(self._execute_single_request(endpoint, request_data))
             return
         batch_key = self._get_batch_key(endpoint, request_data)
-        self.pending_batches[batch_key].append(
-            {"data": request_data, "callback": callback, "timestamp": time.time()}
-        )
-        if len(self.pending_batches[batch_key]) == 1:
-            timer = threading.Timer(
-                self.config["batch_timeout"] / 1000,
-                self._execute_batch,
-                args=[batch_key],
-            )
-            timer.start()
-            self.batch_timers[batch_key] = timer
-        if len(self.pending_batches[batch_key]) >= self.config["batch_size"]:
-            self._execute_batch(batch_key)
+        full_batch = None
+        with self._condition:
+            batch = self.pending_batches.get(batch_key)
+            if batch is None:
+                self._sequence += 1
+                batch = self.pending_batches[batch_key] = {
+                    "endpoint": endpoint,
+                    "generation": self._sequence,
+                    "requests": [],
+                }
+                deadline = time.monotonic() + self.config["batch_timeout"] / 1000
+                heapq.heappush(self._deadlines, (deadline, self._sequence, batch_key))
+                self._condition.notify()
+            batch["requests"].append({"data": request_data, "callback": callback})
+            if len(batch["requests"]) >= self.config["batch_size"]:
+                full_batch = self.pending_batches.pop(batch_key)
+        if full_batch is not None:
+            self.executor.submit(self._execute_batch, full_batch)
+
+    def submit(self, endpoint: Any, request_data: Any) -> Any:
+        """Add request to batch and return a Future for its result"""
+        future = Future()
+        self.add_request(endpoint, request_data, future.set_result)
+        return future
 
     def _get_batch_key(self, endpoint: Any, request_data: Any) -> Any:
         """Generate batch key for grouping similar requests"""
@@ -289,98 +603,265 @@ class RequestBatcher:
         }
         return f"{endpoint}:{json.dumps(common_params, sort_keys=True)}"
 
-    def _execute_batch(self, batch_key: Any) -> Any:
+    def _process_batches(self) -> Any:
+        """Dispatcher loop: flush batches whose deadline has passed"""
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                if not self._deadlines:
+                    self._condition.wait()
+                    continue
+                deadline, generation, batch_key = self._deadlines[0]
+                wait_time = deadline - time.monotonic()
+                if wait_time > 0:
+                    self._condition.wait(wait_time)
+                    continue
+                heapq.heappop(self._deadlines)
+                batch = self.pending_batches.get(batch_key)
+                if batch is None or batch["generation"] != generation:
+                    continue
+                del self.pending_batches[batch_key]
+            self.executor.submit(self._execute_batch, batch)
+
+    def _flush(self, batch_key: Any) -> Any:
+        with self._condition:
+            batch = self.pending_batches.pop(batch_key, None)
+        if batch is not None:
+            self._execute_batch(batch)
+
+    def _execute_batch(self, batch: Any) -> Any:
         """Execute batched requests"""
-        if batch_key not in self.pending_batches:
-            return
-        requests = self.pending_batches.pop(batch_key)
-        if batch_key in self.batch_timers:
-            self.batch_timers[batch_key].cancel()
-            del self.batch_timers[batch_key]
+        requests = batch["requests"]
         try:
             batch_data = [req["data"] for req in requests]
-            results = self._execute_batch_request(batch_key.split(":")[0], batch_data)
-            for i, request in enumerate(requests):
-                if i < len(results):
-                    request["callback"](results[i])
-                else:
-                    request["callback"]({"error": "Batch processing failed"})
+            results = self._execute_batch_request(batch["endpoint"], batch_data)
         except Exception as e:
-            for request in requests:
-                request["callback"]({"error": str(e)})
+            logging.error(f"Batch execution failed for {batch['endpoint']}: {e}")
+            results = [{"status": "error", "error": str(e)}] * len(requests)
+        for i, request in enumerate(requests):
+            result = (
+                results[i]
+                if i < len(results)
+                else {"status": "error", "error": "Batch processing failed"}
+            )
+            try:
+                request["callback"](result)
+            except Exception as e:
+                logging.error(f"Batch callback failed: {e}")
 
     def _execute_single_request(self, endpoint: Any, request_data: Any) -> Any:
         """Execute single request"""
         return {"status": "success", "data": request_data}
 
     def _execute_batch_request(self, endpoint: Any, batch_data: Any) -> Any:
-        """Execute batch request"""
-        return [{"status": "success", "data": data} for data in batch_data]
+        """Execute batch request through the endpoint's registered handler"""
+        handler = self.handlers.get(endpoint)
+        if handler is None:
+            return [{"status": "success", "data": data} for data in batch_data]
+        return handler(batch_data)
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear latency histogram (HDR-style).
+
+    Bucket upper bounds grow geometrically by ``GROWTH`` from ``MIN_VALUE`` ms.
+    Percentiles report a bucket's upper bound, so they overstate a recorded
+    value by less than ``GROWTH - 1`` (10%), and memory is a constant
+    ``BUCKET_COUNT`` integers regardless of traffic.
+    """
+
+    MIN_VALUE = 0.01
+    GROWTH = 1.1
+    BUCKET_COUNT = 200
+    _LOG_GROWTH = math.log(GROWTH)
+
+    __slots__ = ("counts", "count", "total", "errors")
+
+    def __init__(self) -> Any:
+        self.counts = [0] * self.BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+
+    @classmethod
+    def bucket_index(cls, value: Any) -> Any:
+        if value <= cls.MIN_VALUE:
+            return 0
+        index = int(math.log(value / cls.MIN_VALUE) / cls._LOG_GROWTH) + 1
+        return min(index, cls.BUCKET_COUNT - 1)
+
+    @classmethod
+    def bucket_upper_bound(cls, index: Any) -> Any:
+        return cls.MIN_VALUE * cls.GROWTH**index
+
+    def record(self, value: Any, is_error: Any = False) -> Any:
+        self.counts[self.bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if is_error:
+            self.errors += 1
+
+    def merge(self, other: Any) -> Any:
+        counts = self.counts
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        self.errors += other.errors
+
+    def reset(self) -> Any:
+        self.counts = [0] * self.BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+
+    def percentiles(self, *quantiles: Any) -> Any:
+        """Return the bucket upper bound for each quantile in one pass"""
+        if not self.count:
+            return [0.0 for _ in quantiles]
+        targets = sorted((q * self.count, i) for i, q in enumerate(quantiles))
+        results = [0.0] * len(quantiles)
+        seen = 0
+        target = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            while target < len(targets) and seen >= targets[target][0]:
+                results[targets[target][1]] = self.bucket_upper_bound(index)
+                target += 1
+            if target == len(targets):
+                break
+        return results
+
+
+class RollingHistogram:
+    """Ring buffer of per-slice histograms covering a sliding time window.
+
+    Recording touches a single slice (O(1)); reading merges at most
+    ``window / slice_seconds`` slices, independent of request volume.
+    """
+
+    def __init__(self, window_seconds: Any = 300, slice_seconds: Any = 5) -> Any:
+        self.slice_seconds = slice_seconds
+        self.slice_count = max(1, int(math.ceil(window_seconds / slice_seconds)))
+        self.slices = [LatencyHistogram() for _ in range(self.slice_count)]
+        self.epochs = [-1] * self.slice_count
+
+    def record(self, value: Any, is_error: Any = False, now: Any = None) -> Any:
+        epoch = int((time.time() if now is None else now) // self.slice_seconds)
+        index = epoch % self.slice_count
+        if self.epochs[index] != epoch:
+            self.slices[index].reset()
+            self.epochs[index] = epoch
+        self.slices[index].record(value, is_error)
+
+    def merged(self, now: Any = None) -> Any:
+        epoch = int((time.time() if now is None else now) // self.slice_seconds)
+        oldest = epoch - self.slice_count + 1
+        merged = LatencyHistogram()
+        for index, slice_epoch in enumerate(self.epochs):
+            if oldest <= slice_epoch <= epoch:
+                merged.merge(self.slices[index])
+        return merged
 
 
 class PerformanceMonitor:
-    """Real-time performance monitoring and alerting"""
+    """Real-time performance monitoring and alerting.
+
+    Latencies go into fixed-memory rolling histograms per endpoint plus one
+    for all traffic, so ``record_request`` is O(1) and summaries cost
+    O(slices x buckets). Alerts are evaluated by a periodic background timer
+    (``start``) rather than inline with requests.
+    """
 
     def __init__(self, config: Any) -> Any:
         self.config = config
-        self.metrics = defaultdict(deque)
+        self.window_seconds = config.get("summary_window", 300)
+        self.slice_seconds = config.get("slice_seconds", 5)
+        self.overall = self._new_histogram()
+        self.endpoints = {}
         self.alerts = []
         self.start_time = time.time()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._alert_thread = None
+
+    def _new_histogram(self) -> Any:
+        return RollingHistogram(self.window_seconds, self.slice_seconds)
 
     def record_request(
         self, endpoint: Any, response_time: Any, status_code: Any
     ) -> Any:
         """Record request metrics"""
-        current_time = time.time()
-        self.metrics["response_times"].append(
-            {
-                "timestamp": current_time,
-                "endpoint": endpoint,
-                "response_time": response_time,
-                "status_code": status_code,
-            }
-        )
-        self._cleanup_old_metrics()
-        self._check_alerts()
+        now = time.time()
+        is_error = status_code >= 400
+        with self._lock:
+            histogram = self.endpoints.get(endpoint)
+            if histogram is None:
+                histogram = self.endpoints[endpoint] = self._new_histogram()
+            histogram.record(response_time, is_error, now)
+            self.overall.record(response_time, is_error, now)
 
-    def get_metrics_summary(self) -> Any:
+    def get_metrics_summary(self, include_system: Any = True) -> Any:
         """Get current metrics summary"""
         current_time = time.time()
-        recent_requests = [
-            m
-            for m in self.metrics["response_times"]
-            if current_time - m["timestamp"] <= 300
-        ]
-        if not recent_requests:
+        with self._lock:
+            merged = self.overall.merged(current_time)
+            per_endpoint = {
+                endpoint: histogram.merged(current_time)
+                for endpoint, histogram in self.endpoints.items()
+            }
+        if not merged.count:
             return {"status": "no_data"}
-        response_times = [r["response_time"] for r in recent_requests]
-        error_count = len([r for r in recent_requests if r["status_code"] >= 400])
-        process = psutil.Process()
-        cpu_percent = process.cpu_percent()
-        memory_percent = process.memory_percent()
+        summary = self._summarize(merged)
+        summary["endpoints"] = {
+            endpoint: self._summarize(histogram)
+            for endpoint, histogram in per_endpoint.items()
+            if histogram.count
+        }
+        if include_system:
+            process = psutil.Process()
+            summary["cpu_usage"] = process.cpu_percent()
+            summary["memory_usage"] = process.memory_percent()
+        summary["uptime"] = current_time - self.start_time
+        return summary
+
+    @staticmethod
+    def _summarize(histogram: Any) -> Any:
+        p50, p95, p99 = histogram.percentiles(0.5, 0.95, 0.99)
         return {
-            "request_count": len(recent_requests),
-            "avg_response_time": statistics.mean(response_times),
-            "p95_response_time": (
-                statistics.quantiles(response_times, n=20)[18]
-                if len(response_times) > 20
-                else max(response_times)
-            ),
-            "error_rate": error_count / len(recent_requests),
-            "cpu_usage": cpu_percent,
-            "memory_usage": memory_percent,
-            "uptime": current_time - self.start_time,
+            "request_count": histogram.count,
+            "avg_response_time": histogram.total / histogram.count,
+            "p50_response_time": p50,
+            "p95_response_time": p95,
+            "p99_response_time": p99,
+            "error_rate": histogram.errors / histogram.count,
         }
 
-    def _cleanup_old_metrics(self) -> Any:
-        """Remove metrics older than retention period"""
-        current_time = time.time()
-        retention_time = current_time - self.config["metrics_retention"]
-        while (
-            self.metrics["response_times"]
-            and self.metrics["response_times"][0]["timestamp"] < retention_time
-        ):
-            self.metrics["response_times"].popleft()
+    def start(self) -> Any:
+        """Start evaluating alerts every ``alert_interval`` seconds"""
+        if self._alert_thread is not None:
+            return
+        self._stop_event.clear()
+        self._alert_thread = threading.Thread(
+            target=self._alert_loop, name="performance-alerts", daemon=True
+        )
+        self._alert_thread.start()
+
+    def stop(self) -> Any:
+        self._stop_event.set()
+        if self._alert_thread is not None:
+            self._alert_thread.join(timeout=1)
+            self._alert_thread = None
+
+    def _alert_loop(self) -> Any:
+        interval = self.config.get("alert_interval", 15)
+        while not self._stop_event.wait(interval):
+            try:
+                self._check_alerts()
+            except Exception as e:
+                logging.error(f"Performance alert evaluation failed: {e}")
 
     def _check_alerts(self) -> Any:
         """Check for performance alerts"""
@@ -421,11 +902,12 @@ class PerformanceMonitor:
                     "threshold": thresholds["memory_usage"],
                 }
             )
-        for alert in alerts:
-            alert["timestamp"] = time.time()
-            self.alerts.append(alert)
         current_time = time.time()
-        self.alerts = [a for a in self.alerts if current_time - a["timestamp"] <= 3600]
+        for alert in alerts:
+            alert["timestamp"] = current_time
+        self.alerts = [
+            a for a in self.alerts if current_time - a["timestamp"] <= 3600
+        ] + alerts
 
 
 def optimize_performance(
@@ -437,26 +919,41 @@ def optimize_performance(
 
         @wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
-            try:
-                if hasattr(g, "cache_manager"):
-                    cache_key = g.cache_manager.get_cache_key(
-                        request.endpoint, request.get_json() or {}
-                    )
-                    cached_result = g.cache_manager.get(cache_key, cache_type)
-                    if cached_result:
-                        return jsonify(cached_result)
-                result = func(*args, **kwargs)
-                if hasattr(g, "cache_manager") and result:
-                    g.cache_manager.set(cache_key, result.get_json(), cache_type)
-                return result
-            finally:
-                end_time = time.time()
-                response_time = (end_time - start_time) * 1000
-                if hasattr(g, "performance_monitor"):
-                    g.performance_monitor.record_request(
-                        request.endpoint, response_time, 200
-                    )
+            if not hasattr(g, "cache_manager"):
+                return func(*args, **kwargs)
+            cache_key = g.cache_manager.get_cache_key(
+                request.endpoint,
+                {
+                    "principal": request.headers.get("Authorization", ""),
+                    "view_args": request.view_args or {},
+                    "args": request.args.to_dict(flat=False),
+                    "body": request.get_json(silent=True) or {},
+                },
+            )
+            computed = {}
+
+            def load():
+                computed["response"] = func(*args, **kwargs)
+                response = computed["response"]
+                if getattr(response, "status_code", None) == 200:
+                    return response.get_json(silent=True)
+                return None
+
+            current_user = getattr(g, "current_user", None)
+            tags = g.cache_manager.build_tags(
+                endpoint_type=cache_type,
+                user_id=getattr(current_user, "id", None),
+                account_id=(request.view_args or {}).get("account_id"),
+                endpoint=request.endpoint,
+            )
+            cached_result = g.cache_manager.get_or_set(
+                cache_key, load, cache_type, tags
+            )
+            if "response" in computed:
+                return computed["response"]
+            if cached_result is not None:
+                return jsonify(cached_result)
+            return func(*args, **kwargs)
 
         return wrapper
 
@@ -466,28 +963,165 @@ def optimize_performance(
 def create_optimized_gateway(app: Any) -> Any:
     """Create and configure optimized API gateway"""
     gateway = PerformanceOptimizedGateway(app)
+    app.extensions["cache_manager"] = gateway.cache_manager
 
     @app.before_request
     def setup_request_context() -> Any:
-        g.cache_manager = CacheManager(gateway.redis_client, gateway.cache_config)
-        g.performance_monitor = PerformanceMonitor(gateway.monitoring_config)
-        g.request_start_time = time.time()
+        g.cache_manager = gateway.cache_manager
+        g.performance_monitor = gateway.performance_monitor
+        g.request_start_time = time.perf_counter()
+        g.metrics_route = request.url_rule.rule if request.url_rule else "unmatched"
+        gateway.metrics.request_started(g.metrics_route)
+
+    @app.after_request
+    def record_request_metrics(response: Any) -> Any:
+        if "request_start_time" in g:
+            duration = time.perf_counter() - g.request_start_time
+            g.pop("request_start_time")
+            gateway.metrics.request_finished(
+                g.metrics_route, request.method, response.status_code, duration
+            )
+            gateway.performance_monitor.record_request(
+                g.metrics_route, duration * 1000, response.status_code
+            )
+        return response
+
+    @app.teardown_request
+    def release_in_flight(exc: Any = None) -> Any:
+        if "request_start_time" in g:
+            duration = time.perf_counter() - g.pop("request_start_time")
+            gateway.metrics.request_finished(
+                g.metrics_route, request.method, 500, duration
+            )
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics() -> Any:
+        """Prometheus scrape endpoint aggregated across all workers"""
+        return (gateway.metrics.render(), 200, {"Content-Type": CONTENT_TYPE_LATEST})
 
     @app.route("/api/v1/gateway/metrics", methods=["GET"])
     def gateway_metrics() -> Any:
         """Get gateway performance metrics"""
         if hasattr(g, "performance_monitor"):
             metrics = g.performance_monitor.get_metrics_summary()
+            metrics["cache"] = gateway.cache_manager.get_stats()
+            metrics["circuit_breakers"] = circuit_breaker_registry.snapshot()
             return jsonify(metrics)
         return (jsonify({"error": "Metrics not available"}), 500)
 
     @app.route("/api/v1/gateway/cache/clear", methods=["POST"])
     def clear_cache() -> Any:
-        """Clear cache for specific pattern"""
-        pattern = request.json.get("pattern", "*")
+        """Clear cache for specific tags or, as a fallback, a key pattern"""
+        data = request.get_json(silent=True) or {}
         if hasattr(g, "cache_manager"):
+            tags = data.get("tags")
+            if tags:
+                removed = g.cache_manager.invalidate_tags(*tags)
+                return jsonify(
+                    {"status": "cache_cleared", "tags": tags, "local_removed": removed}
+                )
+            pattern = data.get("pattern", "*")
             g.cache_manager.invalidate_pattern(pattern)
             return jsonify({"status": "cache_cleared", "pattern": pattern})
         return (jsonify({"error": "Cache manager not available"}), 500)
 
+    register_batch_endpoints(app, gateway)
     return gateway
+
+
+BATCH_ENDPOINT_OPERATIONS = {
+    "/api/v1/transactions/batch": ("deposit", "withdrawal", "transfer"),
+    "/api/v1/accounts/batch": ("deposit", "withdrawal"),
+    "/api/v1/payments/batch": ("transfer",),
+}
+
+
+def apply_batched_requests(
+    session: Any, batch_data: Any, allowed_types: Any = BATCH_OPERATION_TYPES
+) -> Any:
+    """Apply a flushed batch of batch-endpoint requests, one transaction per user.
+
+    Each item is one API request, ``{"user_id": ..., "operations": [...]}``.
+    A user's operations are applied in request order and then in order
+    within each request, so an operation may rely on an earlier one of the
+    same request. Returns, per item, the list of its operation results.
+    """
+    results = [None] * len(batch_data)
+    by_user = defaultdict(list)
+    for index, item in enumerate(batch_data):
+        by_user[item["user_id"]].append(index)
+    for user_id, indexes in by_user.items():
+        operations = [
+            operation for i in indexes for operation in batch_data[i]["operations"]
+        ]
+        try:
+            user_results = process_batch(
+                session, operations, user_id=user_id, allowed_types=allowed_types
+            )
+        except Exception as e:
+            session.rollback()
+            logging.error(f"Batch for user {user_id} failed: {e}")
+            user_results = [
+                {"status": "error", "error": "Batch processing failed"}
+            ] * len(operations)
+        offset = 0
+        for i in indexes:
+            count = len(batch_data[i]["operations"])
+            results[i] = user_results[offset : offset + count]
+            offset += count
+    return results
+
+
+def register_batch_endpoints(app: Any, gateway: Any) -> Any:
+    """Expose the batch endpoints and back them with one DB transaction per batch.
+
+    Requests from concurrent callers are coalesced by the gateway's
+    ``RequestBatcher``; each flushed batch is applied by
+    ``apply_batched_requests`` and every caller gets back the results for
+    its own operations. A request's operations always travel together, so
+    they are applied in the order given.
+    """
+    batcher = gateway.request_batcher
+    config = gateway.batch_config
+
+    def make_handler(allowed_types: Any) -> Any:
+        def handle(batch_data: Any) -> Any:
+            with app.app_context():
+                return apply_batched_requests(db.session, batch_data, allowed_types)
+
+        return handle
+
+    def batch_view(endpoint: Any) -> Any:
+        @token_required
+        def view() -> Any:
+            operations = (request.get_json(silent=True) or {}).get("operations")
+            if not isinstance(operations, list) or not operations:
+                return (jsonify({"error": "operations must be a non-empty list"}), 400)
+            if len(operations) > config["max_operations"]:
+                return (
+                    jsonify(
+                        {
+                            "error": f"At most {config['max_operations']} operations per request"
+                        }
+                    ),
+                    400,
+                )
+            user_id = g.token_payload.get("user_id")
+            results = batcher.submit(
+                endpoint, {"user_id": user_id, "operations": operations}
+            ).result(timeout=config["result_timeout"])
+            if isinstance(results, dict):
+                # The whole batch failed; every operation gets its error
+                results = [results] * len(operations)
+            return jsonify({"results": results})
+
+        return view
+
+    for endpoint, allowed_types in BATCH_ENDPOINT_OPERATIONS.items():
+        batcher.register_handler(endpoint, make_handler(allowed_types))
+        app.add_url_rule(
+            endpoint,
+            endpoint=f"gateway_batch_{endpoint.split('/')[3]}",
+            view_func=batch_view(endpoint),
+            methods=["POST"],
+        )
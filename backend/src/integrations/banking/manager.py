@@ -1,6 +1,7 @@
 import logging
 from enum import Enum
 from typing import Any, Dict, List, Optional, Type
+from ...gateway.circuit_breaker import circuit_breaker_registry
 from . import (
     BankAccount,
     BankingIntegrationBase,
@@ -39,6 +40,7 @@ class BankingIntegrationManager:
             IntegrationType.OPEN_BANKING: OpenBankingIntegration,
             IntegrationType.FDX: FDXIntegration,
         }
+        self.integration_services: Dict[str, str] = {}
         self.logger = logging.getLogger(__name__)
 
     def register_integration(
@@ -56,6 +58,7 @@ class BankingIntegrationManager:
             integration_class = self.integration_classes[integration_type]
             integration = integration_class(config)
             self.integrations[name] = integration
+            self.integration_services[name] = integration_type.value
             self.logger.info(
                 f"Registered {integration_type.value} integration as '{name}'"
             )
@@ -88,6 +91,20 @@ class BankingIntegrationManager:
         """
         return list(self.integrations.keys())
 
+    async def _call(self, name: str, method: str, *args: Any) -> Any:
+        """
+        Call an integration method through its service's circuit breaker
+
+        While a provider is failing its breaker rejects calls immediately,
+        so callers fall through to the next integration instead of waiting
+        for the HTTP timeout.
+        """
+        return await circuit_breaker_registry.call_async(
+            self.integration_services[name],
+            getattr(self.integrations[name], method),
+            *args,
+        )
+
     async def authenticate_all(self) -> Dict[str, bool]:
         """
         Authenticate all registered integrations
@@ -98,7 +115,7 @@ class BankingIntegrationManager:
         results = {}
         for name, integration in self.integrations.items():
             try:
-                result = await integration.authenticate()
+                result = await self._call(name, "authenticate")
                 results[name] = result
                 self.logger.info(
                     f"Authentication {('successful' if result else 'failed')} for '{name}'"
@@ -123,7 +140,7 @@ class BankingIntegrationManager:
         results = {}
         for name, integration in self.integrations.items():
             try:
-                accounts = await integration.get_accounts(customer_id)
+                accounts = await self._call(name, "get_accounts", customer_id)
                 results[name] = accounts
                 self.logger.info(f"Retrieved {len(accounts)} accounts from '{name}'")
             except Exception as e:
@@ -156,9 +173,13 @@ class BankingIntegrationManager:
                 self.logger.warning(f"Integration '{integration_name}' not found")
                 continue
             try:
-                integration = self.integrations[integration_name]
-                transactions = await integration.get_transactions(
-                    account_id, start_date, end_date, limit
+                transactions = await self._call(
+                    integration_name,
+                    "get_transactions",
+                    account_id,
+                    start_date,
+                    end_date,
+                    limit,
                 )
                 results[integration_name] = transactions
                 self.logger.info(
@@ -189,8 +210,9 @@ class BankingIntegrationManager:
             if integration_name not in self.integrations:
                 continue
             try:
-                integration = self.integrations[integration_name]
-                transaction_id = await integration.initiate_payment(payment_request)
+                transaction_id = await self._call(
+                    integration_name, "initiate_payment", payment_request
+                )
                 self.logger.info(
                     f"Payment initiated successfully with '{integration_name}': {transaction_id}"
                 )
@@ -219,8 +241,9 @@ class BankingIntegrationManager:
             if integration_name not in self.integrations:
                 continue
             try:
-                integration = self.integrations[integration_name]
-                status = await integration.get_payment_status(transaction_id)
+                status = await self._call(
+                    integration_name, "get_payment_status", transaction_id
+                )
                 results[integration_name] = status
             except Exception as e:
                 self.logger.error(
@@ -251,6 +274,9 @@ class BankingIntegrationManager:
             health_status[name] = {
                 "authenticated": integration._authenticated,
                 "type": integration.__class__.__name__,
+                "circuit_breaker": circuit_breaker_registry.get(
+                    self.integration_services[name]
+                ).state,
                 "config_keys": (
                     list(integration.config.keys())
                     if hasattr(integration, "config")
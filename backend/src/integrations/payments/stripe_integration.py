@@ -5,6 +5,7 @@ from abc import ABC, abstractmethod
 from decimal import Decimal
 from typing import Dict, List, Optional, Any
 import requests
+from ...gateway.circuit_breaker import circuit_breaker_registry
 
 logger = logging.getLogger(__name__)
 
@@ -59,11 +60,8 @@ class StripePaymentProcessor(PaymentProcessor):
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/x-www-form-urlencoded",
             }
-            response = requests.post(
-                f"{self.base_url}/payment_intents",
-                data=payload,
-                headers=headers,
-                timeout=30,
+            response = self._request(
+                "POST", "/payment_intents", data=payload, headers=headers
             )
             if response.status_code == 200:
                 data = response.json()
@@ -102,9 +100,7 @@ class StripePaymentProcessor(PaymentProcessor):
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/x-www-form-urlencoded",
             }
-            response = requests.post(
-                f"{self.base_url}/refunds", data=payload, headers=headers, timeout=30
-            )
+            response = self._request("POST", "/refunds", data=payload, headers=headers)
             if response.status_code == 200:
                 data = response.json()
                 return {
@@ -127,10 +123,8 @@ class StripePaymentProcessor(PaymentProcessor):
         """Get Stripe payment status"""
         try:
             headers = {"Authorization": f"Bearer {self.api_key}"}
-            response = requests.get(
-                f"{self.base_url}/payment_intents/{payment_id}",
-                headers=headers,
-                timeout=30,
+            response = self._request(
+                "GET", f"/payment_intents/{payment_id}", headers=headers
             )
             if response.status_code == 200:
                 data = response.json()
@@ -150,6 +144,19 @@ class StripePaymentProcessor(PaymentProcessor):
             logger.error(f"Stripe status check error: {str(e)}")
             return {"success": False, "error": "STRIPE_STATUS_ERROR", "message": str(e)}
 
+    def _request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        """Send a Stripe API request through the shared ``stripe`` circuit breaker"""
+
+        def send() -> requests.Response:
+            response = requests.request(
+                method, f"{self.base_url}{path}", timeout=30, **kwargs
+            )
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        return circuit_breaker_registry.call("stripe", send)
+
     def _map_stripe_status(self, stripe_status: str) -> str:
         """Map Stripe status to internal status"""
         status_mapping = {
@@ -0,0 +1,322 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from . import FraudDetectionError, FraudModelBase, ModelNotTrainedError
+
+"\nCompiled Tree Models for Fraud Detection\nFlat NumPy node arrays for tree ensembles, scored without sklearn/xgboost/lightgbm\n"
+logger = logging.getLogger(__name__)
+
+TREE_ARRAYS = ["feature", "threshold", "left", "right", "value", "roots"]
+LEAF = -1
+# Largest |compiled - native| accepted when verifying an export
+EXPORT_TOLERANCE = 1e-6
+
+
+class CompiledTreeModel(FraudModelBase):
+    """
+    Tree ensemble scored from flat node arrays with pure NumPy
+
+    All trees share one set of arrays indexed by global node id; ``roots``
+    holds each tree's root. Internal nodes send a row left when its
+    feature value is ``<=`` (or ``<``, per ``decision``) the threshold.
+    ``aggregation`` turns the per-tree leaf values into a fraud score:
+    ``mean`` (random forest class-1 probability) or ``logistic``
+    (gradient boosting margin summed with ``base_margin``).
+
+    Arrays saved with ``save_arrays`` are memory-mapped on load, so forked
+    workers share one copy through the page cache.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> Any:
+        super().__init__(meta.get("config", {}))
+        self.arrays = arrays
+        self.meta = meta
+        self.feature_columns = list(meta["feature_columns"])
+        self.model_version = meta.get("model_version", self.model_version)
+        self.training_timestamp = meta.get("training_timestamp")
+        self.is_trained = True
+
+    def train(
+        self, training_data: pd.DataFrame, labels: Optional[pd.Series] = None
+    ) -> None:
+        raise FraudDetectionError("Compiled tree models are inference-only")
+
+    def predict(self, features: pd.DataFrame) -> np.ndarray:
+        """
+        Predict fraud scores
+
+        Args:
+            features: Feature matrix
+
+        Returns:
+            np.ndarray: Fraud scores, as the source model's ``predict``
+        """
+        if not self.is_trained:
+            raise ModelNotTrainedError("Model must be trained before prediction")
+        features = self.preprocess_features(features)
+        matrix = features.to_numpy(dtype=self.meta["input_dtype"])
+        leaf_values = self._leaf_values(matrix)
+        if self.meta["aggregation"] == "mean":
+            return leaf_values.mean(axis=1)
+        margin = leaf_values.sum(axis=1) + self.meta.get("base_margin", 0.0)
+        return 1 / (1 + np.exp(-margin))
+
+    def _leaf_values(self, matrix: np.ndarray) -> np.ndarray:
+        """Walks every row down every tree at once; ``(rows, trees)`` values"""
+        feature = self.arrays["feature"]
+        threshold = self.arrays["threshold"]
+        left = self.arrays["left"]
+        right = self.arrays["right"]
+        rows = np.arange(len(matrix))[:, None]
+        nodes = np.tile(self.arrays["roots"], (len(matrix), 1))
+        strict = self.meta.get("decision") == "<"
+        for _ in range(self.meta["max_depth"]):
+            node_features = feature[nodes]
+            internal = node_features != LEAF
+            if not internal.any():
+                break
+            values = matrix[rows, np.where(internal, node_features, 0)]
+            go_left = (
+                values < threshold[nodes] if strict else values <= threshold[nodes]
+            )
+            nodes = np.where(
+                internal, np.where(go_left, left[nodes], right[nodes]), nodes
+            )
+        return self.arrays["value"][nodes]
+
+    def get_feature_importance(self) -> Dict[str, float]:
+        """Feature importance recorded from the source model at export"""
+        return dict(self.meta.get("feature_importance", {}))
+
+    def save_arrays(self, directory: str) -> Dict[str, Any]:
+        """Writes one ``.npy`` per array plus ``meta.json`` into ``directory``"""
+        os.makedirs(directory, exist_ok=True)
+        for name in TREE_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), self.arrays[name])
+        with open(os.path.join(directory, "meta.json"), "w") as meta_file:
+            json.dump(self.meta, meta_file, default=str)
+        return self.meta
+
+    @classmethod
+    def load_arrays(cls, directory: str, mmap: bool = True) -> "CompiledTreeModel":
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in TREE_ARRAYS
+        }
+        with open(os.path.join(directory, "meta.json")) as meta_file:
+            meta = json.load(meta_file)
+        return cls(arrays, meta)
+
+
+def _build_arrays(nodes: pd.DataFrame, tree_count: int) -> Dict[str, Any]:
+    """
+    Node table (``tree``, ``node``, ``feature``, ``threshold``, ``left``,
+    ``right``, ``value``; child ids local to the tree, feature -1 for
+    leaves) to global node arrays
+    """
+    nodes = nodes.sort_values(["tree", "node"], ignore_index=True)
+    index = {key: i for i, key in enumerate(zip(nodes["tree"], nodes["node"]))}
+
+    def global_ids(column: str) -> np.ndarray:
+        return np.array(
+            [
+                index[(tree, child)] if feature != LEAF else i
+                for i, (tree, child, feature) in enumerate(
+                    zip(nodes["tree"], nodes[column], nodes["feature"])
+                )
+            ],
+            dtype=np.int32,
+        )
+
+    roots = np.array([index[(tree, 0)] for tree in range(tree_count)], dtype=np.int32)
+    left = global_ids("left")
+    right = global_ids("right")
+    feature = nodes["feature"].to_numpy(dtype=np.int32)
+    max_depth = 0
+    stack = [(int(root), 0) for root in roots]
+    while stack:
+        node, depth = stack.pop()
+        if feature[node] == LEAF:
+            max_depth = max(max_depth, depth)
+        else:
+            stack.append((int(left[node]), depth + 1))
+            stack.append((int(right[node]), depth + 1))
+    return {
+        "arrays": {
+            "feature": feature,
+            "threshold": nodes["threshold"].to_numpy(dtype=np.float64),
+            "left": left,
+            "right": right,
+            "value": nodes["value"].to_numpy(dtype=np.float64),
+            "roots": roots,
+        },
+        "max_depth": max_depth,
+    }
+
+
+def _sklearn_forest_nodes(estimator: Any) -> pd.DataFrame:
+    tables = []
+    for tree_index, tree in enumerate(estimator.estimators_):
+        structure = tree.tree_
+        class_values = structure.value[:, 0, :]
+        positive = class_values[:, 1] / class_values.sum(axis=1)
+        is_leaf = structure.children_left == -1
+        tables.append(
+            pd.DataFrame(
+                {
+                    "tree": tree_index,
+                    "node": np.arange(structure.node_count),
+                    "feature": np.where(is_leaf, LEAF, structure.feature),
+                    "threshold": structure.threshold,
+                    "left": structure.children_left,
+                    "right": structure.children_right,
+                    "value": positive,
+                }
+            )
+        )
+    return pd.concat(tables, ignore_index=True)
+
+
+def _xgboost_nodes(estimator: Any, feature_columns: List[str]) -> pd.DataFrame:
+    booster = estimator.get_booster()
+    frame = booster.trees_to_dataframe()
+    best_iteration = getattr(estimator, "best_iteration", None)
+    if best_iteration is not None:
+        frame = frame[frame["Tree"] <= best_iteration]
+    is_leaf = frame["Feature"] == "Leaf"
+    positions = {name: i for i, name in enumerate(feature_columns)}
+
+    def feature_index(name: str) -> int:
+        if name == "Leaf":
+            return LEAF
+        return positions[name] if name in positions else int(name.lstrip("f"))
+
+    def local_id(node_id: Any) -> int:
+        return int(str(node_id).split("-")[1]) if isinstance(node_id, str) else 0
+
+    return pd.DataFrame(
+        {
+            "tree": frame["Tree"].to_numpy(),
+            "node": frame["Node"].to_numpy(),
+            "feature": [feature_index(name) for name in frame["Feature"]],
+            "threshold": frame["Split"].fillna(0).to_numpy(dtype=np.float64),
+            "left": [local_id(node) for node in frame["Yes"]],
+            "right": [local_id(node) for node in frame["No"]],
+            "value": np.where(is_leaf, frame["Gain"], 0.0),
+        }
+    )
+
+
+def _xgboost_base_margin(estimator: Any) -> float:
+    config = json.loads(estimator.get_booster().save_config())
+    base_score = float(config["learner"]["learner_model_param"]["base_score"])
+    return float(np.log(base_score / (1 - base_score)))
+
+
+def _lightgbm_nodes(estimator: Any, feature_columns: List[str]) -> pd.DataFrame:
+    frame = estimator.booster_.trees_to_dataframe()
+    best_iteration = getattr(estimator, "best_iteration_", None)
+    if best_iteration:
+        frame = frame[frame["tree_index"] < best_iteration]
+    positions = {name: i for i, name in enumerate(feature_columns)}
+    local_ids = {}
+    for tree, node in zip(frame["tree_index"], frame["node_index"]):
+        local_ids.setdefault(tree, {})[node] = len(local_ids[tree])
+
+    def child(tree: int, node: Any) -> int:
+        return local_ids[tree][node] if isinstance(node, str) else 0
+
+    is_leaf = frame["split_feature"].isna()
+    return pd.DataFrame(
+        {
+            "tree": frame["tree_index"].to_numpy(),
+            "node": [
+                local_ids[t][n]
+                for t, n in zip(frame["tree_index"], frame["node_index"])
+            ],
+            "feature": [
+                LEAF if leaf else positions[name]
+                for leaf, name in zip(is_leaf, frame["split_feature"])
+            ],
+            "threshold": frame["threshold"].fillna(0).to_numpy(dtype=np.float64),
+            "left": [
+                child(t, n) for t, n in zip(frame["tree_index"], frame["left_child"])
+            ],
+            "right": [
+                child(t, n) for t, n in zip(frame["tree_index"], frame["right_child"])
+            ],
+            "value": np.where(is_leaf, frame["value"], 0.0),
+        }
+    )
+
+
+def compile_tree_model(
+    model: FraudModelBase, sample: pd.DataFrame
+) -> Optional[CompiledTreeModel]:
+    """
+    Exports a trained tree-based fraud model to a ``CompiledTreeModel``
+
+    Supports sklearn random forests and XGBoost/LightGBM classifiers. The
+    export is checked against the source model's ``predict`` on ``sample``;
+    ``None`` is returned for unsupported models or when scores disagree,
+    so callers can keep the native artifact instead.
+
+    Args:
+        model: Trained fraud model wrapping the estimator in ``model.model``
+        sample: Feature rows used to verify the export
+
+    Returns:
+        Optional[CompiledTreeModel]: Compiled model, or None
+    """
+    estimator = getattr(model, "model", None)
+    if estimator is None or not model.is_trained:
+        return None
+    if getattr(model, "scaler", None) is not None:
+        return None
+    kind = type(estimator).__name__
+    meta = {
+        "source": kind,
+        "config": model.config,
+        "feature_columns": list(model.feature_columns),
+        "model_version": model.model_version,
+        "training_timestamp": model.training_timestamp,
+    }
+    try:
+        if hasattr(estimator, "estimators_") and hasattr(estimator, "predict_proba"):
+            nodes = _sklearn_forest_nodes(estimator)
+            tree_count = len(estimator.estimators_)
+            meta.update(aggregation="mean", decision="<=", input_dtype="float32")
+        elif kind == "XGBClassifier":
+            nodes = _xgboost_nodes(estimator, model.feature_columns)
+            tree_count = int(nodes["tree"].max()) + 1
+            meta.update(
+                aggregation="logistic",
+                decision="<",
+                input_dtype="float32",
+                base_margin=_xgboost_base_margin(estimator),
+            )
+        elif kind == "LGBMClassifier":
+            nodes = _lightgbm_nodes(estimator, model.feature_columns)
+            tree_count = int(nodes["tree"].max()) + 1
+            meta.update(aggregation="logistic", decision="<=", input_dtype="float64")
+        else:
+            return None
+        built = _build_arrays(nodes, tree_count)
+        meta["max_depth"] = built["max_depth"]
+        meta["feature_importance"] = model.get_feature_importance()
+        compiled = CompiledTreeModel(built["arrays"], meta)
+        difference = np.abs(compiled.predict(sample) - model.predict(sample)).max()
+    except Exception as e:
+        logger.warning(f"Could not compile {kind}: {str(e)}")
+        return None
+    if difference > EXPORT_TOLERANCE:
+        logger.warning(
+            f"Compiled {kind} differs from the native model by {difference:.2e}; "
+            "keeping the native artifact"
+        )
+        return None
+    return compiled
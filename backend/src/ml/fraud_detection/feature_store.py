@@ -0,0 +1,326 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import pandas as pd
+from . import (
+    HIGH_RISK_MERCHANT_CATEGORIES,
+    FraudDetectionError,
+    TransactionFeatures,
+    _parse_timestamp,
+)
+
+"\nOnline Feature Store for Fraud Detection\nKeeps per-user rolling aggregates so behaviour features need no history scan\n"
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+# (feature, bucket width in seconds, number of buckets)
+VELOCITY_WINDOWS = {
+    "1h": (300, 12),
+    "24h": (3600, 24),
+    "7d": (6 * 3600, 28),
+    "30d": (86400, 30),
+}
+MAX_TRACKED_VALUES = 256
+
+
+def _epoch_seconds(timestamp: datetime) -> float:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def _value_hash(value: Any) -> int:
+    """Stable 64-bit hash (``hash()`` is salted per process)"""
+    return int.from_bytes(
+        hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big"
+    )
+
+
+class WindowCounter:
+    """
+    Count and sum of events over a sliding window, in a ring of time buckets
+
+    Window edges are rounded to the bucket width. Moving the window forward
+    only clears the buckets that fell out of it, so adds and reads cost at
+    most one pass over the (fixed, small) ring.
+    """
+
+    __slots__ = ("width", "size", "counts", "sums", "head", "count", "total")
+
+    def __init__(self, width: int, size: int) -> Any:
+        self.width = width
+        self.size = size
+        self.counts = [0] * size
+        self.sums = [0.0] * size
+        self.head = None
+        self.count = 0
+        self.total = 0.0
+
+    def _expiring(self, bucket: int) -> range:
+        return range(self.head + 1, self.head + 1 + min(bucket - self.head, self.size))
+
+    def add(self, seconds: float, amount: float) -> None:
+        bucket = int(seconds // self.width)
+        if self.head is None:
+            self.head = bucket
+        elif bucket > self.head:
+            for expired in self._expiring(bucket):
+                slot = expired % self.size
+                self.count -= self.counts[slot]
+                self.total -= self.sums[slot]
+                self.counts[slot] = 0
+                self.sums[slot] = 0.0
+            self.head = bucket
+        if bucket <= self.head - self.size:
+            return
+        slot = bucket % self.size
+        self.counts[slot] += 1
+        self.sums[slot] += amount
+        self.count += 1
+        self.total += amount
+
+    def totals(self, seconds: float) -> tuple:
+        """``(count, sum)`` of the window ending at ``seconds`` (read-only)"""
+        if self.head is None:
+            return 0, 0.0
+        bucket = int(seconds // self.width)
+        if bucket <= self.head:
+            return self.count, self.total
+        if bucket - self.head >= self.size:
+            return 0, 0.0
+        count, total = self.count, self.total
+        for expired in self._expiring(bucket):
+            count -= self.counts[expired % self.size]
+            total -= self.sums[expired % self.size]
+        return count, total
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "counts": list(self.counts),
+            "sums": list(self.sums),
+            "head": self.head,
+            "count": self.count,
+            "total": self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, width: int, size: int, data: Dict[str, Any]) -> "WindowCounter":
+        counter = cls(width, size)
+        counter.counts = list(data["counts"])
+        counter.sums = list(data["sums"])
+        counter.head = data["head"]
+        counter.count = data["count"]
+        counter.total = data["total"]
+        return counter
+
+
+class UserFeatureState:
+    """
+    Rolling behaviour aggregates of one user
+
+    Welford running mean/variance of amounts, windowed counts and sums,
+    an hour-of-day histogram, and hashed sets of devices, countries and
+    (with last-seen times) merchant categories.
+    """
+
+    __slots__ = (
+        "first_seen",
+        "amount_count",
+        "amount_mean",
+        "amount_m2",
+        "windows",
+        "hour_counts",
+        "devices",
+        "countries",
+        "merchants",
+    )
+
+    def __init__(self) -> Any:
+        self.first_seen = None
+        self.amount_count = 0
+        self.amount_mean = 0.0
+        self.amount_m2 = 0.0
+        self.windows = {
+            name: WindowCounter(width, size)
+            for name, (width, size) in VELOCITY_WINDOWS.items()
+        }
+        self.hour_counts = [0] * 24
+        self.devices = set()
+        self.countries = set()
+        self.merchants = {}
+
+    def record(
+        self,
+        timestamp: datetime,
+        amount: float,
+        merchant_category: Optional[str] = None,
+        device_fingerprint: Optional[str] = None,
+        location_country: Optional[str] = None,
+    ) -> None:
+        """Folds one past transaction into the aggregates"""
+        seconds = _epoch_seconds(timestamp)
+        if self.first_seen is None or seconds < self.first_seen:
+            self.first_seen = seconds
+        self.amount_count += 1
+        delta = amount - self.amount_mean
+        self.amount_mean += delta / self.amount_count
+        self.amount_m2 += delta * (amount - self.amount_mean)
+        for window in self.windows.values():
+            window.add(seconds, amount)
+        self.hour_counts[timestamp.hour] += 1
+        if device_fingerprint and len(self.devices) < MAX_TRACKED_VALUES:
+            self.devices.add(_value_hash(device_fingerprint))
+        if location_country and len(self.countries) < MAX_TRACKED_VALUES:
+            self.countries.add(_value_hash(location_country))
+        if merchant_category is not None:
+            key = _value_hash(merchant_category)
+            if key in self.merchants or len(self.merchants) < MAX_TRACKED_VALUES:
+                self.merchants[key] = max(self.merchants.get(key, seconds), seconds)
+
+    def fill_features(self, features: TransactionFeatures) -> TransactionFeatures:
+        """Sets the history-derived fields of ``features`` from the aggregates"""
+        if self.amount_count == 0:
+            return features
+        seconds = _epoch_seconds(features.timestamp)
+        features.user_age_days = math.floor((seconds - self.first_seen) / 86400)
+        count_30d, sum_30d = self.windows["30d"].totals(seconds)
+        if count_30d:
+            features.transaction_count_30d = count_30d
+            features.avg_transaction_amount = sum_30d / count_30d
+            cutoff = seconds - 30 * 86400
+            features.unique_merchants_30d = sum(
+                1 for last_seen in self.merchants.values() if last_seen >= cutoff
+            )
+        if self.amount_count > 1:
+            std = math.sqrt(self.amount_m2 / (self.amount_count - 1))
+            if std > 0:
+                features.amount_zscore = (features.amount - self.amount_mean) / std
+        features.velocity_1h = self.windows["1h"].totals(seconds)[0]
+        features.velocity_24h = self.windows["24h"].totals(seconds)[0]
+        features.velocity_7d = self.windows["7d"].totals(seconds)[0]
+        if features.device_fingerprint:
+            features.new_device = (
+                _value_hash(features.device_fingerprint) not in self.devices
+            )
+        if features.location_country:
+            features.new_location = (
+                _value_hash(features.location_country) not in self.countries
+            )
+        features.unusual_time = self.hour_counts[features.hour_of_day] < max(
+            self.hour_counts
+        )
+        features.high_risk_merchant = (
+            features.merchant_category in HIGH_RISK_MERCHANT_CATEGORIES
+        )
+        return features
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "first_seen": self.first_seen,
+            "amount": (self.amount_count, self.amount_mean, self.amount_m2),
+            "windows": {name: w.to_dict() for name, w in self.windows.items()},
+            "hour_counts": list(self.hour_counts),
+            "devices": sorted(self.devices),
+            "countries": sorted(self.countries),
+            "merchants": dict(self.merchants),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserFeatureState":
+        state = cls()
+        state.first_seen = data["first_seen"]
+        state.amount_count, state.amount_mean, state.amount_m2 = data["amount"]
+        state.windows = {
+            name: WindowCounter.from_dict(width, size, data["windows"][name])
+            for name, (width, size) in VELOCITY_WINDOWS.items()
+        }
+        state.hour_counts = list(data["hour_counts"])
+        state.devices = set(data["devices"])
+        state.countries = set(data["countries"])
+        state.merchants = dict(data["merchants"])
+        return state
+
+
+class OnlineFeatureStore:
+    """
+    Per-user rolling feature aggregates, updated as transactions are seen
+
+    ``FeatureEngineer`` reads behaviour features from here in constant time
+    when no explicit history DataFrame is given. Velocity windows are
+    bucketed (see ``VELOCITY_WINDOWS``), so their edges are approximate to
+    the bucket width; everything else matches a full history scan.
+    """
+
+    def __init__(self) -> Any:
+        self.users = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def record_transaction(self, transaction_data: Dict[str, Any]) -> None:
+        """Adds a processed transaction to its user's aggregates"""
+        user_id = transaction_data["user_id"]
+        with self._lock:
+            state = self.users.get(user_id)
+            if state is None:
+                state = self.users[user_id] = UserFeatureState()
+            state.record(
+                _parse_timestamp(transaction_data["timestamp"]),
+                float(transaction_data["amount"]),
+                transaction_data.get("merchant_category"),
+                transaction_data.get("device_fingerprint"),
+                transaction_data.get("location_country"),
+            )
+
+    def load_history(self, user_id: str, user_history: pd.DataFrame) -> None:
+        """Seeds a user's aggregates from a historical transactions DataFrame"""
+        history = user_history.sort_values("timestamp").astype(object)
+        for row in history.where(history.notna(), None).to_dict("records"):
+            self.record_transaction({**row, "user_id": user_id})
+
+    def fill_features(self, features: TransactionFeatures) -> TransactionFeatures:
+        """Sets history-derived features for ``features.user_id``, if known"""
+        with self._lock:
+            state = self.users.get(features.user_id)
+            if state is None:
+                return features
+            return state.fill_features(features)
+
+    def snapshot(self, filepath: str) -> None:
+        """Writes all user states to ``filepath`` (atomically replaced)"""
+        import joblib
+
+        with self._lock:
+            data = {
+                "version": SNAPSHOT_VERSION,
+                "users": {
+                    user_id: state.to_dict() for user_id, state in self.users.items()
+                },
+            }
+        temp_path = f"{filepath}.tmp"
+        joblib.dump(data, temp_path)
+        os.replace(temp_path, filepath)
+        self.logger.info(f"Feature store snapshot of {len(data['users'])} users saved")
+
+    def restore(self, filepath: str) -> None:
+        """Replaces all user states with a snapshot written by ``snapshot``"""
+        import joblib
+
+        data = joblib.load(filepath)
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise FraudDetectionError(
+                f"Unsupported feature store snapshot version: {data.get('version')}"
+            )
+        users = {
+            user_id: UserFeatureState.from_dict(state)
+            for user_id, state in data["users"].items()
+        }
+        with self._lock:
+            self.users = users
+        self.logger.info(f"Feature store restored with {len(users)} users")
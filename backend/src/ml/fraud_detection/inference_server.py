@@ -0,0 +1,253 @@
+import bisect
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from . import FraudDetectionError
+
+"\nMicro-batching Inference Server for Fraud Detection\nCoalesces concurrent scoring requests into one model call per batch\n"
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BOUNDS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+QUEUE_DELAY_BOUNDS_US = [
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+    25000,
+    50000,
+    100000,
+]
+
+
+class InferenceQueueFullError(FraudDetectionError):
+    """Raised when the inference queue is at capacity"""
+
+
+class BucketHistogram:
+    """
+    Counts of observations per fixed upper bound (plus an overflow bucket)
+    """
+
+    def __init__(self, bounds: List[float]) -> Any:
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, quantile: float) -> float:
+        """Upper bound of the bucket holding ``quantile`` (inf on overflow)"""
+        if not self.count:
+            return 0.0
+        target = quantile * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return self.bounds[index] if index < len(self.bounds) else float("inf")
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [str(bound) for bound in self.bounds] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+        }
+
+
+class MicroBatchInferenceServer:
+    """
+    In-process inference server for the ensemble fraud model
+
+    Callers ``submit`` feature rows and get a Future. A batcher thread takes
+    the first queued request, then keeps collecting until ``max_batch_size``
+    rows are waiting or ``max_wait_us`` has passed since that request was
+    enqueued. Each batch is stacked into one feature matrix and scored by a
+    worker pool with a single ``predict_with_components`` call; every Future
+    then resolves to its own slice of ``(scores, model_predictions)``.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        max_batch_size: int = 64,
+        max_wait_us: int = 2000,
+        workers: int = 2,
+        max_queue_size: int = 10000,
+    ) -> Any:
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+        self.workers = workers
+        self.logger = logging.getLogger(__name__)
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._executor = None
+        self._batcher = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._batch_sizes = BucketHistogram(BATCH_SIZE_BOUNDS)
+        self._queue_delays = BucketHistogram(QUEUE_DELAY_BOUNDS_US)
+        self._failed_batches = 0
+
+    def __enter__(self) -> "MicroBatchInferenceServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start the batcher thread and worker pool"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="fraud-inference"
+            )
+            self._batcher = threading.Thread(
+                target=self._run_batcher, name="fraud-inference-batcher", daemon=True
+            )
+            self._batcher.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Score whatever is queued, then stop the batcher and workers"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        self._queue.put(None)
+        self._batcher.join(timeout)
+        self._executor.shutdown(wait=True)
+
+    def submit(self, features: pd.DataFrame) -> Future:
+        """
+        Queue feature rows for scoring
+
+        Args:
+            features: Feature rows (usually one) for the model
+
+        Returns:
+            Future: Resolves to ``(scores, model_predictions)`` for these rows
+        """
+        future = Future()
+        with self._lock:
+            if not self._running:
+                raise FraudDetectionError("Inference server is not running")
+            try:
+                self._queue.put_nowait((features, future, time.perf_counter()))
+            except queue.Full:
+                raise InferenceQueueFullError("Inference queue is full")
+        return future
+
+    def predict_with_components(
+        self, features: pd.DataFrame, timeout: Optional[float] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Blocking ``submit``; same result as the model's own method"""
+        return self.submit(features).result(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch-size and queue-delay (us) histograms for tuning"""
+        with self._lock:
+            return {
+                "running": self._running,
+                "queue_depth": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_us": self.max_wait_us,
+                "failed_batches": self._failed_batches,
+                "batch_size": self._batch_sizes.to_dict(),
+                "queue_delay_us": self._queue_delays.to_dict(),
+            }
+
+    def _run_batcher(self) -> None:
+        """Collect requests into batches and hand them to the workers
+
+        ``stop`` enqueues a ``None`` sentinel after refusing new requests, so
+        everything ahead of it is still scored.
+        """
+        stopping = False
+        while not stopping:
+            request = self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            rows = len(request[0])
+            deadline = request[2] + self.max_wait_us / 1e6
+            while rows < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    request = (
+                        self._queue.get(timeout=remaining)
+                        if remaining > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                rows += len(request[0])
+            self._executor.submit(self._score_batch, batch)
+
+    def _score_batch(self, batch: List[Tuple[pd.DataFrame, Future, float]]) -> None:
+        """Score one coalesced batch and resolve each request's Future"""
+        started = time.perf_counter()
+        try:
+            frames = [features for features, _, _ in batch]
+            columns = frames[0].columns
+            if all(frame.columns.equals(columns) for frame in frames):
+                matrix = pd.DataFrame(
+                    np.vstack([frame.to_numpy(dtype=float) for frame in frames]),
+                    columns=columns,
+                )
+            else:
+                matrix = pd.concat(frames, ignore_index=True)
+            scores, model_predictions = self.model.predict_with_components(matrix)
+            scores = np.asarray(scores)
+            model_predictions = {
+                name: np.asarray(predictions)
+                for name, predictions in model_predictions.items()
+            }
+        except Exception as e:
+            with self._lock:
+                self._failed_batches += 1
+            self.logger.error(f"Inference batch of {len(batch)} failed: {str(e)}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self._batch_sizes.record(len(matrix))
+            for _, _, enqueued_at in batch:
+                self._queue_delays.record((started - enqueued_at) * 1e6)
+        offset = 0
+        for features, future, _ in batch:
+            end = offset + len(features)
+            future.set_result(
+                (
+                    scores[offset:end],
+                    {
+                        name: predictions[offset:end]
+                        for name, predictions in model_predictions.items()
+                    },
+                )
+            )
+            offset = end
@@ -0,0 +1,274 @@
+import gc
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from . import FraudDetectionError, FraudModelBase, ModelNotTrainedError
+from .compiled_trees import CompiledTreeModel, compile_tree_model
+
+"\nModel Registry for Fraud Detection\nVersioned ensemble artifacts with a manifest, loaded lazily on first use\n"
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FORMAT = 1
+ENSEMBLE_SETTINGS = [
+    "voting_strategy",
+    "anomaly_weight",
+    "supervised_weight",
+    "execution_mode",
+    "max_workers",
+    "model_costs",
+    "cascade_band",
+]
+
+
+class LazyModel(FraudModelBase):
+    """
+    Stand-in for one registry artifact; loads it on first prediction
+
+    Status fields (``is_trained``, ``model_version``, ``training_timestamp``)
+    come from the manifest, so listing a model never loads it.
+    """
+
+    def __init__(self, directory: str, entry: Dict[str, Any]) -> Any:
+        super().__init__(entry.get("config", {}))
+        self.directory = directory
+        self.entry = entry
+        self.feature_columns = list(entry.get("feature_columns", []))
+        self.model_version = entry.get("model_version", self.model_version)
+        self.training_timestamp = entry.get("training_timestamp")
+        self.is_trained = entry.get("is_trained", True)
+        self._loaded = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded is not None
+
+    def load(self) -> FraudModelBase:
+        """The underlying model, reading its artifact on first call"""
+        if self._loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    path = os.path.join(self.directory, self.entry["path"])
+                    if self.entry["format"] == "tree_arrays":
+                        self._loaded = CompiledTreeModel.load_arrays(path)
+                    else:
+                        import joblib
+
+                        self._loaded = joblib.load(path)
+                    self.logger.info(f"Loaded {self.entry['format']} artifact {path}")
+        return self._loaded
+
+    def train(
+        self, training_data: pd.DataFrame, labels: Optional[pd.Series] = None
+    ) -> None:
+        raise FraudDetectionError("Registry models are trained before publishing")
+
+    def predict(self, features: pd.DataFrame) -> np.ndarray:
+        if not self.is_trained:
+            raise ModelNotTrainedError("Model must be trained before prediction")
+        return self.load().predict(features)
+
+    def get_feature_importance(self) -> Dict[str, float]:
+        return self.load().get_feature_importance()
+
+
+class ModelRegistry:
+    """
+    Versioned fraud ensemble artifacts on disk
+
+    Each published version is a directory holding ``manifest.json`` and one
+    artifact per sub-model: a joblib dump, or for tree models that export
+    cleanly a directory of ``.npy`` node arrays scored by NumPy alone. The
+    ``CURRENT`` file names the version served by default.
+
+    Loading builds the ensemble from the manifest with ``LazyModel``
+    sub-models, so start-up reads no model weights (and imports no
+    TensorFlow) until a model is first used. ``preload`` loads everything
+    up front instead, for a pre-fork master whose workers then share the
+    pages copy-on-write; compiled tree arrays are memory-mapped and shared
+    through the page cache either way.
+    """
+
+    def __init__(self, root: str) -> Any:
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+
+    def _version_dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def list_versions(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, MANIFEST_FILE))
+        )
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as current_file:
+                return current_file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_current(self, version: str) -> None:
+        """Points ``CURRENT`` at ``version`` (atomically replaced)"""
+        if version not in self.list_versions():
+            raise FraudDetectionError(f"Unknown model version: {version}")
+        temp_path = os.path.join(self.root, f"{CURRENT_FILE}.tmp")
+        with open(temp_path, "w") as current_file:
+            current_file.write(version)
+        os.replace(temp_path, os.path.join(self.root, CURRENT_FILE))
+
+    def manifest(self, version: Optional[str] = None) -> Dict[str, Any]:
+        version = version or self.current_version()
+        if version is None:
+            raise FraudDetectionError("No model version has been published")
+        with open(os.path.join(self._version_dir(version), MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def publish(
+        self,
+        ensemble: Any,
+        sample: Optional[pd.DataFrame] = None,
+        version: Optional[str] = None,
+        make_current: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Writes a trained ensemble as a new registry version
+
+        Args:
+            ensemble: Trained EnsembleFraudModel
+            sample: Feature rows used to verify compiled tree exports; tree
+                models are only compiled when a sample is given
+            version: Version name (defaults to a timestamp)
+            make_current: Point ``CURRENT`` at the new version
+
+        Returns:
+            Dict[str, Any]: The written manifest
+        """
+        import joblib
+
+        if not ensemble.is_trained:
+            raise ModelNotTrainedError("Model must be trained before publishing")
+        version = version or datetime.now().strftime("%Y%m%d%H%M%S%f")
+        directory = self._version_dir(version)
+        if os.path.exists(directory):
+            raise FraudDetectionError(f"Model version already exists: {version}")
+        os.makedirs(directory)
+        entries = {}
+        for model_name, model in ensemble.models.items():
+            if isinstance(model, LazyModel):
+                model = model.load()
+            entry = {
+                "class": type(model).__name__,
+                "config": model.config,
+                "feature_columns": list(model.feature_columns),
+                "model_version": model.model_version,
+                "training_timestamp": model.training_timestamp,
+                "is_trained": model.is_trained,
+            }
+            compiled = None
+            if sample is not None and model.is_trained:
+                compiled = (
+                    model
+                    if isinstance(model, CompiledTreeModel)
+                    else compile_tree_model(model, sample)
+                )
+            if compiled is not None:
+                entry.update(format="tree_arrays", path=f"{model_name}.trees")
+                compiled.save_arrays(os.path.join(directory, entry["path"]))
+            else:
+                entry.update(format="joblib", path=f"{model_name}.joblib")
+                joblib.dump(model, os.path.join(directory, entry["path"]))
+            entries[model_name] = entry
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "version": version,
+            "created_at": datetime.now().isoformat(),
+            "model_version": ensemble.model_version,
+            "training_timestamp": ensemble.training_timestamp,
+            "feature_columns": list(ensemble.feature_columns),
+            "model_weights": dict(ensemble.model_weights),
+            "settings": {
+                name: ensemble.config[name]
+                for name in ENSEMBLE_SETTINGS
+                if name in ensemble.config
+            },
+            "models": entries,
+        }
+        with open(os.path.join(directory, MANIFEST_FILE), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, default=str)
+        if make_current:
+            self.set_current(version)
+        self.logger.info(
+            f"Published model version {version}: "
+            + ", ".join(f"{name} ({e['format']})" for name, e in entries.items())
+        )
+        return manifest
+
+    def load_ensemble(
+        self,
+        model_config: Optional[Dict[str, Any]] = None,
+        version: Optional[str] = None,
+    ) -> Any:
+        """
+        Builds an EnsembleFraudModel whose sub-models load on first use
+
+        Args:
+            model_config: Ensemble settings overriding the published ones
+            version: Version to load (defaults to ``CURRENT``)
+
+        Returns:
+            EnsembleFraudModel: Trained ensemble backed by the registry
+        """
+        from .ensemble_model import EnsembleFraudModel
+
+        manifest = self.manifest(version)
+        overrides = {
+            name: value
+            for name, value in (model_config or {}).items()
+            if name in ENSEMBLE_SETTINGS
+        }
+        ensemble = EnsembleFraudModel(
+            {**manifest["settings"], **overrides, "models": {}}
+        )
+        directory = self._version_dir(manifest["version"])
+        ensemble.model_configs = {
+            name: entry["config"] for name, entry in manifest["models"].items()
+        }
+        ensemble.models = {
+            name: LazyModel(directory, entry)
+            for name, entry in manifest["models"].items()
+        }
+        ensemble.model_weights = dict(manifest["model_weights"])
+        ensemble.feature_columns = list(manifest["feature_columns"])
+        ensemble.model_version = manifest["model_version"]
+        ensemble.training_timestamp = manifest["training_timestamp"]
+        ensemble.is_trained = True
+        self.logger.info(f"Registered model version {manifest['version']} (lazy)")
+        return ensemble
+
+    def preload(self, ensemble: Any, freeze: bool = True) -> None:
+        """
+        Loads every lazy sub-model now
+
+        Call in a pre-fork master (e.g. gunicorn ``--preload``) so workers
+        inherit loaded models. ``freeze`` moves them to the permanent GC
+        generation; otherwise collections in each worker touch their
+        objects and un-share the copy-on-write pages.
+        """
+        for model in ensemble.models.values():
+            if isinstance(model, LazyModel):
+                model.load()
+        if freeze:
+            gc.collect()
+            gc.freeze()
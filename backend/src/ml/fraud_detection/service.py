@@ -3,17 +3,17 @@ from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
-from . import (
-    EnsembleFraudModel,
-    FeatureEngineer,
-    FraudAlert,
-    FraudDetectionError,
-    RealTimeFraudDetector,
-    RiskLevel,
-)
+from . import FeatureEngineer, FraudAlert, FraudDetectionError, RiskLevel
+from .ensemble_model import EnsembleFraudModel, RealTimeFraudDetector
+from .feature_store import OnlineFeatureStore
+from .inference_server import MicroBatchInferenceServer
+from .model_registry import ModelRegistry
 
 logger = logging.getLogger(__name__)
 
+# Training rows kept to verify compiled tree exports when publishing
+REGISTRY_SAMPLE_ROWS = 1000
+
 
 class FraudDetectionService:
 
@@ -21,9 +21,17 @@ class FraudDetectionService:
         self.config = config
         self.ensemble_model = None
         self.real_time_detector = None
-        self.feature_engineer = FeatureEngineer()
+        self.inference_server = None
+        self.feature_store = OnlineFeatureStore()
+        self.feature_engineer = FeatureEngineer(self.feature_store)
         self.logger = logging.getLogger(__name__)
         self.model_path = config.get("model_path", "/tmp/fraud_model.joblib")
+        self.feature_store_path = config.get(
+            "feature_store_path", "/tmp/fraud_feature_store.joblib"
+        )
+        registry_path = config.get("model_registry_path")
+        self.model_registry = ModelRegistry(registry_path) if registry_path else None
+        self.preload_models = config.get("preload_models", False)
         self.auto_retrain = config.get("auto_retrain", True)
         self.retrain_threshold_days = config.get("retrain_threshold_days", 30)
         self.performance_metrics = {
@@ -34,12 +42,15 @@ class FraudDetectionService:
             "last_retrain": None,
         }
         self.alerts_storage = []
+        self._restore_feature_store()
         self._initialize_model()
 
     def _initialize_model(self) -> Any:
         """Initialize the fraud detection model"""
         try:
-            if self._model_exists():
+            if self.model_registry and self.model_registry.current_version():
+                self.load_from_registry()
+            elif self._model_exists():
                 self.load_model()
             else:
                 model_config = self.config.get(
@@ -48,12 +59,45 @@ class FraudDetectionService:
                 self.ensemble_model = EnsembleFraudModel(model_config)
                 self.logger.info("Created new fraud detection model")
             if self.ensemble_model and self.ensemble_model.is_trained:
-                self.real_time_detector = RealTimeFraudDetector(self.ensemble_model)
+                self.real_time_detector = self._create_detector()
                 self.logger.info("Real-time fraud detector initialized")
         except Exception as e:
             self.logger.error(f"Model initialization failed: {str(e)}")
             raise FraudDetectionError(f"Model initialization failed: {str(e)}")
 
+    def _create_detector(self) -> RealTimeFraudDetector:
+        """Real-time detector reading behaviour features from the feature store
+
+        With an ``inference_server`` config section, single-transaction
+        scoring goes through a micro-batching server so concurrent requests
+        share model calls.
+        """
+        if self.inference_server is not None:
+            self.inference_server.stop()
+            self.inference_server = None
+        server_config = self.config.get("inference_server")
+        if server_config:
+            self.inference_server = MicroBatchInferenceServer(
+                self.ensemble_model, **server_config
+            )
+            self.inference_server.start()
+        return RealTimeFraudDetector(
+            self.ensemble_model,
+            feature_store=self.feature_store,
+            inference_server=self.inference_server,
+        )
+
+    def _restore_feature_store(self) -> None:
+        """Load the last feature store snapshot, if there is a usable one"""
+        import os
+
+        if not os.path.exists(self.feature_store_path):
+            return
+        try:
+            self.feature_store.restore(self.feature_store_path)
+        except Exception as e:
+            self.logger.warning(f"Feature store snapshot not restored: {str(e)}")
+
     def _get_default_model_config(self) -> Dict[str, Any]:
         """Get default model configuration"""
         return {
@@ -112,7 +156,7 @@ class FraudDetectionService:
                 )
                 self.ensemble_model = EnsembleFraudModel(model_config)
             self.ensemble_model.train(training_data, labels)
-            self.real_time_detector = RealTimeFraudDetector(self.ensemble_model)
+            self.real_time_detector = self._create_detector()
             training_results = {
                 "training_samples": len(training_data),
                 "features": list(training_data.columns),
@@ -133,7 +177,7 @@ class FraudDetectionService:
                         val_labels, val_pred_binary, output_dict=True
                     )
                     training_results["classification_report"] = report
-            self.save_model()
+            self.save_model(sample=training_data.head(REGISTRY_SAMPLE_ROWS))
             self.performance_metrics["last_retrain"] = datetime.now()
             self.logger.info("Model training completed successfully")
             return training_results
@@ -162,6 +206,7 @@ class FraudDetectionService:
                     "Real-time detector not initialized. Train model first."
                 )
             alert = self.real_time_detector.detect_fraud(transaction_data, user_history)
+            self.feature_store.record_transaction(transaction_data)
             self.alerts_storage.append(alert)
             self.performance_metrics["total_predictions"] += 1
             if alert.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]:
@@ -183,6 +228,9 @@ class FraudDetectionService:
         """
         Detect fraud for multiple transactions in batch
 
+        Features for all transactions are extracted into one matrix and each
+        model predicts once over it (see ``RealTimeFraudDetector.detect_batch``).
+
         Args:
             transactions: List of transaction data dictionaries
             user_histories: Dictionary mapping user_id to historical transactions
@@ -191,12 +239,25 @@ class FraudDetectionService:
             List[FraudAlert]: List of fraud detection results
         """
         try:
-            alerts = []
+            if not self.real_time_detector:
+                raise FraudDetectionError(
+                    "Real-time detector not initialized. Train model first."
+                )
+            alerts = self.real_time_detector.detect_batch(transactions, user_histories)
             for transaction in transactions:
-                user_id = transaction.get("user_id")
-                user_history = user_histories.get(user_id) if user_histories else None
-                alert = await self.detect_fraud(transaction, user_history)
-                alerts.append(alert)
+                self.feature_store.record_transaction(transaction)
+            self.alerts_storage.extend(alerts)
+            high_risk = sum(
+                1
+                for alert in alerts
+                if alert.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]
+            )
+            self.performance_metrics["total_predictions"] += len(alerts)
+            self.performance_metrics["fraud_detected"] += high_risk
+            if high_risk:
+                self.logger.warning(
+                    f"{high_risk} high-risk transactions detected in batch of {len(alerts)}"
+                )
             self.logger.info(
                 f"Batch fraud detection completed for {len(transactions)} transactions"
             )
@@ -220,6 +281,8 @@ class FraudDetectionService:
             "real_time_detector_ready": self.real_time_detector is not None,
             "performance_metrics": self.performance_metrics.copy(),
         }
+        if self.inference_server is not None:
+            status["inference_server"] = self.inference_server.get_stats()
         if self.ensemble_model:
             status.update(
                 {
@@ -302,11 +365,32 @@ class FraudDetectionService:
             ),
         }
 
-    def save_model(self) -> Any:
-        """Save the trained model to disk"""
+    def save_model(self, sample: Optional[pd.DataFrame] = None) -> Any:
+        """Save the trained model and a feature store snapshot to disk
+
+        With a model registry configured, the ensemble is published as a new
+        registry version; ``sample`` rows let tree models be compiled.
+        """
         if self.ensemble_model and self.ensemble_model.is_trained:
-            self.ensemble_model.save_model(self.model_path)
-            self.logger.info(f"Model saved to {self.model_path}")
+            if self.model_registry:
+                self.model_registry.publish(self.ensemble_model, sample=sample)
+            else:
+                self.ensemble_model.save_model(self.model_path)
+                self.logger.info(f"Model saved to {self.model_path}")
+        self.save_feature_store()
+
+    def load_from_registry(self, version: Optional[str] = None) -> Any:
+        """Serve a registry version; sub-models load lazily unless preloading"""
+        self.ensemble_model = self.model_registry.load_ensemble(
+            self.config.get("model_config"), version
+        )
+        if self.preload_models:
+            self.model_registry.preload(self.ensemble_model)
+        self.real_time_detector = self._create_detector()
+
+    def save_feature_store(self) -> None:
+        """Snapshot the online feature store so a restart keeps user profiles"""
+        self.feature_store.snapshot(self.feature_store_path)
 
     def load_model(self) -> Any:
         """Load a trained model from disk"""
@@ -317,7 +401,7 @@ class FraudDetectionService:
             self.ensemble_model = EnsembleFraudModel(model_config)
             self.ensemble_model.load_model(self.model_path)
             if self.ensemble_model.is_trained:
-                self.real_time_detector = RealTimeFraudDetector(self.ensemble_model)
+                self.real_time_detector = self._create_detector()
                 self.logger.info(f"Model loaded from {self.model_path}")
             else:
                 self.logger.warning("Loaded model is not trained")
@@ -421,6 +505,7 @@ def get_fraud_service(config: Optional[Dict[str, Any]] = None) -> FraudDetection
         if config is None:
             config = {
                 "model_path": "/tmp/fraud_model.joblib",
+                "feature_store_path": "/tmp/fraud_feature_store.joblib",
                 "auto_retrain": True,
                 "retrain_threshold_days": 30,
             }
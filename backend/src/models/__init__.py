@@ -10,17 +10,26 @@ from .transaction import (
 )
 from .audit_log import AuditLog, AuditEventType, AuditSeverity
 from .security import SecurityEvent, SecurityEventType
-from .ledger import LedgerEntry, LedgerAccountType
+from .idempotency import IdempotencyKey
+from .ledger import (
+    LedgerEntry,
+    LedgerAccountType,
+    LedgerBalance,
+    LedgerBalanceCheckpoint,
+)
 
 # Define a list of all models for easy import and use in database operations
 ALL_MODELS = [
     User,
     LedgerEntry,
+    LedgerBalance,
+    LedgerBalanceCheckpoint,
     Account,
     Card,
     Transaction,
     AuditLog,
     SecurityEvent,
+    IdempotencyKey,
 ]
 
 __all__ = [
@@ -48,6 +57,9 @@ __all__ = [
     "SecurityEventType",
     "LedgerEntry",
     "LedgerAccountType",
+    "LedgerBalance",
+    "LedgerBalanceCheckpoint",
+    "IdempotencyKey",
     "AuditSeverity",
     "ALL_MODELS",
 ]
@@ -0,0 +1,49 @@
+"""Idempotency key model"""
+
+from typing import Any
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, UniqueConstraint
+from .database import Base
+
+
+class IdempotencyKey(Base):
+    """Stored outcome of a request made with an ``Idempotency-Key`` header.
+
+    Database fallback of the idempotency store: one row per user and key,
+    ``in_progress`` (held by ``lock_token``) while the first request runs
+    and ``completed`` with its response once it finishes. Either state ends
+    at ``expires_at``, after which the key may be reused.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String(36), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_fingerprint = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default="in_progress")
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    lock_token = Column(String(32), nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),
+        Index("idx_idempotency_expires_at", "expires_at"),
+    )
+
+    def to_dict(self) -> Any:
+        """Convert to dictionary"""
+        return {
+            "key": self.key,
+            "status": self.status,
+            "response_status": self.response_status,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+        }
@@ -5,7 +5,17 @@ import uuid
 from datetime import datetime, timezone
 from decimal import Decimal
 from enum import Enum as PyEnum
-from sqlalchemy import Column, DateTime, ForeignKey, Index, Numeric, String, Text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from .database import Base
 
 
@@ -60,6 +70,13 @@ class LedgerEntry(Base):
         Index("idx_ledger_journal_entry", "journal_entry_id"),
         Index("idx_ledger_account_name", "account_name"),
         Index("idx_ledger_created_at", "created_at"),
+        Index("idx_ledger_created_at_id", "created_at", "id"),
+        Index(
+            "idx_ledger_account_currency_created",
+            "account_name",
+            "currency",
+            "created_at",
+        ),
     )
 
     def to_dict(self) -> Any:
@@ -81,3 +98,93 @@ class LedgerEntry(Base):
 
     def __repr__(self) -> Any:
         return f"<LedgerEntry {self.account_name} D:{self.debit_amount} C:{self.credit_amount}>"
+
+
+class LedgerBalance(Base):
+    """Running debit/credit totals per ledger account and currency.
+
+    Updated in the same DB transaction as the ledger entries it summarizes,
+    so the current balance of an account is a single-row read.
+    """
+
+    __tablename__ = "ledger_balances"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    account_name = Column(String(100), nullable=False)
+    currency = Column(String(3), nullable=False)
+    total_debit = Column(
+        Numeric(precision=20, scale=8), default=Decimal("0.00000000"), nullable=False
+    )
+    total_credit = Column(
+        Numeric(precision=20, scale=8), default=Decimal("0.00000000"), nullable=False
+    )
+    entry_count = Column(Integer, default=0, nullable=False)
+    last_entry_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "account_name", "currency", name="uq_ledger_balance_account_currency"
+        ),
+    )
+
+    def to_dict(self) -> Any:
+        """Convert to dictionary"""
+        return {
+            "account_name": self.account_name,
+            "currency": self.currency,
+            "total_debit": float(self.total_debit),
+            "total_credit": float(self.total_credit),
+            "entry_count": self.entry_count,
+            "last_entry_at": (
+                self.last_entry_at.isoformat() if self.last_entry_at else None
+            ),
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def __repr__(self) -> Any:
+        return f"<LedgerBalance {self.account_name} {self.currency} D:{self.total_debit} C:{self.total_credit}>"
+
+
+class LedgerBalanceCheckpoint(Base):
+    """Totals of all entries created up to ``as_of`` for an account/currency.
+
+    Point-in-time balances are the latest checkpoint at or before the
+    requested time plus the entries created since that checkpoint.
+    """
+
+    __tablename__ = "ledger_balance_checkpoints"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    account_name = Column(String(100), nullable=False)
+    currency = Column(String(3), nullable=False)
+    as_of = Column(DateTime(timezone=True), nullable=False)
+    total_debit = Column(
+        Numeric(precision=20, scale=8), default=Decimal("0.00000000"), nullable=False
+    )
+    total_credit = Column(
+        Numeric(precision=20, scale=8), default=Decimal("0.00000000"), nullable=False
+    )
+    entry_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        Index(
+            "idx_ledger_checkpoint_account_currency_as_of",
+            "account_name",
+            "currency",
+            "as_of",
+        ),
+    )
+
+    def __repr__(self) -> Any:
+        return f"<LedgerBalanceCheckpoint {self.account_name} {self.currency} @{self.as_of}>"
@@ -102,9 +102,7 @@ class User(Base):
     wallets = relationship(
         "Account", back_populates="user", cascade="all, delete-orphan"
     )
-    kyc_records = relationship(
-        "KYCRecord", back_populates="user", cascade="all, delete-orphan"
-    )
+    cards = relationship("Card", back_populates="user")
     __table_args__ = (
         Index("idx_user_email_status", "email", "status"),
         Index("idx_user_kyc_status", "kyc_status"),
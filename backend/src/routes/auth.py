@@ -8,7 +8,7 @@ import jwt
 import pyotp
 import qrcode
 from flask import Blueprint, current_app, g, jsonify, request
-from ..utils.auth import token_required
+from ..utils.auth import principal_cache, token_required
 from sqlalchemy.exc import IntegrityError
 from ..models.account import Account, AccountStatus, AccountType
 from ..models.audit_log import AuditEventType, AuditSeverity
@@ -563,6 +563,7 @@ def refresh_token() -> Any:
 @token_required
 def logout() -> Any:
     """User logout (optional: blacklist token)"""
+    principal_cache.invalidate_user(g.current_user.id)
     audit_logger.log_event(
         event_type=AuditEventType.USER_LOGOUT,
         description="User logged out",
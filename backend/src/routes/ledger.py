@@ -1,15 +1,31 @@
 from typing import Any
+import csv
+import io
+import json
 import logging
 import uuid
 from datetime import datetime, timezone
 from decimal import Decimal
-from flask import Blueprint, g, jsonify, request
+from flask import Blueprint, Response, g, jsonify, request, stream_with_context
 from ..models.ledger import LedgerEntry, LedgerAccountType
-from sqlalchemy import func, select
+from sqlalchemy import select
 from ..models.audit_log import AuditEventType, AuditSeverity
 from ..models.database import db
 from ..utils.auth import admin_required
+from ..utils.pagination import (
+    count_rows,
+    encode_cursor,
+    estimate_row_count,
+    keyset_page,
+)
 from ..security.audit_logger import audit_logger
+from ..services.ledger_service import (
+    apply_entries_to_balances,
+    create_balance_checkpoints,
+    get_balances,
+    get_balances_as_of,
+    reconcile_ledger_balances,
+)
 
 ledger_bp = Blueprint("ledger", __name__, url_prefix="/api/v1/ledger")
 logger = logging.getLogger(__name__)
@@ -113,6 +129,7 @@ def create_journal_entry() -> Any:
             )
             ledger_entries.append(ledger_entry)
         db.session.add_all(ledger_entries)
+        apply_entries_to_balances(db.session, ledger_entries)
         db.session.commit()
         audit_logger.log_event(
             event_type=AuditEventType.SYSTEM_EVENT,
@@ -146,7 +163,11 @@ def create_journal_entry() -> Any:
 @ledger_bp.route("/balance/<account_name>", methods=["GET"])
 @admin_required
 def get_account_balance(account_name: Any) -> Any:
-    """Get the current balance for a specific ledger account"""
+    """Get the balance of a ledger account from its running-total snapshot
+
+    Optional query parameters: ``currency`` restricts the totals to one
+    currency and ``as_of`` (ISO 8601) returns the balance at that time.
+    """
     try:
         if account_name not in CHART_OF_ACCOUNTS:
             return (
@@ -163,67 +184,177 @@ def get_account_balance(account_name: Any) -> Any:
             LedgerAccountType.ASSET,
             LedgerAccountType.EXPENSE,
         ]
-        balance_query = select(
-            func.sum(LedgerEntry.debit_amount).label("total_debit"),
-            func.sum(LedgerEntry.credit_amount).label("total_credit"),
-        ).filter(LedgerEntry.account_name == account_name)
-        result = db.session.execute(balance_query).one_or_none()
-        total_debit = (
-            result.total_debit if result and result.total_debit else Decimal("0.00")
+        currency = request.args.get("currency")
+        as_of = request.args.get("as_of")
+        if as_of:
+            try:
+                as_of = _parse_timestamp(as_of)
+            except ValueError:
+                return (
+                    jsonify(
+                        {
+                            "error": "as_of must be an ISO 8601 timestamp",
+                            "code": "INVALID_AS_OF",
+                        }
+                    ),
+                    400,
+                )
+            balances = get_balances_as_of(db.session, account_name, as_of, currency)
+        else:
+            balances = get_balances(db.session, account_name, currency)
+        total_debit = sum((d for d, _ in balances.values()), Decimal("0.00"))
+        total_credit = sum((c for _, c in balances.values()), Decimal("0.00"))
+
+        def signed(debit: Any, credit: Any) -> Any:
+            return debit - credit if is_debit_normal else credit - debit
+
+        response = {
+            "account_name": account_name,
+            "account_type": account_info["type"].value,
+            "balance": float(signed(total_debit, total_credit)),
+            "total_debit": float(total_debit),
+            "total_credit": float(total_credit),
+            "balances": {
+                code: {
+                    "balance": float(signed(debit, credit)),
+                    "total_debit": float(debit),
+                    "total_credit": float(credit),
+                }
+                for code, (debit, credit) in balances.items()
+            },
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        if as_of:
+            response["as_of"] = as_of.isoformat()
+        return (jsonify(response), 200)
+    except Exception as e:
+        logger.error(f"Error getting account balance: {str(e)}", exc_info=True)
+        return (
+            jsonify({"error": "Internal server error", "code": "INTERNAL_ERROR"}),
+            500,
+        )
+
+
+@ledger_bp.route("/balances/checkpoint", methods=["POST"])
+@admin_required
+def checkpoint_balances() -> Any:
+    """Write point-in-time balance checkpoints for every ledger account"""
+    try:
+        checkpoints = create_balance_checkpoints(db.session)
+        return (
+            jsonify(
+                {
+                    "success": True,
+                    "checkpoints": len(checkpoints),
+                    "as_of": (
+                        checkpoints[0]["as_of"].isoformat() if checkpoints else None
+                    ),
+                }
+            ),
+            201,
         )
-        total_credit = (
-            result.total_credit if result and result.total_credit else Decimal("0.00")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating balance checkpoints: {str(e)}", exc_info=True)
+        return (
+            jsonify({"error": "Internal server error", "code": "INTERNAL_ERROR"}),
+            500,
         )
-        if is_debit_normal:
-            balance = total_debit - total_credit
-        else:
-            balance = total_credit - total_debit
+
+
+@ledger_bp.route("/balances/reconcile", methods=["POST"])
+@admin_required
+def reconcile_balances() -> Any:
+    """Verify balance snapshots against the raw ledger entries"""
+    try:
+        repair = bool((request.get_json(silent=True) or {}).get("repair", False))
+        mismatches = reconcile_ledger_balances(db.session, repair=repair)
         return (
             jsonify(
                 {
-                    "account_name": account_name,
-                    "account_type": account_info["type"].value,
-                    "balance": float(balance),
-                    "total_debit": float(total_debit),
-                    "total_credit": float(total_credit),
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "consistent": not mismatches,
+                    "repaired": repair and bool(mismatches),
+                    "mismatches": mismatches,
                 }
             ),
             200,
         )
     except Exception as e:
-        logger.error(f"Error getting account balance: {str(e)}", exc_info=True)
+        db.session.rollback()
+        logger.error(f"Error reconciling ledger balances: {str(e)}", exc_info=True)
         return (
             jsonify({"error": "Internal server error", "code": "INTERNAL_ERROR"}),
             500,
         )
 
 
+EXPORT_COLUMNS = (
+    "id",
+    "journal_entry_id",
+    "transaction_id",
+    "account_type",
+    "account_name",
+    "debit_amount",
+    "credit_amount",
+    "currency",
+    "description",
+    "reference_number",
+    "created_at",
+    "posted_at",
+)
+EXPORT_BATCH_SIZE = 1000
+MAX_PAGE_SIZE = 500
+entries_table = LedgerEntry.__table__
+
+
 @ledger_bp.route("/entries", methods=["GET"])
 @admin_required
 def get_ledger_entries() -> Any:
-    """Get all ledger entries (Admin only)"""
+    """Get ledger entries newest first with keyset pagination (Admin only)
+
+    Pass the returned ``next_cursor`` as ``cursor`` to fetch the next page.
+    ``include_total=true`` adds ``estimated_total``: the table's estimated
+    size, or the exact count when filtered by ``account_name``. Requests
+    that still send ``page`` (and no cursor) get that page by offset, with
+    the ``page``, ``total`` and ``pages`` fields of the old response.
+    """
     try:
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 50, type=int)
-        stmt = select(LedgerEntry).order_by(LedgerEntry.created_at.desc())
-        offset = (page - 1) * per_page
-        paginated_stmt = stmt.limit(per_page).offset(offset)
-        entries = db.session.execute(paginated_stmt).scalars().all()
-        count_stmt = select(func.count()).select_from(LedgerEntry)
-        total_entries = db.session.execute(count_stmt).scalar_one()
-        total_pages = (total_entries + per_page - 1) // per_page
-        entry_list = [entry.to_dict() for entry in entries]
+        per_page = min(
+            max(request.args.get("per_page", 50, type=int), 1), MAX_PAGE_SIZE
+        )
+        stmt = select(entries_table)
+        account_name = request.args.get("account_name")
+        if account_name:
+            stmt = stmt.where(entries_table.c.account_name == account_name)
+        page = request.args.get("page", type=int)
+        cursor = request.args.get("cursor")
+        if page is not None and not cursor:
+            return (jsonify(_offset_page(stmt, max(page, 1), per_page)), 200)
+        try:
+            entries, next_cursor = keyset_page(
+                db.session, stmt, entries_table, per_page, cursor
+            )
+        except ValueError:
+            return (
+                jsonify({"error": "Invalid cursor", "code": "INVALID_CURSOR"}),
+                400,
+            )
+        pagination = {
+            "per_page": per_page,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        }
+        if request.args.get("include_total", "false").lower() == "true":
+            pagination["estimated_total"] = (
+                count_rows(db.session, stmt)
+                if account_name
+                else estimate_row_count(db.session, entries_table)
+            )
         return (
             jsonify(
                 {
-                    "entries": entry_list,
-                    "pagination": {
-                        "page": page,
-                        "per_page": per_page,
-                        "total": total_entries,
-                        "pages": total_pages,
-                    },
+                    "entries": [_entry_dict(entry) for entry in entries],
+                    "pagination": pagination,
                 }
             ),
             200,
@@ -234,3 +365,152 @@ def get_ledger_entries() -> Any:
             jsonify({"error": "Internal server error", "code": "INTERNAL_ERROR"}),
             500,
         )
+
+
+def _offset_page(stmt: Any, page: int, per_page: int) -> dict:
+    """One ``page`` of ``stmt`` by offset, in the response shape of old clients"""
+    entries = db.session.execute(
+        stmt.order_by(entries_table.c.created_at.desc(), entries_table.c.id.desc())
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    ).all()
+    total = count_rows(db.session, stmt)
+    pages = (total + per_page - 1) // per_page
+    next_cursor = (
+        encode_cursor(entries[-1].created_at, entries[-1].id)
+        if entries and page < pages
+        else None
+    )
+    return {
+        "entries": [_entry_dict(entry) for entry in entries],
+        "pagination": {
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "pages": pages,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        },
+    }
+
+
+def _entry_dict(entry: Any) -> dict:
+    """``LedgerEntry.to_dict`` for a ledger entry row"""
+    return {
+        "id": entry.id,
+        "journal_entry_id": entry.journal_entry_id,
+        "transaction_id": entry.transaction_id,
+        "account_type": entry.account_type,
+        "account_name": entry.account_name,
+        "debit_amount": float(entry.debit_amount),
+        "credit_amount": float(entry.credit_amount),
+        "currency": entry.currency,
+        "description": entry.description,
+        "reference_number": entry.reference_number,
+        "created_at": entry.created_at.isoformat() if entry.created_at else None,
+        "posted_at": entry.posted_at.isoformat() if entry.posted_at else None,
+    }
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """ISO 8601 timestamp in UTC; one without an offset is taken to be UTC"""
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+@ledger_bp.route("/entries/export", methods=["GET"])
+@admin_required
+def export_ledger_entries() -> Any:
+    """Stream ledger entries oldest first as NDJSON or CSV (Admin only)
+
+    Rows are read through a server-side cursor in batches of
+    ``EXPORT_BATCH_SIZE`` and written out as they arrive, so memory stays
+    bounded regardless of how many entries are exported. Optional filters:
+    ``account_name``, ``since`` and ``until`` (ISO 8601, inclusive).
+    """
+    export_format = request.args.get("format", "ndjson").lower()
+    if export_format not in ("ndjson", "csv"):
+        return (
+            jsonify(
+                {"error": "format must be ndjson or csv", "code": "INVALID_FORMAT"}
+            ),
+            400,
+        )
+    stmt = select(entries_table).order_by(
+        entries_table.c.created_at, entries_table.c.id
+    )
+    if request.args.get("account_name"):
+        stmt = stmt.where(entries_table.c.account_name == request.args["account_name"])
+    try:
+        if request.args.get("since"):
+            stmt = stmt.where(
+                entries_table.c.created_at >= _parse_timestamp(request.args["since"])
+            )
+        if request.args.get("until"):
+            stmt = stmt.where(
+                entries_table.c.created_at <= _parse_timestamp(request.args["until"])
+            )
+    except ValueError:
+        return (
+            jsonify(
+                {
+                    "error": "since/until must be ISO 8601 timestamps",
+                    "code": "INVALID_DATE",
+                }
+            ),
+            400,
+        )
+    audit_logger.log_event(
+        event_type=AuditEventType.DATA_EXPORT,
+        description=f"Ledger entries exported as {export_format}",
+        user_id=g.token_payload.get("user_id"),
+        severity=AuditSeverity.MEDIUM,
+        resource_type="ledger_entries",
+        details=dict(request.args),
+    )
+
+    def generate() -> Any:
+        rows = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            for partition in rows.partitions():
+                for entry in partition:
+                    writer.writerow(_export_values(entry))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for partition in rows.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(EXPORT_COLUMNS, _export_values(entry)))) + "\n"
+                    for entry in partition
+                )
+
+    mimetype = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f"attachment; filename=ledger_entries.{export_format}"
+        },
+    )
+
+
+def _export_values(entry: Any) -> list:
+    """Column values of one entry; amounts keep full Decimal precision"""
+    values = []
+    for column in EXPORT_COLUMNS:
+        value = getattr(entry, column)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = format(value, "f")
+        elif isinstance(value, LedgerAccountType):
+            value = value.value
+        values.append(value)
+    return values
@@ -5,6 +5,7 @@ from pydantic import ValidationError
 from ..models.audit_log import AuditEventType, AuditSeverity
 from ..models.database import db
 from ..utils.auth import token_required
+from ..utils.idempotency import idempotent
 from ..services.payment_service import process_external_payment, get_transaction_details
 from ..services.payment_service_errors import PaymentServiceError
 from ..schemas import ProcessPaymentRequest
@@ -21,6 +22,7 @@ logger = logging.getLogger(__name__)
 
 @payment_bp.route("/process", methods=["POST"])
 @token_required
+@idempotent
 def process_payment() -> Any:
     """
     Process an external payment (deposit) into a user's account.
@@ -29,7 +31,9 @@ def process_payment() -> Any:
         data = request.get_json()
         payment_request = ProcessPaymentRequest(**data or {})
         user_id = g.current_user.id
-        result = process_external_payment(db.session, user_id, payment_request)
+        result = process_external_payment(
+            db.session, user_id, payment_request, g.get("idempotency_key")
+        )
         audit_logger.log_event(
             event_type=AuditEventType.TRANSACTION_COMPLETED,
             description=f"External payment of {payment_request.amount} {payment_request.currency} processed via {payment_request.payment_method}",
@@ -13,7 +13,7 @@ from ..models.transaction import Transaction, TransactionStatus
 from ..models.user import User
 from ..security.audit_logger import audit_logger
 from ..utils.validators import InputValidator
-from ..utils.auth import admin_required
+from ..utils.auth import admin_required, principal_cache
 
 user_bp = Blueprint("user", __name__, url_prefix="/api/v1/users")
 logger = logging.getLogger(__name__)
@@ -368,6 +368,7 @@ def delete_user(user_id: Any) -> Any:
         user.two_factor_enabled = False
         user.kyc_status = "revoked"
         db.session.commit()
+        principal_cache.invalidate_user(user_id)
         audit_logger.log_event(
             event_type=AuditEventType.ACCOUNT_MODIFICATION,
             description=f"User account soft-deleted: {user_id}",
@@ -6,7 +6,8 @@ from functools import wraps
 from ..models.account import Account
 from ..models.audit_log import AuditEventType, AuditSeverity
 from ..models.database import db
-from ..utils.auth import token_required
+from ..utils.auth import request_account, token_required
+from ..utils.idempotency import idempotent
 from ..services.wallet_service import (
     WalletServiceError,
     process_deposit,
@@ -15,6 +16,10 @@ from ..services.wallet_service import (
     get_user_accounts as service_get_user_accounts,
     get_account_details_with_transactions,
 )
+from ..services.bulk_transfer_service import (
+    MAX_BULK_TRANSFERS,
+    process_bulk_transfers,
+)
 from ..schemas import DepositFundsRequest, WithdrawFundsRequest, TransferFundsRequest
 from ..utils.error_handlers import (
     handle_validation_error,
@@ -33,7 +38,9 @@ def account_access_required(f: Any) -> Any:
     @wraps(f)
     @token_required
     def decorated(account_id: str, *args: Any, **kwargs: Any) -> Any:
-        account = db.session.get(Account, account_id)
+        # The caller's own accounts were loaded with the principal, so this
+        # and the service layer's lookup hit the session identity map.
+        account = request_account(account_id)
         if not account:
             return (
                 jsonify({"error": "Account not found", "code": "ACCOUNT_NOT_FOUND"}),
@@ -93,6 +100,7 @@ def get_account_details(account_id: Any) -> Any:
 
 @wallet_bp.route("/<account_id>/deposit", methods=["POST"])
 @account_access_required
+@idempotent
 def deposit_funds(account_id: Any) -> Any:
     """Deposit funds into an account"""
     try:
@@ -130,6 +138,7 @@ def deposit_funds(account_id: Any) -> Any:
 
 @wallet_bp.route("/<account_id>/withdraw", methods=["POST"])
 @account_access_required
+@idempotent
 def withdraw_funds(account_id: Any) -> Any:
     """Withdraw funds from an account"""
     try:
@@ -167,6 +176,7 @@ def withdraw_funds(account_id: Any) -> Any:
 
 @wallet_bp.route("/<account_id>/transfer", methods=["POST"])
 @account_access_required
+@idempotent
 def transfer_funds(account_id: Any) -> Any:
     """Transfer funds from one account to another (internal transfer)"""
     try:
@@ -176,9 +186,7 @@ def transfer_funds(account_id: Any) -> Any:
             db.session, account_id, transfer_request
         )
         source_account = g.account
-        destination_account = db.session.get(
-            Account, transfer_request.destination_account_id
-        )
+        destination_account = db.session.get(Account, transfer_request.to_account_id)
         audit_logger.log_event(
             event_type=AuditEventType.TRANSACTION_COMPLETED,
             description=f"Internal transfer of {transfer_request.amount} {source_account.currency} from {source_account.id} to {destination_account.id}",
@@ -207,3 +215,56 @@ def transfer_funds(account_id: Any) -> Any:
     except Exception as e:
         db.session.rollback()
         return handle_generic_exception(e)
+
+
+@wallet_bp.route("/transfers/bulk", methods=["POST"])
+@token_required
+@idempotent
+def bulk_transfer_funds() -> Any:
+    """Post a batch of transfers (e.g. payouts) from the caller's accounts
+
+    Body: ``{"transfers": [{"from_account_id", "to_account_id", "amount",
+    "description"?, "reference"?}, ...]}``. Items are reported individually;
+    the response is 200 even when some of them fail.
+    """
+    try:
+        transfers = (request.get_json(silent=True) or {}).get("transfers")
+        if not isinstance(transfers, list) or not transfers:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "transfers must be a non-empty list",
+                        "code": "INVALID_BULK_REQUEST",
+                    }
+                ),
+                400,
+            )
+        if len(transfers) > MAX_BULK_TRANSFERS:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": f"At most {MAX_BULK_TRANSFERS} transfers per request",
+                        "code": "BULK_LIMIT_EXCEEDED",
+                    }
+                ),
+                400,
+            )
+        user_id = g.token_payload.get("user_id")
+        summary = process_bulk_transfers(db.session, transfers, user_id=user_id)
+        audit_logger.log_event(
+            event_type=AuditEventType.TRANSACTION_COMPLETED,
+            description=f"Bulk transfer {summary['batch_id']}: {summary['succeeded']} succeeded, {summary['failed']} failed",
+            user_id=user_id,
+            severity=AuditSeverity.MEDIUM,
+            resource_type="bulk_transfer",
+            resource_id=summary["batch_id"],
+        )
+        return (jsonify(summary), 200)
+    except WalletServiceError as e:
+        db.session.rollback()
+        return handle_wallet_service_error(e)
+    except Exception as e:
+        db.session.rollback()
+        return handle_generic_exception(e)
@@ -0,0 +1,263 @@
+import itertools
+from collections import deque
+from datetime import datetime, timedelta
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+"\nSecurity Event Index\n====================\n\nTime-bucketed, bounded storage for security events. Events are grouped by\n(event_type, ip_address, user_id) and, within each key, into fixed-width\ntime buckets, so windowed queries touch only the keys and buckets they\nneed. Old events expire on their own once past the retention horizon or\nthe size bound.\n"
+
+_EPOCH = datetime(1970, 1, 1)
+
+EventKey = Tuple[str, Optional[str], Optional[str]]
+
+
+def _seconds(timestamp: datetime) -> float:
+    return (timestamp - _EPOCH).total_seconds()
+
+
+class RollingCounter:
+    """Count of events in a sliding window, kept as a wheel of bucket counts.
+
+    ``add`` bumps the newest bucket; both it and ``count`` drop buckets that
+    have rolled out of the window, so both are O(1) amortized and the wheel
+    never holds more than one window of buckets. A bucket is
+    counted while any part of it is inside the window: the count may
+    include events up to ``resolution`` older than the window.
+    """
+
+    def __init__(
+        self, window: timedelta, resolution: timedelta = timedelta(seconds=1)
+    ) -> Any:
+        self.window = window
+        self._window = window.total_seconds()
+        self._resolution = resolution.total_seconds()
+        self._buckets: Deque[List[int]] = deque()
+        self._total = 0
+
+    def add(self, timestamp: datetime, amount: int = 1) -> None:
+        seconds = _seconds(timestamp)
+        bucket_id = int(seconds // self._resolution)
+        if self._buckets and self._buckets[-1][0] >= bucket_id:
+            # Same bucket, or a clock step backwards: count it in the newest
+            self._buckets[-1][1] += amount
+        else:
+            self._buckets.append([bucket_id, amount])
+        self._total += amount
+        self._expire(seconds - self._window)
+
+    def count(self, now: datetime = None) -> int:
+        self._expire(_seconds(now or datetime.utcnow()) - self._window)
+        return self._total
+
+    def _expire(self, cutoff: float) -> None:
+        buckets = self._buckets
+        resolution = self._resolution
+        while buckets and (buckets[0][0] + 1) * resolution <= cutoff:
+            self._total -= buckets.popleft()[1]
+
+
+class _KeySeries:
+    """Events of one key, in time buckets of ``(bucket_id, events)``."""
+
+    __slots__ = ("buckets", "total")
+
+    def __init__(self) -> None:
+        self.buckets: Deque[Tuple[int, Deque[Tuple[int, Any]]]] = deque()
+        self.total = 0
+
+
+class SecurityEventIndex:
+    """Bounded time-wheel index of security events.
+
+    Each (event_type, ip_address, user_id) key keeps its events in
+    ``resolution``-wide buckets with a rolling total. Secondary maps from
+    event type, user and IP to keys let a query visit only matching keys,
+    and within a key only the buckets overlapping its window. Events older
+    than ``retention``, or beyond the newest ``max_events``, are evicted
+    oldest first. Iteration yields the retained events oldest first.
+    """
+
+    def __init__(
+        self,
+        resolution: timedelta = timedelta(seconds=10),
+        retention: timedelta = timedelta(days=7),
+        max_events: int = 10000,
+    ) -> Any:
+        self.resolution = resolution
+        self.retention = retention
+        self.max_events = max_events
+        self._resolution = resolution.total_seconds()
+        self._order: Deque[Tuple[int, EventKey, Any]] = deque()
+        self._series: Dict[EventKey, _KeySeries] = {}
+        self._by_type: Dict[str, Set[EventKey]] = {}
+        self._by_user: Dict[str, Set[EventKey]] = {}
+        self._by_ip: Dict[str, Set[EventKey]] = {}
+        self._sequence = itertools.count()
+
+    @staticmethod
+    def key_of(event: Any) -> EventKey:
+        return (event.event_type, event.ip_address, event.user_id)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self) -> Iterator[Any]:
+        self.expire()
+        return iter([event for _, _, event in self._order])
+
+    def add(self, event: Any) -> None:
+        key = self.key_of(event)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _KeySeries()
+            event_type, ip_address, user_id = key
+            self._by_type.setdefault(event_type, set()).add(key)
+            if user_id is not None:
+                self._by_user.setdefault(user_id, set()).add(key)
+            if ip_address is not None:
+                self._by_ip.setdefault(ip_address, set()).add(key)
+        entry = (next(self._sequence), event)
+        bucket_id = int(_seconds(event.timestamp) // self._resolution)
+        if series.buckets and series.buckets[-1][0] >= bucket_id:
+            series.buckets[-1][1].append(entry)
+        else:
+            series.buckets.append((bucket_id, deque([entry])))
+        series.total += 1
+        self._order.append((entry[0], key, event))
+        while len(self._order) > self.max_events:
+            self._evict_oldest()
+        self.expire(event.timestamp)
+
+    def expire(self, now: datetime = None) -> int:
+        """Evict events older than the retention horizon; returns how many."""
+        cutoff = (now or datetime.utcnow()) - self.retention
+        evicted = 0
+        while self._order and self._order[0][2].timestamp < cutoff:
+            self._evict_oldest()
+            evicted += 1
+        return evicted
+
+    def _evict_oldest(self) -> None:
+        _, key, _ = self._order.popleft()
+        series = self._series[key]
+        _, entries = series.buckets[0]
+        entries.popleft()
+        if not entries:
+            series.buckets.popleft()
+        series.total -= 1
+        if series.total:
+            return
+        del self._series[key]
+        event_type, ip_address, user_id = key
+        for index, value in (
+            (self._by_type, event_type),
+            (self._by_user, user_id),
+            (self._by_ip, ip_address),
+        ):
+            keys = index.get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[value]
+
+    def _keys(
+        self,
+        event_types: Optional[Iterable[str]],
+        user_id: Optional[str],
+        ip_address: Optional[str],
+    ) -> Iterable[EventKey]:
+        """Keys matching every given filter, starting from the narrowest map."""
+        candidates = []
+        if event_types is not None:
+            event_types = set(event_types)
+            candidates.append(
+                set().union(*(self._by_type.get(t, ()) for t in event_types))
+            )
+        if user_id is not None:
+            candidates.append(self._by_user.get(user_id, set()))
+        if ip_address is not None:
+            candidates.append(self._by_ip.get(ip_address, set()))
+        if not candidates:
+            return list(self._series)
+        narrowest = min(candidates, key=len)
+        return [
+            key
+            for key in narrowest
+            if (event_types is None or key[0] in event_types)
+            and (user_id is None or key[2] == user_id)
+            and (ip_address is None or key[1] == ip_address)
+        ]
+
+    def events(
+        self,
+        since: datetime,
+        event_types: Iterable[str] = None,
+        user_id: str = None,
+        ip_address: str = None,
+        predicate: Callable[[Any], bool] = None,
+    ) -> List[Any]:
+        """Matching events at or after ``since``, newest first."""
+        self.expire()
+        since_bucket = int(_seconds(since) // self._resolution)
+        found = []
+        for key in self._keys(event_types, user_id, ip_address):
+            for bucket_id, entries in reversed(self._series[key].buckets):
+                if bucket_id < since_bucket:
+                    break
+                for sequence, event in entries:
+                    if event.timestamp >= since and (
+                        predicate is None or predicate(event)
+                    ):
+                        found.append((sequence, event))
+        found.sort(key=lambda entry: entry[0], reverse=True)
+        return [event for _, event in found]
+
+    def count(
+        self,
+        since: datetime,
+        event_types: Iterable[str] = None,
+        user_id: str = None,
+        ip_address: str = None,
+    ) -> int:
+        """Number of matching events at or after ``since``.
+
+        Buckets wholly inside the window contribute their size; only the
+        bucket straddling ``since`` is scanned event by event.
+        """
+        self.expire()
+        if event_types is None and user_id is None and ip_address is None:
+            total = 0
+            for _, _, event in reversed(self._order):
+                if event.timestamp < since:
+                    break
+                total += 1
+            return total
+        since_seconds = _seconds(since)
+        resolution = self._resolution
+        total = 0
+        for key in self._keys(event_types, user_id, ip_address):
+            series = self._series[key]
+            if since <= self._oldest_timestamp(series):
+                total += series.total
+                continue
+            for bucket_id, entries in reversed(series.buckets):
+                if bucket_id * resolution >= since_seconds:
+                    total += len(entries)
+                    continue
+                total += sum(1 for _, event in entries if event.timestamp >= since)
+                break
+        return total
+
+    @staticmethod
+    def _oldest_timestamp(series: _KeySeries) -> datetime:
+        return series.buckets[0][1][0][1].timestamp
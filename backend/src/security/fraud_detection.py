@@ -1,11 +1,16 @@
+import hashlib
+import json
 import logging
+import math
+import os
+import threading
+import time
 import uuid
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Dict, List
-import numpy as np
 from sqlalchemy.orm import Session
 
 "\nFraud Detection Engine\n=====================\n\nAdvanced fraud detection and prevention system for financial transactions.\nUses machine learning, rule-based detection, and behavioral analysis.\n"
@@ -106,30 +111,135 @@ class FraudAssessment:
         }
 
 
+class RunningStats:
+    """Count, mean and (population) variance updated one value at a time."""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0) -> Any:
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value: float) -> Any:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+class DecayingCounter:
+    """Value frequencies that halve every ``half_life`` seconds.
+
+    Values not seen since a cutoff are evicted, and at most ``max_items``
+    are kept (the least frequent after decay goes first), so memory per
+    counter is bounded however long the user has been active.
+    """
+
+    __slots__ = ("half_life", "max_items", "weights", "last_seen")
+
+    def __init__(self, half_life: float, max_items: int) -> Any:
+        self.half_life = half_life
+        self.max_items = max_items
+        self.weights = {}
+        self.last_seen = {}
+
+    def __contains__(self, value: Any) -> bool:
+        return value in self.weights
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def weight(self, value: Any, now: float) -> float:
+        """Decayed frequency of ``value`` at ``now``"""
+        if value not in self.weights:
+            return 0.0
+        elapsed = max(now - self.last_seen[value], 0.0)
+        return self.weights[value] * 0.5 ** (elapsed / self.half_life)
+
+    def add(self, value: Any, now: float) -> Any:
+        self.weights[value] = self.weight(value, now) + 1.0
+        self.last_seen[value] = max(now, self.last_seen.get(value, now))
+        if len(self.weights) > self.max_items:
+            coldest = min(
+                (item for item in self.weights if item != value),
+                key=lambda item: self.weight(item, now),
+            )
+            del self.weights[coldest]
+            del self.last_seen[coldest]
+
+    def evict_before(self, cutoff: float) -> Any:
+        for value in [v for v, seen in self.last_seen.items() if seen < cutoff]:
+            del self.weights[value]
+            del self.last_seen[value]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "weights": list(self.weights.items()),
+            "last_seen": list(self.last_seen.items()),
+        }
+
+    def load(self, data: Dict[str, Any]) -> Any:
+        self.weights = dict((value, w) for value, w in data["weights"])
+        self.last_seen = dict((value, t) for value, t in data["last_seen"])
+
+
+def _epoch_seconds(timestamp: datetime) -> float:
+    if timestamp.tzinfo is not None:
+        return timestamp.timestamp()
+    return (timestamp - datetime(1970, 1, 1)).total_seconds()
+
+
 class BehavioralProfile:
-    """User behavioral profile for anomaly detection."""
+    """User behavioral profile for anomaly detection.
+
+    Keeps running amount statistics and decaying per-field frequency
+    counters instead of full histories. Values unseen for
+    ``PATTERN_RETENTION_DAYS`` are evicted, so a profile stays a few KB.
+    """
+
+    PATTERN_RETENTION_DAYS = 90
+    HALF_LIFE_DAYS = 30
+    MAX_VALUES_PER_FIELD = 64
+    TRANSACTION_FIELDS = ["merchants", "categories", "hours", "days"]
+    LOGIN_FIELDS = ["ip_addresses", "user_agents", "locations", "hours", "days"]
 
     def __init__(self, user_id: str) -> Any:
         self.user_id = user_id
-        self.transaction_patterns = defaultdict(list)
-        self.login_patterns = defaultdict(list)
-        self.device_patterns = defaultdict(list)
-        self.location_patterns = defaultdict(list)
-        self.time_patterns = defaultdict(list)
+        self.amount_stats = RunningStats()
+        self.login_count = 0
+        self.transaction_patterns = self._new_counters(self.TRANSACTION_FIELDS)
+        self.login_patterns = self._new_counters(self.LOGIN_FIELDS)
         self.last_updated = datetime.utcnow()
 
+    @classmethod
+    def _new_counters(cls, fields: List[str]) -> Dict[str, DecayingCounter]:
+        half_life = cls.HALF_LIFE_DAYS * 86400
+        return {
+            field: DecayingCounter(half_life, cls.MAX_VALUES_PER_FIELD)
+            for field in fields
+        }
+
+    @property
+    def transaction_count(self) -> int:
+        return self.amount_stats.count
+
     def update_transaction_pattern(
         self, amount: float, merchant: str, category: str, timestamp: datetime
     ) -> Any:
         """Update transaction behavioral patterns."""
-        hour = timestamp.hour
-        day_of_week = timestamp.weekday()
-        self.transaction_patterns["amounts"].append(amount)
-        self.transaction_patterns["merchants"].append(merchant)
-        self.transaction_patterns["categories"].append(category)
-        self.transaction_patterns["hours"].append(hour)
-        self.transaction_patterns["days"].append(day_of_week)
-        cutoff = datetime.utcnow() - timedelta(days=90)
+        now = _epoch_seconds(timestamp)
+        self.amount_stats.add(amount)
+        patterns = self.transaction_patterns
+        patterns["merchants"].add(merchant, now)
+        patterns["categories"].add(category, now)
+        patterns["hours"].add(timestamp.hour, now)
+        patterns["days"].add(timestamp.weekday(), now)
+        cutoff = timestamp - timedelta(days=self.PATTERN_RETENTION_DAYS)
         self._cleanup_old_patterns(cutoff)
         self.last_updated = datetime.utcnow()
 
@@ -137,47 +247,175 @@ class BehavioralProfile:
         self, ip_address: str, user_agent: str, location: str, timestamp: datetime
     ) -> Any:
         """Update login behavioral patterns."""
-        hour = timestamp.hour
-        day_of_week = timestamp.weekday()
-        self.login_patterns["ip_addresses"].append(ip_address)
-        self.login_patterns["user_agents"].append(user_agent)
-        self.login_patterns["locations"].append(location)
-        self.login_patterns["hours"].append(hour)
-        self.login_patterns["days"].append(day_of_week)
+        now = _epoch_seconds(timestamp)
+        self.login_count += 1
+        patterns = self.login_patterns
+        patterns["ip_addresses"].add(ip_address, now)
+        patterns["user_agents"].add(user_agent, now)
+        patterns["locations"].add(location, now)
+        patterns["hours"].add(timestamp.hour, now)
+        patterns["days"].add(timestamp.weekday(), now)
+        cutoff = timestamp - timedelta(days=self.PATTERN_RETENTION_DAYS)
+        self._cleanup_old_patterns(cutoff)
         self.last_updated = datetime.utcnow()
 
     def _cleanup_old_patterns(self, cutoff: datetime) -> Any:
         """Remove patterns older than cutoff date."""
+        cutoff_seconds = _epoch_seconds(cutoff)
+        for counters in (self.transaction_patterns, self.login_patterns):
+            for counter in counters.values():
+                counter.evict_before(cutoff_seconds)
 
     def get_transaction_anomaly_score(
         self, amount: float, merchant: str, category: str, timestamp: datetime
     ) -> float:
         """Calculate anomaly score for a transaction."""
         anomaly_score = 0.0
-        if self.transaction_patterns["amounts"]:
-            amounts = self.transaction_patterns["amounts"]
-            mean_amount = np.mean(amounts)
-            std_amount = np.std(amounts)
+        if self.amount_stats.count:
+            std_amount = self.amount_stats.std
             if std_amount > 0:
-                z_score = abs(amount - mean_amount) / std_amount
+                z_score = abs(amount - self.amount_stats.mean) / std_amount
                 if z_score > 3:
                     anomaly_score += 0.4
                 elif z_score > 2:
                     anomaly_score += 0.2
-        if merchant not in self.transaction_patterns["merchants"]:
+        patterns = self.transaction_patterns
+        if merchant not in patterns["merchants"]:
             anomaly_score += 0.2
-        if category not in self.transaction_patterns["categories"]:
+        if category not in patterns["categories"]:
             anomaly_score += 0.1
-        hour = timestamp.hour
-        typical_hours = self.transaction_patterns["hours"]
-        if typical_hours and hour not in typical_hours:
+        if patterns["hours"] and timestamp.hour not in patterns["hours"]:
             anomaly_score += 0.2
-        day_of_week = timestamp.weekday()
-        typical_days = self.transaction_patterns["days"]
-        if typical_days and day_of_week not in typical_days:
+        if patterns["days"] and timestamp.weekday() not in patterns["days"]:
             anomaly_score += 0.1
         return min(anomaly_score, 1.0)
 
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable state, for spilling cold profiles"""
+        stats = self.amount_stats
+        return {
+            "user_id": self.user_id,
+            "amount_stats": [stats.count, stats.mean, stats.m2],
+            "login_count": self.login_count,
+            "transaction_patterns": {
+                field: counter.to_dict()
+                for field, counter in self.transaction_patterns.items()
+            },
+            "login_patterns": {
+                field: counter.to_dict()
+                for field, counter in self.login_patterns.items()
+            },
+            "last_updated": self.last_updated.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BehavioralProfile":
+        profile = cls(data["user_id"])
+        profile.amount_stats = RunningStats(*data["amount_stats"])
+        profile.login_count = data["login_count"]
+        for field, counter in data["transaction_patterns"].items():
+            profile.transaction_patterns[field].load(counter)
+        for field, counter in data["login_patterns"].items():
+            profile.login_patterns[field].load(counter)
+        profile.last_updated = datetime.fromisoformat(data["last_updated"])
+        return profile
+
+
+class BehavioralProfileStore:
+    """LRU-bounded table of behavioral profiles.
+
+    At most ``max_profiles`` stay in memory. The least recently used one is
+    spilled to Redis (``redis_client``) or, failing that, to JSON files in
+    ``spill_dir``, and read back on its user's next request. Spilled
+    profiles expire after the pattern retention period.
+    """
+
+    KEY_PREFIX = "behavioral_profile:"
+
+    def __init__(
+        self,
+        max_profiles: int = 10000,
+        redis_client: Any = None,
+        spill_dir: str = None,
+    ) -> Any:
+        self.max_profiles = max_profiles
+        self.redis_client = redis_client
+        self.spill_dir = spill_dir
+        self.ttl_seconds = BehavioralProfile.PATTERN_RETENTION_DAYS * 86400
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._profiles
+
+    def get(self, user_id: str) -> BehavioralProfile:
+        """Profile of ``user_id``: in memory, spilled, or a new one"""
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if profile is not None:
+                self._profiles.move_to_end(user_id)
+                return profile
+        profile = self._load_spilled(user_id) or BehavioralProfile(user_id)
+        with self._lock:
+            profile = self._profiles.setdefault(user_id, profile)
+            self._profiles.move_to_end(user_id)
+            evicted = []
+            while len(self._profiles) > self.max_profiles:
+                evicted.append(self._profiles.popitem(last=False)[1])
+        for cold in evicted:
+            self._spill(cold)
+        return profile
+
+    def flush(self) -> Any:
+        """Spill every in-memory profile (e.g. on shutdown)"""
+        with self._lock:
+            profiles = list(self._profiles.values())
+        for profile in profiles:
+            self._spill(profile)
+
+    def _spill_path(self, user_id: str) -> str:
+        digest = hashlib.sha256(str(user_id).encode()).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.json")
+
+    def _spill(self, profile: BehavioralProfile) -> Any:
+        payload = json.dumps(profile.to_dict())
+        if self.redis_client is not None:
+            try:
+                self.redis_client.setex(
+                    self.KEY_PREFIX + str(profile.user_id), self.ttl_seconds, payload
+                )
+                return
+            except Exception as e:
+                self.logger.warning(f"Could not spill profile to Redis: {e}")
+        if self.spill_dir:
+            path = self._spill_path(profile.user_id)
+            with open(f"{path}.tmp", "w") as spill_file:
+                spill_file.write(payload)
+            os.replace(f"{path}.tmp", path)
+
+    def _load_spilled(self, user_id: str) -> Any:
+        payload = None
+        if self.redis_client is not None:
+            try:
+                payload = self.redis_client.get(self.KEY_PREFIX + str(user_id))
+            except Exception as e:
+                self.logger.warning(f"Could not load profile from Redis: {e}")
+        if payload is None and self.spill_dir:
+            path = self._spill_path(user_id)
+            try:
+                if time.time() - os.path.getmtime(path) < self.ttl_seconds:
+                    with open(path) as spill_file:
+                        payload = spill_file.read()
+            except FileNotFoundError:
+                pass
+        return BehavioralProfile.from_dict(json.loads(payload)) if payload else None
+
 
 class FraudDetectionEngine:
     """
@@ -199,7 +437,11 @@ class FraudDetectionEngine:
         self.db = db_session
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
-        self._behavioral_profiles = {}
+        self._behavioral_profiles = BehavioralProfileStore(
+            max_profiles=self.config.get("max_behavioral_profiles", 10000),
+            redis_client=self.config.get("redis_client"),
+            spill_dir=self.config.get("behavioral_profile_spill_dir"),
+        )
         self._fraud_rules = {}
         self._ml_models = {}
         self._blacklists = {}
@@ -653,9 +895,7 @@ class FraudDetectionEngine:
         merchant = transaction_data.get("merchant", "")
         category = transaction_data.get("category", "")
         timestamp = datetime.utcnow()
-        if user_id not in self._behavioral_profiles:
-            self._behavioral_profiles[user_id] = BehavioralProfile(user_id)
-        profile = self._behavioral_profiles[user_id]
+        profile = self._behavioral_profiles.get(user_id)
         anomaly_score = profile.get_transaction_anomaly_score(
             amount, merchant, category, timestamp
         )
@@ -663,7 +903,7 @@ class FraudDetectionEngine:
             "anomaly_score": anomaly_score,
             "user_id": user_id,
             "profile_age_days": (datetime.utcnow() - profile.last_updated).days,
-            "transaction_count": len(profile.transaction_patterns["amounts"]),
+            "transaction_count": profile.transaction_count,
             "analysis_timestamp": datetime.utcnow().isoformat(),
         }
 
@@ -865,9 +1105,7 @@ class FraudDetectionEngine:
         user_agent = login_data.get("user_agent", "")
         location = login_data.get("location", {})
         timestamp = datetime.utcnow()
-        if user_id not in self._behavioral_profiles:
-            self._behavioral_profiles[user_id] = BehavioralProfile(user_id)
-        profile = self._behavioral_profiles[user_id]
+        profile = self._behavioral_profiles.get(user_id)
         anomaly_score = 0.0
         hour = timestamp.hour
         typical_hours = profile.login_patterns["hours"]
@@ -884,7 +1122,7 @@ class FraudDetectionEngine:
             "anomaly_score": min(anomaly_score, 1.0),
             "user_id": user_id,
             "profile_age_days": (datetime.utcnow() - profile.last_updated).days,
-            "login_count": len(profile.login_patterns["ip_addresses"]),
+            "login_count": profile.login_count,
             "analysis_timestamp": datetime.utcnow().isoformat(),
         }
 
@@ -892,9 +1130,7 @@ class FraudDetectionEngine:
         self, user_id: str, transaction_data: Dict[str, Any]
     ):
         """Update user behavioral profile with transaction data."""
-        if user_id not in self._behavioral_profiles:
-            self._behavioral_profiles[user_id] = BehavioralProfile(user_id)
-        profile = self._behavioral_profiles[user_id]
+        profile = self._behavioral_profiles.get(user_id)
         amount = transaction_data.get("amount", 0)
         merchant = transaction_data.get("merchant", "")
         category = transaction_data.get("category", "")
@@ -903,9 +1139,7 @@ class FraudDetectionEngine:
 
     async def _update_login_profile(self, user_id: str, login_data: Dict[str, Any]):
         """Update user behavioral profile with login data."""
-        if user_id not in self._behavioral_profiles:
-            self._behavioral_profiles[user_id] = BehavioralProfile(user_id)
-        profile = self._behavioral_profiles[user_id]
+        profile = self._behavioral_profiles.get(user_id)
         ip_address = login_data.get("ip_address", "")
         user_agent = login_data.get("user_agent", "")
         location = login_data.get("location", {})
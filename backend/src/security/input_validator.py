@@ -5,11 +5,13 @@ import logging
 import re
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 import phonenumbers
 from email_validator import EmailNotValidError, validate_email
 from phonenumbers import NumberParseException
 
+from .signature_matcher import required_literal_sets
+
 "\nInput Validation and Sanitization System\n"
 logger = logging.getLogger(__name__)
 
@@ -24,9 +26,149 @@ class ValidationError(Exception):
         super().__init__(message)
 
 
+class CompiledSanitizer:
+    """Dangerous-content and SQL patterns merged into one union regex
+
+    Each source pattern becomes a named alternative (``dangerous_<i>`` or
+    ``sql_<i>``) with its own flags scoped inline, dangerous patterns first.
+    One ``search`` finds the leftmost position any pattern matches; because
+    dangerous alternatives are tried first at that position, a dangerous hit
+    anywhere in the string is never masked by an earlier SQL one.
+
+    A long alternation loses the literal-prefix scans ``re`` uses for single
+    patterns, so the lower-cased input is first checked for the literals each
+    IGNORECASE pattern requires (see ``required_literal_sets``) and only the
+    patterns that can still match go into the union. Unions per candidate
+    set are compiled once and kept.
+    """
+
+    _SCOPED_FLAGS = (
+        (re.IGNORECASE, "i"),
+        (re.MULTILINE, "m"),
+        (re.DOTALL, "s"),
+        (re.VERBOSE, "x"),
+    )
+    MAX_UNIONS = 256
+    # The only non-ASCII characters IGNORECASE matches against ASCII letters
+    _ASCII_FOLDS = (("\u0130", "i"), ("\u0131", "i"), ("\u017f", "s"), ("\u212a", "k"))
+
+    def __init__(
+        self,
+        dangerous_patterns: Sequence[re.Pattern],
+        sql_patterns: Sequence[re.Pattern],
+    ) -> None:
+        self.entries = [
+            (f"dangerous_{i}", pattern) for i, pattern in enumerate(dangerous_patterns)
+        ] + [(f"sql_{i}", pattern) for i, pattern in enumerate(sql_patterns)]
+        self.dangerous_count = len(dangerous_patterns)
+        self.requirements = [
+            (
+                required_literal_sets(pattern.pattern)
+                if pattern.flags & re.IGNORECASE
+                else []
+            )
+            for _, pattern in self.entries
+        ]
+        self.literals = frozenset().union(
+            *(requirement for sets in self.requirements for requirement in sets)
+        )
+        self.all_indexes = tuple(range(len(self.entries)))
+        self.sql_indexes = self.all_indexes[self.dangerous_count :]
+        self._unions: Dict[Tuple[int, ...], re.Pattern] = {}
+
+    @classmethod
+    def _scoped(cls, pattern: re.Pattern) -> str:
+        on = "".join(flag for bit, flag in cls._SCOPED_FLAGS if pattern.flags & bit)
+        off = "".join(
+            flag for bit, flag in cls._SCOPED_FLAGS if not pattern.flags & bit
+        )
+        return f"(?{on}{'-' + off if off else ''}:{pattern.pattern})"
+
+    def _union(self, indexes: Tuple[int, ...]) -> re.Pattern:
+        union = self._unions.get(indexes)
+        if union is None:
+            if len(self._unions) >= self.MAX_UNIONS:
+                self._unions.clear()
+            union = re.compile(
+                "|".join(
+                    f"(?P<{self.entries[i][0]}>{self._scoped(self.entries[i][1])})"
+                    for i in indexes
+                )
+            )
+            self._unions[indexes] = union
+        return union
+
+    def _candidates(self, value: str, indexes: Tuple[int, ...]) -> Tuple[int, ...]:
+        """Patterns among ``indexes`` whose required literals all occur"""
+        if not value.isascii():
+            for char, folded in self._ASCII_FOLDS:
+                if char in value:
+                    value = value.replace(char, folded)
+        lowered = value.lower()
+        present = {literal for literal in self.literals if literal in lowered}
+        requirements = self.requirements
+        return tuple(
+            i
+            for i in indexes
+            if all(not present.isdisjoint(req) for req in requirements[i])
+        )
+
+    def scan(self, value: str, check_dangerous: bool = True) -> Optional[str]:
+        """Return the name of the winning pattern, or None if nothing matched
+
+        With ``check_dangerous`` a dangerous match takes precedence over an
+        SQL match, the same priority as checking the two lists in turn.
+        """
+        indexes = self.all_indexes if check_dangerous else self.sql_indexes
+        candidates = self._candidates(value, indexes)
+        if not candidates:
+            return None
+        match = self._union(candidates).search(value)
+        if match is None or match.lastgroup.startswith("dangerous_"):
+            return match.lastgroup if match else None
+        dangerous = tuple(i for i in candidates if i < self.dangerous_count)
+        if dangerous:
+            later = self._union(dangerous).search(value, match.start() + 1)
+            if later:
+                return later.lastgroup
+        return match.lastgroup
+
+
 class InputValidator:
     """Comprehensive input validation and sanitization"""
 
+    DANGEROUS_PATTERNS = (
+        re.compile("<script[^>]*>.*?</script>", re.IGNORECASE | re.DOTALL),
+        re.compile("javascript:", re.IGNORECASE),
+        re.compile("on\\w+\\s*=", re.IGNORECASE),
+        re.compile("<iframe[^>]*>.*?</iframe>", re.IGNORECASE | re.DOTALL),
+        re.compile("<object[^>]*>.*?</object>", re.IGNORECASE | re.DOTALL),
+        re.compile("<embed[^>]*>", re.IGNORECASE),
+        re.compile("<link[^>]*>", re.IGNORECASE),
+        re.compile("<meta[^>]*>", re.IGNORECASE),
+        re.compile("<style[^>]*>.*?</style>", re.IGNORECASE | re.DOTALL),
+        re.compile("expression\\s*\\(", re.IGNORECASE),
+        re.compile("url\\s*\\(", re.IGNORECASE),
+        re.compile("@import", re.IGNORECASE),
+        re.compile("vbscript:", re.IGNORECASE),
+        re.compile("data:", re.IGNORECASE),
+    )
+    SQL_PATTERNS = (
+        re.compile(
+            "(\\b(SELECT|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|EXEC|UNION|SCRIPT)\\b)",
+            re.IGNORECASE,
+        ),
+        re.compile("(\\b(OR|AND)\\s+\\d+\\s*=\\s*\\d+)", re.IGNORECASE),
+        re.compile(
+            "(\\b(OR|AND)\\s+[\\'\"]?\\w+[\\'\"]?\\s*=\\s*[\\'\"]?\\w+[\\'\"]?)",
+            re.IGNORECASE,
+        ),
+        re.compile("(--|#|/\\*|\\*/)", re.IGNORECASE),
+        re.compile("(\\bUNION\\b.*\\bSELECT\\b)", re.IGNORECASE),
+        re.compile("(\\b(EXEC|EXECUTE)\\b)", re.IGNORECASE),
+    )
+    _compiled_sanitizers: Dict[tuple, CompiledSanitizer] = {}
+
     def __init__(self) -> Any:
         self.patterns = {
             "alphanumeric": re.compile("^[a-zA-Z0-9]+$"),
@@ -58,36 +200,17 @@ class InputValidator:
             "postal_code_ca": re.compile("^[A-Z][0-9][A-Z] [0-9][A-Z][0-9]$"),
             "postal_code_uk": re.compile("^[A-Z]{1,2}[0-9R][0-9A-Z]? [0-9][A-Z]{2}$"),
         }
-        self.dangerous_patterns = [
-            re.compile("<script[^>]*>.*?</script>", re.IGNORECASE | re.DOTALL),
-            re.compile("javascript:", re.IGNORECASE),
-            re.compile("on\\w+\\s*=", re.IGNORECASE),
-            re.compile("<iframe[^>]*>.*?</iframe>", re.IGNORECASE | re.DOTALL),
-            re.compile("<object[^>]*>.*?</object>", re.IGNORECASE | re.DOTALL),
-            re.compile("<embed[^>]*>", re.IGNORECASE),
-            re.compile("<link[^>]*>", re.IGNORECASE),
-            re.compile("<meta[^>]*>", re.IGNORECASE),
-            re.compile("<style[^>]*>.*?</style>", re.IGNORECASE | re.DOTALL),
-            re.compile("expression\\s*\\(", re.IGNORECASE),
-            re.compile("url\\s*\\(", re.IGNORECASE),
-            re.compile("@import", re.IGNORECASE),
-            re.compile("vbscript:", re.IGNORECASE),
-            re.compile("data:", re.IGNORECASE),
-        ]
-        self.sql_patterns = [
-            re.compile(
-                "(\\b(SELECT|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|EXEC|UNION|SCRIPT)\\b)",
-                re.IGNORECASE,
-            ),
-            re.compile("(\\b(OR|AND)\\s+\\d+\\s*=\\s*\\d+)", re.IGNORECASE),
-            re.compile(
-                "(\\b(OR|AND)\\s+[\\'\"]?\\w+[\\'\"]?\\s*=\\s*[\\'\"]?\\w+[\\'\"]?)",
-                re.IGNORECASE,
-            ),
-            re.compile("(--|#|/\\*|\\*/)", re.IGNORECASE),
-            re.compile("(\\bUNION\\b.*\\bSELECT\\b)", re.IGNORECASE),
-            re.compile("(\\b(EXEC|EXECUTE)\\b)", re.IGNORECASE),
-        ]
+        self.dangerous_patterns = list(self.DANGEROUS_PATTERNS)
+        self.sql_patterns = list(self.SQL_PATTERNS)
+
+    def _sanitizer(self) -> CompiledSanitizer:
+        """Compiled union of the current pattern lists, shared per class"""
+        key = (tuple(self.dangerous_patterns), tuple(self.sql_patterns))
+        sanitizer = self._compiled_sanitizers.get(key)
+        if sanitizer is None:
+            sanitizer = CompiledSanitizer(*key)
+            self._compiled_sanitizers[key] = sanitizer
+        return sanitizer
 
     def sanitize_string(
         self, value: str, max_length: int = None, allow_html: bool = False
@@ -103,19 +226,62 @@ class InputValidator:
             )
         if not allow_html:
             value = html.escape(value)
-        if not allow_html:
-            for pattern in self.dangerous_patterns:
-                if pattern.search(value):
-                    raise ValidationError(
-                        "Potentially dangerous content detected",
-                        code="DANGEROUS_CONTENT",
-                    )
-        for pattern in self.sql_patterns:
-            if pattern.search(value):
-                raise ValidationError(
-                    "Potentially malicious SQL content detected", code="SQL_INJECTION"
-                )
-        return value
+        matched = self._sanitizer().scan(value, check_dangerous=not allow_html)
+        if matched is None:
+            return value
+        if matched.startswith("dangerous_"):
+            raise ValidationError(
+                "Potentially dangerous content detected", code="DANGEROUS_CONTENT"
+            )
+        raise ValidationError(
+            "Potentially malicious SQL content detected", code="SQL_INJECTION"
+        )
+
+    def sanitize_payload(
+        self, payload: Dict[str, Any], schema: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Sanitize every string in a nested request body
+
+        ``schema`` mirrors the payload. For a string field its entry is a dict
+        of ``sanitize_string`` options (``max_length``, ``allow_html``); for a
+        dict or list field it is the nested schema, applied to each list item.
+        ``False`` leaves a field untouched and a missing entry uses the
+        defaults. Values that are not strings are copied as-is. Returns a new
+        payload; errors carry the dotted path of the offending field.
+        """
+        if not isinstance(payload, dict):
+            raise ValidationError("Payload must be an object", code="INVALID_TYPE")
+        result: Dict[str, Any] = {}
+        stack = [(payload, result, schema or {}, "")]
+        while stack:
+            source, target, rules, path = stack.pop()
+            items = source.items() if isinstance(source, dict) else enumerate(source)
+            for key, value in items:
+                if isinstance(source, dict):
+                    rule = rules.get(key) if isinstance(rules, dict) else None
+                    field = f"{path}.{key}" if path else str(key)
+                else:
+                    rule = rules
+                    field = f"{path}[{key}]"
+                if rule is False:
+                    sanitized = value
+                elif isinstance(value, str):
+                    options = rule if isinstance(rule, dict) else {}
+                    try:
+                        sanitized = self.sanitize_string(
+                            value,
+                            max_length=options.get("max_length"),
+                            allow_html=options.get("allow_html", False),
+                        )
+                    except ValidationError as e:
+                        raise ValidationError(e.message, field=field, code=e.code)
+                elif isinstance(value, (dict, list)):
+                    sanitized = {} if isinstance(value, dict) else [None] * len(value)
+                    stack.append((value, sanitized, rule or {}, field))
+                else:
+                    sanitized = value
+                target[key] = sanitized
+        return result
 
     def validate_email(self, email: str) -> str:
         """Validate and normalize email address"""
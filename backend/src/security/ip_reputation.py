@@ -0,0 +1,302 @@
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+"\nIP Reputation Index\n===================\n\nLongest-prefix matching of client addresses against IPv4 and IPv6 CIDR\nblocklists. Each address family is a path-compressed binary (Patricia)\ntrie built once into flat arrays; rebuilding produces a new immutable\nsnapshot that is swapped in with a single assignment, so lookups never\ntake a lock.\n"
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+_MAPPED_V4 = 0xFFFF << 32
+
+
+@dataclass
+class ReputationEntry:
+    """Reputation of one CIDR block; read-only once in a snapshot."""
+
+    network: str
+    score: float
+    category: str
+    source: str
+    expires_at: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "network": self.network,
+            "score": self.score,
+            "category": self.category,
+            "source": self.source,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "last_seen": self.last_seen.isoformat() if self.last_seen else None,
+        }
+
+
+def parse_network(network: str) -> Tuple[int, int, int]:
+    """``(version, network address as int, prefix length)`` of a CIDR block.
+
+    Host bits are cleared, as with ``ipaddress.ip_network(strict=False)``;
+    raises ValueError on anything that is not an address or CIDR block.
+    """
+    address, _, length = network.strip().partition("/")
+    try:
+        if ":" in address:
+            version, width = 6, 128
+            packed = socket.inet_pton(socket.AF_INET6, address)
+        else:
+            version, width = 4, 32
+            packed = socket.inet_pton(socket.AF_INET, address)
+    except OSError:
+        raise ValueError(f"Invalid network: {network!r}")
+    prefix_length = int(length) if length else width
+    if not 0 <= prefix_length <= width:
+        raise ValueError(f"Invalid prefix length: {network!r}")
+    host_bits = width - prefix_length
+    key = int.from_bytes(packed, "big") >> host_bits << host_bits
+    return version, key, prefix_length
+
+
+class PrefixTrie:
+    """Immutable Patricia trie over the prefixes of one address family.
+
+    Nodes live in parallel lists (left-aligned key, prefix length, the two
+    children and the entry index, ``-1`` when absent). Every node on a
+    lookup path is at least one bit deeper than its parent, so a lookup
+    visits at most ``width + 1`` nodes. Construction sorts the prefixes and
+    builds the trie along its rightmost path, touching each node a constant
+    number of times.
+    """
+
+    def __init__(self, width: int, prefixes: Iterable[Tuple[int, int, int]]) -> Any:
+        self.width = width
+        self.keys = [0]
+        self.lengths = [0]
+        self.left = [-1]
+        self.right = [-1]
+        self.values = [-1]
+        self._build(sorted(prefixes))
+
+    def _node(self, key: int, length: int, value: int) -> int:
+        self.keys.append(key)
+        self.lengths.append(length)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.values.append(value)
+        return len(self.keys) - 1
+
+    def _attach(self, parent: int, child: int) -> None:
+        if self.keys[child] >> (self.width - 1 - self.lengths[parent]) & 1:
+            self.right[parent] = child
+        else:
+            self.left[parent] = child
+
+    def _build(self, prefixes: List[Tuple[int, int, int]]) -> None:
+        """Insert ``(key, length, value)`` triples in sorted (pre-)order."""
+        width = self.width
+        keys = self.keys
+        lengths = self.lengths
+        stack = [0]
+        for key, length, value in prefixes:
+            popped = -1
+            while True:
+                top = stack[-1]
+                top_length = lengths[top]
+                if (
+                    top_length <= length
+                    and (key ^ keys[top]) >> (width - top_length) == 0
+                ):
+                    break
+                popped = stack.pop()
+            parent = stack[-1]
+            if lengths[parent] == length:
+                # The root prefix, or a duplicate: the later value wins
+                self.values[parent] = value
+                continue
+            if popped != -1:
+                diff = keys[popped] ^ key
+                common = min(width - diff.bit_length(), length, lengths[popped])
+                if common > lengths[parent]:
+                    mask = ((1 << common) - 1) << (width - common)
+                    branch = self._node(key & mask, common, -1)
+                    self._attach(parent, branch)
+                    self._attach(branch, popped)
+                    stack.append(branch)
+                    parent = branch
+            node = self._node(key, length, value)
+            self._attach(parent, node)
+            stack.append(node)
+
+    def __len__(self) -> int:
+        return sum(1 for value in self.values if value != -1)
+
+    def matches(self, address: int) -> List[int]:
+        """Entry indexes of every prefix containing ``address``, shortest first."""
+        width = self.width
+        keys = self.keys
+        lengths = self.lengths
+        left = self.left
+        right = self.right
+        values = self.values
+        found = [values[0]] if values[0] != -1 else []
+        node = 0
+        while True:
+            length = lengths[node]
+            if length == width:
+                break
+            node = right[node] if address >> (width - 1 - length) & 1 else left[node]
+            if node == -1:
+                break
+            length = lengths[node]
+            if (address ^ keys[node]) >> (width - length):
+                break
+            if values[node] != -1:
+                found.append(values[node])
+        return found
+
+
+def _expiry_seconds(expires_at: Optional[datetime]) -> float:
+    """Unix time of ``expires_at``; naive datetimes are taken as UTC."""
+    if expires_at is None:
+        return float("inf")
+    if expires_at.tzinfo is not None:
+        expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return (expires_at - _EPOCH).total_seconds()
+
+
+class ReputationSnapshot:
+    """One immutable generation of the IP reputation index."""
+
+    def __init__(self, entries: List[ReputationEntry]) -> Any:
+        self.entries = entries
+        self.built_at = datetime.utcnow()
+        self._expires = [_expiry_seconds(entry.expires_at) for entry in entries]
+        v4, v6 = [], []
+        for index, entry in enumerate(entries):
+            version, key, length = parse_network(entry.network)
+            (v4 if version == 4 else v6).append((key, length, index))
+        self.v4 = PrefixTrie(32, v4)
+        self.v6 = PrefixTrie(128, v6)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, ip: str, now: float = None) -> Optional[ReputationEntry]:
+        """Most specific unexpired entry covering ``ip``; None if there is none."""
+        try:
+            if ":" in ip:
+                address = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+                if address >> 32 == 0xFFFF:
+                    trie, address = self.v4, address ^ _MAPPED_V4
+                else:
+                    trie = self.v6
+            else:
+                address = int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+                trie = self.v4
+        except (OSError, TypeError, ValueError):
+            return None
+        now = time.time() if now is None else now
+        expires = self._expires
+        for index in reversed(trie.matches(address)):
+            if expires[index] > now:
+                return self.entries[index]
+        return None
+
+
+class IPReputationIndex:
+    """Longest-prefix IP reputation lookups over swappable snapshots.
+
+    ``rebuild`` and ``load_files`` build a complete new snapshot off to the
+    side and publish it with one attribute assignment. Lookups read the
+    current snapshot once and take no lock; rebuilds are serialised.
+
+    Blocklist files hold one network per line: ``cidr[,score[,category[,
+    expires_at]]]``. Blank lines and text after ``#`` or ``;`` are
+    ignored, so plain address lists and Spamhaus DROP-style files load
+    as-is, with the file's defaults filling the missing fields.
+    """
+
+    def __init__(self) -> Any:
+        self._snapshot = ReputationSnapshot([])
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> ReputationSnapshot:
+        return self._snapshot
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def lookup(self, ip: str) -> Optional[ReputationEntry]:
+        return self._snapshot.lookup(ip)
+
+    def rebuild(self, entries: Iterable[ReputationEntry]) -> ReputationSnapshot:
+        """Replace the index with ``entries``; returns the new snapshot."""
+        with self._lock:
+            started = time.perf_counter()
+            snapshot = ReputationSnapshot(list(entries))
+            self._snapshot = snapshot
+        logger.info(
+            f"Built IP reputation snapshot: {len(snapshot.v4)} IPv4 and "
+            f"{len(snapshot.v6)} IPv6 prefixes in "
+            f"{(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return snapshot
+
+    def load_files(
+        self,
+        paths: Iterable[str],
+        extra_entries: Iterable[ReputationEntry] = (),
+        default_score: float = 0.8,
+        default_category: str = "blocklist",
+    ) -> ReputationSnapshot:
+        """Rebuild from blocklist files plus ``extra_entries``.
+
+        Entries from files come after ``extra_entries``, so a file listing
+        the same network overrides them.
+        """
+        entries = list(extra_entries)
+        for path in paths:
+            entries.extend(self.parse_blocklist(path, default_score, default_category))
+        return self.rebuild(entries)
+
+    @staticmethod
+    def parse_blocklist(
+        path: str, default_score: float = 0.8, default_category: str = "blocklist"
+    ) -> List[ReputationEntry]:
+        """Parse one blocklist file, skipping (and logging) malformed lines."""
+        source = os.path.basename(path)
+        entries = []
+        with open(path, encoding="utf-8") as blocklist:
+            for line_number, line in enumerate(blocklist, 1):
+                line = line.split("#", 1)[0].split(";", 1)[0].strip()
+                if not line:
+                    continue
+                fields = [field.strip() for field in line.split(",")]
+                try:
+                    parse_network(fields[0])
+                    network = fields[0]
+                    score = float(fields[1]) if len(fields) > 1 and fields[1] else None
+                    category = fields[2] if len(fields) > 2 and fields[2] else None
+                    expires_at = (
+                        datetime.fromisoformat(fields[3])
+                        if len(fields) > 3 and fields[3]
+                        else None
+                    )
+                except ValueError as e:
+                    logger.warning(f"Skipping {path}:{line_number}: {e}")
+                    continue
+                entries.append(
+                    ReputationEntry(
+                        network=network,
+                        score=default_score if score is None else score,
+                        category=category or default_category,
+                        source=source,
+                        expires_at=expires_at,
+                    )
+                )
+        return entries
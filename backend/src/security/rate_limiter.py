@@ -1,32 +1,302 @@
-from typing import Any
+from typing import Any, Dict, Optional
 import hashlib
+import logging
+import math
+import threading
 import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
 from functools import wraps
 from flask import current_app, jsonify, request
+from ..config.security import SecurityConfig
 
 "\nAdvanced rate limiter for financial applications\n"
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of checking every window of a limit for one identifier."""
+
+    allowed: bool
+    limits: Dict[str, int]
+    remaining: Dict[str, int] = field(default_factory=dict)
+    retry_after: float = 0.0
+
+    @property
+    def current_counts(self) -> Dict[str, int]:
+        """Requests consumed per window (limit minus remaining)."""
+        return {
+            window: self.limits[window] - self.remaining.get(window, 0)
+            for window in self.limits
+        }
+
+
+def window_seconds(window_type: str) -> int:
+    """Length in seconds of a named window; unknown names count as a minute."""
+    return WINDOW_SECONDS.get(window_type, 60)
+
+
+class MemoryRateLimitBackend:
+    """In-process token buckets, one set of buckets per identifier.
+
+    Each window of a limit is a bucket holding ``limit`` tokens that refills
+    at ``limit / period`` tokens per second, so a check is O(number of
+    windows) regardless of how many clients are tracked. Buckets are kept in
+    last-used order; idle ones are refilled completely after their longest
+    period and are dropped lazily from the cold end of the table, a few per
+    check, so memory stays proportional to the active client set.
+    """
+
+    EXPIRE_PER_CHECK = 2
+
+    def __init__(self, max_entries: int = 1_000_000) -> Any:
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(
+        self, identifier: str, limits: Dict[str, int], cost: int = 1
+    ) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._buckets.get(identifier)
+            if entry is None:
+                entry = self._buckets[identifier] = [
+                    now,
+                    max(window_seconds(w) for w in limits),
+                    {w: float(limit) for w, limit in limits.items()},
+                ]
+            else:
+                self._buckets.move_to_end(identifier)
+            last_seen, _, tokens = entry
+            elapsed = now - last_seen
+            remaining = {}
+            retry_after = 0.0
+            for window_type, limit in limits.items():
+                rate = limit / window_seconds(window_type)
+                level = min(
+                    float(limit), tokens.get(window_type, limit) + elapsed * rate
+                )
+                tokens[window_type] = level
+                if level < cost:
+                    retry_after = max(retry_after, (cost - level) / rate)
+            allowed = retry_after == 0.0
+            for window_type, limit in limits.items():
+                if allowed:
+                    tokens[window_type] -= cost
+                remaining[window_type] = int(tokens[window_type])
+            entry[0] = now
+            self._expire(now)
+        return RateLimitResult(allowed, dict(limits), remaining, retry_after)
+
+    def reset(self, identifier: str) -> None:
+        with self._lock:
+            self._buckets.pop(identifier, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _expire(self, now: float) -> None:
+        """Drop a bounded number of idle buckets; caller holds the lock."""
+        for _ in range(self.EXPIRE_PER_CHECK):
+            if not self._buckets:
+                return
+            identifier, (last_seen, longest_period, _) = next(
+                iter(self._buckets.items())
+            )
+            if (
+                now - last_seen < longest_period
+                and len(self._buckets) <= self.max_entries
+            ):
+                return
+            del self._buckets[identifier]
+
+
+class RedisRateLimitBackend:
+    """Cluster-wide limits evaluated atomically by a single Lua script.
+
+    Every window is a GCRA (generic cell rate algorithm) cell: Redis stores
+    only the theoretical arrival time per window key, and one EVALSHA checks
+    and updates all windows of a limit in a single round trip. Nothing is
+    written when any window rejects the request, so a denied call does not
+    consume budget from the other windows.
+    """
+
+    KEY_PREFIX = "rate_limit"
+
+    SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local new_tats = {}
+local remaining = {}
+local retry_after = 0
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[2 * i])
+    local period = tonumber(ARGV[2 * i + 1])
+    local interval = period / limit
+    local tat = tonumber(redis.call('GET', KEYS[i])) or now
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + interval * cost
+    local allow_at = new_tat - period
+    if allow_at > now then
+        retry_after = math.max(retry_after, allow_at - now)
+    end
+    remaining[i] = math.floor((period - (tat - now)) / interval)
+    new_tats[i] = new_tat
+end
+if retry_after == 0 then
+    for i = 1, #KEYS do
+        local ttl = math.ceil((new_tats[i] - now) * 1000)
+        redis.call('SET', KEYS[i], tostring(new_tats[i]), 'PX', ttl)
+        remaining[i] = remaining[i] - cost
+    end
+end
+local result = {retry_after == 0 and 1 or 0, tostring(retry_after)}
+for i = 1, #KEYS do
+    result[#result + 1] = remaining[i]
+end
+return result
+"""
+
+    def __init__(self, redis_client: Any, fallback: Any = None) -> Any:
+        self.redis_client = redis_client
+        self.fallback = fallback or MemoryRateLimitBackend()
+        self._script = redis_client.register_script(self.SCRIPT)
+
+    def check(
+        self, identifier: str, limits: Dict[str, int], cost: int = 1
+    ) -> RateLimitResult:
+        windows = list(limits)
+        keys = [f"{self.KEY_PREFIX}:{identifier}:{w}" for w in windows]
+        args = [cost]
+        for window_type in windows:
+            args.extend([limits[window_type], window_seconds(window_type)])
+        try:
+            allowed, retry_after, *remaining = self._script(keys=keys, args=args)
+        except Exception as e:
+            logger.error(f"Redis rate limiting error: {str(e)}")
+            return self.fallback.check(identifier, limits, cost)
+        return RateLimitResult(
+            bool(allowed),
+            dict(limits),
+            {w: max(int(r), 0) for w, r in zip(windows, remaining)},
+            float(retry_after),
+        )
+
+    def reset(self, identifier: str) -> None:
+        self.redis_client.delete(
+            *(f"{self.KEY_PREFIX}:{identifier}:{w}" for w in WINDOW_SECONDS)
+        )
+
+
+class LeasedRateLimitBackend:
+    """Serves checks from slices of a shared budget leased by this worker.
+
+    Instead of one Redis round trip per request, the worker reserves
+    ``lease_size`` requests at once from the cluster-wide ``backend`` and
+    spends them locally until the slice is used up or ``lease_ttl`` seconds
+    pass. Unspent tokens of an expired lease are simply forfeited, so the
+    global limit is never exceeded; at worst a client gets up to one lease
+    per worker less than its budget. The lease is capped at a tenth of the
+    tightest window so no single worker can hoard the whole budget.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        lease_size: int = 10,
+        lease_ttl: float = 1.0,
+        max_entries: int = 100_000,
+    ) -> Any:
+        self.backend = backend
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        self.max_entries = max_entries
+        self._leases = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(
+        self, identifier: str, limits: Dict[str, int], cost: int = 1
+    ) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            lease = self._leases.get(identifier)
+            if lease is not None and lease[1] > now and lease[0] >= cost:
+                lease[0] -= cost
+                self._leases.move_to_end(identifier)
+                return RateLimitResult(
+                    True,
+                    dict(limits),
+                    {w: r + lease[0] for w, r in lease[2].items()},
+                )
+        size = max(cost, min(self.lease_size, min(limits.values()) // 10))
+        result = self.backend.check(identifier, limits, size)
+        if not result.allowed:
+            if size > cost:
+                return self.backend.check(identifier, limits, cost)
+            return result
+        with self._lock:
+            self._leases[identifier] = [
+                size - cost,
+                now + self.lease_ttl,
+                result.remaining,
+            ]
+            self._leases.move_to_end(identifier)
+            while len(self._leases) > self.max_entries:
+                self._leases.popitem(last=False)
+        return RateLimitResult(
+            True,
+            dict(limits),
+            {w: r + size - cost for w, r in result.remaining.items()},
+        )
+
+    def reset(self, identifier: str) -> None:
+        with self._lock:
+            self._leases.pop(identifier, None)
+        self.backend.reset(identifier)
 
 
 class RateLimiter:
     """Advanced rate limiting with multiple strategies"""
 
-    def __init__(self, redis_client: Any = None) -> Any:
+    def __init__(self, redis_client: Any = None, backend: Any = None) -> Any:
         self.redis_client = redis_client
-        self.memory_store = {}
+        if backend is None:
+            backend = (
+                RedisRateLimitBackend(redis_client)
+                if redis_client
+                else MemoryRateLimitBackend()
+            )
+        self.backend = backend
 
     def limit(self, rate_limit_string: str) -> Any:
-        """Decorator for rate limiting"""
+        """Decorator for rate limiting with a ``"<count> per <window>"`` string"""
+        count, period = self._parse_limit_string(rate_limit_string)
+        window_type = next(
+            (w for w, seconds in WINDOW_SECONDS.items() if seconds == period),
+            "minute",
+        )
+        return self.rate_limit(**{window_type: count})
 
-        def decorator(f: Any) -> Any:
-            @wraps(f)
-            def decorated_function(*args: Any, **kwargs: Any) -> Any:
-                # Simple pass-through for now - full implementation would check limits
-                return f(*args, **kwargs)
-
-            return decorated_function
-
-        return decorator
+    def _parse_limit_string(self, rate_limit_string: str) -> Any:
+        """Parse ``"100 per hour"`` into ``(100, 3600)``"""
+        try:
+            count, _, window_type = rate_limit_string.strip().split()
+            return (int(count), WINDOW_SECONDS[window_type.rstrip("s").lower()])
+        except (ValueError, KeyError):
+            raise ValueError(f"Invalid rate limit string: {rate_limit_string!r}")
 
     def _get_client_id(self) -> Any:
         """Get unique client identifier"""
@@ -35,51 +305,33 @@ class RateLimiter:
         client_string = f"{ip}:{user_agent}"
         return hashlib.sha256(client_string.encode()).hexdigest()[:16]
 
-    def _get_key(self, identifier: Any, window_type: Any) -> Any:
-        """Generate Redis key for rate limiting"""
-        timestamp = int(time.time())
-        if window_type == "minute":
-            window = timestamp // 60
-        elif window_type == "hour":
-            window = timestamp // 3600
-        elif window_type == "day":
-            window = timestamp // 86400
-        else:
-            window = timestamp // 60
-        return f"rate_limit:{identifier}:{window_type}:{window}"
+    def is_allowed(
+        self, rate_limit_string: str, client_id: str, endpoint: str = "global"
+    ) -> Any:
+        """
+        Check a single ``"<count> per <window>"`` limit for a client
 
-    def _check_redis_limit(self, key: Any, limit: Any, window_seconds: Any) -> Any:
-        """Check rate limit using Redis"""
-        try:
-            current_count = self.redis_client.get(key)
-            if current_count is None:
-                self.redis_client.setex(key, window_seconds, 1)
-                return (True, 1, limit)
-            current_count = int(current_count)
-            if current_count >= limit:
-                return (False, current_count, limit)
-            self.redis_client.incr(key)
-            return (True, current_count + 1, limit)
-        except Exception as e:
-            current_app.logger.error(f"Redis rate limiting error: {str(e)}")
-            return (True, 0, limit)
-
-    def _check_memory_limit(self, key: Any, limit: Any, window_seconds: Any) -> Any:
-        """Check rate limit using memory store (fallback)"""
-        now = time.time()
-        self.memory_store = {
-            k: v
-            for k, v in self.memory_store.items()
-            if now - v["timestamp"] < window_seconds
-        }
-        if key not in self.memory_store:
-            self.memory_store[key] = {"count": 1, "timestamp": now}
-            return (True, 1, limit)
-        entry = self.memory_store[key]
-        if entry["count"] >= limit:
-            return (False, entry["count"], limit)
-        entry["count"] += 1
-        return (True, entry["count"], limit)
+        Returns:
+            Tuple: (allowed, info) where info has limit, remaining and
+            retry_after (seconds)
+        """
+        count, period = self._parse_limit_string(rate_limit_string)
+        window_type = next(w for w, s in WINDOW_SECONDS.items() if s == period)
+        result = self.backend.check(f"{endpoint}:{client_id}", {window_type: count})
+        return (
+            result.allowed,
+            {
+                "limit": count,
+                "remaining": result.remaining[window_type],
+                "retry_after": math.ceil(result.retry_after),
+            },
+        )
+
+    def check_limits(
+        self, identifier: Any, limits: Any, cost: int = 1
+    ) -> RateLimitResult:
+        """Check every window in ``limits`` for ``identifier`` in one call"""
+        return self.backend.check(identifier, limits, cost)
 
     def check_rate_limit(self, identifier: Any, limits: Any) -> Any:
         """
@@ -92,36 +344,16 @@ class RateLimiter:
         Returns:
             Tuple: (allowed, current_counts, limits_info)
         """
-        current_counts = {}
-        limits_info = {}
-        for window_type, limit in limits.items():
-            key = self._get_key(identifier, window_type)
-            if window_type == "minute":
-                window_seconds = 60
-            elif window_type == "hour":
-                window_seconds = 3600
-            elif window_type == "day":
-                window_seconds = 86400
-            else:
-                window_seconds = 60
-            if self.redis_client:
-                allowed, current, max_limit = self._check_redis_limit(
-                    key, limit, window_seconds
-                )
-            else:
-                allowed, current, max_limit = self._check_memory_limit(
-                    key, limit, window_seconds
-                )
-            current_counts[window_type] = current
-            limits_info[window_type] = max_limit
-            if not allowed:
-                return (False, current_counts, limits_info)
-        return (True, current_counts, limits_info)
+        result = self.check_limits(identifier, limits)
+        return (result.allowed, result.current_counts, result.limits)
 
-    def rate_limit(self, **limits) -> Any:
+    def rate_limit(self, scope: Optional[str] = None, **limits) -> Any:
         """
         Decorator for rate limiting endpoints
 
+        Counters are kept per decorated endpoint (or per ``scope`` when given)
+        and per client.
+
         Usage:
             @rate_limit(minute=10, hour=100)
             def my_endpoint() -> Any:
@@ -129,76 +361,148 @@ class RateLimiter:
         """
 
         def decorator(f):
+            limit_scope = scope or f"{f.__module__}.{f.__name__}"
 
             @wraps(f)
             def decorated_function(*args, **kwargs):
-                client_id = self._get_client_id()
-                allowed, current_counts, limits_info = self.check_rate_limit(
-                    client_id, limits
-                )
-                if not allowed:
-                    current_app.audit_logger.log_security_event(
-                        f"Rate limit exceeded for client {client_id}",
-                        ip_address=request.remote_addr,
-                        severity="HIGH",
-                    )
-                    retry_after = 60
-                    response = jsonify(
-                        {
-                            "error": "Rate Limit Exceeded",
-                            "message": "Too many requests. Please try again later.",
-                            "code": "RATE_LIMIT_EXCEEDED",
-                            "retry_after": retry_after,
-                            "current_limits": current_counts,
-                            "max_limits": limits_info,
-                            "timestamp": datetime.utcnow().isoformat(),
-                        }
-                    )
-                    response.status_code = 429
-                    response.headers["Retry-After"] = str(retry_after)
-                    response.headers["X-RateLimit-Limit"] = str(
-                        max(limits_info.values())
-                    )
-                    response.headers["X-RateLimit-Remaining"] = "0"
-                    response.headers["X-RateLimit-Reset"] = str(
-                        int(time.time()) + retry_after
-                    )
-                    return response
-                response = f(*args, **kwargs)
-                if hasattr(response, "headers"):
-                    max_limit = max(limits_info.values())
-                    current_max = max(current_counts.values())
-                    response.headers["X-RateLimit-Limit"] = str(max_limit)
-                    response.headers["X-RateLimit-Remaining"] = str(
-                        max_limit - current_max
+                return self._enforce(limit_scope, limits, f, *args, **kwargs)
+
+            return decorated_function
+
+        return decorator
+
+    def _enforce(self, scope: str, limits: Any, f: Any, *args, **kwargs) -> Any:
+        """Check ``limits`` for the calling client and run ``f`` if allowed"""
+        client_id = self._get_client_id()
+        result = self.check_limits(f"{scope}:{client_id}", limits)
+        limits_info = result.limits
+        if not result.allowed:
+            self._log_exceeded(client_id)
+            retry_after = max(math.ceil(result.retry_after), 1)
+            response = jsonify(
+                {
+                    "error": "Rate Limit Exceeded",
+                    "message": "Too many requests. Please try again later.",
+                    "code": "RATE_LIMIT_EXCEEDED",
+                    "retry_after": retry_after,
+                    "current_limits": result.current_counts,
+                    "max_limits": limits_info,
+                    "timestamp": datetime.utcnow().isoformat(),
+                }
+            )
+            response.status_code = 429
+            response.headers["Retry-After"] = str(retry_after)
+            response.headers["X-RateLimit-Limit"] = str(max(limits_info.values()))
+            response.headers["X-RateLimit-Remaining"] = "0"
+            response.headers["X-RateLimit-Reset"] = str(int(time.time()) + retry_after)
+            return response
+        response = f(*args, **kwargs)
+        if hasattr(response, "headers"):
+            tightest = min(result.remaining, key=result.remaining.get)
+            response.headers["X-RateLimit-Limit"] = str(limits_info[tightest])
+            response.headers["X-RateLimit-Remaining"] = str(result.remaining[tightest])
+            response.headers["X-RateLimit-Reset"] = str(
+                int(time.time()) + window_seconds(tightest)
+            )
+        return response
+
+    def _log_exceeded(self, client_id: str) -> None:
+        audit = getattr(current_app, "audit_logger", None)
+        message = f"Rate limit exceeded for client {client_id}"
+        if audit is not None:
+            audit.log_security_event(message, details={"ip": request.remote_addr})
+        else:
+            current_app.logger.warning(f"{message} ({request.remote_addr})")
+
+
+class RateLimiterRegistry:
+    """Process-wide named rate limit policies.
+
+    Each policy (see ``SecurityConfig.RATE_LIMIT_POLICIES``) gets one shared
+    limiter, created lazily on first use. Once a Redis client is configured
+    (the optimized gateway passes its pooled client) the counters become
+    cluster-wide; policies with a ``lease`` size use leased local quotas.
+    """
+
+    def __init__(self, policies: Any = None) -> Any:
+        self._policies = dict(
+            SecurityConfig.RATE_LIMIT_POLICIES if policies is None else policies
+        )
+        self._redis_client = None
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def configure(self, policies: Any = None, redis_client: Any = None) -> None:
+        """Override policies and/or switch to a Redis-backed store"""
+        with self._lock:
+            if policies:
+                self._policies.update(policies)
+            if redis_client is not None:
+                self._redis_client = redis_client
+            self._limiters = {}
+
+    def policy(self, name: str) -> Dict[str, int]:
+        """Window limits of a named policy"""
+        return self._policies[name]["limits"]
+
+    def get(self, name: str) -> RateLimiter:
+        """Shared limiter for a named policy"""
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(name)
+                if limiter is None:
+                    limiter = RateLimiter(
+                        self._redis_client, self._build_backend(self._policies[name])
                     )
-                    response.headers["X-RateLimit-Reset"] = str(int(time.time()) + 3600)
-                return response
+                    self._limiters[name] = limiter
+        return limiter
+
+    def limit(self, name: str) -> Any:
+        """Decorator enforcing a named policy, shared by every endpoint using it"""
+        if name not in self._policies:
+            raise KeyError(f"Unknown rate limit policy: {name}")
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                return self.get(name)._enforce(
+                    name, self.policy(name), f, *args, **kwargs
+                )
 
             return decorated_function
 
         return decorator
 
+    def _build_backend(self, policy: Any) -> Any:
+        if self._redis_client is None:
+            return MemoryRateLimitBackend()
+        backend = RedisRateLimitBackend(self._redis_client)
+        if policy.get("lease"):
+            backend = LeasedRateLimitBackend(
+                backend, policy["lease"], policy.get("lease_ttl", 1.0)
+            )
+        return backend
+
+
+limiter_registry = RateLimiterRegistry()
+
 
 def auth_rate_limit(f: Any) -> Any:
     """Rate limit for authentication endpoints"""
-    limiter = RateLimiter()
-    return limiter.rate_limit(minute=5, hour=20)(f)
+    return limiter_registry.limit("auth")(f)
 
 
 def transaction_rate_limit(f: Any) -> Any:
     """Rate limit for transaction endpoints"""
-    limiter = RateLimiter()
-    return limiter.rate_limit(minute=10, hour=100, day=500)(f)
+    return limiter_registry.limit("transaction")(f)
 
 
 def api_rate_limit(f: Any) -> Any:
     """Standard rate limit for API endpoints"""
-    limiter = RateLimiter()
-    return limiter.rate_limit(minute=60, hour=1000)(f)
+    return limiter_registry.limit("api")(f)
 
 
 def admin_rate_limit(f: Any) -> Any:
     """Rate limit for admin endpoints"""
-    limiter = RateLimiter()
-    return limiter.rate_limit(minute=30, hour=200)(f)
+    return limiter_registry.limit("admin")(f)
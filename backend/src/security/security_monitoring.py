@@ -2,11 +2,12 @@ import asyncio
 import json
 import logging
 import uuid
-from collections import defaultdict, deque
+from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional
+from .event_index import RollingCounter, SecurityEventIndex
 
 "\nSecurity Monitoring Service\n===========================\n\nComprehensive security monitoring and incident response system.\nProvides real-time security event monitoring, alerting, and forensic capabilities.\n"
 
@@ -21,6 +22,11 @@ class EventSeverity(Enum):
     CRITICAL = "critical"
 
 
+_SEVERITY_ORDINALS = {
+    severity: ordinal for ordinal, severity in enumerate(EventSeverity)
+}
+
+
 class EventCategory(Enum):
     """Security event categories."""
 
@@ -133,14 +139,10 @@ class AlertRule:
         """Check if event matches this alert rule."""
         if self.event_type != "*" and event.event_type != self.event_type:
             return False
-        severity_levels = {
-            EventSeverity.INFO: 1,
-            EventSeverity.LOW: 2,
-            EventSeverity.MEDIUM: 3,
-            EventSeverity.HIGH: 4,
-            EventSeverity.CRITICAL: 5,
-        }
-        if severity_levels[event.severity] < severity_levels[self.severity_threshold]:
+        if (
+            _SEVERITY_ORDINALS[event.severity]
+            < _SEVERITY_ORDINALS[self.severity_threshold]
+        ):
             return False
         for condition_key, condition_value in self.conditions.items():
             if condition_key == "source" and event.source != condition_value:
@@ -175,7 +177,12 @@ class SecurityMonitoringService:
         self.db = db_client
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
-        self._events = deque(maxlen=10000)
+        self._events = SecurityEventIndex(
+            resolution=self.config.get("event_bucket_width", timedelta(seconds=10)),
+            retention=self.config.get("event_retention", timedelta(days=7)),
+            max_events=self.config.get("max_events", 10000),
+        )
+        self._rule_counters = {}
         self._incidents = {}
         self._alert_rules = {}
         self._event_handlers = {}
@@ -354,7 +361,8 @@ class SecurityMonitoringService:
             ip_address=ip_address,
             user_agent=user_agent,
         )
-        self._events.append(event)
+        self._count_for_alert_rules(event)
+        self._events.add(event)
         await self._event_queue.put(event)
         self._metrics[f"events_{category.value}"] += 1
         self._metrics[f"events_{severity.value}"] += 1
@@ -372,26 +380,43 @@ class SecurityMonitoringService:
         except Exception as e:
             self.logger.error(f"Error processing event {event.event_id}: {str(e)}")
 
+    def _rule_counter(self, rule: AlertRule) -> RollingCounter:
+        """Rolling count of events matching ``rule``, seeded from the index."""
+        counter = self._rule_counters.get(rule.rule_id)
+        if counter is None or counter.window != rule.time_window:
+            counter = RollingCounter(rule.time_window)
+            for event in reversed(self._get_recent_events_for_rule(rule)):
+                counter.add(event.timestamp)
+            self._rule_counters[rule.rule_id] = counter
+        return counter
+
+    def _count_for_alert_rules(self, event: SecurityEvent) -> Any:
+        """Feed a new event, before it is indexed, to every enabled matching rule."""
+        for rule in self._alert_rules.values():
+            if rule.enabled and rule.matches(event):
+                self._rule_counter(rule).add(event.timestamp)
+
     async def _check_alert_rules(self, event: SecurityEvent):
         """Check if event triggers any alert rules."""
         for rule_id, rule in self._alert_rules.items():
             if not rule.enabled:
                 continue
             if rule.matches(event):
+                if self._rule_counter(rule).count() < rule.max_events:
+                    continue
                 recent_events = self._get_recent_events_for_rule(rule)
                 if len(recent_events) >= rule.max_events:
                     await self._trigger_alert(rule, recent_events)
 
     def _get_recent_events_for_rule(self, rule: AlertRule) -> List[SecurityEvent]:
         """Get recent events that match the alert rule."""
-        cutoff_time = datetime.utcnow() - rule.time_window
-        matching_events = []
-        for event in reversed(self._events):
-            if event.timestamp < cutoff_time:
-                break
-            if rule.matches(event):
-                matching_events.append(event)
-        return matching_events
+        return self._events.events(
+            datetime.utcnow() - rule.time_window,
+            event_types=None if rule.event_type == "*" else [rule.event_type],
+            user_id=rule.conditions.get("user_id"),
+            ip_address=rule.conditions.get("ip_address"),
+            predicate=rule.matches,
+        )
 
     async def _trigger_alert(self, rule: AlertRule, events: List[SecurityEvent]):
         """Trigger a security alert."""
@@ -427,30 +452,28 @@ class SecurityMonitoringService:
         self, event: SecurityEvent, pattern_name: str, pattern_config: Dict[str, Any]
     ):
         """Check if event matches a correlation pattern."""
-        time_window = pattern_config["time_window"]
-        cutoff_time = datetime.utcnow() - time_window
-        recent_events = [e for e in self._events if e.timestamp >= cutoff_time]
+        cutoff_time = datetime.utcnow() - pattern_config["time_window"]
         if pattern_name == "account_takeover_pattern":
             await self._check_account_takeover_pattern(
-                event, recent_events, pattern_config
+                event, cutoff_time, pattern_config
             )
         elif pattern_name == "data_exfiltration_pattern":
             await self._check_data_exfiltration_pattern(
-                event, recent_events, pattern_config
+                event, cutoff_time, pattern_config
             )
         elif pattern_name == "brute_force_pattern":
-            await self._check_brute_force_pattern(event, recent_events, pattern_config)
+            await self._check_brute_force_pattern(event, cutoff_time, pattern_config)
 
     async def _check_account_takeover_pattern(
         self,
         event: SecurityEvent,
-        recent_events: List[SecurityEvent],
+        cutoff_time: datetime,
         pattern_config: Dict[str, Any],
     ):
         """Check for account takeover patterns."""
         if not event.user_id:
             return
-        user_events = [e for e in recent_events if e.user_id == event.user_id]
+        user_events = self._events.events(cutoff_time, user_id=event.user_id)
         failed_logins = [e for e in user_events if e.event_type == "login_failed"]
         successful_logins = [e for e in user_events if e.event_type == "login_success"]
         password_changes = [e for e in user_events if e.event_type == "password_change"]
@@ -466,59 +489,57 @@ class SecurityMonitoringService:
                 f"Potential account takeover for user {event.user_id}",
                 EventSeverity.HIGH,
                 EventCategory.AUTHENTICATION,
-                user_events,
+                user_events[::-1],
             )
 
     async def _check_data_exfiltration_pattern(
         self,
         event: SecurityEvent,
-        recent_events: List[SecurityEvent],
+        cutoff_time: datetime,
         pattern_config: Dict[str, Any],
     ):
         """Check for data exfiltration patterns."""
         if not event.user_id:
             return
-        user_events = [e for e in recent_events if e.user_id == event.user_id]
-        data_access_events = [
-            e for e in user_events if e.event_type == "large_data_access"
-        ]
-        download_events = [e for e in user_events if e.event_type == "file_download"]
-        transfer_events = [
-            e for e in user_events if e.event_type == "external_transfer"
-        ]
-        if len(data_access_events) >= 1 and (
-            len(download_events) >= 3 or len(transfer_events) >= 1
+        count = self._events.count
+        if not count(
+            cutoff_time, event_types=["large_data_access"], user_id=event.user_id
+        ):
+            return
+        if (
+            count(cutoff_time, event_types=["file_download"], user_id=event.user_id)
+            >= 3
+            or count(
+                cutoff_time, event_types=["external_transfer"], user_id=event.user_id
+            )
+            >= 1
         ):
             await self._create_correlation_incident(
                 "Data Exfiltration Detected",
                 f"Potential data exfiltration by user {event.user_id}",
                 EventSeverity.CRITICAL,
                 EventCategory.DATA_ACCESS,
-                user_events,
+                self._events.events(cutoff_time, user_id=event.user_id)[::-1],
             )
 
     async def _check_brute_force_pattern(
         self,
         event: SecurityEvent,
-        recent_events: List[SecurityEvent],
+        cutoff_time: datetime,
         pattern_config: Dict[str, Any],
     ):
         """Check for brute force attack patterns."""
         if not event.ip_address:
             return
-        failed_logins = [
-            e
-            for e in recent_events
-            if e.event_type == "login_failed" and e.ip_address == event.ip_address
-        ]
         min_count = pattern_config["conditions"].get("min_count", 10)
-        if len(failed_logins) >= min_count:
+        query = {"event_types": ["login_failed"], "ip_address": event.ip_address}
+        if self._events.count(cutoff_time, **query) >= min_count:
             await self._create_correlation_incident(
                 "Brute Force Attack Detected",
                 f"Brute force attack from IP {event.ip_address}",
                 EventSeverity.HIGH,
                 EventCategory.AUTHENTICATION,
-                failed_logins,
+                self._events.events(cutoff_time, **query)[::-1],
             )
 
     async def _create_correlation_incident(
@@ -666,10 +687,10 @@ class SecurityMonitoringService:
         time_range: timedelta = None,
     ) -> List[SecurityEvent]:
         """Get recent security events with optional filtering."""
-        events = list(self._events)
         if time_range:
-            cutoff_time = datetime.utcnow() - time_range
-            events = [e for e in events if e.timestamp >= cutoff_time]
+            events = self._events.events(datetime.utcnow() - time_range)
+        else:
+            events = list(self._events)
         if category:
             events = [e for e in events if e.category == category]
         if severity:
@@ -752,6 +773,8 @@ class SecurityMonitoringService:
         """Disable an alert rule."""
         if rule_id in self._alert_rules:
             self._alert_rules[rule_id].enabled = False
+            # Rebuilt from the event index if the rule is enabled again
+            self._rule_counters.pop(rule_id, None)
             return True
         return False
 
@@ -768,12 +791,8 @@ class SecurityMonitoringService:
             ]
         )
         now = datetime.utcnow()
-        last_hour_events = len(
-            [e for e in self._events if e.timestamp >= now - timedelta(hours=1)]
-        )
-        last_day_events = len(
-            [e for e in self._events if e.timestamp >= now - timedelta(days=1)]
-        )
+        last_hour_events = self._events.count(now - timedelta(hours=1))
+        last_day_events = self._events.count(now - timedelta(days=1))
         return {
             "total_events": self._metrics["total_events"],
             "events_last_hour": last_hour_events,
@@ -802,7 +821,7 @@ class SecurityMonitoringService:
     ) -> Dict[str, Any]:
         """Generate comprehensive security report."""
         cutoff_time = datetime.utcnow() - time_range
-        period_events = [e for e in self._events if e.timestamp >= cutoff_time]
+        period_events = self._events.events(cutoff_time)[::-1]
         period_incidents = [
             i for i in self._incidents.values() if i.created_at >= cutoff_time
         ]
@@ -0,0 +1,335 @@
+import hashlib
+import logging
+import re
+import threading
+from collections import deque
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Union
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+"\nCompiled Signature Matcher\n==========================\n\nMulti-pattern matching of threat signatures: an Aho-Corasick prefilter over\nthe literal text each signature requires, then regex verification of the\nfew signatures whose literals occur.\n"
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_FLAGS = re.IGNORECASE
+# Candidates needed before one alternation regex screens them all at once;
+# below this, searching each candidate's own regex is as cheap
+GATE_MIN_CANDIDATES = 3
+# Distinct candidate sets whose alternation regex is kept compiled
+MAX_GATES = 256
+
+
+def signature_id(category: str, pattern: str) -> str:
+    """Stable ID of a signature given without one (survives reordering)."""
+    return f"{category}-{hashlib.sha1(pattern.encode()).hexdigest()[:8]}"
+
+
+def _best(requirements: List[FrozenSet[str]]) -> Optional[FrozenSet[str]]:
+    """The most selective requirement: longest shortest literal, fewest options."""
+    if not requirements:
+        return None
+    return max(requirements, key=lambda r: (min(len(s) for s in r), -len(r)))
+
+
+def _sequence_requirements(items: Any) -> List[FrozenSet[str]]:
+    """Literal sets of which every match of ``items`` contains one literal each.
+
+    Each set is one requirement; a match satisfies all of them. Only
+    constructs whose semantics are certain contribute, so the result never
+    rules out a real match.
+    """
+    requirements = []
+    run = []
+
+    def end_run() -> None:
+        literal = "".join(run)
+        if literal and literal.isascii():
+            requirements.append(frozenset([literal]))
+        run.clear()
+
+    for op, arg in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(arg).lower())
+            continue
+        end_run()
+        if op is sre_constants.SUBPATTERN:
+            requirements.extend(_sequence_requirements(arg[-1]))
+        elif op is sre_constants.BRANCH:
+            branches = [_sequence_requirement(branch) for branch in arg[1]]
+            if branches and all(branches):
+                requirements.append(frozenset().union(*branches))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) or (
+            op is getattr(sre_constants, "POSSESSIVE_REPEAT", None)
+        ):
+            if arg[0] >= 1:
+                requirements.extend(_sequence_requirements(arg[2]))
+        elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            requirements.extend(_sequence_requirements(arg))
+    end_run()
+    return requirements
+
+
+def _sequence_requirement(items: Any) -> Optional[FrozenSet[str]]:
+    """The most selective requirement of ``items``; ``None`` if there is none."""
+    return _best(_sequence_requirements(items))
+
+
+def required_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """
+    Lower-cased ASCII literals of which any match of ``pattern`` contains one
+
+    Non-ASCII literals are left out: under IGNORECASE they can match ASCII
+    text (e.g. the Kelvin sign and ``k``) that lower-casing would not find.
+    """
+    try:
+        return _sequence_requirement(sre_parse.parse(pattern, SIGNATURE_FLAGS))
+    except Exception:
+        return None
+
+
+def _has_group_reference(items: Any) -> bool:
+    """Whether ``items`` holds a backreference or a group conditional."""
+    for op, arg in items:
+        if op in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS):
+            return True
+        for value in arg if isinstance(arg, (list, tuple)) else ():
+            branches = value if isinstance(value, list) else [value]
+            if any(
+                isinstance(branch, sre_parse.SubPattern)
+                and _has_group_reference(branch)
+                for branch in branches
+            ):
+                return True
+    return False
+
+
+def has_group_reference(pattern: str) -> bool:
+    """
+    Whether ``pattern`` refers back to one of its groups
+
+    Group numbers shift when the pattern is embedded in an alternation with
+    other patterns' groups, so such a pattern only works standalone. Errs
+    towards ``True`` when the pattern can't be parsed.
+    """
+    try:
+        return _has_group_reference(sre_parse.parse(pattern, SIGNATURE_FLAGS))
+    except Exception:
+        return True
+
+
+def required_literal_sets(pattern: str) -> List[FrozenSet[str]]:
+    """Every requirement of ``pattern``, as lower-cased ASCII literal sets
+
+    A match contains at least one literal from each set, so text missing
+    all literals of any one set cannot match. Empty when nothing is known.
+    """
+    try:
+        return list(
+            dict.fromkeys(
+                _sequence_requirements(sre_parse.parse(pattern, SIGNATURE_FLAGS))
+            )
+        )
+    except Exception:
+        return []
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton flattened into a DFA over the keyword alphabet.
+
+    ``search`` walks the text once, one dict lookup per character, and
+    returns the union of the labels of every keyword occurring in it.
+    Characters outside the alphabet reset to the root.
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]) -> Any:
+        goto = [{}]
+        outputs = [set()]
+        for keyword, labels in keywords.items():
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append(set())
+                state = next_state
+            outputs[state].update(labels)
+        alphabet = {char for keyword in keywords for char in keyword}
+        fail = [0] * len(goto)
+        delta = [dict() for _ in goto]
+        order = deque()
+        for char in alphabet:
+            child = goto[0].get(char)
+            if child is not None:
+                delta[0][char] = child
+                order.append(child)
+        while order:
+            state = order.popleft()
+            outputs[state] |= outputs[fail[state]]
+            for char in alphabet:
+                child = goto[state].get(char)
+                if child is None:
+                    target = delta[fail[state]].get(char, 0)
+                    if target:
+                        delta[state][char] = target
+                else:
+                    fail[child] = delta[fail[state]].get(char, 0)
+                    delta[state][char] = child
+                    order.append(child)
+        self._delta = delta
+        self._outputs = [frozenset(labels) for labels in outputs]
+        self.state_count = len(goto)
+
+    def search(self, text: str) -> Set[str]:
+        delta = self._delta
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
+
+
+class CompiledSignatureSet:
+    """Signatures of one category compiled for multi-pattern matching.
+
+    Matching runs the category's Aho-Corasick prefilter over the
+    lower-cased input. Signatures with no required literal are always
+    candidates, as is every signature for non-ASCII input, where
+    IGNORECASE equivalences go beyond ``str.lower``. Several candidates
+    are first screened together by one alternation regex, unless one of
+    them uses backreferences; each remaining candidate's own regex then
+    decides which signature IDs matched.
+    """
+
+    def __init__(self, signatures: Dict[str, str], cache: Dict[str, Any]) -> Any:
+        self.signatures = dict(signatures)
+        self.regexes = {}
+        keywords = {}
+        self.unfiltered = []
+        # Backreferences would point at other signatures' groups in a gate
+        self.ungated = set()
+        for sig_id, pattern in self.signatures.items():
+            if pattern not in cache:
+                regex = re.compile(pattern, SIGNATURE_FLAGS)
+                cache[pattern] = (
+                    regex,
+                    required_literals(pattern),
+                    regex.groups > 0 and has_group_reference(pattern),
+                )
+            regex, literals, references_groups = cache[pattern]
+            self.regexes[sig_id] = regex
+            if references_groups:
+                self.ungated.add(sig_id)
+            if literals:
+                for literal in literals:
+                    keywords.setdefault(literal, set()).add(sig_id)
+            else:
+                self.unfiltered.append(sig_id)
+        self.automaton = AhoCorasick(keywords)
+        self._order = {sig_id: i for i, sig_id in enumerate(self.signatures)}
+        self._all_ids = frozenset(self.signatures)
+        self._gates = {}
+
+    def _gate(self, candidates: FrozenSet[str]) -> Any:
+        """One alternation of the candidates' patterns; None if it won't compile"""
+        gate = self._gates.get(candidates, False)
+        if gate is not False:
+            return gate
+        if len(self._gates) >= MAX_GATES:
+            self._gates.clear()
+        try:
+            gate = re.compile(
+                "|".join(
+                    f"(?:{self.signatures[sig_id]})"
+                    for sig_id in sorted(candidates, key=self._order.get)
+                ),
+                SIGNATURE_FLAGS,
+            )
+        except re.error:
+            # e.g. the same named group in two signatures
+            gate = None
+        self._gates[candidates] = gate
+        return gate
+
+    def match(self, text: str) -> List[str]:
+        """IDs of the signatures matching ``text``, in signature order."""
+        if text.isascii():
+            candidates = self.automaton.search(text.lower())
+            if self.unfiltered:
+                candidates.update(self.unfiltered)
+            if not candidates:
+                return []
+        else:
+            candidates = self._all_ids
+        if len(candidates) >= GATE_MIN_CANDIDATES and self.ungated.isdisjoint(
+            candidates
+        ):
+            gate = self._gate(frozenset(candidates))
+            if gate is not None and not gate.search(text):
+                return []
+        return [
+            sig_id
+            for sig_id, regex in self.regexes.items()
+            if sig_id in candidates and regex.search(text)
+        ]
+
+
+class SignatureMatcher:
+    """Compiled signature sets per threat category, hot-reloadable.
+
+    ``load`` replaces a category's signatures; a category is recompiled
+    only when its signatures changed, and individual patterns already seen
+    are not parsed or compiled again.
+    """
+
+    def __init__(self) -> Any:
+        self._sets = {}
+        self._pattern_cache = {}
+        self._lock = threading.Lock()
+
+    def load(self, category: str, signatures: Union[Dict[str, str], List[str]]) -> bool:
+        """Install ``signatures`` (``{id: pattern}`` or a list) for ``category``.
+
+        Returns whether anything was recompiled.
+        """
+        if not isinstance(signatures, dict):
+            signatures = {
+                signature_id(category, pattern): pattern for pattern in signatures
+            }
+        current = self._sets.get(category)
+        if current is not None and current.signatures == signatures:
+            return False
+        with self._lock:
+            compiled = CompiledSignatureSet(signatures, self._pattern_cache)
+            live = set(signatures.values())
+            for other_category, other in self._sets.items():
+                if other_category != category:
+                    live.update(other.signatures.values())
+            for pattern in [p for p in self._pattern_cache if p not in live]:
+                del self._pattern_cache[pattern]
+            self._sets[category] = compiled
+        logger.info(
+            f"Compiled {len(signatures)} {category} signatures "
+            f"({compiled.automaton.state_count} automaton states, "
+            f"{len(compiled.unfiltered)} without prefilter)"
+        )
+        return True
+
+    def match(self, category: str, text: str) -> List[str]:
+        compiled = self._sets.get(category)
+        return compiled.match(text) if compiled is not None else []
+
+    def pattern(self, category: str, sig_id: str) -> str:
+        return self._sets[category].signatures[sig_id]
+
+    def signature_count(self) -> int:
+        return sum(len(compiled.signatures) for compiled in self._sets.values())
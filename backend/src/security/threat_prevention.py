@@ -1,6 +1,5 @@
 import json
 import logging
-import re
 import uuid
 from collections import defaultdict, deque
 from dataclasses import dataclass
@@ -8,6 +7,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Dict, List
 from sqlalchemy.orm import Session
+from .ip_reputation import IPReputationIndex, ReputationEntry
+from .signature_matcher import SignatureMatcher
 
 "\nThreat Prevention Service\n========================\n\nAdvanced threat prevention and cybersecurity service for financial applications.\nProvides real-time threat detection, prevention, and response capabilities.\n"
 
@@ -136,8 +137,10 @@ class ThreatPreventionService:
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
         self._threat_signatures = {}
+        self._signature_matcher = SignatureMatcher()
         self._behavioral_baselines = {}
         self._threat_intelligence = {}
+        self._ip_reputation = IPReputationIndex()
         self._rate_limiters = {}
         self._blocked_entities = {}
         self._security_rules = {}
@@ -203,6 +206,30 @@ class ThreatPreventionService:
             "(security.{0,20}alert)",
             "(update.{0,20}payment.{0,20}information)",
         ]
+        self._compile_threat_signatures()
+
+    def _compile_threat_signatures(self) -> Any:
+        """Compile signatures per threat type; unchanged types are kept as-is."""
+        for threat_type, signatures in self._threat_signatures.items():
+            self._signature_matcher.load(threat_type.value, signatures)
+
+    def reload_threat_signatures(
+        self, signatures: Dict[ThreatType, List[str]]
+    ) -> List[ThreatType]:
+        """
+        Hot-reload signatures for the given threat types.
+
+        Only the threat types whose signatures changed are recompiled.
+
+        Returns:
+            List[ThreatType]: Threat types that were recompiled
+        """
+        recompiled = []
+        for threat_type, patterns in signatures.items():
+            self._threat_signatures[threat_type] = list(patterns)
+            if self._signature_matcher.load(threat_type.value, list(patterns)):
+                recompiled.append(threat_type)
+        return recompiled
 
     def _initialize_security_rules(self) -> Any:
         """Initialize security rules and policies."""
@@ -281,6 +308,43 @@ class ThreatPreventionService:
                 }
             },
         }
+        self.reload_ip_reputation()
+
+    def reload_ip_reputation(self, blocklist_files: List[str] = None) -> int:
+        """
+        Rebuild the IP reputation index and swap it in.
+
+        The index holds the ``malicious_ips`` threat intelligence, the
+        configured ``blocked_ip_ranges`` and every blocklist file (by default
+        ``config["ip_blocklist_files"]``). Lookups keep using the previous
+        snapshot until the new one is complete.
+
+        Returns:
+            int: Number of networks in the new index
+        """
+        if blocklist_files is None:
+            blocklist_files = self.config.get("ip_blocklist_files", [])
+        entries = [
+            ReputationEntry(
+                network=ip,
+                score=info["confidence"],
+                category=info["threat_type"],
+                source=info["source"],
+                last_seen=info.get("last_seen"),
+            )
+            for ip, info in self._threat_intelligence["malicious_ips"].items()
+        ]
+        entries.extend(
+            ReputationEntry(
+                network=network,
+                score=1.0,
+                category="blocked_range",
+                source="network_security",
+            )
+            for network in self._security_rules["network_security"]["blocked_ip_ranges"]
+        )
+        snapshot = self._ip_reputation.load_files(blocklist_files, entries)
+        return len(snapshot)
 
     def _initialize_rate_limiters(self) -> Any:
         """Initialize rate limiting mechanisms."""
@@ -413,8 +477,10 @@ class ThreatPreventionService:
         for input_value in inputs_to_check:
             if not isinstance(input_value, str):
                 continue
-            sql_matches = self._check_signatures(input_value, ThreatType.SQL_INJECTION)
-            if sql_matches:
+            sql_ids = self._signature_matcher.match(
+                ThreatType.SQL_INJECTION.value, input_value
+            )
+            if sql_ids:
                 indicators.append(
                     ThreatIndicator(
                         indicator_id=f"sqli_{int(datetime.utcnow().timestamp())}",
@@ -423,13 +489,15 @@ class ThreatPreventionService:
                         severity=ThreatSeverity.HIGH,
                         confidence=0.9,
                         description="SQL injection attempt detected",
-                        evidence={"input": input_value[:100], "matches": sql_matches},
+                        evidence=self._signature_evidence(
+                            input_value, ThreatType.SQL_INJECTION, sql_ids
+                        ),
                         source="signature_detection",
                         timestamp=datetime.utcnow(),
                     )
                 )
-            xss_matches = self._check_signatures(input_value, ThreatType.XSS)
-            if xss_matches:
+            xss_ids = self._signature_matcher.match(ThreatType.XSS.value, input_value)
+            if xss_ids:
                 indicators.append(
                     ThreatIndicator(
                         indicator_id=f"xss_{int(datetime.utcnow().timestamp())}",
@@ -438,13 +506,17 @@ class ThreatPreventionService:
                         severity=ThreatSeverity.HIGH,
                         confidence=0.85,
                         description="Cross-site scripting attempt detected",
-                        evidence={"input": input_value[:100], "matches": xss_matches},
+                        evidence=self._signature_evidence(
+                            input_value, ThreatType.XSS, xss_ids
+                        ),
                         source="signature_detection",
                         timestamp=datetime.utcnow(),
                     )
                 )
-            cmd_matches = self._check_signatures(input_value, ThreatType.MALWARE)
-            if cmd_matches:
+            cmd_ids = self._signature_matcher.match(
+                ThreatType.MALWARE.value, input_value
+            )
+            if cmd_ids:
                 indicators.append(
                     ThreatIndicator(
                         indicator_id=f"cmdi_{int(datetime.utcnow().timestamp())}",
@@ -453,7 +525,9 @@ class ThreatPreventionService:
                         severity=ThreatSeverity.CRITICAL,
                         confidence=0.95,
                         description="Command injection attempt detected",
-                        evidence={"input": input_value[:100], "matches": cmd_matches},
+                        evidence=self._signature_evidence(
+                            input_value, ThreatType.MALWARE, cmd_ids
+                        ),
                         source="signature_detection",
                         timestamp=datetime.utcnow(),
                     )
@@ -462,12 +536,23 @@ class ThreatPreventionService:
 
     def _check_signatures(self, input_value: str, threat_type: ThreatType) -> List[str]:
         """Check input against threat signatures."""
-        matches = []
-        signatures = self._threat_signatures.get(threat_type, [])
-        for signature in signatures:
-            if re.search(signature, input_value, re.IGNORECASE):
-                matches.append(signature)
-        return matches
+        return [
+            self._signature_matcher.pattern(threat_type.value, sig_id)
+            for sig_id in self._signature_matcher.match(threat_type.value, input_value)
+        ]
+
+    def _signature_evidence(
+        self, input_value: str, threat_type: ThreatType, signature_ids: List[str]
+    ) -> Dict[str, Any]:
+        """Evidence for matched signatures: their IDs and patterns."""
+        return {
+            "input": input_value[:100],
+            "signature_ids": signature_ids,
+            "matches": [
+                self._signature_matcher.pattern(threat_type.value, sig_id)
+                for sig_id in signature_ids
+            ],
+        }
 
     async def _check_rate_limits(
         self, request_data: Dict[str, Any]
@@ -547,21 +632,26 @@ class ThreatPreventionService:
         client_ip = request_data.get("client_ip", "")
         if not client_ip:
             return indicators
-        if client_ip in self._threat_intelligence["malicious_ips"]:
-            threat_info = self._threat_intelligence["malicious_ips"][client_ip]
+        reputation = self._ip_reputation.lookup(client_ip)
+        if reputation is not None:
             indicators.append(
                 ThreatIndicator(
                     indicator_id=f"malicious_ip_{int(datetime.utcnow().timestamp())}",
                     indicator_type="malicious_ip",
                     threat_type=ThreatType.MALWARE,
                     severity=ThreatSeverity.HIGH,
-                    confidence=threat_info["confidence"],
-                    description=f"Request from known malicious IP: {threat_info['threat_type']}",
+                    confidence=reputation.score,
+                    description=f"Request from known malicious IP: {reputation.category}",
                     evidence={
                         "ip_address": client_ip,
-                        "threat_type": threat_info["threat_type"],
-                        "source": threat_info["source"],
-                        "last_seen": threat_info["last_seen"].isoformat(),
+                        "network": reputation.network,
+                        "threat_type": reputation.category,
+                        "source": reputation.source,
+                        "last_seen": (
+                            reputation.last_seen.isoformat()
+                            if reputation.last_seen
+                            else None
+                        ),
                     },
                     source="threat_intelligence",
                     timestamp=datetime.utcnow(),
@@ -994,6 +1084,7 @@ class ThreatPreventionService:
             ),
             "blocked_entities": len(self._blocked_entities),
             "threat_intelligence_ips": len(self._threat_intelligence["malicious_ips"]),
+            "ip_reputation_networks": len(self._ip_reputation),
             "threat_intelligence_domains": len(
                 self._threat_intelligence["malicious_domains"]
             ),
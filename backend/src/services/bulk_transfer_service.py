@@ -0,0 +1,235 @@
+import logging
+import uuid
+from decimal import Decimal
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+from ..models.account import Account, AccountStatus
+from ..models.transaction import Transaction, TransactionCategory, TransactionType
+from ..schemas import TransferFundsRequest
+from .wallet_service import (
+    AccountAccessDenied,
+    AccountInactive,
+    AccountNotFound,
+    CurrencyMismatch,
+    InsufficientFunds,
+    WalletServiceError,
+    build_transaction_row,
+    fetch_accounts,
+    invalidate_account_cache,
+    run_in_transaction,
+)
+
+"\nBulk transfer / payout posting on top of wallet_service\n"
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = 1000
+MAX_BULK_TRANSFERS = 50000
+
+
+def process_bulk_transfers(
+    session: Session,
+    transfers: list[dict],
+    user_id: str = None,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    channel: str = "api",
+) -> dict:
+    """Posts many transfers with a handful of statements per chunk.
+
+    Every item is validated in one pass against accounts preloaded with a
+    single ``IN`` query. Valid items are then posted in chunks of
+    ``chunk_size``, each chunk being one DB transaction that locks its
+    accounts in canonical order, applies the transfers in order against
+    running balances, updates every touched account once with its net
+    delta and bulk-inserts all ``Transaction`` rows. A transfer that would
+    overdraw its source at that point fails on its own; the rest of the
+    chunk still commits. A chunk whose transaction fails is rolled back and
+    its items reported as failed; other chunks are unaffected. When
+    ``user_id`` is given, source accounts must belong to that user.
+
+    Returns ``{"batch_id", "succeeded", "failed", "results"}`` with one
+    result per input item, in input order.
+    """
+    batch_id = str(uuid.uuid4())
+    results = [None] * len(transfers)
+    requests = {}
+    for index, item in enumerate(transfers):
+        try:
+            requests[index] = TransferFundsRequest.model_validate(item)
+        except ValidationError as e:
+            results[index] = _failure(
+                index, "VALIDATION_ERROR", e.errors()[0]["msg"], 400
+            )
+    accounts = fetch_accounts(
+        session,
+        {r.from_account_id for r in requests.values()}
+        | {r.to_account_id for r in requests.values()},
+    )
+    valid = []
+    for index, transfer in requests.items():
+        try:
+            _validate(transfer, transfers[index], accounts, user_id)
+        except WalletServiceError as e:
+            results[index] = _failure(index, e.error_code, str(e), e.status_code)
+            continue
+        valid.append((index, transfer))
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start : start + chunk_size]
+        try:
+            chunk_results, touched = run_in_transaction(
+                session, _post_chunk, session, chunk, batch_id, channel
+            )
+        except Exception as e:
+            # Earlier chunks are committed: report this one's items as failed
+            # instead of raising, so the summary is still returned (and stored
+            # under the idempotency key) and a retry cannot post them twice.
+            logger.exception(f"Bulk transfer {batch_id}: chunk at {start} failed")
+            if isinstance(e, WalletServiceError):
+                code, message, status_code = e.error_code, str(e), e.status_code
+            else:
+                code, message, status_code = (
+                    "BULK_CHUNK_FAILED",
+                    "Chunk could not be posted",
+                    500,
+                )
+            for index, _ in chunk:
+                results[index] = _failure(index, code, message, status_code)
+            continue
+        for index, result in chunk_results.items():
+            results[index] = result
+        invalidate_account_cache(*touched)
+    succeeded = sum(1 for result in results if result["status"] == "success")
+    logger.info(
+        f"Bulk transfer {batch_id}: {succeeded} succeeded, "
+        f"{len(results) - succeeded} failed"
+    )
+    return {
+        "batch_id": batch_id,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+def _validate(
+    transfer: TransferFundsRequest, item: dict, accounts: dict, user_id: str
+) -> None:
+    source = accounts.get(transfer.from_account_id)
+    destination = accounts.get(transfer.to_account_id)
+    if source is None:
+        raise AccountNotFound(transfer.from_account_id)
+    if destination is None:
+        raise AccountNotFound(transfer.to_account_id)
+    if user_id is not None and source.user_id != user_id:
+        raise AccountAccessDenied(source.id)
+    for account in (source, destination):
+        if account.status != AccountStatus.ACTIVE:
+            raise AccountInactive(account.id)
+    if source.currency != destination.currency or (
+        "currency" in item and transfer.currency != source.currency
+    ):
+        raise CurrencyMismatch()
+
+
+def _post_chunk(
+    session: Session, chunk: list, batch_id: str, channel: str
+) -> tuple[dict, set]:
+    """Posts one chunk inside the current DB transaction (re-run on retry)."""
+    account_ids = set()
+    for _, transfer in chunk:
+        account_ids.add(transfer.from_account_id)
+        account_ids.add(transfer.to_account_id)
+    locked = fetch_accounts(session, account_ids, for_update=True)
+    balances = {
+        account_id: row.balance
+        for account_id, row in locked.items()
+        if row.status == AccountStatus.ACTIVE
+    }
+    deltas = {}
+    rows = []
+    results = {}
+    for index, transfer in chunk:
+        source = locked.get(transfer.from_account_id)
+        destination = locked.get(transfer.to_account_id)
+        if source is None or destination is None:
+            missing = transfer.to_account_id if source else transfer.from_account_id
+            error = AccountNotFound(missing)
+        elif source.id not in balances or destination.id not in balances:
+            error = AccountInactive(
+                source.id if source.id not in balances else destination.id
+            )
+        elif balances[source.id] < transfer.amount:
+            error = InsufficientFunds(source.id)
+        else:
+            error = None
+        if error is not None:
+            results[index] = _failure(
+                index, error.error_code, str(error), error.status_code
+            )
+            continue
+        amount = transfer.amount
+        balances[source.id] -= amount
+        balances[destination.id] += amount
+        deltas[source.id] = deltas.get(source.id, Decimal("0")) - amount
+        deltas[destination.id] = deltas.get(destination.id, Decimal("0")) + amount
+        description = (
+            transfer.description
+            or f"Transfer from {source.account_name} to {destination.account_name}"
+        )
+        reference = transfer.reference or f"BULK-{batch_id}"
+        debit = build_transaction_row(
+            source,
+            TransactionType.DEBIT,
+            TransactionCategory.TRANSFER,
+            amount,
+            description,
+            channel,
+            balances[source.id],
+            reference_number=reference,
+        )
+        credit = build_transaction_row(
+            destination,
+            TransactionType.CREDIT,
+            TransactionCategory.TRANSFER,
+            amount,
+            description,
+            channel,
+            balances[destination.id],
+            reference_number=reference,
+            parent_transaction_id=debit["id"],
+        )
+        rows.extend((debit, credit))
+        results[index] = {
+            "index": index,
+            "status": "success",
+            "debit_transaction_id": debit["id"],
+            "credit_transaction_id": credit["id"],
+        }
+    changed = sorted(account_id for account_id, delta in deltas.items() if delta)
+    if changed:
+        accounts = Account.__table__
+        session.execute(
+            update(accounts)
+            .where(accounts.c.id == bindparam("account_id"))
+            .values(
+                balance=accounts.c.balance + bindparam("delta"),
+                available_balance=accounts.c.available_balance + bindparam("delta"),
+            ),
+            [
+                {"account_id": account_id, "delta": deltas[account_id]}
+                for account_id in changed
+            ],
+        )
+    if rows:
+        session.execute(insert(Transaction.__table__), rows)
+    return results, {row["account_id"] for row in rows}
+
+
+def _failure(index: int, code: str, message: str, status_code: int = 400) -> dict:
+    return {
+        "index": index,
+        "status": "error",
+        "code": code,
+        "error": message,
+        "status_code": status_code,
+    }
@@ -0,0 +1,357 @@
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..models.ledger import LedgerBalance, LedgerBalanceCheckpoint, LedgerEntry
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0.00000000")
+CHECKPOINT_SETTLE_SECONDS = 60
+
+entries_table = LedgerEntry.__table__
+balances_table = LedgerBalance.__table__
+checkpoints_table = LedgerBalanceCheckpoint.__table__
+
+
+def apply_entries_to_balances(session: Session, entries: list[LedgerEntry]) -> None:
+    """Adds new ledger entries to the running per-(account, currency) totals.
+
+    Must be called in the same DB transaction that inserts ``entries``.
+    Each total is bumped with an atomic ``UPDATE ... SET total = total + x``
+    in sorted key order, so concurrent journal entries serialize on the
+    balance rows without deadlocking. Missing rows are created in a
+    savepoint; if another transaction created the row first, the update is
+    retried.
+    """
+    deltas = {}
+    for entry in entries:
+        key = (entry.account_name, entry.currency)
+        delta = deltas.setdefault(key, [ZERO, ZERO, 0, None])
+        delta[0] += Decimal(entry.debit_amount or 0)
+        delta[1] += Decimal(entry.credit_amount or 0)
+        delta[2] += 1
+        created_at = entry.created_at or datetime.now(timezone.utc)
+        if delta[3] is None or created_at > delta[3]:
+            delta[3] = created_at
+    for (account_name, currency), (debit, credit, count, last_entry_at) in sorted(
+        deltas.items()
+    ):
+        if _increment_balance(
+            session, account_name, currency, debit, credit, count, last_entry_at
+        ):
+            continue
+        try:
+            with session.begin_nested():
+                session.execute(
+                    insert(balances_table).values(
+                        id=str(uuid.uuid4()),
+                        account_name=account_name,
+                        currency=currency,
+                        total_debit=debit,
+                        total_credit=credit,
+                        entry_count=count,
+                        last_entry_at=last_entry_at,
+                    )
+                )
+        except IntegrityError:
+            _increment_balance(
+                session, account_name, currency, debit, credit, count, last_entry_at
+            )
+
+
+def _increment_balance(
+    session: Session,
+    account_name: str,
+    currency: str,
+    debit: Decimal,
+    credit: Decimal,
+    count: int,
+    last_entry_at: datetime,
+) -> bool:
+    result = session.execute(
+        update(balances_table)
+        .where(
+            balances_table.c.account_name == account_name,
+            balances_table.c.currency == currency,
+        )
+        .values(
+            total_debit=balances_table.c.total_debit + debit,
+            total_credit=balances_table.c.total_credit + credit,
+            entry_count=balances_table.c.entry_count + count,
+            last_entry_at=last_entry_at,
+            updated_at=datetime.now(timezone.utc),
+        )
+    )
+    return result.rowcount > 0
+
+
+def get_balances(
+    session: Session, account_name: str, currency: str = None
+) -> dict[str, tuple[Decimal, Decimal]]:
+    """Current ``{currency: (total_debit, total_credit)}`` from the snapshot rows."""
+    stmt = select(balances_table).where(balances_table.c.account_name == account_name)
+    if currency:
+        stmt = stmt.where(balances_table.c.currency == currency)
+    return {
+        row.currency: (row.total_debit, row.total_credit)
+        for row in session.execute(stmt)
+    }
+
+
+def get_balances_as_of(
+    session: Session, account_name: str, as_of: datetime, currency: str = None
+) -> dict[str, tuple[Decimal, Decimal]]:
+    """Point-in-time totals: latest checkpoint at or before ``as_of`` plus delta.
+
+    Only entries created after that checkpoint are summed, so the cost is
+    bounded by the checkpoint interval rather than the ledger's history.
+    Currencies come from the snapshot rows and the latest checkpoint run,
+    plus any currency with entries since that run, so one whose snapshot row
+    is missing (e.g. awaiting a reconcile repair) is still reported. Every
+    checkpoint run covers all snapshot rows, so a currency absent from the
+    latest run is summed from that run onwards.
+    """
+    currencies_stmt = select(balances_table.c.currency).where(
+        balances_table.c.account_name == account_name
+    )
+    checkpoints_stmt = select(checkpoints_table).where(
+        checkpoints_table.c.account_name == account_name,
+        checkpoints_table.c.as_of <= as_of,
+    )
+    if currency:
+        currencies_stmt = currencies_stmt.where(balances_table.c.currency == currency)
+        checkpoints_stmt = checkpoints_stmt.where(
+            checkpoints_table.c.currency == currency
+        )
+    currencies = set(session.execute(currencies_stmt).scalars())
+    latest_as_of = session.execute(
+        select(func.max(checkpoints_table.c.as_of)).where(checkpoints_stmt.whereclause)
+    ).scalar()
+    checkpoints = {}
+    if latest_as_of is not None:
+        checkpoints = {
+            row.currency: row
+            for row in session.execute(
+                checkpoints_stmt.where(checkpoints_table.c.as_of == latest_as_of)
+            )
+        }
+    new_currencies_stmt = select(entries_table.c.currency).where(
+        entries_table.c.account_name == account_name,
+        entries_table.c.created_at <= as_of,
+    )
+    if latest_as_of is not None:
+        new_currencies_stmt = new_currencies_stmt.where(
+            entries_table.c.created_at > latest_as_of
+        )
+    if currency:
+        new_currencies_stmt = new_currencies_stmt.where(
+            entries_table.c.currency == currency
+        )
+    currencies.update(checkpoints)
+    currencies.update(session.execute(new_currencies_stmt.distinct()).scalars())
+    balances = {}
+    for row_currency in sorted(currencies):
+        # A currency missing from the latest run had no entries before it
+        checkpoint = checkpoints.get(row_currency)
+        debit, credit, count = _sum_entries(
+            session,
+            account_name,
+            row_currency,
+            checkpoint.as_of if checkpoint else latest_as_of,
+            as_of,
+        )
+        if checkpoint:
+            debit += checkpoint.total_debit
+            credit += checkpoint.total_credit
+        elif not count:
+            continue
+        balances[row_currency] = (debit, credit)
+    return balances
+
+
+def _sum_entries(
+    session: Session,
+    account_name: str,
+    currency: str,
+    after: datetime = None,
+    until: datetime = None,
+) -> tuple[Decimal, Decimal, int]:
+    """Totals of entries with ``after < created_at <= until``"""
+    stmt = select(
+        func.coalesce(func.sum(entries_table.c.debit_amount), 0),
+        func.coalesce(func.sum(entries_table.c.credit_amount), 0),
+        func.count(entries_table.c.id),
+    ).where(
+        entries_table.c.account_name == account_name,
+        entries_table.c.currency == currency,
+    )
+    if after is not None:
+        stmt = stmt.where(entries_table.c.created_at > after)
+    if until is not None:
+        stmt = stmt.where(entries_table.c.created_at <= until)
+    debit, credit, count = session.execute(stmt).one()
+    return Decimal(debit), Decimal(credit), count
+
+
+def create_balance_checkpoints(
+    session: Session,
+    as_of: datetime = None,
+    settle_seconds: int = CHECKPOINT_SETTLE_SECONDS,
+) -> list[dict]:
+    """Writes a checkpoint for every account/currency with a balance snapshot.
+
+    Each checkpoint is the previous checkpoint plus the entries created
+    since, so a run only reads the entries of one interval. ``as_of``
+    defaults to ``settle_seconds`` ago, leaving in-flight transactions time
+    to commit entries stamped before the checkpoint. Returns the inserted
+    checkpoint rows.
+    """
+    if as_of is None:
+        as_of = datetime.now(timezone.utc) - timedelta(seconds=settle_seconds)
+    checkpoints = []
+    keys = session.execute(
+        select(balances_table.c.account_name, balances_table.c.currency).order_by(
+            balances_table.c.account_name, balances_table.c.currency
+        )
+    ).all()
+    for account_name, currency in keys:
+        previous = session.execute(
+            select(checkpoints_table)
+            .where(
+                checkpoints_table.c.account_name == account_name,
+                checkpoints_table.c.currency == currency,
+            )
+            .order_by(checkpoints_table.c.as_of.desc())
+            .limit(1)
+        ).one_or_none()
+        if previous is not None and _aware(previous.as_of) >= _aware(as_of):
+            continue
+        debit, credit, count = _sum_entries(
+            session,
+            account_name,
+            currency,
+            previous.as_of if previous else None,
+            as_of,
+        )
+        checkpoints.append(
+            {
+                "id": str(uuid.uuid4()),
+                "account_name": account_name,
+                "currency": currency,
+                "as_of": as_of,
+                "total_debit": debit + (previous.total_debit if previous else ZERO),
+                "total_credit": credit + (previous.total_credit if previous else ZERO),
+                "entry_count": count + (previous.entry_count if previous else 0),
+                "created_at": datetime.now(timezone.utc),
+            }
+        )
+    if checkpoints:
+        session.execute(insert(checkpoints_table), checkpoints)
+    session.commit()
+    return checkpoints
+
+
+def reconcile_ledger_balances(session: Session, repair: bool = False) -> list[dict]:
+    """Verifies every balance snapshot against a full aggregate of the entries.
+
+    Returns one report per mismatching account/currency (including entries
+    without a snapshot row and snapshots without entries). With ``repair``
+    the snapshot rows are locked first and overwritten with the recomputed
+    totals.
+    """
+    snapshot_stmt = select(balances_table).order_by(
+        balances_table.c.account_name, balances_table.c.currency
+    )
+    if repair:
+        snapshot_stmt = snapshot_stmt.with_for_update()
+    snapshots = {
+        (row.account_name, row.currency): row for row in session.execute(snapshot_stmt)
+    }
+    actual = {
+        (account_name, currency): (
+            Decimal(debit),
+            Decimal(credit),
+            count,
+            last_entry_at,
+        )
+        for account_name, currency, debit, credit, count, last_entry_at in session.execute(
+            select(
+                entries_table.c.account_name,
+                entries_table.c.currency,
+                func.sum(entries_table.c.debit_amount),
+                func.sum(entries_table.c.credit_amount),
+                func.count(entries_table.c.id),
+                func.max(entries_table.c.created_at),
+            ).group_by(entries_table.c.account_name, entries_table.c.currency)
+        )
+    }
+    mismatches = []
+    for key in sorted(set(snapshots) | set(actual)):
+        snapshot = snapshots.get(key)
+        debit, credit, count, last_entry_at = actual.get(key, (ZERO, ZERO, 0, None))
+        recorded = (
+            (snapshot.total_debit, snapshot.total_credit, snapshot.entry_count)
+            if snapshot
+            else None
+        )
+        if recorded == (debit, credit, count):
+            continue
+        mismatches.append(
+            {
+                "account_name": key[0],
+                "currency": key[1],
+                "expected": {
+                    "total_debit": format(debit, "f"),
+                    "total_credit": format(credit, "f"),
+                    "entry_count": count,
+                },
+                "snapshot": (
+                    {
+                        "total_debit": format(recorded[0], "f"),
+                        "total_credit": format(recorded[1], "f"),
+                        "entry_count": recorded[2],
+                    }
+                    if recorded
+                    else None
+                ),
+            }
+        )
+        if repair:
+            totals = {
+                "total_debit": debit,
+                "total_credit": credit,
+                "entry_count": count,
+                "last_entry_at": last_entry_at,
+                "updated_at": datetime.now(timezone.utc),
+            }
+            if snapshot is None:
+                session.execute(
+                    insert(balances_table).values(
+                        id=str(uuid.uuid4()),
+                        account_name=key[0],
+                        currency=key[1],
+                        **totals,
+                    )
+                )
+            else:
+                session.execute(
+                    update(balances_table)
+                    .where(balances_table.c.id == snapshot.id)
+                    .values(**totals)
+                )
+    if mismatches:
+        logger.warning(
+            f"Ledger reconciliation found {len(mismatches)} mismatched balance(s)"
+        )
+    if repair:
+        session.commit()
+    return mismatches
+
+
+def _aware(value: datetime) -> datetime:
+    """SQLite returns naive datetimes for timezone-aware columns"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import uuid
 from datetime import datetime, timezone
@@ -57,10 +58,17 @@ def check_funds_and_limits(account: Account, amount: Decimal) -> Any:
 
 
 def process_external_payment(
-    session: Session, user_id: str, data: ProcessPaymentRequest
+    session: Session,
+    user_id: str,
+    data: ProcessPaymentRequest,
+    idempotency_key: str = None,
 ) -> Dict[str, Any]:
     """
     Processes an external payment (deposit) into a user's account.
+
+    ``idempotency_key`` (the client's ``Idempotency-Key``) is forwarded to
+    the processor, scoped to the user, so a retried charge is not made twice
+    even if our own idempotency record was lost.
     """
     account = session.get(Account, data.account_id)
     if not account or account.user_id != user_id:
@@ -74,6 +82,11 @@ def process_external_payment(
                 source=data.payment_details.get("token"),
                 description=data.description or f"Payment via {data.payment_method}",
                 metadata={"account_id": str(account.id), "user_id": str(user_id)},
+                idempotency_key=(
+                    hashlib.sha256(f"{user_id}:{idempotency_key}".encode()).hexdigest()
+                    if idempotency_key
+                    else None
+                ),
             )
         except PaymentProcessorError as e:
             raise e
@@ -1,8 +1,14 @@
-from typing import Any
+from typing import Any, Callable
 import logging
-from decimal import Decimal
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from flask import current_app, has_app_context
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.exc import DBAPIError
 from ..models.account import Account, AccountStatus, AccountType
 from ..models.transaction import (
     Transaction,
@@ -66,6 +72,28 @@ class CurrencyMismatch(WalletServiceError):
         )
 
 
+class AccountAccessDenied(WalletServiceError):
+
+    def __init__(self, account_id: str) -> Any:
+        super().__init__(f"Access to account {account_id} denied", "ACCESS_DENIED", 403)
+
+
+class InvalidBatchOperation(WalletServiceError):
+
+    def __init__(self, reason: str) -> Any:
+        super().__init__(
+            f"Invalid batch operation: {reason}", "INVALID_BATCH_OPERATION", 400
+        )
+
+
+class SameAccountTransfer(WalletServiceError):
+
+    def __init__(self) -> Any:
+        super().__init__(
+            "Cannot transfer to the same account", "SAME_ACCOUNT_TRANSFER", 400
+        )
+
+
 class InvalidAccountType(WalletServiceError):
 
     def __init__(self, account_type: str) -> Any:
@@ -82,6 +110,23 @@ class UnsupportedCurrency(WalletServiceError):
         )
 
 
+ACCOUNT_CACHE_TYPES = ("account_balance", "transaction_history")
+
+
+def invalidate_account_cache(*account_ids: str) -> None:
+    """Drops cached balance and history views of the given accounts.
+
+    No-op when the optimized gateway (and its shared cache) is not installed.
+    """
+    if not has_app_context():
+        return
+    cache_manager = current_app.extensions.get("cache_manager")
+    if cache_manager is None:
+        return
+    for account_id in account_ids:
+        cache_manager.invalidate_account(account_id, *ACCOUNT_CACHE_TYPES)
+
+
 def get_account_by_id(session: Session, account_id: str) -> Account:
     """Retrieves an account or raises AccountNotFound."""
     account = session.get(Account, account_id)
@@ -90,6 +135,160 @@ def get_account_by_id(session: Session, account_id: str) -> Account:
     return account
 
 
+TRANSACTION_RETRY_ATTEMPTS = 5
+TRANSACTION_RETRY_BASE_DELAY = 0.01
+# PostgreSQL serialization_failure / deadlock_detected
+RETRYABLE_SQLSTATES = ("40001", "40P01")
+
+
+def run_in_transaction(
+    session: Session,
+    work: Callable,
+    *args: Any,
+    attempts: int = TRANSACTION_RETRY_ATTEMPTS,
+    **kwargs: Any,
+) -> Any:
+    """Runs ``work`` and commits, retrying the whole unit on transient conflicts.
+
+    Serialization failures and deadlocks (PostgreSQL) and ``database is
+    locked`` (SQLite) roll back and re-run ``work`` after a jittered
+    exponential backoff. Any other error rolls back and propagates.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            result = work(*args, **kwargs)
+            session.commit()
+            return result
+        except DBAPIError as e:
+            session.rollback()
+            if attempt == attempts or not _is_retryable(e):
+                raise
+            delay = TRANSACTION_RETRY_BASE_DELAY * 2 ** (attempt - 1)
+            time.sleep(delay * (0.5 + random.random()))
+        except Exception:
+            session.rollback()
+            raise
+
+
+def _is_retryable(error: DBAPIError) -> bool:
+    original = error.orig
+    sqlstate = getattr(original, "pgcode", None) or getattr(original, "sqlstate", None)
+    if sqlstate in RETRYABLE_SQLSTATES:
+        return True
+    return "database is locked" in str(original)
+
+
+def fetch_accounts(
+    session: Session, account_ids: Any, for_update: bool = False
+) -> dict[str, Any]:
+    """Loads account rows with one ``IN`` query, optionally row-locked.
+
+    Locks are taken in ascending id order. Every writer uses that same
+    canonical order, so two transfers touching the same pair of accounts
+    in opposite directions queue behind each other instead of deadlocking.
+    """
+    accounts = Account.__table__
+    stmt = (
+        select(accounts)
+        .where(accounts.c.id.in_(sorted(set(account_ids))))
+        .order_by(accounts.c.id)
+    )
+    if for_update:
+        stmt = stmt.with_for_update()
+    return {row.id: row for row in session.execute(stmt)}
+
+
+def _lock_accounts(session: Session, account_ids: list[str]) -> dict[str, Any]:
+    """Row-locks accounts (see ``fetch_accounts``) and returns their rows by id.
+
+    Raises ``AccountNotFound`` or ``AccountInactive``.
+    """
+    rows = fetch_accounts(session, account_ids, for_update=True)
+    for account_id in account_ids:
+        row = rows.get(account_id)
+        if row is None:
+            raise AccountNotFound(account_id)
+        if row.status != AccountStatus.ACTIVE:
+            raise AccountInactive(account_id)
+    return rows
+
+
+def apply_balance_delta(session: Session, account_id: str, delta: Decimal) -> Decimal:
+    """Atomically adds ``delta`` to an account's balances; returns the new balance.
+
+    Debits are a single ``UPDATE ... SET balance = balance - :amt WHERE
+    balance >= :amt``, so no interleaving of concurrent writers can
+    overdraw the account; zero affected rows means insufficient funds.
+    """
+    accounts = Account.__table__
+    stmt = update(accounts).where(accounts.c.id == account_id)
+    if delta < 0:
+        stmt = stmt.where(accounts.c.balance >= -delta)
+    new_balance = session.execute(
+        stmt.values(
+            balance=accounts.c.balance + delta,
+            available_balance=accounts.c.available_balance + delta,
+        ).returning(accounts.c.balance)
+    ).scalar_one_or_none()
+    if new_balance is None:
+        raise InsufficientFunds(account_id)
+    return new_balance
+
+
+def post_transfer(
+    session: Session,
+    source_account_id: str,
+    destination_account_id: str,
+    amount: Decimal,
+    description: str = None,
+    channel: str = "api",
+    reference_number: str = None,
+) -> tuple[str, str]:
+    """Posts a transfer inside the caller's DB transaction.
+
+    Locks both accounts in canonical order, moves the funds with two atomic
+    balance updates and inserts the paired debit/credit transactions (the
+    credit's ``parent_transaction_id`` is the debit). Returns their ids;
+    committing is left to the caller, normally ``run_in_transaction``.
+    """
+    if source_account_id == destination_account_id:
+        raise SameAccountTransfer()
+    accounts = _lock_accounts(session, [source_account_id, destination_account_id])
+    source = accounts[source_account_id]
+    destination = accounts[destination_account_id]
+    if source.currency != destination.currency:
+        raise CurrencyMismatch()
+    source_balance = apply_balance_delta(session, source.id, -amount)
+    destination_balance = apply_balance_delta(session, destination.id, amount)
+    description = (
+        description
+        or f"Transfer from {source.account_name} to {destination.account_name}"
+    )
+    debit = build_transaction_row(
+        source,
+        TransactionType.DEBIT,
+        TransactionCategory.TRANSFER,
+        amount,
+        description,
+        channel,
+        source_balance,
+        reference_number=reference_number,
+    )
+    credit = build_transaction_row(
+        destination,
+        TransactionType.CREDIT,
+        TransactionCategory.TRANSFER,
+        amount,
+        description,
+        channel,
+        destination_balance,
+        reference_number=reference_number,
+        parent_transaction_id=debit["id"],
+    )
+    session.execute(insert(Transaction.__table__), [debit, credit])
+    return (debit["id"], credit["id"])
+
+
 def create_wallet(session: Session, user_id: str, data: CreateWalletRequest) -> Account:
     """Creates a new wallet for a user."""
     user = session.get(User, user_id)
@@ -139,103 +338,70 @@ def process_deposit(
     session: Session, account_id: str, data: DepositFundsRequest
 ) -> Transaction:
     """Handles the deposit of funds into an account."""
-    account = get_account_by_id(session, account_id)
-    if account.status != AccountStatus.ACTIVE:
-        raise AccountInactive(account_id)
-    amount = data.amount
-    account.credit(amount)
-    transaction = Transaction(
-        user_id=account.user_id,
-        account_id=account.id,
-        transaction_type=TransactionType.CREDIT,
-        transaction_category=TransactionCategory.DEPOSIT,
-        status=TransactionStatus.COMPLETED,
-        description=data.description or f"Deposit to {account.account_name}",
-        channel=data.channel,
-        currency=account.currency,
-        amount=amount,
-    )
-    session.add(transaction)
-    session.commit()
-    return transaction
+
+    def post() -> str:
+        account = _lock_accounts(session, [account_id])[account_id]
+        balance = apply_balance_delta(session, account_id, data.amount)
+        row = build_transaction_row(
+            account,
+            TransactionType.CREDIT,
+            TransactionCategory.DEPOSIT,
+            data.amount,
+            data.description or f"Deposit to {account.account_name}",
+            "api",
+            balance,
+            reference_number=data.reference,
+        )
+        session.execute(insert(Transaction.__table__), [row])
+        return row["id"]
+
+    transaction_id = run_in_transaction(session, post)
+    invalidate_account_cache(account_id)
+    return session.get(Transaction, transaction_id)
 
 
 def process_withdrawal(
     session: Session, account_id: str, data: WithdrawFundsRequest
 ) -> Transaction:
     """Handles the withdrawal of funds from an account."""
-    account = get_account_by_id(session, account_id)
-    if account.status != AccountStatus.ACTIVE:
-        raise AccountInactive(account_id)
-    amount = data.amount
-    if account.balance < amount:
-        raise InsufficientFunds(account_id)
-    account.debit(amount)
-    transaction = Transaction(
-        user_id=account.user_id,
-        account_id=account.id,
-        transaction_type=TransactionType.DEBIT,
-        transaction_category=TransactionCategory.WITHDRAWAL,
-        status=TransactionStatus.COMPLETED,
-        description=data.description or f"Withdrawal from {account.account_name}",
-        channel=data.channel,
-        currency=account.currency,
-        amount=amount,
-    )
-    session.add(transaction)
-    session.commit()
-    return transaction
+
+    def post() -> str:
+        account = _lock_accounts(session, [account_id])[account_id]
+        balance = apply_balance_delta(session, account_id, -data.amount)
+        row = build_transaction_row(
+            account,
+            TransactionType.DEBIT,
+            TransactionCategory.WITHDRAWAL,
+            data.amount,
+            data.description or f"Withdrawal from {account.account_name}",
+            "api",
+            balance,
+            reference_number=data.reference,
+        )
+        session.execute(insert(Transaction.__table__), [row])
+        return row["id"]
+
+    transaction_id = run_in_transaction(session, post)
+    invalidate_account_cache(account_id)
+    return session.get(Transaction, transaction_id)
 
 
 def process_transfer(
     session: Session, source_account_id: str, data: TransferFundsRequest
 ) -> tuple[Transaction, Transaction]:
     """Handles the transfer of funds between two accounts."""
-    source_account = get_account_by_id(session, source_account_id)
-    destination_account = get_account_by_id(session, data.destination_account_id)
-    if (
-        source_account.status != AccountStatus.ACTIVE
-        or destination_account.status != AccountStatus.ACTIVE
-    ):
-        raise AccountInactive(f"{source_account_id} or {data.destination_account_id}")
-    amount = data.amount
-    if source_account.balance < amount:
-        raise InsufficientFunds(source_account_id)
-    if source_account.currency != destination_account.currency:
-        raise CurrencyMismatch()
-    source_account.debit(amount)
-    destination_account.credit(amount)
-    description = (
-        data.description
-        or f"Transfer from {source_account.account_name} to {destination_account.account_name}"
-    )
-    debit_transaction = Transaction(
-        user_id=source_account.user_id,
-        account_id=source_account.id,
-        transaction_type=TransactionType.DEBIT,
-        transaction_category=TransactionCategory.TRANSFER,
-        status=TransactionStatus.COMPLETED,
-        description=description,
-        channel=data.channel,
-        currency=source_account.currency,
-        amount=amount,
-        related_account_id=destination_account.id,
-    )
-    credit_transaction = Transaction(
-        user_id=destination_account.user_id,
-        account_id=destination_account.id,
-        transaction_type=TransactionType.CREDIT,
-        transaction_category=TransactionCategory.TRANSFER,
-        status=TransactionStatus.COMPLETED,
-        description=description,
-        channel=data.channel,
-        currency=destination_account.currency,
-        amount=amount,
-        related_account_id=source_account.id,
+    debit_id, credit_id = run_in_transaction(
+        session,
+        post_transfer,
+        session,
+        source_account_id,
+        data.to_account_id,
+        data.amount,
+        description=data.description,
+        reference_number=data.reference,
     )
-    session.add_all([debit_transaction, credit_transaction])
-    session.commit()
-    return (debit_transaction, credit_transaction)
+    invalidate_account_cache(source_account_id, data.to_account_id)
+    return (session.get(Transaction, debit_id), session.get(Transaction, credit_id))
 
 
 def get_user_accounts(session: Session, user_id: str) -> list[Account]:
@@ -258,3 +424,223 @@ def get_account_details_with_transactions(
     )
     recent_transactions = session.execute(recent_transactions_stmt).scalars().all()
     return (account, recent_transactions)
+
+
+BATCH_OPERATION_TYPES = ("deposit", "withdrawal", "transfer")
+
+
+def process_batch(
+    session: Session,
+    operations: list[dict],
+    user_id: str = None,
+    allowed_types: tuple = BATCH_OPERATION_TYPES,
+) -> list[dict]:
+    """Applies many deposit/withdrawal/transfer operations in one DB transaction.
+
+    Every involved account is loaded (row-locked in id order where the
+    database supports it) with a single ``IN`` query, running balances are
+    kept in memory, each touched account gets one net balance update and all
+    ``Transaction`` rows are written with one bulk insert. Operations are
+    applied in order; an invalid one fails on its own and is reported in its
+    result without affecting the others. When ``user_id`` is given, debited
+    accounts must belong to that user.
+    """
+    account_ids = set()
+    for operation in operations:
+        if not isinstance(operation, dict):
+            continue
+        account_ids.add(operation.get("account_id"))
+        account_ids.add(operation.get("destination_account_id"))
+    account_ids.discard(None)
+    results, touched = run_in_transaction(
+        session, _post_batch, session, operations, account_ids, user_id, allowed_types
+    )
+    invalidate_account_cache(*touched)
+    return results
+
+
+def _post_batch(
+    session: Session,
+    operations: list[dict],
+    account_ids: set,
+    user_id: str,
+    allowed_types: tuple,
+) -> tuple[list[dict], set]:
+    accounts = fetch_accounts(session, account_ids, for_update=True)
+    balances = {account_id: row.balance for account_id, row in accounts.items()}
+    deltas = {}
+    rows = []
+    results = []
+    for operation in operations:
+        try:
+            created = _apply_batch_operation(
+                operation, accounts, balances, user_id, allowed_types
+            )
+        except WalletServiceError as e:
+            results.append({"status": "error", "error": str(e), "code": e.error_code})
+            continue
+        for row in created:
+            delta = row["balance_after"] - row["balance_before"]
+            deltas[row["account_id"]] = deltas.get(row["account_id"], 0) + delta
+        rows.extend(created)
+        results.append(
+            {
+                "status": "success",
+                "transaction_ids": [row["id"] for row in created],
+                "balances": {
+                    row["account_id"]: str(balances[row["account_id"]])
+                    for row in created
+                },
+            }
+        )
+    changed = sorted(account_id for account_id, delta in deltas.items() if delta)
+    if changed:
+        accounts_table = Account.__table__
+        session.execute(
+            update(accounts_table)
+            .where(accounts_table.c.id == bindparam("account_id"))
+            .values(
+                balance=accounts_table.c.balance + bindparam("delta"),
+                available_balance=accounts_table.c.available_balance
+                + bindparam("delta"),
+            ),
+            [
+                {"account_id": account_id, "delta": deltas[account_id]}
+                for account_id in changed
+            ],
+        )
+    if rows:
+        session.execute(insert(Transaction.__table__), rows)
+    return results, {row["account_id"] for row in rows}
+
+
+def _apply_batch_operation(
+    operation: dict,
+    accounts: dict,
+    balances: dict,
+    user_id: str,
+    allowed_types: tuple,
+) -> list[dict]:
+    """Validates one batch operation, moves ``balances`` and returns its rows."""
+    if not isinstance(operation, dict):
+        raise InvalidBatchOperation("operation must be an object")
+    operation_type = operation.get("type")
+    if operation_type not in allowed_types:
+        raise InvalidBatchOperation(f"unsupported type {operation_type!r}")
+    try:
+        amount = Decimal(str(operation.get("amount")))
+    except (InvalidOperation, ValueError):
+        raise InvalidBatchOperation("amount must be a number")
+    if not amount.is_finite() or amount <= 0:
+        raise InvalidBatchOperation("amount must be positive")
+    account_id = operation.get("account_id")
+    account = accounts.get(account_id)
+    if account is None:
+        raise AccountNotFound(account_id)
+    if account.status != AccountStatus.ACTIVE:
+        raise AccountInactive(account_id)
+    if user_id is not None and account.user_id != user_id:
+        raise AccountAccessDenied(account_id)
+    description = operation.get("description")
+    channel = operation.get("channel", "api")
+    if operation_type == "deposit":
+        balances[account_id] += amount
+        return [
+            build_transaction_row(
+                account,
+                TransactionType.CREDIT,
+                TransactionCategory.DEPOSIT,
+                amount,
+                description or f"Deposit to {account.account_name}",
+                channel,
+                balances[account_id],
+            )
+        ]
+    if balances[account_id] < amount:
+        raise InsufficientFunds(account_id)
+    if operation_type == "withdrawal":
+        balances[account_id] -= amount
+        return [
+            build_transaction_row(
+                account,
+                TransactionType.DEBIT,
+                TransactionCategory.WITHDRAWAL,
+                amount,
+                description or f"Withdrawal from {account.account_name}",
+                channel,
+                balances[account_id],
+            )
+        ]
+    destination_id = operation.get("destination_account_id")
+    destination = accounts.get(destination_id)
+    if destination is None:
+        raise AccountNotFound(destination_id)
+    if destination.id == account.id:
+        raise InvalidBatchOperation("cannot transfer to the same account")
+    if destination.status != AccountStatus.ACTIVE:
+        raise AccountInactive(destination_id)
+    if destination.currency != account.currency:
+        raise CurrencyMismatch()
+    balances[account_id] -= amount
+    balances[destination_id] += amount
+    description = (
+        description
+        or f"Transfer from {account.account_name} to {destination.account_name}"
+    )
+    debit = build_transaction_row(
+        account,
+        TransactionType.DEBIT,
+        TransactionCategory.TRANSFER,
+        amount,
+        description,
+        channel,
+        balances[account_id],
+    )
+    credit = build_transaction_row(
+        destination,
+        TransactionType.CREDIT,
+        TransactionCategory.TRANSFER,
+        amount,
+        description,
+        channel,
+        balances[destination_id],
+        parent_transaction_id=debit["id"],
+    )
+    return [debit, credit]
+
+
+def build_transaction_row(
+    account: Account,
+    transaction_type: TransactionType,
+    category: TransactionCategory,
+    amount: Decimal,
+    description: str,
+    channel: str,
+    balance_after: Decimal,
+    **extra: Any,
+) -> dict:
+    """Builds an insert mapping for a completed ``Transaction``."""
+    now = datetime.now(timezone.utc)
+    return {
+        "id": str(uuid.uuid4()),
+        "transaction_id": Transaction.generate_transaction_id(),
+        "user_id": account.user_id,
+        "account_id": account.id,
+        "transaction_type": transaction_type,
+        "transaction_category": category,
+        "status": TransactionStatus.COMPLETED,
+        "description": description,
+        "channel": channel,
+        "currency": account.currency,
+        "amount": amount,
+        "balance_before": (
+            balance_after + amount
+            if transaction_type == TransactionType.DEBIT
+            else balance_after - amount
+        ),
+        "balance_after": balance_after,
+        "processed_at": now,
+        "created_at": now,
+        "updated_at": now,
+        **extra,
+    }
@@ -1,10 +1,133 @@
 """Authentication utilities"""
 
 from typing import Any
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
-from flask import request, jsonify
+from flask import g, request, jsonify
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager
 import jwt
 import os
+from ..models.account import Account
+from ..models.database import db
+from ..models.user import User
+
+PRINCIPAL_CACHE_TTL_SECONDS = 30
+PRINCIPAL_CACHE_MAX_ENTRIES = 10000
+
+
+class PrincipalCache:
+    """Verified JWT payloads keyed by the raw token, kept for a short TTL.
+
+    A hit skips signature verification and claim checks; an entry never
+    outlives the token's own ``exp``. Bounded LRU, safe across threads.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS,
+        max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES,
+    ) -> Any:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Any:
+        """Cached payload of ``token``, or ``None``"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        if payload.get("exp") is not None:
+            expires_at = min(expires_at, float(payload["exp"]))
+        with self._lock:
+            self._entries[token] = (expires_at, payload)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Forget every cached token of ``user_id`` (logout, disable)"""
+        with self._lock:
+            for token in [
+                token
+                for token, (_, payload) in self._entries.items()
+                if payload.get("user_id") == user_id
+            ]:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def decode_token(token: str) -> dict:
+    """Verified payload of a bearer token; raises ``jwt.InvalidTokenError``"""
+    payload = principal_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(
+            token, os.environ.get("JWT_SECRET_KEY", "secret"), algorithms=["HS256"]
+        )
+        principal_cache.put(token, payload)
+    return payload
+
+
+def load_principal(session: Any, user_id: str) -> Any:
+    """Loads a user together with all of their accounts in one query.
+
+    The accounts land in the session's identity map, so later
+    ``session.get(Account, id)`` calls for them within the request (access
+    checks, service lookups) are answered without another round trip.
+    """
+    return (
+        session.execute(
+            select(User)
+            .outerjoin(User.wallets)
+            .options(contains_eager(User.wallets))
+            .where(User.id == user_id)
+        )
+        .unique()
+        .scalar_one_or_none()
+    )
+
+
+def request_account(account_id: str) -> Any:
+    """Account ``account_id`` from the request's identity map (or the DB)"""
+    return db.session.get(Account, account_id)
+
+
+def _authenticate() -> Any:
+    """Sets ``g.token_payload``/``g.current_user``; returns an error response"""
+    token = request.headers.get("Authorization")
+    if not token:
+        return jsonify({"message": "Token is missing"}), 401
+    try:
+        if token.startswith("Bearer "):
+            token = token[7:]
+        data = decode_token(token)
+    except Exception:
+        return jsonify({"message": "Token is invalid"}), 401
+    current_user = load_principal(db.session, data.get("user_id"))
+    if current_user is None or not current_user.is_active:
+        return jsonify({"message": "Token is invalid"}), 401
+    g.token_payload = data
+    g.current_user = current_user
+    return None
 
 
 def token_required(f: Any) -> Any:
@@ -12,19 +135,9 @@ def token_required(f: Any) -> Any:
 
     @wraps(f)
     def decorated(*args: Any, **kwargs: Any) -> Any:
-        token = request.headers.get("Authorization")
-        if not token:
-            return jsonify({"message": "Token is missing"}), 401
-
-        try:
-            if token.startswith("Bearer "):
-                token = token[7:]
-            data = jwt.decode(
-                token, os.environ.get("JWT_SECRET_KEY", "secret"), algorithms=["HS256"]
-            )
-        except Exception:
-            return jsonify({"message": "Token is invalid"}), 401
-
+        error = _authenticate()
+        if error is not None:
+            return error
         return f(*args, **kwargs)
 
     return decorated
@@ -35,22 +148,12 @@ def admin_required(f: Any) -> Any:
 
     @wraps(f)
     def decorated(*args: Any, **kwargs: Any) -> Any:
-        token = request.headers.get("Authorization")
-        if not token:
-            return jsonify({"message": "Token is missing"}), 401
-
-        try:
-            if token.startswith("Bearer "):
-                token = token[7:]
-            data = jwt.decode(
-                token, os.environ.get("JWT_SECRET_KEY", "secret"), algorithms=["HS256"]
-            )
-            # Check if user has admin role
-            if data.get("role") != "admin":
-                return jsonify({"message": "Admin access required"}), 403
-        except Exception:
-            return jsonify({"message": "Token is invalid"}), 401
-
+        error = _authenticate()
+        if error is not None:
+            return error
+        # Check if user has admin role
+        if g.token_payload.get("role") != "admin":
+            return jsonify({"message": "Admin access required"}), 403
         return f(*args, **kwargs)
 
     return decorated
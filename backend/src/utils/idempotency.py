@@ -0,0 +1,457 @@
+"""Idempotency-Key handling for money-moving endpoints"""
+
+from typing import Any
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+import redis
+from flask import (
+    current_app,
+    g,
+    has_request_context,
+    jsonify,
+    make_response,
+    request,
+)
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..models.database import db
+from ..models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+DEFAULT_TTL_SECONDS = 86400
+DEFAULT_LOCK_SECONDS = 60
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+_COMPLETE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return 0
+"""
+
+
+class RedisIdempotencyBackend:
+    """Records as JSON strings under ``idempotency:<user>:<key>``.
+
+    The in-flight lock is a ``SET NX EX``; completing the request
+    overwrites it with the response and the retention TTL. Completing and
+    releasing are compare-and-set scripts on the lock's token, so a request
+    whose lock expired and was taken over cannot clobber the new owner.
+    """
+
+    def __init__(self, redis_client: Any, prefix: str = "idempotency:") -> Any:
+        self.redis_client = redis_client
+        self.prefix = prefix
+
+    def _name(self, user_id: str, key: str) -> str:
+        return f"{self.prefix}{user_id}:{key}"
+
+    @staticmethod
+    def _lock_value(fingerprint: str, token: str) -> str:
+        return json.dumps(
+            {"fingerprint": fingerprint, "status": IN_PROGRESS, "token": token}
+        )
+
+    def reserve(
+        self, user_id: str, key: str, fingerprint: str, token: str, lock_seconds: int
+    ) -> Any:
+        name = self._name(user_id, key)
+        value = self._lock_value(fingerprint, token)
+        while True:
+            if self.redis_client.set(name, value, nx=True, ex=lock_seconds):
+                return None
+            raw = self.redis_client.get(name)
+            if raw is not None:
+                return json.loads(raw)
+
+    def complete(
+        self,
+        user_id: str,
+        key: str,
+        fingerprint: str,
+        token: str,
+        status_code: int,
+        body: str,
+        ttl_seconds: int,
+    ) -> None:
+        record = {
+            "fingerprint": fingerprint,
+            "status": COMPLETED,
+            "response_status": status_code,
+            "response_body": body,
+        }
+        self.redis_client.eval(
+            _COMPLETE_SCRIPT,
+            1,
+            self._name(user_id, key),
+            self._lock_value(fingerprint, token),
+            json.dumps(record),
+            ttl_seconds,
+        )
+
+    def release(self, user_id: str, key: str, fingerprint: str, token: str) -> None:
+        self.redis_client.eval(
+            _RELEASE_SCRIPT,
+            1,
+            self._name(user_id, key),
+            self._lock_value(fingerprint, token),
+        )
+
+    def purge_expired(self) -> int:
+        return 0
+
+
+class DatabaseIdempotencyBackend:
+    """Records in the ``idempotency_keys`` table.
+
+    Uses its own short transactions (not the request's session), so the
+    lock is visible to concurrent requests before the endpoint runs and a
+    rollback of the endpoint's work does not drop it.
+    """
+
+    def __init__(self, session_factory: Any = None) -> Any:
+        self.session_factory = session_factory or (lambda: Session(db.engine))
+        self.table = IdempotencyKey.__table__
+
+    def _where(self, user_id: str, key: str) -> Any:
+        return (self.table.c.user_id == user_id, self.table.c.key == key)
+
+    def reserve(
+        self, user_id: str, key: str, fingerprint: str, token: str, lock_seconds: int
+    ) -> Any:
+        lock = {
+            "request_fingerprint": fingerprint,
+            "status": IN_PROGRESS,
+            "response_status": None,
+            "response_body": None,
+            "lock_token": token,
+        }
+        with self.session_factory() as session:
+            while True:
+                now = datetime.now(timezone.utc)
+                lock["created_at"] = now
+                lock["expires_at"] = now + timedelta(seconds=lock_seconds)
+                try:
+                    session.execute(
+                        insert(self.table).values(
+                            id=str(uuid.uuid4()), user_id=user_id, key=key, **lock
+                        )
+                    )
+                    session.commit()
+                    return None
+                except IntegrityError:
+                    session.rollback()
+                taken = session.execute(
+                    update(self.table)
+                    .where(*self._where(user_id, key), self.table.c.expires_at <= now)
+                    .values(**lock)
+                ).rowcount
+                session.commit()
+                if taken:
+                    return None
+                row = session.execute(
+                    select(
+                        self.table.c.request_fingerprint,
+                        self.table.c.status,
+                        self.table.c.response_status,
+                        self.table.c.response_body,
+                    ).where(*self._where(user_id, key))
+                ).one_or_none()
+                session.commit()
+                if row is not None:
+                    return {
+                        "fingerprint": row.request_fingerprint,
+                        "status": row.status,
+                        "response_status": row.response_status,
+                        "response_body": row.response_body,
+                    }
+
+    def complete(
+        self,
+        user_id: str,
+        key: str,
+        fingerprint: str,
+        token: str,
+        status_code: int,
+        body: str,
+        ttl_seconds: int,
+    ) -> None:
+        with self.session_factory() as session:
+            session.execute(
+                update(self.table)
+                .where(*self._where(user_id, key), self.table.c.lock_token == token)
+                .values(
+                    status=COMPLETED,
+                    response_status=status_code,
+                    response_body=body,
+                    lock_token=None,
+                    expires_at=datetime.now(timezone.utc)
+                    + timedelta(seconds=ttl_seconds),
+                )
+            )
+            session.commit()
+
+    def release(self, user_id: str, key: str, fingerprint: str, token: str) -> None:
+        with self.session_factory() as session:
+            session.execute(
+                delete(self.table).where(
+                    *self._where(user_id, key), self.table.c.lock_token == token
+                )
+            )
+            session.commit()
+
+    def purge_expired(self) -> int:
+        with self.session_factory() as session:
+            deleted = session.execute(
+                delete(self.table).where(
+                    self.table.c.expires_at <= datetime.now(timezone.utc)
+                )
+            ).rowcount
+            session.commit()
+        return deleted
+
+
+class IdempotencyStore:
+    """Process-wide idempotency record store.
+
+    Uses Redis once a client is configured (the optimized gateway passes
+    its pooled client) and the database otherwise; if a Redis call fails
+    the database backend takes over for that call.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        lock_seconds: int = DEFAULT_LOCK_SECONDS,
+    ) -> Any:
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self._redis_backend = None
+        self._database_backend = DatabaseIdempotencyBackend()
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        redis_client: Any = None,
+        ttl_seconds: int = None,
+        lock_seconds: int = None,
+        session_factory: Any = None,
+    ) -> None:
+        """Switch to a Redis-backed store and/or override the TTLs"""
+        with self._lock:
+            if redis_client is not None:
+                self._redis_backend = RedisIdempotencyBackend(redis_client)
+            if ttl_seconds:
+                self.ttl_seconds = ttl_seconds
+            if lock_seconds:
+                self.lock_seconds = lock_seconds
+            if session_factory is not None:
+                self._database_backend = DatabaseIdempotencyBackend(session_factory)
+
+    def _call(self, method: str, *args: Any) -> Any:
+        if self._redis_backend is not None:
+            try:
+                return getattr(self._redis_backend, method)(*args)
+            except redis.RedisError as e:
+                logger.warning(f"Idempotency store falling back to database: {e}")
+        return getattr(self._database_backend, method)(*args)
+
+    def reserve(self, user_id: str, key: str, fingerprint: str, token: str) -> Any:
+        """Takes the in-flight lock for ``key``.
+
+        Returns ``None`` when the caller now owns the key, otherwise the
+        existing record (``fingerprint``, ``status`` and, once completed,
+        ``response_status``/``response_body``).
+        """
+        return self._call(
+            "reserve", user_id, key, fingerprint, token, self.lock_seconds
+        )
+
+    def complete(
+        self,
+        user_id: str,
+        key: str,
+        fingerprint: str,
+        token: str,
+        status_code: int,
+        body: str,
+    ) -> None:
+        """Stores the response for replay for ``ttl_seconds``"""
+        self._call(
+            "complete",
+            user_id,
+            key,
+            fingerprint,
+            token,
+            status_code,
+            body,
+            self.ttl_seconds,
+        )
+
+    def release(self, user_id: str, key: str, fingerprint: str, token: str) -> None:
+        """Drops the in-flight lock so the request can be retried"""
+        self._call("release", user_id, key, fingerprint, token)
+
+    def purge_expired(self) -> int:
+        """Deletes expired database records (Redis expires them itself)"""
+        return self._database_backend.purge_expired()
+
+
+idempotency_store = IdempotencyStore()
+
+
+def request_fingerprint() -> str:
+    """SHA-256 of the method, path and (canonicalized JSON) body"""
+    payload = request.get_json(silent=True)
+    if payload is not None:
+        body = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    else:
+        body = request.get_data()
+    digest = hashlib.sha256(f"{request.method} {request.path}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed(session: Session) -> None:
+    """Notes that the idempotent request being handled has committed a change"""
+    if has_request_context() and "idempotency_committed" in g:
+        g.idempotency_committed = True
+
+
+def _committed_body(status_code: int) -> str:
+    """Replay body for a committed request whose own response can't be stored"""
+    if status_code < 500:
+        return json.dumps({"message": "The request was processed"})
+    return json.dumps(
+        {
+            "error": "The request failed after its changes were committed",
+            "code": "IDEMPOTENT_REQUEST_FAILED_AFTER_COMMIT",
+        }
+    )
+
+
+def idempotent(f: Any) -> Any:
+    """Replays the stored response of a request repeated with the same key.
+
+    Must run after authentication: keys are scoped to the caller, taken
+    from ``g.current_user`` or else the verified ``g.token_payload``.
+    Requests without an ``Idempotency-Key`` header run unchanged. While the
+    first request with a key is in flight, repeats get ``409``; reusing a
+    key with a different request gets ``422``. Responses below ``500`` are
+    stored. Server errors release the key so the client may retry, unless a
+    database transaction committed while the handler ran: then the outcome
+    is stored too, so a retry cannot repeat a committed deposit or charge.
+    """
+
+    @wraps(f)
+    def decorated(*args: Any, **kwargs: Any) -> Any:
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return (
+                jsonify(
+                    {
+                        "error": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters",
+                        "code": "INVALID_IDEMPOTENCY_KEY",
+                    }
+                ),
+                400,
+            )
+        user_id = _request_user_id()
+        fingerprint = request_fingerprint()
+        token = uuid.uuid4().hex
+        record = idempotency_store.reserve(user_id, key, fingerprint, token)
+        if record is not None:
+            return _existing_response(record, fingerprint)
+        g.idempotency_key = key
+        g.idempotency_committed = False
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            if g.pop("idempotency_committed"):
+                idempotency_store.complete(
+                    user_id, key, fingerprint, token, 500, _committed_body(500)
+                )
+            else:
+                idempotency_store.release(user_id, key, fingerprint, token)
+            raise
+        committed = g.pop("idempotency_committed")
+        if response.is_json and (response.status_code < 500 or committed):
+            idempotency_store.complete(
+                user_id,
+                key,
+                fingerprint,
+                token,
+                response.status_code,
+                response.get_data(as_text=True),
+            )
+        elif committed:
+            idempotency_store.complete(
+                user_id,
+                key,
+                fingerprint,
+                token,
+                response.status_code,
+                _committed_body(response.status_code),
+            )
+        else:
+            idempotency_store.release(user_id, key, fingerprint, token)
+        return response
+
+    return decorated
+
+
+def _request_user_id() -> str:
+    current_user = g.get("current_user")
+    if current_user is not None:
+        return current_user.id
+    return g.token_payload["user_id"]
+
+
+def _existing_response(record: dict, fingerprint: str) -> Any:
+    if record["fingerprint"] != fingerprint:
+        return (
+            jsonify(
+                {
+                    "error": f"{IDEMPOTENCY_HEADER} was already used for a different request",
+                    "code": "IDEMPOTENCY_KEY_REUSED",
+                }
+            ),
+            422,
+        )
+    if record["status"] != COMPLETED:
+        response = jsonify(
+            {
+                "error": "A request with this idempotency key is still being processed",
+                "code": "IDEMPOTENCY_REQUEST_IN_PROGRESS",
+            }
+        )
+        response.status_code = 409
+        response.headers["Retry-After"] = "1"
+        return response
+    response = current_app.response_class(
+        record["response_body"],
+        status=record["response_status"],
+        mimetype="application/json",
+    )
+    response.headers[REPLAY_HEADER] = "true"
+    return response
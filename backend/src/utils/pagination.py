@@ -0,0 +1,67 @@
+"""Keyset pagination helpers"""
+
+from typing import Any
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import func, select, text, tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Encode a ``(created_at, id)`` position as an opaque URL-safe token"""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, str]:
+    """Decode a token from ``encode_cursor``; raises ``ValueError`` if malformed"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_page(
+    session: Any, stmt: Any, table: Any, limit: int, cursor: str = None
+) -> tuple[list, str]:
+    """Fetch one page of ``stmt`` newest first, ordered by ``(created_at, id)``.
+
+    Seeks past the cursor position instead of using ``OFFSET``, so every
+    page costs the same index range scan no matter how deep it is. Returns
+    the rows and the cursor of the next page (``None`` on the last page).
+    """
+    key = tuple_(table.c.created_at, table.c.id)
+    if cursor:
+        stmt = stmt.where(key < tuple_(*decode_cursor(cursor)))
+    rows = session.execute(
+        stmt.order_by(table.c.created_at.desc(), table.c.id.desc()).limit(limit + 1)
+    ).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def count_rows(session: Any, stmt: Any) -> int:
+    """Exact number of rows ``stmt`` returns"""
+    return session.execute(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    ).scalar_one()
+
+
+def estimate_row_count(session: Any, table: Any) -> int:
+    """Row count of ``table``, estimated from statistics on PostgreSQL.
+
+    ``pg_class.reltuples`` is maintained by ``ANALYZE``/autovacuum and is
+    read in constant time; other databases fall back to an exact count.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        estimate = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+            {"table": table.name},
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return session.execute(select(func.count()).select_from(table)).scalar_one()
@@ -0,0 +1,31 @@
+"""
+Behavioral profile scoring cost as the user's history grows
+"""
+
+import random
+import time
+from datetime import datetime
+
+from src.security.fraud_detection import BehavioralProfile
+
+BASE_TIME = datetime(2026, 3, 2, 12)
+
+
+class TestProfileScoringBenchmark:
+    """Scoring cost does not grow with the user's history"""
+
+    def test_scoring_time_is_flat(self):
+        profile = BehavioralProfile("u1")
+        timings = []
+        for target in (100, 20000):
+            while profile.transaction_count < target:
+                profile.update_transaction_pattern(
+                    random.uniform(1, 100), "shop", "retail", BASE_TIME
+                )
+            start = time.perf_counter()
+            for _ in range(2000):
+                profile.get_transaction_anomaly_score(75, "shop", "retail", BASE_TIME)
+            timings.append((time.perf_counter() - start) / 2000)
+        assert (
+            timings[1] < timings[0] * 3
+        ), f"Scoring {timings[0] * 1e6:.1f}us -> {timings[1] * 1e6:.1f}us"
@@ -0,0 +1,94 @@
+"""
+Throughput of the bulk transfer / payout service
+"""
+
+import time
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from src.models.account import Account, AccountStatus, AccountType
+from src.models.database import Base
+from src.models.transaction import Transaction
+from src.models.user import User
+from src.services.bulk_transfer_service import process_bulk_transfers
+
+TABLES = [User.__table__, Account.__table__, Transaction.__table__]
+EMPLOYEES = 500
+PAYOUTS = 10_000
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    Base.metadata.create_all(engine, tables=TABLES)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def add_accounts(session, user_id, count, balance, currency="USD", status=None):
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    session.execute(
+        insert(Account.__table__),
+        [
+            {
+                "id": account_id,
+                "user_id": user_id,
+                "account_name": f"Account {account_id[:8]}",
+                "account_number": account_id[:20],
+                "account_type": AccountType.CHECKING,
+                "status": status or AccountStatus.ACTIVE,
+                "currency": currency,
+                "balance": Decimal(balance),
+                "available_balance": Decimal(balance),
+            }
+            for account_id in ids
+        ],
+    )
+    session.commit()
+    return ids
+
+
+def balance_of(session, account_id):
+    accounts = Account.__table__
+    return session.execute(
+        select(accounts.c.balance).where(accounts.c.id == account_id)
+    ).scalar_one()
+
+
+class TestBulkTransferThroughput:
+    """Payroll-style payouts posted in chunked single transactions"""
+
+    def test_ten_thousand_payouts_post_in_seconds(self, session):
+        (payroll,) = add_accounts(session, "employer", 1, "1000000")
+        employees = add_accounts(session, "employee", EMPLOYEES, "0")
+        transfers = [
+            {
+                "from_account_id": payroll,
+                "to_account_id": employees[i % EMPLOYEES],
+                "amount": "12.50",
+            }
+            for i in range(PAYOUTS)
+        ]
+        start = time.perf_counter()
+        summary = process_bulk_transfers(session, transfers, user_id="employer")
+        elapsed = time.perf_counter() - start
+
+        assert summary["succeeded"] == PAYOUTS
+        assert summary["failed"] == 0
+        assert (
+            balance_of(session, payroll)
+            == Decimal("1000000") - Decimal("12.50") * PAYOUTS
+        )
+        assert balance_of(session, employees[0]) == Decimal("12.50") * (
+            PAYOUTS // EMPLOYEES
+        )
+        count = session.execute(
+            select(func.count()).select_from(Transaction.__table__)
+        ).scalar_one()
+        assert count == 2 * PAYOUTS
+        assert elapsed < 15, f"{PAYOUTS} payouts took {elapsed:.1f}s"
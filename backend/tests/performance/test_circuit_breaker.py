@@ -0,0 +1,197 @@
+"""
+Tests for the shared circuit breakers
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.gateway.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerOpenError,
+    CircuitBreakerRegistry,
+)
+from src.gateway.metrics import GatewayMetrics
+
+
+def fail():
+    raise ConnectionError("service unavailable")
+
+
+def ok():
+    return "ok"
+
+
+def trip(breaker):
+    for _ in range(breaker.config["minimum_calls"]):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+
+class TestCircuitBreakerTransitions:
+    """Rolling-window tripping and half-open recovery"""
+
+    @pytest.fixture
+    def breaker(self):
+        return CircuitBreaker(
+            "svc",
+            {
+                "failure_threshold": 3,
+                "minimum_calls": 6,
+                "failure_rate_threshold": 0.5,
+                "recovery_timeout": 0.05,
+                "half_open_max_calls": 2,
+            },
+        )
+
+    def test_low_failure_rate_keeps_breaker_closed(self, breaker):
+        for _ in range(10):
+            breaker.call(ok)
+            breaker.call(ok)
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+        assert breaker.state == "closed"
+
+    def test_high_failure_rate_opens_and_rejects_fast(self, breaker):
+        trip(breaker)
+        assert breaker.state == "open"
+        start = time.perf_counter()
+        with pytest.raises(CircuitBreakerOpenError) as exc:
+            breaker.call(ok)
+        assert time.perf_counter() - start < 0.01
+        assert exc.value.retry_after > 0
+        assert breaker.snapshot()["rejected"] == 1
+
+    def test_successful_probes_close_breaker(self, breaker):
+        trip(breaker)
+        time.sleep(0.06)
+        breaker.call(ok)
+        assert breaker.state == "half_open"
+        breaker.call(ok)
+        assert breaker.state == "closed"
+        assert breaker.failure_count == 0
+
+    def test_failed_probe_reopens_breaker(self, breaker):
+        trip(breaker)
+        time.sleep(0.06)
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+        assert breaker.state == "open"
+        with pytest.raises(CircuitBreakerOpenError):
+            breaker.call(ok)
+
+    def test_half_open_limits_concurrent_probes(self, breaker):
+        trip(breaker)
+        time.sleep(0.06)
+        release = threading.Event()
+        entered = []
+        rejected = []
+
+        def slow_probe():
+            entered.append(1)
+            release.wait(2)
+            return "ok"
+
+        def worker():
+            try:
+                breaker.call(slow_probe)
+            except CircuitBreakerOpenError:
+                rejected.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for t in threads:
+            t.start()
+        deadline = time.monotonic() + 2
+        while len(entered) + len(rejected) < 10 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert len(entered) == 2
+        assert len(rejected) == 8
+        release.set()
+        for t in threads:
+            t.join()
+        assert breaker.state == "closed"
+
+    def test_async_call_timeout_counts_as_failure(self):
+        breaker = CircuitBreaker("svc", {"failure_threshold": 1, "call_timeout": 0.01})
+
+        async def hang():
+            await asyncio.sleep(1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(breaker.call_async(hang))
+        assert breaker.state == "open"
+
+    def test_cancelled_probe_frees_its_slot(self, breaker):
+        trip(breaker)
+        time.sleep(0.06)
+
+        async def probe_then_cancel():
+            started = asyncio.Event()
+
+            async def slow():
+                started.set()
+                await asyncio.sleep(1)
+
+            tasks = [asyncio.create_task(breaker.call_async(slow)) for _ in range(2)]
+            await started.wait()
+            await asyncio.sleep(0)
+            assert breaker.snapshot()["half_open_in_flight"] == 2
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run(probe_then_cancel())
+        snapshot = breaker.snapshot()
+        assert snapshot["half_open_in_flight"] == 0
+        assert snapshot["failures"] == breaker.config["minimum_calls"]
+        assert breaker.state == "half_open"
+        breaker.call(ok)
+        breaker.call(ok)
+        assert breaker.state == "closed"
+
+    def test_interrupted_sync_probe_frees_its_slot(self, breaker):
+        trip(breaker)
+        time.sleep(0.06)
+
+        def interrupt():
+            raise KeyboardInterrupt
+
+        for _ in range(3):
+            with pytest.raises(KeyboardInterrupt):
+                breaker.call(interrupt)
+        assert breaker.snapshot()["half_open_in_flight"] == 0
+        breaker.call(ok)
+        breaker.call(ok)
+        assert breaker.state == "closed"
+
+
+class TestCircuitBreakerRegistry:
+    """Shared breakers and metrics export"""
+
+    def test_breakers_are_shared_and_configurable(self):
+        registry = CircuitBreakerRegistry({"failure_threshold": 2})
+        registry.configure(services={"stripe": {"failure_threshold": 4}})
+        assert registry.get("plaid") is registry.get("plaid")
+        assert registry.get("plaid").config["failure_threshold"] == 2
+        assert registry.get("stripe").config["failure_threshold"] == 4
+        assert set(registry.snapshot()) == {"plaid", "stripe"}
+
+    def test_breaker_state_and_latency_are_exported(self, tmp_path):
+        registry = CircuitBreakerRegistry({"failure_threshold": 1})
+        registry.call("plaid", ok)
+        with pytest.raises(ConnectionError):
+            registry.call("stripe", fail)
+        metrics = GatewayMetrics(directory=str(tmp_path))
+        metrics.circuit_breaker_provider = registry.snapshot
+        text = metrics.render()
+        assert (
+            'flowlet_gateway_circuit_breaker_state{service="stripe",state="open"} 1'
+            in text
+        )
+        assert (
+            'flowlet_gateway_circuit_breaker_calls_total{outcome="successes",service="plaid"} 1'
+            in text
+        )
+        assert 'circuit_breaker_latency_seconds_total{service="plaid"}' in text
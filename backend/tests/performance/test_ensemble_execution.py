@@ -0,0 +1,191 @@
+"""
+Sequential, parallel and cascade execution of the fraud ensemble
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ml.fraud_detection import FraudModelBase
+from src.ml.fraud_detection.ensemble_model import EnsembleFraudModel
+
+MODEL_NAMES = ["isolation_forest", "random_forest", "xgboost", "autoencoder"]
+VOTING_STRATEGIES = ["weighted", "average", "max"]
+
+
+class Logistic(FraudModelBase):
+    """Stand-in sub-model: a fixed logistic function of the features"""
+
+    def __init__(self, coefficients, delay=0.0):
+        super().__init__({})
+        self.coefficients = np.asarray(coefficients)
+        self.delay = delay
+        self.is_trained = True
+
+    def train(self, training_data, labels=None):
+        pass
+
+    def predict(self, features):
+        if self.delay:
+            time.sleep(self.delay)
+        return 1 / (1 + np.exp(-features.to_numpy() @ self.coefficients))
+
+    def get_feature_importance(self):
+        return {}
+
+
+def make_ensemble(mode, voting_strategy="weighted", delay=0.0):
+    model = EnsembleFraudModel(
+        {"execution_mode": mode, "voting_strategy": voting_strategy}
+    )
+    rng = np.random.default_rng(18)
+    for name in MODEL_NAMES:
+        model.models[name] = Logistic(rng.normal(size=4), delay)
+    model.model_weights = dict(zip(MODEL_NAMES, [0.1, 0.4, 0.3, 0.2]))
+    model.is_trained = True
+    return model
+
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(19)
+    return pd.DataFrame(rng.normal(scale=2, size=(5000, 4)), columns=list("abcd"))
+
+
+class TestParallelExecution:
+    @pytest.mark.parametrize("voting_strategy", VOTING_STRATEGIES)
+    def test_scores_equal_sequential(self, features, voting_strategy):
+        sequential = make_ensemble("sequential", voting_strategy)
+        parallel = make_ensemble("parallel", voting_strategy)
+        expected, expected_components = sequential.predict_with_components(features)
+        scores, components = parallel.predict_with_components(features)
+        np.testing.assert_array_equal(scores, expected)
+        assert list(components) == list(expected_components)
+        for name in MODEL_NAMES:
+            np.testing.assert_array_equal(components[name], expected_components[name])
+
+    def test_slow_models_overlap(self, features):
+        sequential = make_ensemble("sequential", delay=0.1)
+        parallel = make_ensemble("parallel", delay=0.1)
+        start = time.perf_counter()
+        sequential.predict(features)
+        sequential_time = time.perf_counter() - start
+        start = time.perf_counter()
+        parallel.predict(features)
+        parallel_time = time.perf_counter() - start
+        assert sequential_time >= 0.4
+        assert parallel_time < sequential_time / 2
+
+
+class TestCascadeExecution:
+    @pytest.mark.parametrize("voting_strategy", VOTING_STRATEGIES)
+    def test_keeps_risk_levels(self, features, voting_strategy):
+        exact = make_ensemble("sequential", voting_strategy).predict(features)
+        cascade = make_ensemble("cascade", voting_strategy)
+        scores = cascade.predict(features)
+        assert list(cascade.calculate_risk_levels(scores)) == list(
+            cascade.calculate_risk_levels(exact)
+        )
+        skipped = sum(
+            status["latency"]["skipped_rows"]
+            for status in cascade.get_model_status().values()
+        )
+        assert skipped > 0
+
+    @pytest.mark.parametrize("voting_strategy", VOTING_STRATEGIES)
+    def test_exact_inside_band(self, features, voting_strategy):
+        exact = make_ensemble("sequential", voting_strategy).predict(features)
+        cascade = make_ensemble("cascade", voting_strategy)
+        scores = cascade.predict(features)
+        low, high = cascade.cascade_band
+        inside = (exact >= low) & (exact < high)
+        assert inside.any() and not inside.all()
+        np.testing.assert_allclose(scores[inside], exact[inside], rtol=0, atol=1e-12)
+        assert ((scores < low) == (exact < low)).all()
+        assert ((scores >= high) == (exact >= high)).all()
+
+    def test_skipped_rows_are_nan_in_components(self, features):
+        cascade = make_ensemble("cascade")
+        _, components = cascade.predict_with_components(features)
+        cheapest = components["isolation_forest"]
+        assert not np.isnan(cheapest).any()
+        assert np.isnan(components["autoencoder"]).any()
+
+
+class TestModelStatus:
+    def test_latency_fields_are_filled(self, features):
+        model = make_ensemble("cascade")
+        model.predict(features)
+        model.predict(features.head(100))
+        status = model.get_model_status()
+        assert set(status) == set(MODEL_NAMES)
+        for name in MODEL_NAMES:
+            latency = status[name]["latency"]
+            assert set(latency) == {
+                "calls",
+                "rows",
+                "skipped_rows",
+                "mean_ms",
+                "max_ms",
+            }
+            assert latency["rows"] + latency["skipped_rows"] == 5100
+            assert status[name]["weight"] == model.model_weights[name]
+        cheapest = status["isolation_forest"]["latency"]
+        assert cheapest["calls"] == 2
+        assert cheapest["rows"] == 5100 and cheapest["skipped_rows"] == 0
+        assert 0 < cheapest["mean_ms"] <= cheapest["max_ms"]
+
+    def test_untouched_models_report_zero(self):
+        status = make_ensemble("sequential").get_model_status()
+        assert status["xgboost"]["latency"] == {
+            "calls": 0,
+            "rows": 0,
+            "skipped_rows": 0,
+            "mean_ms": 0.0,
+            "max_ms": 0.0,
+        }
+
+
+class TestTrainedSklearnModels:
+    """The execution modes agree on real isolation and random forests"""
+
+    @pytest.fixture(scope="class")
+    def data(self):
+        # The sub-model modules import all of the ML frameworks
+        for module in ("tensorflow", "xgboost", "lightgbm"):
+            pytest.importorskip(module)
+        rng = np.random.default_rng(20)
+        features = pd.DataFrame(rng.normal(size=(3000, 6)), columns=list("abcdef"))
+        labels = pd.Series(
+            (features["a"] + features["b"] * features["c"] > 1.5).astype(int)
+        )
+        return features, labels
+
+    def train(self, mode, data):
+        model = EnsembleFraudModel(
+            {
+                "execution_mode": mode,
+                "models": {
+                    "isolation_forest": {"n_estimators": 50},
+                    "random_forest": {"n_estimators": 50, "max_depth": 8},
+                },
+            }
+        )
+        model.train(*data)
+        return model
+
+    def test_modes_agree(self, data):
+        features = data[0]
+        exact = self.train("sequential", data).predict(features)
+        parallel = self.train("parallel", data).predict(features)
+        cascade_model = self.train("cascade", data)
+        cascade = cascade_model.predict(features)
+        np.testing.assert_allclose(parallel, exact, rtol=0, atol=1e-12)
+        low, high = cascade_model.cascade_band
+        inside = (exact >= low) & (exact < high)
+        np.testing.assert_allclose(cascade[inside], exact[inside], rtol=0, atol=1e-12)
+        assert list(cascade_model.calculate_risk_levels(cascade)) == list(
+            cascade_model.calculate_risk_levels(exact)
+        )
@@ -0,0 +1,81 @@
+"""
+Online feature store lookups vs. scanning the user's history
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from src.ml.fraud_detection import FeatureEngineer
+from src.ml.fraud_detection.feature_store import OnlineFeatureStore
+
+BASE_TIME = datetime(2026, 3, 1)
+
+
+def make_history(rng, size, days=40):
+    # Whole-day offsets keep every event on a bucket boundary of all windows
+    history = pd.DataFrame(
+        {
+            "timestamp": [
+                BASE_TIME + timedelta(days=rng.randint(0, days - 1))
+                for _ in range(size)
+            ],
+            "amount": [rng.uniform(1, 500) for _ in range(size)],
+            "merchant_category": [
+                rng.choice(["grocery", "travel", None]) for _ in range(size)
+            ],
+            "device_fingerprint": [rng.choice(["d1", "d2", None]) for _ in range(size)],
+            "location_country": [rng.choice(["US", "FR"]) for _ in range(size)],
+        }
+    )
+    return history.sort_values("timestamp", ignore_index=True)
+
+
+def transaction(timestamp, **fields):
+    return {
+        "transaction_id": "t1",
+        "user_id": "u1",
+        "amount": 120.0,
+        "timestamp": timestamp.isoformat(),
+        "merchant_category": "gambling",
+        "device_fingerprint": "d3",
+        "location_country": "US",
+        **fields,
+    }
+
+
+class TestFeatureStoreBenchmark:
+    """Lookup cost does not grow with the user's history"""
+
+    @pytest.mark.parametrize("size", [5000])
+    def test_lookup_is_independent_of_history_size(self, size):
+        rng = random.Random(11)
+        small, large = OnlineFeatureStore(), OnlineFeatureStore()
+        small.load_history("u1", make_history(rng, 10))
+        large.load_history("u1", make_history(rng, size))
+        history = make_history(rng, size)
+        engineer = FeatureEngineer()
+        data = transaction(BASE_TIME + timedelta(days=30))
+
+        def timed(extract, iterations=200):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                extract()
+            return (time.perf_counter() - start) / iterations
+
+        small_store = timed(
+            lambda: FeatureEngineer(small).extract_transaction_features(data)
+        )
+        large_store = timed(
+            lambda: FeatureEngineer(large).extract_transaction_features(data)
+        )
+        scan = timed(
+            lambda: engineer.extract_transaction_features(data, history), iterations=20
+        )
+        assert large_store < small_store * 3
+        assert (
+            scan / large_store >= 20
+        ), f"Store lookup only {scan / large_store:.0f}x faster than a history scan"
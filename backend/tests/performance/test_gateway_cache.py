@@ -0,0 +1,125 @@
+import threading
+import time
+from typing import Any
+import pytest
+from src.gateway.optimized_gateway import CacheManager
+
+
+class TestSharedCacheManager:
+    """Test the bounded two-tier cache and its single-flight refill"""
+
+    @pytest.fixture
+    def cache_config(self) -> Any:
+        return {
+            "default_ttl": 300,
+            "max_cache_size": 3,
+            "cache_strategies": {"account_balance": 60, "exchange_rates": 900},
+            "single_flight_timeout": 5,
+        }
+
+    def test_local_tier_is_lru_bounded(self, cache_config: Any) -> Any:
+        cache_manager = CacheManager(None, cache_config)
+        for key in ("a", "b", "c"):
+            cache_manager.set(key, {"key": key})
+        assert cache_manager.get("a") == {"key": "a"}
+        cache_manager.set("d", {"key": "d"})
+        assert cache_manager.get("b") is None
+        assert cache_manager.get("a") == {"key": "a"}
+        stats = cache_manager.get_stats()
+        assert stats["local_size"] == 3
+        assert stats["evictions"] == 1
+
+    def test_per_endpoint_type_ttl(self, cache_config: Any) -> Any:
+        cache_manager = CacheManager(None, cache_config)
+        cache_manager.set("balance", {"balance": "10.00"}, "account_balance")
+        cache_manager.local_cache["balance"]["expires"] = time.time() - 1
+        assert cache_manager.get("balance", "account_balance") is None
+        assert cache_manager.get_ttl("exchange_rates") == 900
+        assert cache_manager.get_ttl("unknown") == 300
+
+    def test_single_flight_coalesces_concurrent_misses(self, cache_config: Any) -> Any:
+        cache_manager = CacheManager(None, cache_config)
+        calls = []
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(2)
+            return {"rate": 1.1}
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    cache_manager.get_or_set("fx", loader, "exchange_rates")
+                )
+            )
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert results == [{"rate": 1.1}] * 20
+        assert cache_manager.get_stats()["coalesced"] >= 1
+
+    def test_single_flight_shares_loader_errors(self, cache_config: Any) -> Any:
+        cache_manager = CacheManager(None, cache_config)
+
+        def loader():
+            raise RuntimeError("backend down")
+
+        with pytest.raises(RuntimeError):
+            cache_manager.get_or_set("fx", loader)
+        assert cache_manager.get_or_set("fx", lambda: {"rate": 1}) == {"rate": 1}
+
+
+class TestTaggedInvalidation:
+    """Test tag-indexed invalidation of cached entries"""
+
+    @pytest.fixture
+    def cache_manager(self) -> Any:
+        return CacheManager(
+            None,
+            {
+                "default_ttl": 300,
+                "max_cache_size": 100,
+                "cache_strategies": {
+                    "account_balance": 60,
+                    "transaction_history": 300,
+                },
+            },
+        )
+
+    def test_invalidate_account_only_drops_requested_views(
+        self, cache_manager: Any
+    ) -> Any:
+        for account_id in ("acc-1", "acc-2"):
+            for cache_type in ("account_balance", "transaction_history"):
+                tags = cache_manager.build_tags(
+                    endpoint_type=cache_type, user_id="u-1", account_id=account_id
+                )
+                cache_manager.set(
+                    f"{account_id}:{cache_type}", {"v": 1}, cache_type, tags
+                )
+        removed = cache_manager.invalidate_account("acc-1", "account_balance")
+        assert removed == 1
+        assert cache_manager.get("acc-1:account_balance") is None
+        assert cache_manager.get("acc-1:transaction_history") == {"v": 1}
+        assert cache_manager.get("acc-2:account_balance") == {"v": 1}
+        assert cache_manager.invalidate_tags("user:u-1") == 3
+        assert cache_manager.get_stats()["tag_count"] == 0
+
+    def test_pattern_fallback_uses_glob_on_readable_keys(
+        self, cache_manager: Any
+    ) -> Any:
+        key = cache_manager.get_cache_key("account.get_balance", {"id": 1})
+        other = cache_manager.get_cache_key("account.get_history", {"id": 1})
+        cache_manager.set(key, {"v": 1})
+        cache_manager.set(other, {"v": 2})
+        cache_manager.invalidate_pattern("cache:account.get_balance:*")
+        assert cache_manager.get(key) is None
+        assert cache_manager.get(other) == {"v": 2}
@@ -0,0 +1,68 @@
+import multiprocessing
+import time
+from typing import Any
+from src.gateway.metrics import GatewayMetrics
+
+
+def _serve_requests(directory: Any, count: Any) -> Any:
+    metrics = GatewayMetrics(directory=directory)
+    for _ in range(count):
+        metrics.request_started("/api/v1/accounts/<account_id>")
+        metrics.request_finished("/api/v1/accounts/<account_id>", "GET", 200, 0.02)
+    metrics.flush()
+
+
+class TestGatewayMetrics:
+    """Test the cross-worker Prometheus metrics registry"""
+
+    def test_render_prometheus_text(self, tmp_path: Any) -> Any:
+        metrics = GatewayMetrics(directory=str(tmp_path))
+        metrics.request_started("/health")
+        metrics.request_finished("/health", "GET", 200, 0.003)
+        metrics.request_started("/health")
+        metrics.request_finished("/health", "GET", 503, 0.2)
+        metrics.request_started("/slow")
+        metrics.update_cache_stats({"local_hits": 3, "misses": 1})
+        text = metrics.render()
+        assert "# TYPE flowlet_gateway_request_duration_seconds histogram" in text
+        assert (
+            'flowlet_gateway_request_duration_seconds_bucket{method="GET",'
+            'route="/health",le="0.005"} 1' in text
+        )
+        assert (
+            'flowlet_gateway_request_duration_seconds_bucket{method="GET",'
+            'route="/health",le="+Inf"} 2' in text
+        )
+        assert (
+            'flowlet_gateway_requests_total{method="GET",route="/health",status="503"} 1'
+            in text
+        )
+        assert 'flowlet_gateway_requests_in_flight{route="/slow"} 1' in text
+        assert "flowlet_gateway_cache_hit_ratio 0.75" in text
+
+    def test_aggregates_across_worker_processes(self, tmp_path: Any) -> Any:
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_serve_requests, args=(str(tmp_path), 50))
+            for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        text = GatewayMetrics(directory=str(tmp_path)).render()
+        assert (
+            'flowlet_gateway_requests_total{method="GET",'
+            'route="/api/v1/accounts/<account_id>",status="200"} 150' in text
+        )
+        assert "requests_in_flight" not in text
+
+    def test_recording_overhead(self, tmp_path: Any) -> Any:
+        metrics = GatewayMetrics(directory=str(tmp_path))
+        start_time = time.perf_counter()
+        for i in range(100_000):
+            route = f"/route/{i % 25}"
+            metrics.request_started(route)
+            metrics.request_finished(route, "GET", 200, 0.015)
+        per_request = (time.perf_counter() - start_time) / 100_000
+        assert per_request < 10e-6, f"Recording too slow: {per_request * 1e6:.2f}us"
@@ -0,0 +1,92 @@
+import random
+import statistics
+import time
+from typing import Any
+import pytest
+from src.gateway.optimized_gateway import (
+    LatencyHistogram,
+    PerformanceMonitor,
+    RollingHistogram,
+)
+
+
+class TestLatencyHistogram:
+    """Test the fixed-memory latency histogram"""
+
+    def test_percentiles_within_bucket_error(self) -> Any:
+        random.seed(7)
+        values = [random.lognormvariate(3, 1) for _ in range(20_000)]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+        exact = statistics.quantiles(values, n=100)
+        p50, p95, p99 = histogram.percentiles(0.5, 0.95, 0.99)
+        assert p50 == pytest.approx(exact[49], rel=0.1)
+        assert p95 == pytest.approx(exact[94], rel=0.1)
+        assert p99 == pytest.approx(exact[98], rel=0.1)
+        assert len(histogram.counts) == LatencyHistogram.BUCKET_COUNT
+
+
+class TestRollingHistogram:
+    """Test the ring-buffered time window"""
+
+    def test_old_slices_fall_out_of_window(self) -> Any:
+        rolling = RollingHistogram(window_seconds=10, slice_seconds=5)
+        rolling.record(100.0, now=1000.0)
+        rolling.record(5.0, is_error=True, now=1006.0)
+        assert rolling.merged(now=1006.0).count == 2
+        merged = rolling.merged(now=1011.0)
+        assert merged.count == 1
+        assert merged.errors == 1
+        assert rolling.merged(now=1100.0).count == 0
+
+
+class TestPerformanceMonitor:
+    """Test the streaming performance monitor"""
+
+    @pytest.fixture
+    def monitor(self) -> Any:
+        return PerformanceMonitor(
+            {
+                "alert_interval": 0.01,
+                "alert_thresholds": {
+                    "response_time_p95": 50,
+                    "error_rate": 0.05,
+                    "cpu_usage": 1000,
+                    "memory_usage": 1000,
+                },
+            }
+        )
+
+    def test_summary_per_endpoint(self, monitor: Any) -> Any:
+        assert monitor.get_metrics_summary() == {"status": "no_data"}
+        for _ in range(90):
+            monitor.record_request("wallet.balance", 10.0, 200)
+        for _ in range(10):
+            monitor.record_request("wallet.transfer", 200.0, 500)
+        summary = monitor.get_metrics_summary(include_system=False)
+        assert summary["request_count"] == 100
+        assert summary["error_rate"] == pytest.approx(0.1)
+        assert summary["p50_response_time"] == pytest.approx(10.0, rel=0.1)
+        assert summary["endpoints"]["wallet.transfer"]["error_rate"] == 1.0
+
+    def test_alerts_run_on_timer_not_inline(self, monitor: Any) -> Any:
+        for _ in range(100):
+            monitor.record_request("wallet.transfer", 200.0, 500)
+        assert monitor.alerts == []
+        monitor.start()
+        try:
+            deadline = time.time() + 2
+            while not monitor.alerts and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            monitor.stop()
+        alert_types = {alert["type"] for alert in monitor.alerts}
+        assert {"high_response_time", "high_error_rate"} <= alert_types
+
+    def test_record_request_is_cheap(self, monitor: Any) -> Any:
+        start_time = time.perf_counter()
+        for i in range(50_000):
+            monitor.record_request(f"endpoint-{i % 20}", 12.5, 200)
+        per_record = (time.perf_counter() - start_time) / 50_000
+        assert per_record < 0.0001
@@ -0,0 +1,77 @@
+"""
+Idempotency-Key replay cost under a retry storm
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, g, jsonify, request
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.models.idempotency import IdempotencyKey
+from src.utils.idempotency import IdempotencyStore, idempotent
+import src.utils.idempotency as idempotency
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'idempotency.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    IdempotencyKey.__table__.create(engine)
+    store = IdempotencyStore(ttl_seconds=60, lock_seconds=5)
+    store.configure(session_factory=lambda: Session(engine))
+    monkeypatch.setattr(idempotency, "idempotency_store", store)
+    yield store
+    engine.dispose()
+
+
+@pytest.fixture
+def app(store):
+    app = Flask(__name__)
+    app.calls = 0
+    app.started = threading.Event()
+    app.finish = threading.Event()
+    app.finish.set()
+
+    @app.before_request
+    def authenticate():
+        g.current_user = SimpleNamespace(id=request.headers.get("X-User", "u1"))
+
+    @app.route("/deposit", methods=["POST"])
+    @idempotent
+    def deposit():
+        app.calls += 1
+        app.started.set()
+        app.finish.wait(5)
+        body = request.get_json()
+        if body.get("fail"):
+            return jsonify({"error": "boom"}), 500
+        return jsonify({"transaction": app.calls, "amount": body["amount"]}), 201
+
+    return app
+
+
+def post(client, key, body, user="u1"):
+    headers = {"X-User": user}
+    if key:
+        headers["Idempotency-Key"] = key
+    return client.post("/deposit", json=body, headers=headers)
+
+
+class TestReplayCost:
+    """Replays answer from the store without running the endpoint"""
+
+    def test_retry_storm_runs_endpoint_once(self, app):
+        client = app.test_client()
+        post(client, "storm", {"amount": 10})
+        start = time.perf_counter()
+        for _ in range(200):
+            assert post(client, "storm", {"amount": 10}).status_code == 201
+        elapsed = time.perf_counter() - start
+        assert app.calls == 1
+        assert elapsed < 2.0, f"200 replays took {elapsed:.2f}s"
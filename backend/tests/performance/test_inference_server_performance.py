@@ -0,0 +1,76 @@
+"""
+Micro-batched vs. one-row-per-call scoring under concurrency
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.ml.fraud_detection.inference_server import MicroBatchInferenceServer
+
+COLUMNS = ["amount", "velocity_1h", "velocity_24h", "amount_zscore"]
+
+
+def make_rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.random((count, len(COLUMNS))), columns=COLUMNS)
+
+
+class ForestEnsemble:
+    """Stand-in ensemble: one RandomForest, per-call overhead like the real one"""
+
+    def __init__(self):
+        rows = make_rows(500)
+        self.forest = RandomForestClassifier(n_estimators=30, random_state=0)
+        self.forest.fit(rows, rows["amount"] > 0.7)
+        self.calls = 0
+
+    def predict_with_components(self, features):
+        self.calls += 1
+        scores = self.forest.predict_proba(features)[:, 1]
+        return scores, {"random_forest": scores}
+
+
+@pytest.fixture(scope="module")
+def model():
+    return ForestEnsemble()
+
+
+class TestInferenceServerBenchmark:
+    """Throughput of batched vs. one-row-per-call scoring under concurrency"""
+
+    def test_batched_throughput_beats_per_request_calls(self, model):
+        rows = make_rows(512, seed=3)
+        single_rows = [rows.iloc[[i]] for i in range(len(rows))]
+        model_lock = threading.Lock()
+
+        def direct(row):
+            # Per-call model overhead is CPU-bound, so callers serialize on it
+            with model_lock:
+                return model.predict_with_components(row)
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            start = time.perf_counter()
+            list(pool.map(direct, single_rows))
+            unbatched = time.perf_counter() - start
+            with MicroBatchInferenceServer(
+                model, max_batch_size=64, max_wait_us=2000, workers=1
+            ) as server:
+                start = time.perf_counter()
+                list(
+                    pool.map(
+                        lambda row: server.predict_with_components(row, 10),
+                        single_rows,
+                    )
+                )
+                batched = time.perf_counter() - start
+                stats = server.get_stats()
+        assert stats["batch_size"]["mean"] > 1
+        assert (
+            unbatched / batched >= 3
+        ), f"Micro-batching only {unbatched / batched:.1f}x faster"
@@ -0,0 +1,68 @@
+"""
+Input sanitization throughput: compiled union regex vs. per-pattern scans
+"""
+
+import html
+import random
+import time
+
+import pytest
+
+from src.security.input_validator import InputValidator, ValidationError
+
+BENIGN = [
+    "John Smith",
+    "Acme Holdings Ltd",
+    "Invoice 2024-001 for consulting",
+    "selection of items",
+    "Anderson & Sons",
+    "order for android",
+    "description: monthly fee",
+    "O'Brien",
+    "café payment",
+    "",
+]
+
+
+def naive_sanitize(validator, value, max_length=None, allow_html=False):
+    """sanitize_string as it was: one re.search per pattern"""
+    if not isinstance(value, str):
+        raise ValidationError("Value must be a string", code="INVALID_TYPE")
+    value = value.replace("\x00", "").strip()
+    if max_length and len(value) > max_length:
+        raise ValidationError("String too long", code="STRING_TOO_LONG")
+    if not allow_html:
+        value = html.escape(value)
+        for pattern in validator.dangerous_patterns:
+            if pattern.search(value):
+                raise ValidationError("dangerous", code="DANGEROUS_CONTENT")
+    for pattern in validator.sql_patterns:
+        if pattern.search(value):
+            raise ValidationError("sql", code="SQL_INJECTION")
+    return value
+
+
+@pytest.fixture(scope="module")
+def validator():
+    return InputValidator()
+
+
+class TestSanitizerBenchmark:
+    """Benign strings, compiled union vs. per-pattern re.search"""
+
+    def test_compiled_union_is_faster(self, validator):
+        rng = random.Random(3)
+        clean = [value for value in BENIGN if "'" not in value]
+        values = [" ".join(rng.choices(clean, k=40)) for _ in range(3000)]
+
+        def timed(sanitize):
+            start = time.perf_counter()
+            results = [sanitize(value) for value in values]
+            return time.perf_counter() - start, results
+
+        naive_time, naive_results = timed(lambda v: naive_sanitize(validator, v))
+        fast_time, fast_results = timed(validator.sanitize_string)
+        assert fast_results == naive_results
+        assert (
+            fast_time < naive_time
+        ), f"Union {fast_time * 1e3:.0f}ms vs. per-pattern {naive_time * 1e3:.0f}ms"
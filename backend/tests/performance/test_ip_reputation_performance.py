@@ -0,0 +1,37 @@
+"""
+IP reputation lookups at one million prefixes
+"""
+
+import ipaddress
+import random
+import time
+
+from src.security.ip_reputation import IPReputationIndex, ReputationEntry
+
+
+class TestIPReputationBenchmark:
+    """One million IPv4 prefixes"""
+
+    def test_lookup_at_one_million_prefixes(self):
+        rng = random.Random(9)
+        lengths = [16, 20, 24, 24, 28, 32, 32, 32]
+        entries = []
+        for _ in range(1_000_000):
+            a = rng.getrandbits(32)
+            network = f"{a >> 24}.{a >> 16 & 255}.{a >> 8 & 255}.{a & 255}"
+            entries.append(
+                ReputationEntry(f"{network}/{rng.choice(lengths)}", 0.9, "c", "s")
+            )
+        snapshot = IPReputationIndex().rebuild(entries)
+
+        ips = [str(ipaddress.ip_address(rng.getrandbits(32))) for _ in range(100_000)]
+        start = time.perf_counter()
+        hits = sum(1 for ip in ips if snapshot.lookup(ip) is not None)
+        per_lookup = (time.perf_counter() - start) / len(ips)
+
+        depth = max(
+            len(snapshot.v4.matches(int(ipaddress.ip_address(ip)))) for ip in ips
+        )
+        assert hits > 0
+        assert depth <= 33
+        assert per_lookup < 100e-6, f"Lookup took {per_lookup * 1e6:.1f}us"
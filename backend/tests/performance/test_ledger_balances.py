@@ -0,0 +1,237 @@
+"""
+Ledger balance snapshots, checkpoints and reconciliation against the entries
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select, update
+from sqlalchemy.orm import Session
+
+from src.models.database import Base
+from src.models.ledger import LedgerBalance, LedgerBalanceCheckpoint, LedgerEntry
+from src.services.ledger_service import (
+    apply_entries_to_balances,
+    create_balance_checkpoints,
+    get_balances,
+    get_balances_as_of,
+    reconcile_ledger_balances,
+)
+
+TABLES = [
+    LedgerEntry.__table__,
+    LedgerBalance.__table__,
+    LedgerBalanceCheckpoint.__table__,
+]
+ACCOUNTS = ["cash_and_equivalents", "customer_deposits", "transaction_fees"]
+CURRENCIES = ["USD", "EUR"]
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ledger.db'}")
+    Base.metadata.create_all(engine, tables=TABLES)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def entry(account_name, currency, debit, credit, created_at):
+    return {
+        "id": str(uuid.uuid4()),
+        "journal_entry_id": str(uuid.uuid4()),
+        "account_type": "asset",
+        "account_name": account_name,
+        "debit_amount": Decimal(debit),
+        "credit_amount": Decimal(credit),
+        "currency": currency,
+        "created_at": created_at,
+    }
+
+
+def post(session, rows, snapshot=True):
+    """Insert entries and, like the journal route, bump the snapshots"""
+    table = LedgerEntry.__table__
+    session.execute(insert(table), rows)
+    if snapshot:
+        inserted = session.execute(
+            select(table).where(table.c.id.in_([row["id"] for row in rows]))
+        ).all()
+        apply_entries_to_balances(session, inserted)
+    session.commit()
+
+
+def random_entries(rng, count, start=START, step=timedelta(minutes=1)):
+    return [
+        entry(
+            rng.choice(ACCOUNTS),
+            rng.choice(CURRENCIES),
+            f"{rng.randint(0, 10000) / 100:.2f}",
+            f"{rng.randint(0, 10000) / 100:.2f}",
+            start + step * i,
+        )
+        for i in range(count)
+    ]
+
+
+def totals(rows, account_name, until=None):
+    """``{currency: (debit, credit)}`` summed straight from the entry dicts"""
+    result = {}
+    for row in rows:
+        if row["account_name"] != account_name:
+            continue
+        if until is not None and row["created_at"] > until:
+            continue
+        debit, credit = result.get(row["currency"], (Decimal(0), Decimal(0)))
+        result[row["currency"]] = (
+            debit + row["debit_amount"],
+            credit + row["credit_amount"],
+        )
+    return result
+
+
+class TestBalanceSnapshots:
+    def test_snapshots_track_entry_totals(self, session):
+        rng = random.Random(9)
+        rows = random_entries(rng, 300)
+        for start in range(0, len(rows), 25):
+            post(session, rows[start : start + 25])
+        for account_name in ACCOUNTS:
+            assert get_balances(session, account_name) == totals(rows, account_name)
+        assert get_balances(session, ACCOUNTS[0], "EUR") == {
+            "EUR": totals(rows, ACCOUNTS[0])["EUR"]
+        }
+        count = session.execute(
+            select(LedgerBalance.__table__.c.entry_count).where(
+                LedgerBalance.__table__.c.account_name == ACCOUNTS[0],
+                LedgerBalance.__table__.c.currency == "USD",
+            )
+        ).scalar_one()
+        assert count == sum(
+            1
+            for row in rows
+            if row["account_name"] == ACCOUNTS[0] and row["currency"] == "USD"
+        )
+        assert reconcile_ledger_balances(session) == []
+
+
+class TestReconciliation:
+    def test_reports_and_repairs_drifted_and_missing_snapshots(self, session):
+        post(session, [entry("customer_deposits", "USD", "10", "0", START)])
+        post(
+            session,
+            [entry("transaction_fees", "EUR", "0", "2.50", START)],
+            snapshot=False,
+        )
+        balances = LedgerBalance.__table__
+        session.execute(
+            update(balances)
+            .where(balances.c.account_name == "customer_deposits")
+            .values(total_debit=Decimal("99"))
+        )
+        session.commit()
+
+        mismatches = reconcile_ledger_balances(session)
+        assert [(m["account_name"], m["currency"]) for m in mismatches] == [
+            ("customer_deposits", "USD"),
+            ("transaction_fees", "EUR"),
+        ]
+        assert mismatches[0]["snapshot"]["total_debit"] == "99.00000000"
+        assert mismatches[0]["expected"]["total_debit"] == "10.00000000"
+        assert mismatches[1]["snapshot"] is None
+        assert get_balances(session, "customer_deposits")["USD"][0] == Decimal("99")
+
+        assert len(reconcile_ledger_balances(session, repair=True)) == 2
+        assert reconcile_ledger_balances(session) == []
+        assert get_balances(session, "customer_deposits") == {
+            "USD": (Decimal("10"), Decimal("0"))
+        }
+        assert get_balances(session, "transaction_fees") == {
+            "EUR": (Decimal("0"), Decimal("2.50"))
+        }
+
+
+class TestCheckpoints:
+    def test_as_of_balances_equal_full_sums(self, session):
+        rng = random.Random(10)
+        rows = random_entries(rng, 240)
+        post(session, rows[:120])
+        first = create_balance_checkpoints(session, as_of=START + timedelta(hours=1))
+        assert len(first) == len(ACCOUNTS) * len(CURRENCIES)
+        post(session, rows[120:])
+        second = create_balance_checkpoints(session, as_of=START + timedelta(hours=3))
+        assert len(second) == len(first)
+        assert create_balance_checkpoints(session, as_of=START) == []
+
+        checkpoint = next(
+            c
+            for c in second
+            if c["account_name"] == ACCOUNTS[1] and c["currency"] == "USD"
+        )
+        expected = totals(rows, ACCOUNTS[1], START + timedelta(hours=3))["USD"]
+        assert (checkpoint["total_debit"], checkpoint["total_credit"]) == expected
+
+        for minutes in (0, 30, 60, 61, 119, 150, 239, 400):
+            as_of = START + timedelta(minutes=minutes)
+            for account_name in ACCOUNTS:
+                assert get_balances_as_of(session, account_name, as_of) == totals(
+                    rows, account_name, as_of
+                ), (account_name, minutes)
+        assert get_balances_as_of(session, ACCOUNTS[0], START - timedelta(days=1)) == {}
+
+    def test_as_of_includes_currencies_without_snapshot(self, session):
+        post(session, [entry("cash_and_equivalents", "USD", "5", "0", START)])
+        post(
+            session,
+            [entry("cash_and_equivalents", "EUR", "7", "0", START)],
+            snapshot=False,
+        )
+        as_of = START + timedelta(minutes=1)
+        assert get_balances_as_of(session, "cash_and_equivalents", as_of) == {
+            "EUR": (Decimal("7"), Decimal("0")),
+            "USD": (Decimal("5"), Decimal("0")),
+        }
+        assert get_balances_as_of(session, "cash_and_equivalents", as_of, "EUR") == {
+            "EUR": (Decimal("7"), Decimal("0"))
+        }
+
+    def test_as_of_reads_only_entries_after_checkpoint(self, session):
+        rng = random.Random(11)
+        rows = random_entries(rng, 120)
+        post(session, rows)
+        create_balance_checkpoints(session, as_of=START + timedelta(hours=1))
+        post(
+            session,
+            [
+                entry(
+                    "cash_and_equivalents",
+                    "GBP",
+                    "3",
+                    "0",
+                    START + timedelta(hours=1, minutes=5),
+                )
+            ],
+            snapshot=False,
+        )
+        statements = []
+        engine = session.get_bind()
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            as_of = START + timedelta(hours=1, minutes=30)
+            balances = get_balances_as_of(session, "cash_and_equivalents", as_of)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        expected = totals(rows, "cash_and_equivalents", as_of)
+        expected["GBP"] = (Decimal("3"), Decimal("0"))
+        assert balances == expected
+        entry_reads = [s for s in statements if "FROM ledger_entries" in s]
+        assert entry_reads
+        assert all("ledger_entries.created_at >" in s for s in entry_reads), entry_reads
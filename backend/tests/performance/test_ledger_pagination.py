@@ -0,0 +1,225 @@
+"""
+Keyset pagination and streaming export of ledger entries
+"""
+
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from flask import Flask
+from sqlalchemy import insert, select
+
+import src.utils.auth as auth
+from src.models.database import Base, db
+from src.models.ledger import LedgerEntry
+from src.routes import ledger
+from src.utils.pagination import decode_cursor, encode_cursor, keyset_page
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+ENTRIES = 130
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'ledger.db'}"
+    db.init_app(app)
+    app.register_blueprint(ledger.ledger_bp)
+    monkeypatch.setattr(
+        auth,
+        "load_principal",
+        lambda session, user_id: SimpleNamespace(id=user_id, is_active=True),
+    )
+    app.exports = []
+    monkeypatch.setattr(
+        ledger.audit_logger,
+        "log_event",
+        lambda **kwargs: app.exports.append(kwargs),
+    )
+    with app.app_context():
+        Base.metadata.create_all(db.engine, tables=[LedgerEntry.__table__])
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "journal_entry_id": str(uuid.uuid4()),
+                "account_type": "asset",
+                "account_name": (
+                    "customer_deposits" if i % 3 == 0 else "cash_and_equivalents"
+                ),
+                "debit_amount": Decimal(i) / 100,
+                "credit_amount": Decimal("0"),
+                "currency": "USD",
+                # pairs of entries share a timestamp, so ties are broken by id
+                "created_at": START + timedelta(minutes=i // 2),
+            }
+            for i in range(ENTRIES)
+        ]
+        db.session.execute(insert(LedgerEntry.__table__), rows)
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    token = jwt.encode({"user_id": "admin-1", "role": "admin"}, "secret")
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
+
+
+def expected_ids(app, account_name=None):
+    table = LedgerEntry.__table__
+    stmt = select(table.c.id).order_by(table.c.created_at.desc(), table.c.id.desc())
+    if account_name:
+        stmt = stmt.where(table.c.account_name == account_name)
+    with app.app_context():
+        return db.session.execute(stmt).scalars().all()
+
+
+def walk(client, query=""):
+    ids, cursor, pages = [], None, 0
+    while True:
+        url = f"/api/v1/ledger/entries?per_page=25{query}"
+        if cursor:
+            url += f"&cursor={cursor}"
+        body = client.get(url).get_json()
+        ids.extend(entry["id"] for entry in body["entries"])
+        pages += 1
+        cursor = body["pagination"]["next_cursor"]
+        assert body["pagination"]["has_more"] == (cursor is not None)
+        if cursor is None:
+            return ids, pages
+
+
+class TestCursor:
+    def test_round_trip(self):
+        for created_at in (START, START.replace(tzinfo=None), START.astimezone()):
+            token = encode_cursor(created_at, "entry-1")
+            assert "=" not in token
+            assert decode_cursor(token) == (created_at, "entry-1")
+
+    @pytest.mark.parametrize("token", ["", "not-base64!", "WzFd", "bnVsbA"])
+    def test_malformed_cursor_is_rejected(self, token):
+        with pytest.raises(ValueError):
+            decode_cursor(token)
+
+    def test_pages_have_no_gaps_or_repeats(self, app):
+        table = LedgerEntry.__table__
+        seen, cursor = [], None
+        with app.app_context():
+            while True:
+                rows, cursor = keyset_page(db.session, select(table), table, 7, cursor)
+                seen.extend(row.id for row in rows)
+                if cursor is None:
+                    break
+        assert seen == expected_ids(app)
+
+
+class TestEntriesEndpoint:
+    def test_cursor_walk_returns_every_entry_once(self, app, client):
+        ids, pages = walk(client)
+        assert ids == expected_ids(app)
+        assert pages == 6
+
+    def test_account_filter(self, app, client):
+        ids, _ = walk(client, "&account_name=customer_deposits")
+        assert ids == expected_ids(app, "customer_deposits")
+        body = client.get(
+            "/api/v1/ledger/entries?account_name=customer_deposits&include_total=true"
+        ).get_json()
+        assert body["pagination"]["estimated_total"] == len(ids)
+        assert {entry["account_name"] for entry in body["entries"]} == {
+            "customer_deposits"
+        }
+
+    def test_total_without_filter(self, client):
+        body = client.get("/api/v1/ledger/entries?include_total=true").get_json()
+        assert body["pagination"]["estimated_total"] == ENTRIES
+        assert "estimated_total" not in (
+            client.get("/api/v1/ledger/entries").get_json()["pagination"]
+        )
+
+    def test_page_parameter_keeps_old_response(self, app, client):
+        body = client.get("/api/v1/ledger/entries?page=2&per_page=50").get_json()
+        pagination = body["pagination"]
+        assert (pagination["page"], pagination["total"], pagination["pages"]) == (
+            2,
+            ENTRIES,
+            3,
+        )
+        ids = [entry["id"] for entry in body["entries"]]
+        assert ids == expected_ids(app)[50:100]
+        rest = client.get(
+            f"/api/v1/ledger/entries?per_page=50&cursor={pagination['next_cursor']}"
+        ).get_json()
+        assert [entry["id"] for entry in rest["entries"]] == expected_ids(app)[100:]
+        last = client.get("/api/v1/ledger/entries?page=3&per_page=50").get_json()
+        assert last["pagination"]["has_more"] is False
+
+    def test_invalid_cursor(self, client):
+        response = client.get("/api/v1/ledger/entries?cursor=garbage")
+        assert response.status_code == 400
+        assert response.get_json()["code"] == "INVALID_CURSOR"
+
+    def test_admin_only(self, app):
+        token = jwt.encode({"user_id": "u1", "role": "user"}, "secret")
+        response = app.test_client().get(
+            "/api/v1/ledger/entries", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 403
+
+
+class TestExport:
+    def test_ndjson_filtered_by_account_and_time(self, app, client):
+        response = client.get(
+            "/api/v1/ledger/entries/export?account_name=customer_deposits"
+            "&since=2026-01-01T00:10:00&until=2026-01-01T00:30:00"
+        )
+        assert response.mimetype == "application/x-ndjson"
+        rows = [
+            json.loads(line) for line in response.get_data(as_text=True).splitlines()
+        ]
+        minutes = [
+            (datetime.fromisoformat(row["created_at"]) - START.replace(tzinfo=None))
+            // timedelta(minutes=1)
+            for row in rows
+        ]
+        assert minutes == sorted(minutes)
+        assert min(minutes) == 10 and max(minutes) == 30
+        assert {row["account_name"] for row in rows} == {"customer_deposits"}
+        assert len(rows) == len([i for i in range(20, 62) if i % 3 == 0])
+        assert rows[0]["debit_amount"] == "0.21000000"
+        assert app.exports[0]["resource_type"] == "ledger_entries"
+
+    def test_naive_and_offset_timestamps_agree(self, client):
+        naive = client.get(
+            "/api/v1/ledger/entries/export?until=2026-01-01T00:05:00"
+        ).get_data()
+        utc = client.get(
+            "/api/v1/ledger/entries/export?until=2026-01-01T00:05:00%2B00:00"
+        ).get_data()
+        shifted = client.get(
+            "/api/v1/ledger/entries/export?until=2026-01-01T02:05:00%2B02:00"
+        ).get_data()
+        assert naive == utc == shifted
+        assert len(naive.splitlines()) == 12
+
+    def test_csv_streams_every_entry(self, app, client, monkeypatch):
+        monkeypatch.setattr(ledger, "EXPORT_BATCH_SIZE", 16)
+        response = client.get("/api/v1/ledger/entries/export?format=csv")
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        assert rows[0] == list(ledger.EXPORT_COLUMNS)
+        assert len(rows) == ENTRIES + 1
+        assert sorted(row[0] for row in rows[1:]) == sorted(expected_ids(app))
+
+    def test_bad_arguments(self, client):
+        assert client.get("/api/v1/ledger/entries/export?format=xml").status_code == 400
+        response = client.get("/api/v1/ledger/entries/export?since=yesterday")
+        assert response.get_json()["code"] == "INVALID_DATE"
@@ -0,0 +1,76 @@
+"""
+Single-row scoring latency of compiled tree models
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.ml.fraud_detection import FraudModelBase
+from src.ml.fraud_detection.compiled_trees import compile_tree_model
+
+COLUMNS = ["amount", "velocity_1h", "velocity_24h", "amount_zscore", "new_device"]
+
+
+class EstimatorModel(FraudModelBase):
+    """Fraud model around any fitted sklearn classifier"""
+
+    def __init__(self, estimator):
+        super().__init__({})
+        self.model = estimator
+
+    def train(self, training_data, labels=None):
+        self.feature_columns = list(training_data.columns)
+        self.model.fit(training_data, labels)
+        self.is_trained = True
+
+    def predict(self, features):
+        return self.model.predict_proba(self.preprocess_features(features))[:, 1]
+
+    def get_feature_importance(self):
+        return dict(zip(self.feature_columns, [1.0] * len(self.feature_columns)))
+
+
+def make_data(rows, seed):
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame(rng.random((rows, len(COLUMNS))), columns=COLUMNS)
+    features["new_device"] = (features["new_device"] > 0.8).astype(int)
+    labels = ((features["amount"] + 0.5 * features["new_device"]) > 0.9).astype(int)
+    return features, labels
+
+
+@pytest.fixture(scope="module")
+def data():
+    return make_data(2000, 0), make_data(500, 1)[0]
+
+
+@pytest.fixture(scope="module")
+def forest(data):
+    (features, labels), _ = data
+    model = EstimatorModel(RandomForestClassifier(n_estimators=40, random_state=0))
+    model.train(features, labels)
+    return model
+
+
+class TestCompiledTreeBenchmark:
+    """Single-transaction scoring latency, compiled vs. native forest"""
+
+    def test_compiled_single_row_is_faster(self, data, forest):
+        (features, _), holdout = data
+        compiled = compile_tree_model(forest, features.head(100))
+        row = holdout.iloc[[0]]
+
+        def timed(model, iterations=100):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                model.predict(row)
+            return (time.perf_counter() - start) / iterations
+
+        native = timed(forest)
+        fast = timed(compiled)
+        assert (
+            fast < native
+        ), f"Compiled forest {fast * 1e3:.2f}ms vs. sklearn {native * 1e3:.2f}ms"
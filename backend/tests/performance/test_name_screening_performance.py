@@ -0,0 +1,158 @@
+"""
+Name screening at 100k names: indexed search vs. scoring every list name
+"""
+
+import random
+import re
+import time
+
+from src.compliance.name_screening import NameScreeningIndex
+
+FIRST = [
+    "john", "jane", "robert", "mary", "michael", "maria", "mohammed", "ahmed",
+    "ali", "omar", "olga", "ivan", "sergei", "dmitri", "elena", "anna", "li",
+    "wei", "chen", "kim", "jose", "juan", "carlos", "sofia", "pierre", "jean",
+    "hans", "klaus", "giovanni", "luca", "yusuf", "fatima", "aisha", "hassan",
+    "viktor", "boris", "natalia", "tariq", "kwame", "amina",
+]  # fmt: skip
+LAST = [
+    "smith", "doe", "johnson", "petrov", "ivanov", "al rashid", "hussein",
+    "kim", "park", "wang", "zhang", "garcia", "rodriguez", "muller", "schmidt",
+    "rossi", "bianchi", "dubois", "martin", "okafor", "mensah", "khan",
+    "rahman", "haddad", "nasser", "kowalski", "novak", "horvat", "sokolov",
+    "volkov", "ben ali", "el amin", "de la cruz", "van der berg", "oconnor",
+]  # fmt: skip
+SYLLABLES = [
+    "ba", "ko", "ri", "sha", "mel", "dan", "vo", "lin", "ser", "ga", "tor",
+    "mi", "ha", "zu", "en", "ov", "ak", "ra", "bek", "ul", "ye", "no", "ch",
+    "ta", "kar", "is", "lo", "pe", "dim", "far", "gu", "sa", "wen", "ju",
+]  # fmt: skip
+
+
+def jaccard_score(name1, name2):
+    """AMLEngine._calculate_name_match_score as it was"""
+    if not name1 or not name2:
+        return 0.0
+    name1_clean = re.sub("[^a-zA-Z\\s]", "", name1.lower()).strip()
+    name2_clean = re.sub("[^a-zA-Z\\s]", "", name2.lower()).strip()
+    if name1_clean == name2_clean:
+        return 1.0
+    words1 = set(name1_clean.split())
+    words2 = set(name2_clean.split())
+    if not words1 or not words2:
+        return 0.0
+    intersection = words1.intersection(words2)
+    union = words1.union(words2)
+    return len(intersection) / len(union)
+
+
+def brute_force(names, query, threshold):
+    scores = {}
+    for name_id, name in enumerate(names):
+        score = jaccard_score(query, name)
+        if score >= threshold:
+            scores[name_id] = score
+    return scores
+
+
+def typo(rng, word):
+    if len(word) < 3:
+        return word
+    i = rng.randrange(len(word) - 1)
+    edit = rng.randrange(3)
+    if edit == 0:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+    if edit == 1:
+        return word[:i] + word[i + 1 :]
+    return word[:i] + rng.choice("aeiouhy") + word[i + 1 :]
+
+
+def random_surname(rng):
+    if rng.random() < 0.2:
+        return rng.choice(LAST)
+    return "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+
+
+def random_name(rng):
+    parts = [rng.choice(FIRST)]
+    if rng.random() < 0.4:
+        parts.append(rng.choice(FIRST).upper()[0] + ".")
+    parts.append(random_surname(rng))
+    if rng.random() < 0.1:
+        parts.append(random_surname(rng))
+    return " ".join(parts).title()
+
+
+def variant(rng, name):
+    """A query derived from a list name, as customers' names drift from it."""
+    words = name.split()
+    change = rng.randrange(7)
+    if change == 0:
+        rng.shuffle(words)
+    elif change == 1 and len(words) > 1:
+        words.pop(rng.randrange(len(words)))
+    elif change == 2:
+        words.append(rng.choice(FIRST).title())
+    elif change == 3:
+        i = rng.randrange(len(words))
+        words[i] = typo(rng, words[i])
+    elif change == 4:
+        words = [word.upper() + rng.choice(["", ",", "-", "'"]) for word in words]
+    elif change == 5:
+        words = words + words[:1]
+    return " ".join(words)
+
+
+def synthetic_list(rng, count):
+    names = []
+    while len(names) < count:
+        names.append(random_name(rng))
+        if rng.random() < 0.3:
+            names.append(variant(rng, names[-1]))
+    return names
+
+
+def queries_for(rng, names, count):
+    queries = ["", "   ", "123", "J.", "X Æ A-12"]
+    while len(queries) < count:
+        if rng.random() < 0.7:
+            queries.append(variant(rng, rng.choice(names)))
+        else:
+            queries.append(random_name(rng))
+    return queries
+
+
+def build_index(names, **kwargs):
+    return NameScreeningIndex(
+        [(name, position) for position, name in enumerate(names)], **kwargs
+    )
+
+
+def matches(index, query, threshold=0.85):
+    """``{list position: score}`` of the index's matches for ``query``"""
+    return {index.payloads[i]: score for i, score in index.query(query, threshold)}
+
+
+class TestNameScreeningBenchmark:
+    """100k list names and aliases"""
+
+    def test_indexed_screening_is_faster(self):
+        rng = random.Random(24)
+        names = synthetic_list(rng, 100_000)
+        index = build_index(names)
+        queries = queries_for(rng, names, 200)
+
+        start = time.perf_counter()
+        found = [matches(index, query) for query in queries]
+        per_query = (time.perf_counter() - start) / len(queries)
+
+        sample = queries[:10]
+        start = time.perf_counter()
+        expected = [brute_force(names, query, 0.85) for query in sample]
+        brute_per_query = (time.perf_counter() - start) / len(sample)
+
+        for hits, scores in zip(found, expected):
+            assert all(hits.get(name_id, -1) >= s for name_id, s in scores.items())
+        assert (
+            per_query * 20 < brute_per_query
+        ), f"Index {per_query * 1e3:.2f}ms vs. {brute_per_query * 1e3:.0f}ms per query"
@@ -0,0 +1,197 @@
+"""
+Principal cache: bearer tokens are verified once per TTL, not per request
+"""
+
+import time
+import uuid
+from decimal import Decimal
+
+import jwt
+import pytest
+from flask import Flask
+from sqlalchemy import event, insert
+
+from src.models.account import Account, AccountStatus, AccountType
+from src.models.database import Base, db
+from src.models.transaction import Transaction
+from src.models.user import User
+from src.routes.wallet import wallet_bp
+from src.utils.auth import PrincipalCache, decode_token, principal_cache
+
+
+def make_token(user_id="u1", **claims):
+    return jwt.encode({"user_id": user_id, **claims}, "secret" * 6, algorithm="HS256")
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setenv("JWT_SECRET_KEY", "secret" * 6)
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+class TestPrincipalCache:
+    """TTL, expiry and eviction of cached payloads"""
+
+    def test_hit_skips_verification(self, monkeypatch):
+        token = make_token()
+        assert decode_token(token)["user_id"] == "u1"
+        monkeypatch.setenv("JWT_SECRET_KEY", "rotated")
+        assert decode_token(token)["user_id"] == "u1"
+
+    def test_invalid_token_is_not_cached(self):
+        with pytest.raises(jwt.InvalidTokenError):
+            decode_token("not-a-token")
+        assert principal_cache.get("not-a-token") is None
+
+    def test_entry_never_outlives_token_exp(self):
+        cache = PrincipalCache(ttl_seconds=60)
+        cache.put("t", {"user_id": "u1", "exp": time.time() - 1})
+        assert cache.get("t") is None
+
+    def test_entry_expires_after_ttl(self):
+        cache = PrincipalCache(ttl_seconds=0.05)
+        cache.put("t", {"user_id": "u1"})
+        assert cache.get("t") == {"user_id": "u1"}
+        time.sleep(0.06)
+        assert cache.get("t") is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = PrincipalCache(max_entries=2)
+        cache.put("a", {"user_id": "a"})
+        cache.put("b", {"user_id": "b"})
+        cache.get("a")
+        cache.put("c", {"user_id": "c"})
+        assert cache.get("b") is None
+        assert cache.get("a") and cache.get("c")
+
+    def test_invalidate_user_drops_all_their_tokens(self):
+        cache = PrincipalCache()
+        cache.put("a1", {"user_id": "a"})
+        cache.put("a2", {"user_id": "a"})
+        cache.put("b1", {"user_id": "b"})
+        cache.invalidate_user("a")
+        assert cache.get("a1") is None and cache.get("a2") is None
+        assert cache.get("b1") is not None
+
+
+class TestPrincipalLoading:
+    """One query resolves the caller and their accounts for a wallet route"""
+
+    @pytest.fixture
+    def app(self, tmp_path):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'auth.db'}"
+        db.init_app(app)
+        app.register_blueprint(wallet_bp)
+        with app.app_context():
+            Base.metadata.create_all(
+                db.engine,
+                tables=[User.__table__, Account.__table__, Transaction.__table__],
+            )
+            for user_id in ("u1", "u2"):
+                add_user(user_id)
+            app.accounts = [add_account("u1") for _ in range(3)]
+            app.other_account = add_account("u2")
+            db.session.commit()
+            db.session.remove()
+            yield app
+            db.session.remove()
+
+    def count_queries(self, app, path, user_id="u1"):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                response = app.test_client().get(
+                    path, headers={"Authorization": f"Bearer {make_token(user_id)}"}
+                )
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+        return response, statements
+
+    def test_account_route_reads_user_and_accounts_once(self, app):
+        response, statements = self.count_queries(
+            app, f"/api/v1/accounts/{app.accounts[1]}"
+        )
+        assert response.status_code == 200
+        assert response.get_json()["account"]["id"] == app.accounts[1]
+        # the principal with its accounts, then the recent transactions
+        assert len(statements) == 2
+        assert "accounts" in statements[0] and "users" in statements[0]
+        assert "transactions" in statements[1]
+
+    def test_other_users_account_is_loaded_for_the_access_check(self, app):
+        response, statements = self.count_queries(
+            app, f"/api/v1/accounts/{app.other_account}"
+        )
+        assert response.status_code == 403
+        assert len(statements) == 2
+
+    def test_disabled_user_is_rejected(self, app):
+        with app.app_context():
+            db.session.execute(
+                User.__table__.update()
+                .where(User.__table__.c.id == "u1")
+                .values(is_active=False)
+            )
+            db.session.commit()
+        response, statements = self.count_queries(
+            app, f"/api/v1/accounts/{app.accounts[0]}"
+        )
+        assert response.status_code == 401
+        assert len(statements) == 1
+
+
+def add_user(user_id):
+    db.session.execute(
+        insert(User.__table__).values(
+            id=user_id,
+            email=f"{user_id}@example.com",
+            password_hash="x",
+            first_name="Test",
+            last_name=user_id,
+        )
+    )
+
+
+def add_account(user_id):
+    account_id = str(uuid.uuid4())
+    db.session.execute(
+        insert(Account.__table__).values(
+            id=account_id,
+            user_id=user_id,
+            account_name=f"Account {account_id[:8]}",
+            account_number=account_id[:20],
+            account_type=AccountType.CHECKING,
+            status=AccountStatus.ACTIVE,
+            currency="USD",
+            balance=Decimal("10"),
+            available_balance=Decimal("10"),
+        )
+    )
+    return account_id
+
+
+class TestPrincipalCacheBenchmark:
+    """Cached resolution vs. verifying the signature on every request"""
+
+    def test_cached_decode_is_faster(self):
+        token = make_token(exp=time.time() + 3600)
+        iterations = 5000
+        start = time.perf_counter()
+        for _ in range(iterations):
+            jwt.decode(token, "secret" * 6, algorithms=["HS256"])
+        uncached = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(iterations):
+            decode_token(token)
+        cached = time.perf_counter() - start
+        assert (
+            cached < uncached
+        ), f"Cached {cached * 1e3:.0f}ms vs. jwt.decode {uncached * 1e3:.0f}ms"
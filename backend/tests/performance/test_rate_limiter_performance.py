@@ -0,0 +1,121 @@
+import random
+import time
+from typing import Any
+import pytest
+from src.security.rate_limiter import (
+    LeasedRateLimitBackend,
+    MemoryRateLimitBackend,
+    RateLimiter,
+    RateLimiterRegistry,
+)
+
+CLIENT_COUNT = 100_000
+
+
+class TestMemoryRateLimitBackend:
+    """Test the in-process token bucket limiter"""
+
+    def test_all_windows_checked_together(self) -> Any:
+        backend = MemoryRateLimitBackend()
+        limits = {"minute": 3, "hour": 4}
+        results = [backend.check("client", limits) for _ in range(4)]
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert results[2].remaining == {"minute": 0, "hour": 1}
+        assert results[3].retry_after > 0
+        assert results[3].current_counts == {"minute": 3, "hour": 3}
+
+    def test_denied_check_consumes_no_budget(self) -> Any:
+        backend = MemoryRateLimitBackend()
+        backend.check("client", {"minute": 1, "hour": 10})
+        backend.check("client", {"minute": 1, "hour": 10})
+        assert backend.check("other", {"minute": 1}).allowed
+        assert backend._buckets["client"][2]["hour"] == pytest.approx(9, abs=0.01)
+
+    def test_table_is_bounded(self) -> Any:
+        backend = MemoryRateLimitBackend(max_entries=100)
+        for i in range(1_000):
+            backend.check(f"client-{i}", {"second": 5})
+        assert len(backend) <= 101
+
+    def test_is_allowed_single_limit(self) -> Any:
+        rate_limiter = RateLimiter()
+        allowed, info = rate_limiter.is_allowed("2 per minute", "client", "login")
+        assert allowed and info["remaining"] == 1
+        rate_limiter.is_allowed("2 per minute", "client", "login")
+        allowed, info = rate_limiter.is_allowed("2 per minute", "client", "login")
+        assert not allowed
+        assert info["retry_after"] > 0
+        assert rate_limiter.is_allowed("2 per minute", "client", "register")[0]
+
+
+class TestRateLimiterBenchmark:
+    """Per-check overhead must stay sub-millisecond with many distinct clients"""
+
+    def test_check_overhead_at_100k_clients(self) -> Any:
+        backend = MemoryRateLimitBackend()
+        limits = {"minute": 60, "hour": 1000, "day": 5000}
+        clients = [f"client-{i}" for i in range(CLIENT_COUNT)]
+        for client in clients:
+            backend.check(client, limits)
+        random.seed(42)
+        sample = random.choices(clients, k=CLIENT_COUNT)
+        start_time = time.perf_counter()
+        for client in sample:
+            backend.check(client, limits)
+        per_check = (time.perf_counter() - start_time) / CLIENT_COUNT
+        assert len(backend) == CLIENT_COUNT
+        assert per_check < 0.001, f"Rate limit check too slow: {per_check * 1e6:.1f}us"
+
+
+class CountingBackend(MemoryRateLimitBackend):
+    """Memory backend that counts round trips to the shared store"""
+
+    def __init__(self) -> Any:
+        super().__init__()
+        self.calls = 0
+
+    def check(self, identifier: Any, limits: Any, cost: int = 1) -> Any:
+        self.calls += 1
+        return super().check(identifier, limits, cost)
+
+
+class TestLeasedRateLimitBackend:
+    """Test leased local quotas on top of a shared budget"""
+
+    def test_leases_cut_shared_store_round_trips(self) -> Any:
+        shared = CountingBackend()
+        backend = LeasedRateLimitBackend(shared, lease_size=10, lease_ttl=60)
+        results = [backend.check("client", {"minute": 1000}) for _ in range(100)]
+        assert all(r.allowed for r in results)
+        assert shared.calls == 10
+
+    def test_global_budget_is_never_exceeded(self) -> Any:
+        shared = CountingBackend()
+        workers = [
+            LeasedRateLimitBackend(shared, lease_size=10, lease_ttl=60)
+            for _ in range(3)
+        ]
+        allowed = sum(
+            worker.check("client", {"minute": 100}).allowed
+            for _ in range(100)
+            for worker in workers
+        )
+        assert allowed == 100
+
+
+class TestRateLimiterRegistry:
+    """Test named policies sharing one limiter"""
+
+    def test_policies_share_one_limiter(self) -> Any:
+        registry = RateLimiterRegistry({"auth": {"limits": {"minute": 5}}})
+        assert registry.get("auth") is registry.get("auth")
+        assert registry.policy("auth") == {"minute": 5}
+        with pytest.raises(KeyError):
+            registry.limit("unknown")
+
+    def test_configure_overrides_policy(self) -> Any:
+        registry = RateLimiterRegistry({"auth": {"limits": {"minute": 5}}})
+        limiter = registry.get("auth")
+        registry.configure(policies={"auth": {"limits": {"minute": 1}}})
+        assert registry.get("auth") is not limiter
+        assert registry.policy("auth") == {"minute": 1}
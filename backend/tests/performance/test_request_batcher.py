@@ -0,0 +1,243 @@
+"""
+Tests for the micro-batching RequestBatcher
+"""
+
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from src.gateway.optimized_gateway import RequestBatcher, apply_batched_requests
+from src.models.account import Account, AccountStatus, AccountType
+from src.models.database import Base
+from src.models.transaction import Transaction
+from src.models.user import User
+
+ENDPOINT = "/api/v1/transactions/batch"
+
+
+def make_batcher(batch_size=5, batch_timeout=50):
+    return RequestBatcher(
+        {
+            "batch_size": batch_size,
+            "batch_timeout": batch_timeout,
+            "batch_endpoints": [ENDPOINT],
+        }
+    )
+
+
+class TestRequestBatcher:
+    """Flush triggers and result delivery"""
+
+    def test_full_batch_executes_in_one_handler_call(self):
+        batcher = make_batcher(batch_size=5, batch_timeout=10_000)
+        calls = []
+
+        def handler(batch_data):
+            calls.append(len(batch_data))
+            return [{"status": "success", "value": d["n"] * 2} for d in batch_data]
+
+        batcher.register_handler(ENDPOINT, handler)
+        futures = [
+            batcher.submit(ENDPOINT, {"user_id": "u1", "n": n}) for n in range(5)
+        ]
+        results = [f.result(timeout=2) for f in futures]
+        assert calls == [5]
+        assert [r["value"] for r in results] == [0, 2, 4, 6, 8]
+
+    def test_partial_batch_flushes_on_deadline(self):
+        batcher = make_batcher(batch_size=50, batch_timeout=20)
+        batcher.register_handler(ENDPOINT, lambda data: [{"status": "ok"}] * len(data))
+        batcher.start()
+        try:
+            start = time.monotonic()
+            futures = [batcher.submit(ENDPOINT, {"user_id": "u1"}) for _ in range(3)]
+            assert all(f.result(timeout=2)["status"] == "ok" for f in futures)
+            assert time.monotonic() - start < 1
+        finally:
+            batcher.stop()
+
+    def test_batches_are_grouped_per_user(self):
+        batcher = make_batcher(batch_size=2, batch_timeout=10_000)
+        seen = []
+        lock = threading.Lock()
+
+        def handler(batch_data):
+            with lock:
+                seen.append({d["user_id"] for d in batch_data})
+            return [{"status": "success"}] * len(batch_data)
+
+        batcher.register_handler(ENDPOINT, handler)
+        futures = [
+            batcher.submit(ENDPOINT, {"user_id": user}) for user in ("a", "b", "a", "b")
+        ]
+        for f in futures:
+            f.result(timeout=2)
+        assert sorted(map(sorted, seen)) == [["a"], ["b"]]
+
+    def test_handler_failure_reaches_every_caller(self):
+        batcher = make_batcher(batch_size=2, batch_timeout=10_000)
+
+        def handler(batch_data):
+            raise RuntimeError("database unavailable")
+
+        batcher.register_handler(ENDPOINT, handler)
+        futures = [batcher.submit(ENDPOINT, {"user_id": "u1"}) for _ in range(2)]
+        for f in futures:
+            result = f.result(timeout=2)
+            assert result["status"] == "error"
+            assert "database unavailable" in result["error"]
+
+    def test_stop_flushes_pending_requests(self):
+        batcher = make_batcher(batch_size=50, batch_timeout=10_000)
+        batcher.start()
+        future = batcher.submit(ENDPOINT, {"user_id": "u1"})
+        batcher.stop()
+        assert future.result(timeout=1)["status"] == "success"
+
+    def test_concurrent_submitters_all_get_results(self):
+        batcher = make_batcher(batch_size=10, batch_timeout=5)
+        batcher.register_handler(
+            ENDPOINT, lambda data: [{"status": "success", "n": d["n"]} for d in data]
+        )
+        batcher.start()
+        results = {}
+
+        def worker(offset):
+            futures = [
+                (n, batcher.submit(ENDPOINT, {"user_id": "u1", "n": n}))
+                for n in range(offset, offset + 25)
+            ]
+            for n, f in futures:
+                results[n] = f.result(timeout=5)["n"]
+
+        try:
+            threads = [
+                threading.Thread(target=worker, args=(i * 25,)) for i in range(8)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            batcher.stop()
+        assert results == {n: n for n in range(200)}
+
+
+TABLES = [User.__table__, Account.__table__, Transaction.__table__]
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'batch.db'}")
+    Base.metadata.create_all(engine, tables=TABLES)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def add_account(session, user_id, balance):
+    account_id = str(uuid.uuid4())
+    session.execute(
+        insert(Account.__table__),
+        [
+            {
+                "id": account_id,
+                "user_id": user_id,
+                "account_name": f"Account {account_id[:8]}",
+                "account_number": account_id[:20],
+                "account_type": AccountType.CHECKING,
+                "status": AccountStatus.ACTIVE,
+                "currency": "USD",
+                "balance": Decimal(balance),
+                "available_balance": Decimal(balance),
+            }
+        ],
+    )
+    session.commit()
+    return account_id
+
+
+def balance_of(session, account_id):
+    accounts = Account.__table__
+    return session.execute(
+        select(accounts.c.balance).where(accounts.c.id == account_id)
+    ).scalar_one()
+
+
+class TestBatchedWalletOperations:
+    """Batch endpoint requests applied through wallet_service.process_batch"""
+
+    def test_request_operations_apply_in_order(self, session):
+        account = add_account(session, "u1", "0")
+        other = add_account(session, "u2", "10")
+        # More operations than a batcher batch holds; each withdrawal relies
+        # on the deposit just before it
+        operations = [
+            {"type": kind, "account_id": account, "amount": "5"}
+            for _ in range(40)
+            for kind in ("deposit", "withdrawal")
+        ]
+        batch = [
+            {"user_id": "u1", "operations": operations},
+            {
+                "user_id": "u2",
+                "operations": [
+                    {"type": "withdrawal", "account_id": other, "amount": "25"}
+                ],
+            },
+            {
+                "user_id": "u1",
+                "operations": [
+                    {"type": "deposit", "account_id": account, "amount": "7"}
+                ],
+            },
+        ]
+        results = apply_batched_requests(session, batch)
+        assert [len(r) for r in results] == [80, 1, 1]
+        assert all(r["status"] == "success" for r in results[0])
+        assert results[1][0]["code"] == "INSUFFICIENT_FUNDS"
+        assert Decimal(results[2][0]["balances"][account]) == Decimal("7")
+        assert balance_of(session, account) == Decimal("7.00")
+        assert balance_of(session, other) == Decimal("10.00")
+        rows = session.execute(
+            select(func.count()).select_from(Transaction.__table__)
+        ).scalar_one()
+        assert rows == 81
+
+    def test_debits_limited_to_own_accounts(self, session):
+        account = add_account(session, "u1", "50")
+        (result,) = apply_batched_requests(
+            session,
+            [
+                {
+                    "user_id": "intruder",
+                    "operations": [
+                        {"type": "withdrawal", "account_id": account, "amount": "1"}
+                    ],
+                }
+            ],
+        )
+        assert result[0]["status"] == "error"
+        assert balance_of(session, account) == Decimal("50.00")
+
+    def test_one_request_is_never_split_across_batches(self, session):
+        account = add_account(session, "u1", "0")
+        batcher = make_batcher(batch_size=2, batch_timeout=10_000)
+        batcher.register_handler(
+            ENDPOINT, lambda data: apply_batched_requests(session, data)
+        )
+        operations = [
+            {"type": kind, "account_id": account, "amount": "1"}
+            for _ in range(30)
+            for kind in ("deposit", "withdrawal")
+        ]
+        first = batcher.submit(ENDPOINT, {"user_id": "u1", "operations": operations})
+        second = batcher.submit(ENDPOINT, {"user_id": "u1", "operations": []})
+        results = first.result(timeout=5)
+        assert second.result(timeout=5) == []
+        assert [r["status"] for r in results] == ["success"] * 60
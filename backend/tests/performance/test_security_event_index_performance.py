@@ -0,0 +1,81 @@
+"""
+Security monitoring threshold checks: event index vs. flat-list scan
+"""
+
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from src.security.event_index import SecurityEventIndex
+from src.security.security_monitoring import EventCategory, EventSeverity, SecurityEvent
+
+EVENT_TYPES = ["login_failed", "login_success", "file_download", "data_export"]
+
+
+def make_event(timestamp, event_type="login_failed", user_id=None, ip_address=None):
+    return SecurityEvent(
+        event_id=str(uuid.uuid4()),
+        event_type=event_type,
+        category=EventCategory.AUTHENTICATION,
+        severity=EventSeverity.MEDIUM,
+        source="test",
+        target="api",
+        description="",
+        details={},
+        timestamp=timestamp,
+        user_id=user_id,
+        ip_address=ip_address,
+    )
+
+
+def random_events(count, seed=4, span=timedelta(hours=2)):
+    rng = random.Random(seed)
+    start = datetime.utcnow() - span
+    step = span / count
+    return [
+        make_event(
+            start + step * i,
+            rng.choice(EVENT_TYPES),
+            rng.choice([None, "u1", "u2", "u3"]),
+            rng.choice([None, "10.0.0.1", "10.0.0.2"]),
+        )
+        for i in range(count)
+    ]
+
+
+class TestEventIndexBenchmark:
+    """Threshold checks over 10k retained events: index vs. flat-list scan"""
+
+    def test_rule_checks_are_faster(self):
+        events = random_events(10000, span=timedelta(minutes=30))
+        index = SecurityEventIndex()
+        for event in events:
+            index.add(event)
+        since = datetime.utcnow() - timedelta(minutes=15)
+        probes = random_events(300, seed=8, span=timedelta(minutes=1))
+
+        def naive(probe):
+            return sum(
+                1
+                for e in reversed(events)
+                if e.timestamp >= since
+                and e.event_type == "login_failed"
+                and e.ip_address == probe.ip_address
+            )
+
+        def indexed(probe):
+            return index.count(
+                since, event_types=["login_failed"], ip_address=probe.ip_address
+            )
+
+        start = time.perf_counter()
+        naive_counts = [naive(probe) for probe in probes if probe.ip_address]
+        naive_time = time.perf_counter() - start
+        start = time.perf_counter()
+        indexed_counts = [indexed(probe) for probe in probes if probe.ip_address]
+        indexed_time = time.perf_counter() - start
+        assert indexed_counts == naive_counts
+        assert (
+            indexed_time < naive_time
+        ), f"Index {indexed_time * 1e3:.0f}ms vs. list scan {naive_time * 1e3:.0f}ms"
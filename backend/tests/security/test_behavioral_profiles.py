@@ -0,0 +1,142 @@
+"""
+Behavioral profiles: bounded per-user state and an LRU-bounded profile table
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.security.fraud_detection import (
+    BehavioralProfile,
+    BehavioralProfileStore,
+    FraudDetectionEngine,
+)
+
+BASE_TIME = datetime(2026, 3, 2, 12)
+
+
+class DictRedis:
+    """In-process stand-in for the two Redis commands the store uses"""
+
+    def __init__(self):
+        self.data = {}
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def get(self, key):
+        return self.data.get(key)
+
+
+def profile_size(profile):
+    return len(str(profile.to_dict()))
+
+
+class TestBehavioralProfile:
+    """Running statistics and decaying frequencies"""
+
+    def test_amount_zscore_matches_full_history(self):
+        rng = random.Random(1)
+        profile = BehavioralProfile("u1")
+        amounts = [rng.uniform(10, 200) for _ in range(500)]
+        for amount in amounts:
+            profile.update_transaction_pattern(amount, "shop", "retail", BASE_TIME)
+        assert profile.amount_stats.mean == pytest.approx(np.mean(amounts))
+        assert profile.amount_stats.std == pytest.approx(np.std(amounts))
+        assert profile.get_transaction_anomaly_score(
+            np.mean(amounts) + 3.5 * np.std(amounts), "shop", "retail", BASE_TIME
+        ) == pytest.approx(0.4)
+
+    def test_unseen_values_raise_the_score(self):
+        profile = BehavioralProfile("u1")
+        profile.update_transaction_pattern(50, "shop", "retail", BASE_TIME)
+        assert profile.get_transaction_anomaly_score(
+            50, "shop", "retail", BASE_TIME
+        ) == pytest.approx(0.0)
+        other_day = BASE_TIME + timedelta(days=1, hours=3)
+        assert profile.get_transaction_anomaly_score(
+            50, "casino", "gambling", other_day
+        ) == pytest.approx(0.6)
+
+    def test_values_expire_after_retention(self):
+        profile = BehavioralProfile("u1")
+        profile.update_transaction_pattern(50, "old-shop", "retail", BASE_TIME)
+        later = BASE_TIME + timedelta(days=BehavioralProfile.PATTERN_RETENTION_DAYS + 1)
+        profile.update_transaction_pattern(50, "new-shop", "retail", later)
+        assert "old-shop" not in profile.transaction_patterns["merchants"]
+        assert "new-shop" in profile.transaction_patterns["merchants"]
+
+    def test_frequent_values_survive_the_cap(self):
+        profile = BehavioralProfile("u1")
+        for _ in range(20):
+            profile.update_transaction_pattern(50, "regular", "retail", BASE_TIME)
+        for i in range(500):
+            profile.update_transaction_pattern(50, f"m{i}", "retail", BASE_TIME)
+        merchants = profile.transaction_patterns["merchants"]
+        assert len(merchants) == BehavioralProfile.MAX_VALUES_PER_FIELD
+        assert "regular" in merchants
+
+    def test_profile_size_is_flat_in_history_length(self):
+        rng = random.Random(2)
+        sizes = []
+        for count in (1000, 10000):
+            profile = BehavioralProfile("u1")
+            for i in range(count):
+                profile.update_transaction_pattern(
+                    rng.uniform(1, 100),
+                    f"m{rng.randint(0, 200)}",
+                    "retail",
+                    BASE_TIME + timedelta(minutes=i),
+                )
+            sizes.append(profile_size(profile))
+        assert sizes[1] < sizes[0] * 1.2
+
+    def test_round_trips_through_dict(self):
+        profile = BehavioralProfile("u1")
+        profile.update_transaction_pattern(50, "shop", "retail", BASE_TIME)
+        profile.update_login_pattern("1.2.3.4", "ua", "Paris, FR", BASE_TIME)
+        restored = BehavioralProfile.from_dict(profile.to_dict())
+        assert restored.to_dict() == profile.to_dict()
+        assert 12 in restored.transaction_patterns["hours"]
+
+
+class TestBehavioralProfileStore:
+    """LRU bound with spill to Redis or disk"""
+
+    def fill(self, store, users):
+        for i in range(users):
+            store.get(f"u{i}").update_transaction_pattern(
+                i, "shop", "retail", BASE_TIME
+            )
+
+    def test_memory_is_bounded_and_cold_profiles_come_back(self, tmp_path):
+        store = BehavioralProfileStore(max_profiles=10, spill_dir=str(tmp_path))
+        self.fill(store, 50)
+        assert len(store) == 10
+        assert "u0" not in store
+        assert store.get("u0").amount_stats.count == 1
+
+    def test_spills_to_redis(self):
+        redis_client = DictRedis()
+        store = BehavioralProfileStore(max_profiles=5, redis_client=redis_client)
+        self.fill(store, 20)
+        assert len(redis_client.data) == 15
+        assert store.get("u3").amount_stats.mean == 3
+
+    def test_without_spill_backend_cold_profiles_are_dropped(self):
+        store = BehavioralProfileStore(max_profiles=5)
+        self.fill(store, 20)
+        assert store.get("u0").amount_stats.count == 0
+
+    def test_engine_uses_bounded_store(self):
+        engine = FraudDetectionEngine(None, {"max_behavioral_profiles": 3})
+        for i in range(10):
+            asyncio.run(
+                engine._update_behavioral_profile(
+                    f"u{i}", {"amount": 10, "merchant": "m", "category": "c"}
+                )
+            )
+        assert engine.get_fraud_statistics()["behavioral_profiles"] == 3
@@ -0,0 +1,189 @@
+"""
+Input sanitization: compiled union regex vs. per-pattern scans
+"""
+
+import html
+import random
+
+import pytest
+
+from src.security.input_validator import (
+    CompiledSanitizer,
+    InputValidator,
+    ValidationError,
+)
+
+ATTACKS = [
+    "<script>alert(1)</script>",
+    "<SCRIPT src=x>\n</script>",
+    "javascript:alert(document.cookie)",
+    "JaVaScRiPt:void(0)",
+    "<img src=x onerror=alert(1)>",
+    "onload = go()",
+    "<iframe src=evil></iframe>",
+    "<object data=x></object>",
+    "<embed src=x>",
+    "<link rel=stylesheet href=x>",
+    "<meta http-equiv=refresh>",
+    "<style>body{}</style>",
+    "width: expression(alert(1))",
+    "background: url (x.png)",
+    "@import 'evil.css'",
+    "vbscript:msgbox",
+    "data:text/html;base64,xx",
+    "SELECT * FROM users",
+    "1 OR 1=1",
+    "x' or 'a'='a",
+    "admin'--",
+    "/* comment */",
+    "UNION ALL SELECT password",
+    "exec xp_cmdshell",
+    "EXECUTE sp_who",
+    "DROP TABLE accounts",
+    "name # tag",
+    "select then onclick=x",
+    "a -- b javascript:x",
+    "\x00<script>x</script>\x00",
+    "   padded union   ",
+    "ſelect 1",
+    "İNSERT row",
+    "1 \u0131r 2=2",
+    "\u212aill; exec it",
+]
+BENIGN = [
+    "John Smith",
+    "Acme Holdings Ltd",
+    "Invoice 2024-001 for consulting",
+    "selection of items",
+    "Anderson & Sons",
+    "order for android",
+    "description: monthly fee",
+    "O'Brien",
+    "café payment",
+    "",
+]
+
+
+def naive_sanitize(validator, value, max_length=None, allow_html=False):
+    """sanitize_string as it was: one re.search per pattern"""
+    if not isinstance(value, str):
+        raise ValidationError("Value must be a string", code="INVALID_TYPE")
+    value = value.replace("\x00", "").strip()
+    if max_length and len(value) > max_length:
+        raise ValidationError("String too long", code="STRING_TOO_LONG")
+    if not allow_html:
+        value = html.escape(value)
+        for pattern in validator.dangerous_patterns:
+            if pattern.search(value):
+                raise ValidationError("dangerous", code="DANGEROUS_CONTENT")
+    for pattern in validator.sql_patterns:
+        if pattern.search(value):
+            raise ValidationError("sql", code="SQL_INJECTION")
+    return value
+
+
+def outcome(sanitize, value, **kwargs):
+    try:
+        return ("ok", sanitize(value, **kwargs))
+    except ValidationError as e:
+        return ("error", e.code)
+
+
+def make_corpus(count, seed=11):
+    rng = random.Random(seed)
+    pieces = ATTACKS + BENIGN
+    return [" ".join(rng.choices(pieces, k=rng.randint(1, 6))) for _ in range(count)]
+
+
+@pytest.fixture(scope="module")
+def validator():
+    return InputValidator()
+
+
+class TestCompiledSanitizer:
+    """Same outcome as scanning each pattern list in turn"""
+
+    @pytest.mark.parametrize("allow_html", [False, True])
+    def test_matches_naive_on_attack_corpus(self, validator, allow_html):
+        for value in ATTACKS + BENIGN + make_corpus(2000):
+            assert outcome(
+                validator.sanitize_string, value, allow_html=allow_html
+            ) == outcome(
+                lambda v, **kw: naive_sanitize(validator, v, **kw),
+                value,
+                allow_html=allow_html,
+            ), value
+
+    def test_dangerous_wins_over_earlier_sql_match(self, validator):
+        with pytest.raises(ValidationError) as exc:
+            validator.sanitize_string("DROP it then javascript:x")
+        assert exc.value.code == "DANGEROUS_CONTENT"
+
+    def test_scoped_flags_keep_per_pattern_dotall(self):
+        sanitizer = CompiledSanitizer(InputValidator.DANGEROUS_PATTERNS, [])
+        assert sanitizer.scan("<style>\n</style>") == "dangerous_8"
+        assert sanitizer.scan("<embed\n") is None
+
+    def test_prefilter_skips_patterns_missing_literals(self):
+        sanitizer = CompiledSanitizer(InputValidator.DANGEROUS_PATTERNS, [])
+        assert sanitizer._candidates("monthly fee", sanitizer.all_indexes) == ()
+        assert sanitizer._candidates("onclick=", sanitizer.all_indexes) == (2,)
+
+    def test_union_is_cached_per_pattern_set(self, validator):
+        assert validator._sanitizer() is InputValidator()._sanitizer()
+
+    def test_max_length_and_type_errors_unchanged(self, validator):
+        with pytest.raises(ValidationError) as exc:
+            validator.sanitize_string("abcdef", max_length=3)
+        assert exc.value.code == "STRING_TOO_LONG"
+        with pytest.raises(ValidationError) as exc:
+            validator.sanitize_string(42)
+        assert exc.value.code == "INVALID_TYPE"
+
+
+class TestSanitizePayload:
+    def test_walks_nested_dicts_and_lists(self, validator):
+        payload = {
+            "amount": 12.5,
+            "memo": "  rent <june> ",
+            "beneficiary": {"name": "Jane", "tags": ["a", "b & c"], "active": True},
+            "items": [{"label": "x"}, {"label": "y", "qty": 2}],
+        }
+        assert validator.sanitize_payload(payload) == {
+            "amount": 12.5,
+            "memo": "rent &lt;june&gt;",
+            "beneficiary": {"name": "Jane", "tags": ["a", "b &amp; c"], "active": True},
+            "items": [{"label": "x"}, {"label": "y", "qty": 2}],
+        }
+        assert payload["memo"] == "  rent <june> "
+
+    def test_schema_options_and_skips(self, validator):
+        payload = {"bio": "<b>hi</b>", "password": "p'--", "items": [{"label": "abc"}]}
+        schema = {
+            "bio": {"allow_html": True},
+            "password": False,
+            "items": {"label": {"max_length": 5}},
+        }
+        assert validator.sanitize_payload(payload, schema) == {
+            "bio": "<b>hi</b>",
+            "password": "p'--",
+            "items": [{"label": "abc"}],
+        }
+
+    def test_errors_carry_field_path(self, validator):
+        payload = {"items": [{"label": "ok"}, {"label": "1 OR 1=1"}]}
+        with pytest.raises(ValidationError) as exc:
+            validator.sanitize_payload(payload)
+        assert exc.value.code == "SQL_INJECTION"
+        assert exc.value.field == "items[1].label"
+
+    def test_deep_nesting_does_not_recurse(self, validator):
+        payload = node = {}
+        for _ in range(5000):
+            node["child"] = {}
+            node = node["child"]
+        node["leaf"] = "value"
+        result = validator.sanitize_payload(payload)
+        for _ in range(5000):
+            result = result["child"]
+        assert result == {"leaf": "value"}
@@ -0,0 +1,210 @@
+"""
+IP reputation: longest-prefix match over IPv4/IPv6 CIDR blocks
+"""
+
+import asyncio
+import ipaddress
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.security.ip_reputation import (
+    IPReputationIndex,
+    ReputationEntry,
+    ReputationSnapshot,
+    parse_network,
+)
+from src.security.threat_prevention import ThreatPreventionService
+
+
+def entry(network, category="c", score=0.9, **kwargs):
+    return ReputationEntry(network, score, category, "test", **kwargs)
+
+
+def random_v4(rng):
+    if rng.random() < 0.5:
+        return rng.getrandbits(32)
+    return (10 << 24) | rng.getrandbits(24)
+
+
+def naive_lookup(entries, ip):
+    address = ipaddress.ip_address(ip)
+    best = None
+    for item in entries:
+        network = ipaddress.ip_network(item.network, strict=False)
+        if address.version == network.version and address in network:
+            if best is None or network.prefixlen >= best[0]:
+                best = (network.prefixlen, item)
+    return best[1] if best else None
+
+
+class TestParseNetwork:
+    def test_clears_host_bits(self):
+        assert parse_network("10.1.2.3/8") == (4, 10 << 24, 8)
+        assert parse_network("2001:db8::1/32") == (
+            6,
+            int(ipaddress.ip_address("2001:db8::")),
+            32,
+        )
+        assert parse_network("1.2.3.4") == (4, 0x01020304, 32)
+
+    @pytest.mark.parametrize("network", ["10.0.0.0/33", "not-an-ip", "1.2.3/8"])
+    def test_rejects_invalid(self, network):
+        with pytest.raises(ValueError):
+            parse_network(network)
+
+
+class TestPrefixTrie:
+    """Same answer as testing every network in turn"""
+
+    def test_matches_naive_ipv4(self):
+        rng = random.Random(5)
+        lengths = [0, 8, 12, 16, 20, 24, 24, 28, 32, 32]
+        entries = [
+            entry(f"{ipaddress.ip_address(random_v4(rng))}/{rng.choice(lengths)}", i)
+            for i in range(1500)
+        ]
+        snapshot = ReputationSnapshot(entries)
+        for _ in range(1500):
+            ip = str(ipaddress.ip_address(random_v4(rng)))
+            assert snapshot.lookup(ip) is naive_lookup(entries, ip), ip
+
+    def test_matches_naive_ipv6(self):
+        rng = random.Random(6)
+        base = int(ipaddress.ip_address("2001:db8::"))
+        entries = [
+            entry(
+                f"{ipaddress.ip_address(base | rng.getrandbits(96))}/"
+                f"{rng.choice([32, 48, 56, 64, 128])}",
+                i,
+            )
+            for i in range(500)
+        ]
+        snapshot = ReputationSnapshot(entries)
+        for _ in range(500):
+            ip = str(ipaddress.ip_address(base | rng.getrandbits(96)))
+            assert snapshot.lookup(ip) is naive_lookup(entries, ip), ip
+
+    def test_longest_prefix_wins(self):
+        snapshot = ReputationSnapshot(
+            [
+                entry("0.0.0.0/0", "any"),
+                entry("10.0.0.0/8", "ten"),
+                entry("10.1.0.0/16", "ten-one"),
+            ]
+        )
+        assert snapshot.lookup("10.1.2.3").category == "ten-one"
+        assert snapshot.lookup("10.2.0.1").category == "ten"
+        assert snapshot.lookup("8.8.8.8").category == "any"
+
+    def test_ipv4_mapped_ipv6_uses_ipv4_prefixes(self):
+        snapshot = ReputationSnapshot([entry("192.0.2.0/24")])
+        assert snapshot.lookup("::ffff:192.0.2.7") is not None
+        assert snapshot.lookup("2001:db8::1") is None
+
+    def test_expired_prefix_falls_back_to_covering_one(self):
+        past = datetime.utcnow() - timedelta(minutes=1)
+        snapshot = ReputationSnapshot(
+            [
+                entry("10.0.0.0/8", "wide"),
+                entry("10.1.0.0/16", "narrow", expires_at=past),
+            ]
+        )
+        assert snapshot.lookup("10.1.0.1").category == "wide"
+
+    def test_aware_and_naive_expiry_agree(self):
+        expires_at = datetime(2030, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+        snapshot = ReputationSnapshot(
+            [
+                entry("10.0.0.0/8", "aware", expires_at=expires_at),
+                entry("192.0.2.0/24", "naive", expires_at=datetime(2030, 1, 1, 10)),
+            ]
+        )
+        deadline = expires_at.timestamp()
+        for ip in ("10.0.0.1", "192.0.2.1"):
+            assert snapshot.lookup(ip, now=deadline - 1) is not None
+            assert snapshot.lookup(ip, now=deadline) is None
+
+    def test_duplicates_keep_last(self):
+        snapshot = ReputationSnapshot(
+            [entry("10.0.0.0/8", "old"), entry("10.0.0.0/8", "new")]
+        )
+        assert snapshot.lookup("10.0.0.1").category == "new"
+
+    @pytest.mark.parametrize("ip", ["", "tor-exit", "300.1.1.1", "fe80::1%eth0"])
+    def test_invalid_addresses_do_not_match(self, ip):
+        assert ReputationSnapshot([entry("0.0.0.0/0")]).lookup(ip) is None
+
+
+class TestIPReputationIndex:
+    def test_load_files(self, tmp_path):
+        blocklist = tmp_path / "drop.txt"
+        blocklist.write_text(
+            "# Spamhaus DROP style\n"
+            "198.51.100.0/24 ; SBL1\n"
+            "203.0.113.0/24,0.5,scanner\n"
+            "2001:db8::/32,,,2999-01-01T00:00:00\n"
+            "garbage line\n"
+        )
+        index = IPReputationIndex()
+        index.load_files([str(blocklist)], [entry("192.0.2.1", "intel")])
+        assert len(index) == 4
+        assert index.lookup("198.51.100.9").category == "blocklist"
+        assert index.lookup("203.0.113.9").score == 0.5
+        assert index.lookup("2001:db8:1::1").source == "drop.txt"
+        assert index.lookup("192.0.2.1").category == "intel"
+
+    def test_offset_expiry_in_blocklist(self, tmp_path):
+        blocklist = tmp_path / "spam.txt"
+        blocklist.write_text("10.0.0.0/8,0.9,spam,2030-01-01T00:00:00+00:00\n")
+        index = IPReputationIndex()
+        index.load_files([str(blocklist)])
+        assert len(index) == 1
+        assert index.lookup("10.2.3.4").category == "spam"
+        assert index.lookup("10.2.3.4").expires_at.tzinfo is not None
+
+    def test_lookups_see_old_or_new_snapshot_during_rebuild(self):
+        index = IPReputationIndex()
+        index.rebuild([entry("10.0.0.0/8", "old")])
+        seen = set()
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                seen.add(index.lookup("10.0.0.1").category)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for i in range(20):
+            index.rebuild(
+                [entry("10.0.0.0/8", "new")]
+                + [entry(f"11.0.{i}.{j}") for j in range(200)]
+            )
+        stop.set()
+        thread.join()
+        assert seen <= {"old", "new"}
+        assert index.lookup("10.0.0.1").category == "new"
+
+
+class TestThreatPreventionIPReputation:
+    def test_ranges_and_blocklists_raise_indicators(self, tmp_path):
+        blocklist = tmp_path / "asn.txt"
+        blocklist.write_text("2001:db8:bad::/48,0.7,bulletproof_hosting\n")
+        service = ThreatPreventionService(
+            None, {"ip_blocklist_files": [str(blocklist)]}
+        )
+
+        def indicators(ip):
+            return asyncio.run(service._check_ip_reputation({"client_ip": ip}))
+
+        exact = indicators("192.168.1.100")
+        assert exact[0].evidence["threat_type"] == "botnet"
+        assert exact[0].confidence == 0.9
+        ranged = indicators("192.168.100.42")
+        assert ranged[0].evidence["network"] == "192.168.100.0/24"
+        ipv6 = indicators("2001:db8:bad::1")
+        assert ipv6[0].evidence["threat_type"] == "bulletproof_hosting"
+        assert indicators("203.0.113.1") == []
+        assert service.get_threat_statistics()["ip_reputation_networks"] == 4
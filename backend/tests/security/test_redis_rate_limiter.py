@@ -0,0 +1,116 @@
+from typing import Any
+import pytest
+from src.security.rate_limiter import RedisRateLimitBackend
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+LIMITS = {"minute": 3, "hour": 4}
+
+
+@pytest.fixture
+def redis_client() -> Any:
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture
+def backend(redis_client: Any) -> Any:
+    return RedisRateLimitBackend(redis_client)
+
+
+def stored(redis_client: Any, identifier: str) -> Any:
+    """Theoretical arrival time and TTL of every window key"""
+    return {
+        window: (
+            redis_client.get(f"rate_limit:{identifier}:{window}"),
+            redis_client.pttl(f"rate_limit:{identifier}:{window}"),
+        )
+        for window in LIMITS
+    }
+
+
+class TestRedisRateLimitBackend:
+    """Test the GCRA Lua script against an in-process Redis"""
+
+    def test_all_windows_checked_in_one_call(
+        self, backend: Any, redis_client: Any
+    ) -> Any:
+        calls = []
+        script = backend._script
+        backend._script = lambda **kwargs: calls.append(kwargs) or script(**kwargs)
+        results = [backend.check("client", LIMITS) for _ in range(4)]
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert len(calls) == 4
+        assert calls[0] == {
+            "keys": ["rate_limit:client:minute", "rate_limit:client:hour"],
+            "args": [1, 3, 60, 4, 3600],
+        }
+        assert results[3].current_counts == {"minute": 3, "hour": 3}
+
+    def test_remaining_and_retry_after(self, backend: Any) -> Any:
+        results = [backend.check("client", LIMITS) for _ in range(4)]
+        assert [r.remaining for r in results] == [
+            {"minute": 2, "hour": 3},
+            {"minute": 1, "hour": 2},
+            {"minute": 0, "hour": 1},
+            {"minute": 0, "hour": 1},
+        ]
+        assert [r.retry_after for r in results[:3]] == [0.0, 0.0, 0.0]
+        # The next minute cell frees up one interval (60s / 3) after the first call
+        assert results[3].retry_after == pytest.approx(20, abs=0.5)
+
+    def test_retry_after_is_the_tightest_window(self, backend: Any) -> Any:
+        limits = {"minute": 10, "hour": 2}
+        for _ in range(2):
+            assert backend.check("client", limits).allowed
+        result = backend.check("client", limits)
+        assert not result.allowed
+        assert result.remaining == {"minute": 8, "hour": 0}
+        assert result.retry_after == pytest.approx(1800, abs=0.5)
+
+    def test_rejected_call_writes_nothing(self, backend: Any, redis_client: Any) -> Any:
+        for _ in range(3):
+            backend.check("client", LIMITS)
+        before = stored(redis_client, "client")
+        assert all(value is not None for value, _ in before.values())
+        assert not backend.check("client", LIMITS).allowed
+        after = stored(redis_client, "client")
+        for window in LIMITS:
+            assert after[window][0] == before[window][0]
+            assert after[window][1] <= before[window][1]
+
+    def test_rejected_call_consumes_no_other_window(self, backend: Any) -> Any:
+        limits = {"minute": 1, "hour": 10}
+        assert backend.check("client", limits).allowed
+        for _ in range(5):
+            assert not backend.check("client", limits).allowed
+        result = backend.check("client", {"hour": 10})
+        assert result.allowed
+        assert result.remaining == {"hour": 8}
+
+    def test_cost_spends_several_cells(self, backend: Any) -> Any:
+        result = backend.check("client", LIMITS, cost=3)
+        assert result.allowed
+        assert result.remaining == {"minute": 0, "hour": 1}
+        denied = backend.check("client", LIMITS, cost=2)
+        assert not denied.allowed
+        assert denied.remaining == {"minute": 0, "hour": 1}
+        result = backend.check("client", {"hour": 4})
+        assert result.allowed and result.remaining == {"hour": 0}
+
+    def test_keys_expire_when_budget_refills(
+        self, backend: Any, redis_client: Any
+    ) -> Any:
+        backend.check("client", LIMITS)
+        ttls = {
+            window: ttl for window, (_, ttl) in stored(redis_client, "client").items()
+        }
+        assert 19_000 < ttls["minute"] <= 20_000
+        assert 899_000 < ttls["hour"] <= 900_000
+
+    def test_reset_clears_every_window(self, backend: Any, redis_client: Any) -> Any:
+        for _ in range(3):
+            backend.check("client", LIMITS)
+        backend.reset("client")
+        assert redis_client.keys("rate_limit:client:*") == []
+        assert backend.check("client", LIMITS).remaining == {"minute": 2, "hour": 3}
@@ -0,0 +1,193 @@
+"""
+Security monitoring: time-bucketed event index and rolling rule counters
+"""
+
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.security.event_index import RollingCounter, SecurityEventIndex
+from src.security.security_monitoring import (
+    AlertRule,
+    EventCategory,
+    EventSeverity,
+    SecurityEvent,
+    SecurityMonitoringService,
+)
+
+EVENT_TYPES = ["login_failed", "login_success", "file_download", "data_export"]
+
+
+def make_event(timestamp, event_type="login_failed", user_id=None, ip_address=None):
+    return SecurityEvent(
+        event_id=str(uuid.uuid4()),
+        event_type=event_type,
+        category=EventCategory.AUTHENTICATION,
+        severity=EventSeverity.MEDIUM,
+        source="test",
+        target="api",
+        description="",
+        details={},
+        timestamp=timestamp,
+        user_id=user_id,
+        ip_address=ip_address,
+    )
+
+
+def random_events(count, seed=4, span=timedelta(hours=2)):
+    rng = random.Random(seed)
+    start = datetime.utcnow() - span
+    step = span / count
+    return [
+        make_event(
+            start + step * i,
+            rng.choice(EVENT_TYPES),
+            rng.choice([None, "u1", "u2", "u3"]),
+            rng.choice([None, "10.0.0.1", "10.0.0.2"]),
+        )
+        for i in range(count)
+    ]
+
+
+class TestSecurityEventIndex:
+    """Same answers as filtering the flat event list"""
+
+    @pytest.mark.parametrize("window_minutes", [1, 15, 60, 600])
+    def test_matches_naive_filtering(self, window_minutes):
+        events = random_events(3000)
+        index = SecurityEventIndex()
+        for event in events:
+            index.add(event)
+        since = datetime.utcnow() - timedelta(minutes=window_minutes)
+        queries = [
+            {},
+            {"event_types": ["login_failed"]},
+            {"user_id": "u1"},
+            {"event_types": ["login_failed"], "ip_address": "10.0.0.2"},
+            {"event_types": ["file_download", "data_export"], "user_id": "u2"},
+        ]
+        for query in queries:
+            expected = [
+                e
+                for e in reversed(events)
+                if e.timestamp >= since
+                and e.event_type in query.get("event_types", [e.event_type])
+                and e.user_id == query.get("user_id", e.user_id)
+                and e.ip_address == query.get("ip_address", e.ip_address)
+            ]
+            assert index.events(since, **query) == expected, query
+            assert index.count(since, **query) == len(expected), query
+
+    def test_bounded_and_expiring(self):
+        index = SecurityEventIndex(retention=timedelta(hours=1), max_events=500)
+        events = random_events(2000)
+        for event in events:
+            index.add(event)
+        assert list(index) == events[-500:]
+        index = SecurityEventIndex(retention=timedelta(hours=1))
+        for event in events:
+            index.add(event)
+        cutoff = datetime.utcnow() - timedelta(hours=1)
+        assert list(index) == [e for e in events if e.timestamp >= cutoff]
+
+    def test_empty_keys_are_dropped(self):
+        index = SecurityEventIndex(max_events=1)
+        index.add(make_event(datetime.utcnow(), user_id="a", ip_address="1.1.1.1"))
+        index.add(make_event(datetime.utcnow(), user_id="b"))
+        assert index.count(datetime.utcnow() - timedelta(minutes=1), user_id="a") == 0
+        assert list(index._series) == [("login_failed", None, "b")]
+        assert "a" not in index._by_user and "1.1.1.1" not in index._by_ip
+
+
+class TestRollingCounter:
+    def test_rolls_buckets_out_of_the_window(self):
+        now = datetime.utcnow()
+        counter = RollingCounter(timedelta(minutes=5))
+        for seconds in (400, 200, 100, 0):
+            counter.add(now - timedelta(seconds=seconds))
+        assert counter.count(now) == 3
+        assert counter.count(now + timedelta(seconds=150)) == 2
+
+    def test_add_drops_expired_buckets(self):
+        start = datetime.utcnow()
+        counter = RollingCounter(timedelta(minutes=1))
+        for seconds in range(3600):
+            counter.add(start + timedelta(seconds=seconds))
+        assert len(counter._buckets) <= 61
+        assert counter.count(start + timedelta(seconds=3599)) in (60, 61)
+
+
+class TestAlertRule:
+    def test_severity_threshold(self):
+        rule = AlertRule(
+            rule_id="r",
+            name="r",
+            description="",
+            event_type="*",
+            conditions={},
+            severity_threshold=EventSeverity.HIGH,
+            time_window=timedelta(minutes=1),
+            max_events=1,
+        )
+        event = make_event(datetime.utcnow())
+        assert not rule.matches(event)
+        event.severity = EventSeverity.CRITICAL
+        assert rule.matches(event)
+
+
+class TestSecurityMonitoringService:
+    def test_rules_and_correlations_fire_from_the_index(self):
+        async def scenario():
+            service = SecurityMonitoringService(None)
+            for _ in range(10):
+                event = await service.log_security_event(
+                    "login_failed",
+                    EventCategory.AUTHENTICATION,
+                    EventSeverity.MEDIUM,
+                    "auth",
+                    "login",
+                    "bad password",
+                    user_id="victim",
+                    ip_address="203.0.113.5",
+                )
+                await service._process_single_event(event)
+            service._processing_task.cancel()
+            return service
+
+        service = asyncio.run(scenario())
+        titles = [incident.title for incident in service._incidents.values()]
+        assert "Brute Force Attack Detected" in titles
+        assert "Security Alert: Multiple Failed Login Attempts" in titles
+        assert service._rule_counters["failed_login_attempts"].count() == 10
+        assert service.get_security_metrics()["events_last_hour"] == 10
+
+    def test_disabled_rules_keep_no_counter(self):
+        async def log_failures(service, count):
+            for _ in range(count):
+                await service.log_security_event(
+                    "login_failed",
+                    EventCategory.AUTHENTICATION,
+                    EventSeverity.MEDIUM,
+                    "auth",
+                    "login",
+                    "bad password",
+                    user_id="victim",
+                )
+
+        async def scenario():
+            service = SecurityMonitoringService(None)
+            await log_failures(service, 2)
+            assert service.disable_alert_rule("failed_login_attempts")
+            assert "failed_login_attempts" not in service._rule_counters
+            await log_failures(service, 3)
+            assert "failed_login_attempts" not in service._rule_counters
+            service.enable_alert_rule("failed_login_attempts")
+            await log_failures(service, 1)
+            service._processing_task.cancel()
+            return service
+
+        service = asyncio.run(scenario())
+        assert service._rule_counters["failed_login_attempts"].count() == 6
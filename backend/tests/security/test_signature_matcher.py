@@ -0,0 +1,160 @@
+"""
+Signature matching: Aho-Corasick prefilter plus regex verification
+"""
+
+import asyncio
+import random
+import re
+
+import pytest
+
+from src.security.signature_matcher import (
+    AhoCorasick,
+    SignatureMatcher,
+    has_group_reference,
+    required_literals,
+)
+from src.security.threat_prevention import ThreatPreventionService, ThreatType
+
+CHECKED_TYPES = [ThreatType.SQL_INJECTION, ThreatType.XSS, ThreatType.MALWARE]
+FRAGMENTS = [
+    "SELECT * FROM users",
+    "1 OR 1=1",
+    "' and 'a'='a",
+    "admin'--",
+    "UNION ALL SELECT",
+    "exec xp_cmdshell",
+    "CHAR(65)",
+    "waitfor delay '5'",
+    "<script>alert(1)</script>",
+    "JavaScript :void(0)",
+    'onload="x()"',
+    "<iframe src=x>",
+    "eval (atob(s))",
+    "document.cookie",
+    "window.open",
+    "; curl http://x",
+    "| whoami",
+    "$(id)",
+    "`uname`",
+    "rm -rf /",
+    "İNSERT",
+    "ſh -c",
+]
+WORDS = [
+    "order",
+    "for",
+    "android",
+    "payment",
+    "description",
+    "select",
+    "scripted",
+    "evaluate",
+    "format",
+    "shipping",
+    "ideal",
+    "Anderson",
+    "#",
+    "$",
+    "|",
+    "=",
+    "(",
+]
+
+
+@pytest.fixture(scope="module")
+def service():
+    return ThreatPreventionService(None)
+
+
+def naive_matches(service, text, threat_type):
+    return [
+        signature
+        for signature in service._threat_signatures[threat_type]
+        if re.search(signature, text, re.IGNORECASE)
+    ]
+
+
+def make_payloads(count, seed=7, attack_rate=0.1):
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(1, 12))
+        if rng.random() < attack_rate:
+            words.insert(rng.randint(0, len(words)), rng.choice(FRAGMENTS))
+        payloads.append(" ".join(words))
+    return payloads
+
+
+class TestRequiredLiterals:
+    """Literal extraction never rules out a real match"""
+
+    def test_extracts_alternation_and_runs(self):
+        assert required_literals("(\\b(OR|AND)\\s+\\d+)") == {"or", "and"}
+        assert required_literals("(<script[^>]*>.*?</script>)") == {"</script>"}
+        assert required_literals("(--|#|/\\*|\\*/)") == {"--", "#", "/*", "*/"}
+
+    def test_optional_parts_give_no_literal(self):
+        assert required_literals("(a?b*)") is None
+        assert required_literals("(x|\\d+)") is None
+
+
+class TestAhoCorasick:
+    def test_finds_overlapping_keywords(self):
+        automaton = AhoCorasick({"he": ["a"], "she": ["b"], "hers": ["c"]})
+        assert automaton.search("ushers") == {"a", "b", "c"}
+        assert automaton.search("house") == set()
+
+
+class TestSignatureMatcher:
+    """Same matches as trying every signature in turn"""
+
+    def test_matches_naive_loop(self, service):
+        for payload in make_payloads(3000, attack_rate=0.5) + FRAGMENTS:
+            for threat_type in CHECKED_TYPES:
+                assert service._check_signatures(payload, threat_type) == naive_matches(
+                    service, payload, threat_type
+                )
+
+    def test_reports_signature_ids(self, service):
+        indicators = asyncio.run(
+            service._detect_injection_attacks(
+                {"post_data": {"q": "x' UNION SELECT password --"}}
+            )
+        )
+        evidence = indicators[0].evidence
+        assert len(evidence["signature_ids"]) == len(evidence["matches"]) == 3
+        assert all(
+            sig_id.startswith("sql_injection-") for sig_id in evidence["signature_ids"]
+        )
+
+    def test_hot_reload_recompiles_only_changed_types(self):
+        service = ThreatPreventionService(None)
+        assert not service._check_signatures("DROP TABLE x", ThreatType.PHISHING)
+        phishing = service._threat_signatures[ThreatType.PHISHING] + ["(drop table)"]
+        recompiled = service.reload_threat_signatures(
+            {
+                ThreatType.PHISHING: phishing,
+                ThreatType.XSS: service._threat_signatures[ThreatType.XSS],
+            }
+        )
+        assert recompiled == [ThreatType.PHISHING]
+        assert service._check_signatures("DROP TABLE x", ThreatType.PHISHING) == [
+            "(drop table)"
+        ]
+
+    def test_backreferences_bypass_the_gate(self):
+        matcher = SignatureMatcher()
+        matcher.load("t", {"a": r"(x)yz\1", "b": r"(['\"])evil\1", "c": r"(q)uery\1"})
+        assert matcher.match("t", "'evil' yz uery") == ["b"]
+        assert matcher.match("t", "xyzx 'evil\" query") == ["a"]
+        assert has_group_reference(r"(?P<q>')x(?P=q)")
+        assert has_group_reference(r"(a)?(?(1)b|c)")
+        assert not has_group_reference(r"(a)(b)+[\1]")
+
+    def test_ids_are_stable_across_reordering(self):
+        matcher = SignatureMatcher()
+        matcher.load("t", ["(abc)", "(xyz)"])
+        first = matcher.match("t", "abc xyz")
+        matcher.load("t", ["(xyz)", "(abc)"])
+        assert sorted(matcher.match("t", "abc xyz")) == sorted(first)
@@ -0,0 +1,192 @@
+"""
+Bulk transfer / payout service: per-item results and failed chunks
+"""
+
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, g, jsonify, request
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+import src.services.bulk_transfer_service as bulk_transfer_service
+import src.utils.idempotency as idempotency
+from src.models.account import Account, AccountStatus, AccountType
+from src.models.database import Base
+from src.models.idempotency import IdempotencyKey
+from src.models.transaction import Transaction
+from src.models.user import User
+from src.services.bulk_transfer_service import process_bulk_transfers
+from src.utils.idempotency import IdempotencyStore, idempotent
+
+TABLES = [User.__table__, Account.__table__, Transaction.__table__]
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    Base.metadata.create_all(engine, tables=TABLES)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def add_accounts(session, user_id, count, balance, currency="USD", status=None):
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    session.execute(
+        insert(Account.__table__),
+        [
+            {
+                "id": account_id,
+                "user_id": user_id,
+                "account_name": f"Account {account_id[:8]}",
+                "account_number": account_id[:20],
+                "account_type": AccountType.CHECKING,
+                "status": status or AccountStatus.ACTIVE,
+                "currency": currency,
+                "balance": Decimal(balance),
+                "available_balance": Decimal(balance),
+            }
+            for account_id in ids
+        ],
+    )
+    session.commit()
+    return ids
+
+
+def balance_of(session, account_id):
+    accounts = Account.__table__
+    return session.execute(
+        select(accounts.c.balance).where(accounts.c.id == account_id)
+    ).scalar_one()
+
+
+class TestBulkTransfers:
+    """Per-item results of chunked bulk transfers"""
+
+    def test_failures_are_reported_per_item(self, session):
+        (source,) = add_accounts(session, "u1", 1, "100")
+        (other_users,) = add_accounts(session, "u2", 1, "100")
+        (euro,) = add_accounts(session, "u2", 1, "0", currency="EUR")
+        (frozen,) = add_accounts(session, "u2", 1, "0", status=AccountStatus.SUSPENDED)
+        (destination,) = add_accounts(session, "u2", 1, "0")
+        summary = process_bulk_transfers(
+            session,
+            [
+                {"from_account_id": source, "to_account_id": destination, "amount": 60},
+                {"from_account_id": source, "to_account_id": destination, "amount": 60},
+                {"from_account_id": source, "to_account_id": euro, "amount": 1},
+                {"from_account_id": source, "to_account_id": frozen, "amount": 1},
+                {"from_account_id": other_users, "to_account_id": source, "amount": 1},
+                {"from_account_id": source, "to_account_id": "missing", "amount": 1},
+                {"from_account_id": source, "to_account_id": destination, "amount": -5},
+                {"from_account_id": source, "to_account_id": destination, "amount": 40},
+            ],
+            user_id="u1",
+            chunk_size=3,
+        )
+        codes = [r.get("code", r["status"]) for r in summary["results"]]
+        assert codes == [
+            "success",
+            "INSUFFICIENT_FUNDS",
+            "CURRENCY_MISMATCH",
+            "ACCOUNT_INACTIVE",
+            "ACCESS_DENIED",
+            "ACCOUNT_NOT_FOUND",
+            "VALIDATION_ERROR",
+            "success",
+        ]
+        assert [r["index"] for r in summary["results"]] == list(range(8))
+        assert balance_of(session, source) == Decimal("0")
+        assert balance_of(session, destination) == Decimal("100")
+
+
+class TestFailedChunk:
+    """A chunk that raises is reported per item; committed chunks stay posted"""
+
+    @pytest.fixture
+    def failing_second_chunk(self, monkeypatch):
+        post_chunk = bulk_transfer_service._post_chunk
+        calls = []
+
+        def fail_once(session, chunk, batch_id, channel):
+            calls.append(len(chunk))
+            if len(calls) == 2:
+                raise RuntimeError("connection reset")
+            return post_chunk(session, chunk, batch_id, channel)
+
+        monkeypatch.setattr(bulk_transfer_service, "_post_chunk", fail_once)
+        return calls
+
+    @pytest.fixture
+    def app(self, session, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'idempotency.db'}")
+        IdempotencyKey.__table__.create(engine)
+        store = IdempotencyStore(ttl_seconds=60, lock_seconds=5)
+        store.configure(session_factory=lambda: Session(engine))
+        monkeypatch.setattr(idempotency, "idempotency_store", store)
+        app = Flask(__name__)
+
+        @app.before_request
+        def authenticate():
+            g.current_user = SimpleNamespace(id="u1")
+
+        @app.route("/transfers/bulk", methods=["POST"])
+        @idempotent
+        def bulk():
+            try:
+                summary = process_bulk_transfers(
+                    session, request.get_json()["transfers"], "u1", chunk_size=2
+                )
+            except Exception as e:
+                session.rollback()
+                return jsonify({"error": str(e)}), 500
+            return jsonify(summary), 200
+
+        yield app
+        engine.dispose()
+
+    def payouts(self, session):
+        (source,) = add_accounts(session, "u1", 1, "100")
+        destinations = add_accounts(session, "u2", 5, "0")
+        transfers = [
+            {"from_account_id": source, "to_account_id": account_id, "amount": 10}
+            for account_id in destinations
+        ]
+        return source, destinations, transfers
+
+    def test_items_of_failed_chunk_are_reported(self, session, failing_second_chunk):
+        source, destinations, transfers = self.payouts(session)
+        summary = process_bulk_transfers(session, transfers, "u1", chunk_size=2)
+        assert [r.get("code", r["status"]) for r in summary["results"]] == [
+            "success",
+            "success",
+            "BULK_CHUNK_FAILED",
+            "BULK_CHUNK_FAILED",
+            "success",
+        ]
+        assert summary["results"][2]["status_code"] == 500
+        assert (summary["succeeded"], summary["failed"]) == (3, 2)
+        assert balance_of(session, source) == Decimal("70")
+        assert balance_of(session, destinations[2]) == Decimal("0")
+
+    def test_replay_does_not_repost_committed_chunk(
+        self, session, app, failing_second_chunk
+    ):
+        source, destinations, transfers = self.payouts(session)
+        client = app.test_client()
+        headers = {"Idempotency-Key": "payroll-1"}
+        first = client.post(
+            "/transfers/bulk", json={"transfers": transfers}, headers=headers
+        )
+        retry = client.post(
+            "/transfers/bulk", json={"transfers": transfers}, headers=headers
+        )
+        assert first.status_code == retry.status_code == 200
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert retry.get_json() == first.get_json()
+        assert failing_second_chunk == [2, 2, 1]
+        assert balance_of(session, source) == Decimal("70")
+        assert balance_of(session, destinations[0]) == Decimal("10")
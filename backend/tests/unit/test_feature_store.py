@@ -0,0 +1,191 @@
+"""
+Online feature store: O(1) behaviour features from rolling per-user aggregates
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.ml.fraud_detection import FeatureEngineer, FraudModelBase
+from src.ml.fraud_detection.ensemble_model import (
+    EnsembleFraudModel,
+    RealTimeFraudDetector,
+)
+from src.ml.fraud_detection.feature_store import OnlineFeatureStore, WindowCounter
+
+BASE_TIME = datetime(2026, 3, 1)
+
+
+def make_history(rng, size, days=40):
+    # Whole-day offsets keep every event on a bucket boundary of all windows
+    history = pd.DataFrame(
+        {
+            "timestamp": [
+                BASE_TIME + timedelta(days=rng.randint(0, days - 1))
+                for _ in range(size)
+            ],
+            "amount": [rng.uniform(1, 500) for _ in range(size)],
+            "merchant_category": [
+                rng.choice(["grocery", "travel", None]) for _ in range(size)
+            ],
+            "device_fingerprint": [rng.choice(["d1", "d2", None]) for _ in range(size)],
+            "location_country": [rng.choice(["US", "FR"]) for _ in range(size)],
+        }
+    )
+    return history.sort_values("timestamp", ignore_index=True)
+
+
+def transaction(timestamp, **fields):
+    return {
+        "transaction_id": "t1",
+        "user_id": "u1",
+        "amount": 120.0,
+        "timestamp": timestamp.isoformat(),
+        "merchant_category": "gambling",
+        "device_fingerprint": "d3",
+        "location_country": "US",
+        **fields,
+    }
+
+
+def history_features(data, history):
+    engineer = FeatureEngineer()
+    return engineer.features_to_dataframe(
+        engineer.extract_transaction_features(data, history)
+    ).iloc[0]
+
+
+def store_features(data, store):
+    engineer = FeatureEngineer(store)
+    return engineer.features_to_dataframe(
+        engineer.extract_transaction_features(data)
+    ).iloc[0]
+
+
+class TestWindowCounter:
+    """Ring buffer counts expire bucket by bucket"""
+
+    def test_events_leave_window_after_its_length(self):
+        counter = WindowCounter(width=60, size=3)
+        counter.add(0, 5.0)
+        counter.add(90, 7.0)
+        assert counter.totals(100) == (2, 12.0)
+        assert counter.totals(180) == (1, 7.0)
+        assert counter.totals(300) == (0, 0.0)
+
+    def test_late_event_older_than_window_is_ignored(self):
+        counter = WindowCounter(width=60, size=3)
+        counter.add(600, 1.0)
+        counter.add(0, 1.0)
+        assert counter.totals(600) == (1, 1.0)
+
+
+class TestOnlineFeatureStore:
+    """Store-backed features vs. scanning the user's history"""
+
+    def test_matches_history_features(self):
+        rng = random.Random(3)
+        history = make_history(rng, 300)
+        store = OnlineFeatureStore()
+        store.load_history("u1", history)
+        # The store answers "as of now", so query after the last history event
+        for day in (39, 41, 55):
+            data = transaction(BASE_TIME + timedelta(days=day, hours=6))
+            expected = history_features(data, history)
+            actual = store_features(data, store)
+            pd.testing.assert_series_equal(actual, expected, check_names=False)
+
+    def test_unknown_user_gets_only_transaction_features(self):
+        features = store_features(
+            transaction(BASE_TIME, user_id="nobody"), OnlineFeatureStore()
+        )
+        assert features["velocity_24h"] == 0
+        assert features["high_risk_merchant"] == 0
+
+    def test_recorded_transactions_update_velocity(self):
+        store = OnlineFeatureStore()
+        for minute in range(0, 50, 10):
+            store.record_transaction(transaction(BASE_TIME + timedelta(minutes=minute)))
+        features = store_features(
+            transaction(BASE_TIME + timedelta(minutes=55), device_fingerprint="d9"),
+            store,
+        )
+        assert features["velocity_1h"] == 5
+        assert features["new_device"] == 1
+        assert features["new_location"] == 0
+
+    def test_snapshot_round_trip(self, tmp_path):
+        store = OnlineFeatureStore()
+        store.load_history("u1", make_history(random.Random(5), 50))
+        path = str(tmp_path / "features.joblib")
+        store.snapshot(path)
+        restored = OnlineFeatureStore()
+        restored.restore(path)
+        data = transaction(BASE_TIME + timedelta(days=30))
+        pd.testing.assert_series_equal(
+            store_features(data, restored), store_features(data, store)
+        )
+
+
+class Constant(FraudModelBase):
+    def __init__(self):
+        super().__init__({})
+        self.is_trained = True
+
+    def train(self, training_data, labels=None):
+        pass
+
+    def predict(self, features):
+        return np.full(len(features), 0.5)
+
+    def get_feature_importance(self):
+        return {}
+
+
+class TestBatchFeaturesFromStore:
+    """Users without a history DataFrame are read from the store in batches"""
+
+    def test_batch_matches_single_transaction_features(self):
+        rng = random.Random(6)
+        store = OnlineFeatureStore()
+        store.load_history("u1", make_history(rng, 200))
+        store.load_history("u2", make_history(rng, 20))
+        histories = {"u2": make_history(rng, 60)}
+        batch = [
+            transaction(
+                BASE_TIME + timedelta(days=41, hours=hour),
+                transaction_id=f"t{i}",
+                user_id=user_id,
+            )
+            for i, (user_id, hour) in enumerate(
+                [("u1", 3), ("u2", 5), ("nobody", 7), ("u1", 22)]
+            )
+        ]
+        frame = FeatureEngineer(store).extract_batch_features(batch, histories)
+        for i, data in enumerate(batch):
+            history = histories.get(data["user_id"])
+            if history is None:
+                expected = store_features(data, store)
+            else:
+                expected = history_features(data, history)
+            pd.testing.assert_series_equal(
+                frame.iloc[i], expected, check_names=False, check_dtype=False
+            )
+        assert frame["velocity_7d"].iloc[0] > 0
+
+    def test_detect_batch_reads_the_detector_store(self):
+        store = OnlineFeatureStore()
+        for minute in range(0, 50, 10):
+            store.record_transaction(transaction(BASE_TIME + timedelta(minutes=minute)))
+        model = EnsembleFraudModel({})
+        model.models = {"constant": Constant()}
+        model.model_weights = {"constant": 1.0}
+        model.is_trained = True
+        detector = RealTimeFraudDetector(model, feature_store=store)
+        (alert,) = detector.detect_batch(
+            [transaction(BASE_TIME + timedelta(minutes=55), device_fingerprint="d9")]
+        )
+        assert alert.metadata["feature_values"]["velocity_1h"] == 5
+        assert alert.metadata["feature_values"]["new_device"] == 1
@@ -0,0 +1,211 @@
+"""
+Batch fraud feature extraction and detection
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ml.fraud_detection import (
+    FEATURE_COLUMNS,
+    FeatureEngineer,
+    FraudModelBase,
+    RiskLevel,
+)
+from src.ml.fraud_detection.ensemble_model import EnsembleFraudModel
+from src.ml.fraud_detection.service import FraudDetectionService
+
+CATEGORIES = ["grocery", "gambling", "travel", None, "adult"]
+BASE_TIME = datetime(2026, 3, 1)
+
+
+def make_transaction(rng, index, user_id):
+    return {
+        "transaction_id": f"t{index}",
+        "user_id": user_id,
+        "amount": rng.uniform(1, 500),
+        "timestamp": (
+            BASE_TIME + timedelta(minutes=rng.randint(0, 60 * 24 * 40))
+        ).isoformat(),
+        "merchant_category": rng.choice(CATEGORIES),
+        "device_fingerprint": rng.choice(["d1", "d2", "d3", None]),
+        "location_country": rng.choice(["US", "FR", None]),
+        "payment_method": "card",
+    }
+
+
+@pytest.fixture
+def workload():
+    rng = random.Random(7)
+    users = [f"u{i}" for i in range(200)]
+    histories = {}
+    for user_id in users[:180]:
+        history = pd.DataFrame(
+            [make_transaction(rng, 0, user_id) for _ in range(rng.randint(1, 80))]
+        )
+        history["timestamp"] = pd.to_datetime(history["timestamp"])
+        histories[user_id] = history
+    histories[users[180]] = pd.DataFrame(
+        columns=[
+            "timestamp",
+            "amount",
+            "merchant_category",
+            "device_fingerprint",
+            "location_country",
+        ]
+    )
+    transactions = [make_transaction(rng, i, rng.choice(users)) for i in range(10_000)]
+    return transactions, histories
+
+
+class Scores(FraudModelBase):
+    def train(self, training_data, labels=None):
+        pass
+
+    def predict(self, features):
+        return np.asarray(features)
+
+    def get_feature_importance(self):
+        return {}
+
+
+class TestBatchFeatureExtraction:
+    """extract_batch_features vs. the per-transaction path"""
+
+    def test_matches_per_transaction_features(self, workload):
+        transactions, histories = workload
+        sample = transactions[:1000]
+        engineer = FeatureEngineer()
+        expected = pd.concat(
+            [
+                engineer.features_to_dataframe(
+                    engineer.extract_transaction_features(
+                        t, histories.get(t["user_id"])
+                    )
+                )
+                for t in sample
+            ],
+            ignore_index=True,
+        )
+        actual = engineer.extract_batch_features(sample, histories)
+        assert list(actual.columns) == FEATURE_COLUMNS
+        for column in FEATURE_COLUMNS:
+            np.testing.assert_allclose(
+                actual[column].to_numpy(dtype=float),
+                expected[column].to_numpy(dtype=float),
+                err_msg=column,
+            )
+
+    def test_without_histories_only_time_features_are_set(self, workload):
+        transactions, _ = workload
+        frame = FeatureEngineer().extract_batch_features(transactions[:10])
+        assert (frame["velocity_24h"] == 0).all()
+        assert (frame["high_risk_merchant"] == 0).all()
+        assert (frame["hour_of_day"] > 0).any()
+
+
+class ColumnScore(FraudModelBase):
+    """Stand-in sub-model: a logistic function of one feature column"""
+
+    def __init__(self, column, center, scale):
+        super().__init__({})
+        self.column, self.center, self.scale = column, center, scale
+        self.is_trained = True
+        self.calls = 0
+
+    def train(self, training_data, labels=None):
+        pass
+
+    def predict(self, features):
+        self.calls += 1
+        values = features[self.column].to_numpy(dtype=float)
+        return 1 / (1 + np.exp(-(values - self.center) / self.scale))
+
+    def get_feature_importance(self):
+        return {self.column: 1.0}
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = FraudDetectionService(
+        {
+            "model_path": str(tmp_path / "model.joblib"),
+            "feature_store_path": str(tmp_path / "features.joblib"),
+            "model_config": {},
+        }
+    )
+    model = EnsembleFraudModel({"voting_strategy": "weighted"})
+    model.models = {
+        "amount": ColumnScore("amount", 250, 60),
+        "velocity": ColumnScore("velocity_24h", 3, 2),
+        "zscore": ColumnScore("amount_zscore", 1, 0.5),
+    }
+    model.model_weights = {"amount": 0.5, "velocity": 0.3, "zscore": 0.2}
+    model.is_trained = True
+    service.ensemble_model = model
+    service.real_time_detector = service._create_detector()
+    return service
+
+
+class TestBatchDetection:
+    """batch_detect_fraud scores like detect_fraud, one model call per batch"""
+
+    def test_alerts_match_single_transaction_detection(self, service, workload):
+        transactions, histories = workload
+        sample = transactions[:300]
+        detector = service.real_time_detector
+        expected = [
+            detector.detect_fraud(t, histories.get(t["user_id"])) for t in sample
+        ]
+        models = service.ensemble_model.models
+        calls = {name: model.calls for name, model in models.items()}
+        alerts = asyncio.run(service.batch_detect_fraud(sample, histories))
+        assert {name: model.calls - calls[name] for name, model in models.items()} == {
+            name: 1 for name in models
+        }
+        assert [a.transaction_id for a in alerts] == [
+            t["transaction_id"] for t in sample
+        ]
+        np.testing.assert_allclose(
+            [a.risk_score for a in alerts], [a.risk_score for a in expected]
+        )
+        assert [a.risk_level for a in alerts] == [a.risk_level for a in expected]
+        assert [a.fraud_types for a in alerts] == [a.fraud_types for a in expected]
+        assert [a.recommended_actions for a in alerts] == [
+            a.recommended_actions for a in expected
+        ]
+        assert len({a.risk_level for a in alerts}) > 1
+        assert any(a.fraud_types for a in alerts)
+
+    def test_scores_are_weighted_votes(self, service, workload):
+        transactions, histories = workload
+        sample = transactions[:200]
+        alerts = service.real_time_detector.detect_batch(sample, histories)
+        features = FeatureEngineer().extract_batch_features(sample, histories)
+        model = service.ensemble_model
+        expected = sum(
+            weight * model.models[name].predict(features)
+            for name, weight in model.model_weights.items()
+        )
+        np.testing.assert_allclose([a.risk_score for a in alerts], expected)
+        predictions = alerts[0].metadata["model_predictions"]
+        assert set(predictions) == set(model.models)
+
+    def test_empty_batch(self, service):
+        assert asyncio.run(service.batch_detect_fraud([])) == []
+
+
+class TestVectorizedRiskLevels:
+    """calculate_risk_levels agrees with calculate_risk_level"""
+
+    def test_matches_scalar_thresholds(self):
+        model = Scores({})
+        scores = np.array([0.0, 0.29, 0.3, 0.59, 0.6, 0.79, 0.8, 1.0])
+        assert list(model.calculate_risk_levels(scores)) == [
+            model.calculate_risk_level(s) for s in scores
+        ]
+        assert model.calculate_risk_levels(np.array([0.95]))[0] is RiskLevel.CRITICAL
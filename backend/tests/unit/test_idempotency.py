@@ -0,0 +1,300 @@
+"""
+Idempotency-Key replay: retries must not re-run the endpoint
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+import redis
+from flask import Flask, g, jsonify, request
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    create_engine,
+    func,
+    insert,
+    select,
+)
+from sqlalchemy.orm import Session
+
+from src.models.idempotency import IdempotencyKey
+from src.utils.idempotency import IdempotencyStore, idempotent
+import src.utils.idempotency as idempotency
+
+
+class BrokenRedis:
+    """Every call fails as if the server were down"""
+
+    def __getattr__(self, name: str) -> Any:
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError("connection refused")
+
+        return fail
+
+
+class ScriptedRedis:
+    """In-process stand-in for the commands and scripts the backend uses"""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, name, value, nx=False, ex=None):
+        if nx and name in self.data:
+            return None
+        self.data[name] = value
+        return True
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def eval(self, script, numkeys, name, expected, *args):
+        if self.data.get(name) != expected:
+            return 0
+        if script == idempotency._RELEASE_SCRIPT:
+            del self.data[name]
+        elif script == idempotency._COMPLETE_SCRIPT:
+            self.data[name] = args[0]
+        return 1
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'idempotency.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    IdempotencyKey.__table__.create(engine)
+    store = IdempotencyStore(ttl_seconds=60, lock_seconds=5)
+    store.configure(session_factory=lambda: Session(engine))
+    monkeypatch.setattr(idempotency, "idempotency_store", store)
+    yield store
+    engine.dispose()
+
+
+@pytest.fixture
+def app(store):
+    app = Flask(__name__)
+    app.calls = 0
+    app.started = threading.Event()
+    app.finish = threading.Event()
+    app.finish.set()
+
+    @app.before_request
+    def authenticate():
+        g.current_user = SimpleNamespace(id=request.headers.get("X-User", "u1"))
+
+    @app.route("/deposit", methods=["POST"])
+    @idempotent
+    def deposit():
+        app.calls += 1
+        app.started.set()
+        app.finish.wait(5)
+        body = request.get_json()
+        if body.get("fail"):
+            return jsonify({"error": "boom"}), 500
+        return jsonify({"transaction": app.calls, "amount": body["amount"]}), 201
+
+    return app
+
+
+def post(client, key, body, user="u1"):
+    headers = {"X-User": user}
+    if key:
+        headers["Idempotency-Key"] = key
+    return client.post("/deposit", json=body, headers=headers)
+
+
+class TestIdempotentEndpoint:
+    """Replay, conflict and release behaviour of @idempotent"""
+
+    def test_retry_replays_stored_response(self, app):
+        client = app.test_client()
+        first = post(client, "k1", {"amount": 10})
+        retry = post(client, "k1", {"amount": 10})
+        assert app.calls == 1
+        assert retry.status_code == first.status_code == 201
+        assert retry.get_json() == first.get_json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+
+    def test_keys_are_scoped_per_user(self, app):
+        client = app.test_client()
+        post(client, "k1", {"amount": 10}, user="u1")
+        post(client, "k1", {"amount": 10}, user="u2")
+        assert app.calls == 2
+
+    def test_requests_without_key_always_run(self, app):
+        client = app.test_client()
+        post(client, None, {"amount": 10})
+        post(client, None, {"amount": 10})
+        assert app.calls == 2
+
+    def test_reused_key_with_different_body_is_rejected(self, app):
+        client = app.test_client()
+        post(client, "k1", {"amount": 10})
+        response = post(client, "k1", {"amount": 99})
+        assert response.status_code == 422
+        assert response.get_json()["code"] == "IDEMPOTENCY_KEY_REUSED"
+        assert app.calls == 1
+
+    def test_concurrent_retry_gets_conflict(self, app):
+        app.finish.clear()
+        first = {}
+        thread = threading.Thread(
+            target=lambda: first.update(
+                response=post(app.test_client(), "k1", {"amount": 10})
+            )
+        )
+        thread.start()
+        assert app.started.wait(5)
+        response = post(app.test_client(), "k1", {"amount": 10})
+        app.finish.set()
+        thread.join(5)
+        assert response.status_code == 409
+        assert response.headers["Retry-After"] == "1"
+        assert first["response"].status_code == 201
+        assert app.calls == 1
+
+    def test_server_error_releases_key(self, app):
+        client = app.test_client()
+        assert post(client, "k1", {"fail": True}).status_code == 500
+        assert post(client, "k1", {"fail": True}).status_code == 500
+        assert app.calls == 2
+
+    def test_expired_key_can_be_reused(self, app, store):
+        store.ttl_seconds = 1
+        client = app.test_client()
+        post(client, "k1", {"amount": 10})
+        time.sleep(1.1)
+        post(client, "k1", {"amount": 10})
+        assert app.calls == 2
+        time.sleep(1.1)
+        assert store.purge_expired() == 1
+
+    def test_redis_outage_falls_back_to_database(self, app, store):
+        store.configure(redis_client=BrokenRedis())
+        client = app.test_client()
+        post(client, "k1", {"amount": 10})
+        retry = post(client, "k1", {"amount": 10})
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert app.calls == 1
+
+    def test_keys_scoped_by_token_without_loaded_user(self, store):
+        app = Flask(__name__)
+        app.calls = 0
+
+        @app.before_request
+        def authenticate():
+            g.token_payload = {"user_id": request.headers["X-User"]}
+
+        @app.route("/deposit", methods=["POST"])
+        @idempotent
+        def deposit():
+            app.calls += 1
+            return jsonify({"transaction": app.calls}), 201
+
+        client = app.test_client()
+        post(client, "k1", {"amount": 10}, user="u1")
+        assert post(client, "k1", {"amount": 10}, user="u1").status_code == 201
+        post(client, "k1", {"amount": 10}, user="u2")
+        assert app.calls == 2
+
+
+class TestCommittedFailures:
+    """A handler that commits and then fails keeps its key"""
+
+    @pytest.fixture
+    def app(self, store, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'deposits.db'}")
+        deposits = Table(
+            "deposits", MetaData(), Column("id", Integer, primary_key=True)
+        )
+        deposits.create(engine)
+        app = Flask(__name__)
+        app.deposits = (
+            lambda: Session(engine)
+            .execute(select(func.count()).select_from(deposits))
+            .scalar_one()
+        )
+
+        @app.before_request
+        def authenticate():
+            g.current_user = SimpleNamespace(id="u1")
+
+        @app.route("/deposit", methods=["POST"])
+        @idempotent
+        def deposit():
+            body = request.get_json()
+            if body.get("commit", True):
+                with Session(engine) as session:
+                    session.execute(insert(deposits))
+                    session.commit()
+            if body.get("raise"):
+                raise RuntimeError("audit log unavailable")
+            return jsonify({"error": "serialization failed"}), 500
+
+        yield app
+        engine.dispose()
+
+    def test_commit_then_raise_is_not_repeated(self, app):
+        client = app.test_client()
+        first = post(client, "k1", {"raise": True})
+        retry = post(client, "k1", {"raise": True})
+        assert first.status_code == retry.status_code == 500
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert retry.get_json()["code"] == "IDEMPOTENT_REQUEST_FAILED_AFTER_COMMIT"
+        assert app.deposits() == 1
+
+    def test_committed_server_error_response_is_replayed(self, app):
+        client = app.test_client()
+        first = post(client, "k1", {})
+        retry = post(client, "k1", {})
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert retry.get_json() == first.get_json()
+        assert app.deposits() == 1
+
+    def test_failure_before_commit_releases_key(self, app):
+        client = app.test_client()
+        post(client, "k1", {"commit": False, "raise": True})
+        retry = post(client, "k1", {"commit": False, "raise": True})
+        assert "Idempotent-Replayed" not in retry.headers
+        assert app.deposits() == 0
+
+
+class TestRedisBackend:
+    """Completing and releasing only touch the caller's own lock"""
+
+    @pytest.fixture
+    def backend(self):
+        return idempotency.RedisIdempotencyBackend(ScriptedRedis())
+
+    def test_complete_stores_response(self, backend):
+        assert backend.reserve("u1", "k1", "fp", "t1", 60) is None
+        backend.complete("u1", "k1", "fp", "t1", 201, "{}", 3600)
+        record = backend.reserve("u1", "k1", "fp", "t2", 60)
+        assert record["status"] == idempotency.COMPLETED
+        assert record["response_status"] == 201
+
+    def test_stale_owner_cannot_overwrite_new_lock(self, backend):
+        backend.reserve("u1", "k1", "fp", "t1", 60)
+        # t1's lock expires and another request takes the key over
+        backend.redis_client.data.clear()
+        assert backend.reserve("u1", "k1", "fp", "t2", 60) is None
+        backend.complete("u1", "k1", "fp", "t1", 201, "{}", 3600)
+        backend.release("u1", "k1", "fp", "t1")
+        record = backend.reserve("u1", "k1", "fp", "t3", 60)
+        assert record["status"] == idempotency.IN_PROGRESS
+        backend.complete("u1", "k1", "fp", "t2", 200, "{}", 3600)
+        assert backend.reserve("u1", "k1", "fp", "t3", 60)["response_status"] == 200
+
+    def test_endpoint_replays_through_redis(self, app, store):
+        store.configure(redis_client=ScriptedRedis())
+        client = app.test_client()
+        post(client, "k1", {"amount": 10})
+        retry = post(client, "k1", {"amount": 10})
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert app.calls == 1
@@ -0,0 +1,114 @@
+"""
+Micro-batching inference server: concurrent requests share one model call
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.ml.fraud_detection import FraudDetectionError
+from src.ml.fraud_detection.inference_server import (
+    BucketHistogram,
+    MicroBatchInferenceServer,
+)
+
+COLUMNS = ["amount", "velocity_1h", "velocity_24h", "amount_zscore"]
+
+
+def make_rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.random((count, len(COLUMNS))), columns=COLUMNS)
+
+
+class ForestEnsemble:
+    """Stand-in ensemble: one RandomForest, per-call overhead like the real one"""
+
+    def __init__(self):
+        rows = make_rows(500)
+        self.forest = RandomForestClassifier(n_estimators=30, random_state=0)
+        self.forest.fit(rows, rows["amount"] > 0.7)
+        self.calls = 0
+
+    def predict_with_components(self, features):
+        self.calls += 1
+        scores = self.forest.predict_proba(features)[:, 1]
+        return scores, {"random_forest": scores}
+
+
+class FailingModel:
+    def predict_with_components(self, features):
+        raise ValueError("model exploded")
+
+
+@pytest.fixture(scope="module")
+def model():
+    return ForestEnsemble()
+
+
+class TestMicroBatchInferenceServer:
+    """Coalescing, per-request results and shutdown"""
+
+    def test_each_request_gets_its_own_scores(self, model):
+        rows = make_rows(200, seed=1)
+        expected, _ = model.predict_with_components(rows)
+        with MicroBatchInferenceServer(model, max_batch_size=32) as server:
+            futures = [server.submit(rows.iloc[[i]]) for i in range(len(rows))]
+            results = [future.result(5) for future in futures]
+        scores = np.concatenate([scores for scores, _ in results])
+        np.testing.assert_allclose(scores, expected)
+        assert all(len(p["random_forest"]) == 1 for _, p in results)
+
+    def test_concurrent_requests_are_coalesced(self, model):
+        rows = make_rows(256, seed=2)
+        calls_before = model.calls
+        with MicroBatchInferenceServer(
+            model, max_batch_size=64, max_wait_us=5000
+        ) as server:
+            with ThreadPoolExecutor(max_workers=32) as pool:
+                list(
+                    pool.map(
+                        lambda i: server.predict_with_components(rows.iloc[[i]], 5),
+                        range(len(rows)),
+                    )
+                )
+            stats = server.get_stats()
+        assert stats["batch_size"]["count"] == model.calls - calls_before
+        assert stats["batch_size"]["count"] < len(rows) / 4
+        assert stats["batch_size"]["buckets"]["+Inf"] == 0
+        assert sum(stats["queue_delay_us"]["buckets"].values()) == len(rows)
+
+    def test_lone_request_waits_at_most_max_wait(self, model):
+        with MicroBatchInferenceServer(model, max_wait_us=1000) as server:
+            start = time.perf_counter()
+            server.predict_with_components(make_rows(1), 5)
+            elapsed = time.perf_counter() - start
+        assert elapsed < 0.5
+
+    def test_model_error_fails_every_future_in_batch(self):
+        with MicroBatchInferenceServer(FailingModel()) as server:
+            futures = [server.submit(make_rows(1)) for _ in range(3)]
+            for future in futures:
+                with pytest.raises(ValueError):
+                    future.result(5)
+            assert server.get_stats()["failed_batches"] >= 1
+
+    def test_stop_scores_queued_requests_then_refuses_new_ones(self, model):
+        server = MicroBatchInferenceServer(model, max_wait_us=100000)
+        server.start()
+        futures = [server.submit(make_rows(1)) for _ in range(10)]
+        server.stop()
+        assert all(future.done() and not future.exception() for future in futures)
+        with pytest.raises(FraudDetectionError):
+            server.submit(make_rows(1))
+
+    def test_histogram_percentiles_use_bucket_bounds(self):
+        histogram = BucketHistogram([1, 10, 100])
+        for value in [1] * 98 + [50, 5000]:
+            histogram.record(value)
+        assert histogram.percentile(0.5) == 1
+        assert histogram.percentile(0.99) == 100
+        assert histogram.percentile(1.0) == float("inf")
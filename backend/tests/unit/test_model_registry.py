@@ -0,0 +1,246 @@
+"""
+Model registry: versioned artifacts, lazy loading and compiled tree models
+"""
+
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from src.ml.fraud_detection import FraudModelBase
+from src.ml.fraud_detection.compiled_trees import CompiledTreeModel, compile_tree_model
+from src.ml.fraud_detection.ensemble_model import EnsembleFraudModel
+from src.ml.fraud_detection.model_registry import LazyModel, ModelRegistry
+
+COLUMNS = ["amount", "velocity_1h", "velocity_24h", "amount_zscore", "new_device"]
+
+
+class EstimatorModel(FraudModelBase):
+    """Fraud model around any fitted sklearn classifier"""
+
+    def __init__(self, estimator):
+        super().__init__({})
+        self.model = estimator
+
+    def train(self, training_data, labels=None):
+        self.feature_columns = list(training_data.columns)
+        self.model.fit(training_data, labels)
+        self.is_trained = True
+
+    def predict(self, features):
+        return self.model.predict_proba(self.preprocess_features(features))[:, 1]
+
+    def get_feature_importance(self):
+        return dict(zip(self.feature_columns, [1.0] * len(self.feature_columns)))
+
+
+def make_data(rows, seed):
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame(rng.random((rows, len(COLUMNS))), columns=COLUMNS)
+    features["new_device"] = (features["new_device"] > 0.8).astype(int)
+    labels = ((features["amount"] + 0.5 * features["new_device"]) > 0.9).astype(int)
+    return features, labels
+
+
+@pytest.fixture(scope="module")
+def data():
+    return make_data(2000, 0), make_data(500, 1)[0]
+
+
+@pytest.fixture(scope="module")
+def forest(data):
+    (features, labels), _ = data
+    model = EstimatorModel(RandomForestClassifier(n_estimators=40, random_state=0))
+    model.train(features, labels)
+    return model
+
+
+def make_ensemble(data, forest):
+    (features, labels), _ = data
+    logistic = EstimatorModel(LogisticRegression())
+    logistic.train(features, labels)
+    return SimpleNamespace(
+        models={"random_forest": forest, "logistic": logistic},
+        is_trained=True,
+        model_version="v-test",
+        training_timestamp=None,
+        feature_columns=COLUMNS,
+        model_weights={"random_forest": 0.6, "logistic": 0.4},
+        config={"voting_strategy": "weighted"},
+    )
+
+
+class TestCompiledTrees:
+    """NumPy node-array scoring reproduces the native estimator"""
+
+    def test_random_forest_scores_match(self, data, forest):
+        (features, _), holdout = data
+        compiled = compile_tree_model(forest, features.head(200))
+        assert compiled is not None
+        np.testing.assert_allclose(
+            compiled.predict(holdout), forest.predict(holdout), atol=1e-12
+        )
+
+    def test_unsupported_estimator_is_not_compiled(self, data):
+        (features, labels), _ = data
+        boosted = EstimatorModel(GradientBoostingClassifier(n_estimators=5))
+        boosted.train(features, labels)
+        assert compile_tree_model(boosted, features.head(50)) is None
+
+    def test_saved_arrays_are_memory_mapped(self, data, forest, tmp_path):
+        (features, _), holdout = data
+        compile_tree_model(forest, features.head(50)).save_arrays(str(tmp_path))
+        loaded = CompiledTreeModel.load_arrays(str(tmp_path))
+        assert all(isinstance(a, np.memmap) for a in loaded.arrays.values())
+        np.testing.assert_allclose(loaded.predict(holdout), forest.predict(holdout))
+
+
+class TestModelRegistry:
+    """Publishing versions and lazily loading their sub-models"""
+
+    def test_publish_writes_manifest_and_artifacts(self, data, forest, tmp_path):
+        (features, _), _ = data
+        registry = ModelRegistry(str(tmp_path))
+        manifest = registry.publish(
+            make_ensemble(data, forest), sample=features.head(100), version="v1"
+        )
+        assert registry.current_version() == "v1"
+        assert manifest["models"]["random_forest"]["format"] == "tree_arrays"
+        assert manifest["models"]["logistic"]["format"] == "joblib"
+        assert registry.manifest()["model_weights"]["random_forest"] == 0.6
+        assert os.path.isdir(tmp_path / "v1" / "random_forest.trees")
+
+    def test_without_sample_everything_stays_native(self, data, forest, tmp_path):
+        registry = ModelRegistry(str(tmp_path))
+        manifest = registry.publish(make_ensemble(data, forest))
+        assert {e["format"] for e in manifest["models"].values()} == {"joblib"}
+
+    def test_models_load_on_first_prediction(self, data, forest, tmp_path):
+        (features, _), holdout = data
+        registry = ModelRegistry(str(tmp_path))
+        manifest = registry.publish(
+            make_ensemble(data, forest), sample=features.head(100), version="v1"
+        )
+        lazy = {
+            name: LazyModel(str(tmp_path / "v1"), entry)
+            for name, entry in manifest["models"].items()
+        }
+        assert not any(model.loaded for model in lazy.values())
+        assert lazy["logistic"].is_trained
+        np.testing.assert_allclose(
+            lazy["logistic"].predict(holdout),
+            make_ensemble(data, forest).models["logistic"].predict(holdout),
+        )
+        assert lazy["logistic"].loaded and not lazy["random_forest"].loaded
+
+    def test_current_version_can_be_switched(self, data, forest, tmp_path):
+        registry = ModelRegistry(str(tmp_path))
+        registry.publish(make_ensemble(data, forest), version="v1")
+        registry.publish(make_ensemble(data, forest), version="v2")
+        assert registry.list_versions() == ["v1", "v2"]
+        assert registry.current_version() == "v2"
+        registry.set_current("v1")
+        assert registry.manifest()["version"] == "v1"
+
+
+class TestEnsembleRoundTrip:
+    """publish -> load_ensemble -> predict gives the published scores"""
+
+    def test_stand_in_ensemble(self, data, forest, tmp_path):
+        (features, _), holdout = data
+        ensemble = EnsembleFraudModel({"voting_strategy": "weighted"})
+        published = make_ensemble(data, forest)
+        ensemble.models = dict(published.models)
+        ensemble.model_weights = dict(published.model_weights)
+        ensemble.feature_columns = COLUMNS
+        ensemble.is_trained = True
+        registry = ModelRegistry(str(tmp_path))
+        registry.publish(ensemble, sample=features.head(100), version="v1")
+
+        loaded = registry.load_ensemble()
+        assert loaded.is_trained and loaded.model_weights == ensemble.model_weights
+        assert not any(model.loaded for model in loaded.models.values())
+        scores, components = loaded.predict_with_components(holdout)
+        expected, expected_components = ensemble.predict_with_components(holdout)
+        np.testing.assert_allclose(scores, expected, atol=1e-12)
+        for name in ensemble.models:
+            np.testing.assert_allclose(
+                components[name], expected_components[name], atol=1e-12
+            )
+        assert all(model.loaded for model in loaded.models.values())
+
+    def test_trained_ensemble_with_overrides(self, data, tmp_path):
+        for module in ("tensorflow", "xgboost", "lightgbm"):
+            pytest.importorskip(module)
+        (features, labels), holdout = data
+        ensemble = EnsembleFraudModel(
+            {
+                "models": {
+                    "isolation_forest": {"n_estimators": 30},
+                    "random_forest": {"n_estimators": 30, "max_depth": 6},
+                }
+            }
+        )
+        ensemble.train(features, labels)
+        registry = ModelRegistry(str(tmp_path))
+        manifest = registry.publish(ensemble, sample=features.head(100))
+        assert set(manifest["models"]) == set(ensemble.models)
+
+        loaded = registry.load_ensemble({"execution_mode": "parallel"})
+        assert loaded.execution_mode == "parallel"
+        np.testing.assert_allclose(
+            loaded.predict(holdout), ensemble.predict(holdout), atol=1e-12
+        )
+
+
+LOAD_AND_PREDICT = """
+import sys
+import pandas as pd
+from src.ml.fraud_detection.model_registry import ModelRegistry
+
+ensemble = ModelRegistry(sys.argv[1]).load_ensemble()
+ensemble.predict(pd.read_json(sys.argv[2]))
+print(",".join(m for m in ("tensorflow", "xgboost", "lightgbm") if m in sys.modules))
+"""
+
+
+class TestLazyImports:
+    """Serving compiled trees imports none of the ML frameworks"""
+
+    def test_load_and_predict_compiled_trees(self, data, forest, tmp_path):
+        (features, _), holdout = data
+        ensemble = EnsembleFraudModel({})
+        ensemble.models = {"random_forest": forest}
+        ensemble.model_weights = {"random_forest": 1.0}
+        ensemble.feature_columns = COLUMNS
+        ensemble.is_trained = True
+        registry = ModelRegistry(str(tmp_path / "registry"))
+        manifest = registry.publish(ensemble, sample=features.head(100))
+        assert manifest["models"]["random_forest"]["format"] == "tree_arrays"
+        holdout.to_json(tmp_path / "holdout.json")
+        backend = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [backend] + [p for p in [env.get("PYTHONPATH")] if p]
+        )
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                LOAD_AND_PREDICT,
+                str(tmp_path / "registry"),
+                str(tmp_path / "holdout.json"),
+            ],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=backend,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == ""
@@ -0,0 +1,301 @@
+"""
+Name screening: indexed candidate search vs. scoring every list name
+"""
+
+import asyncio
+import random
+import re
+
+import pytest
+
+from src.compliance.aml_engine import AMLEngine, SanctionsListType
+from src.compliance.name_screening import (
+    NameScreeningIndex,
+    double_metaphone,
+    jaro_winkler,
+)
+
+FIRST = [
+    "john", "jane", "robert", "mary", "michael", "maria", "mohammed", "ahmed",
+    "ali", "omar", "olga", "ivan", "sergei", "dmitri", "elena", "anna", "li",
+    "wei", "chen", "kim", "jose", "juan", "carlos", "sofia", "pierre", "jean",
+    "hans", "klaus", "giovanni", "luca", "yusuf", "fatima", "aisha", "hassan",
+    "viktor", "boris", "natalia", "tariq", "kwame", "amina",
+]  # fmt: skip
+LAST = [
+    "smith", "doe", "johnson", "petrov", "ivanov", "al rashid", "hussein",
+    "kim", "park", "wang", "zhang", "garcia", "rodriguez", "muller", "schmidt",
+    "rossi", "bianchi", "dubois", "martin", "okafor", "mensah", "khan",
+    "rahman", "haddad", "nasser", "kowalski", "novak", "horvat", "sokolov",
+    "volkov", "ben ali", "el amin", "de la cruz", "van der berg", "oconnor",
+]  # fmt: skip
+SYLLABLES = [
+    "ba", "ko", "ri", "sha", "mel", "dan", "vo", "lin", "ser", "ga", "tor",
+    "mi", "ha", "zu", "en", "ov", "ak", "ra", "bek", "ul", "ye", "no", "ch",
+    "ta", "kar", "is", "lo", "pe", "dim", "far", "gu", "sa", "wen", "ju",
+]  # fmt: skip
+
+
+def jaccard_score(name1, name2):
+    """AMLEngine._calculate_name_match_score as it was"""
+    if not name1 or not name2:
+        return 0.0
+    name1_clean = re.sub("[^a-zA-Z\\s]", "", name1.lower()).strip()
+    name2_clean = re.sub("[^a-zA-Z\\s]", "", name2.lower()).strip()
+    if name1_clean == name2_clean:
+        return 1.0
+    words1 = set(name1_clean.split())
+    words2 = set(name2_clean.split())
+    if not words1 or not words2:
+        return 0.0
+    intersection = words1.intersection(words2)
+    union = words1.union(words2)
+    return len(intersection) / len(union)
+
+
+def brute_force(names, query, threshold):
+    scores = {}
+    for name_id, name in enumerate(names):
+        score = jaccard_score(query, name)
+        if score >= threshold:
+            scores[name_id] = score
+    return scores
+
+
+def typo(rng, word):
+    if len(word) < 3:
+        return word
+    i = rng.randrange(len(word) - 1)
+    edit = rng.randrange(3)
+    if edit == 0:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+    if edit == 1:
+        return word[:i] + word[i + 1 :]
+    return word[:i] + rng.choice("aeiouhy") + word[i + 1 :]
+
+
+def random_surname(rng):
+    if rng.random() < 0.2:
+        return rng.choice(LAST)
+    return "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+
+
+def random_name(rng):
+    parts = [rng.choice(FIRST)]
+    if rng.random() < 0.4:
+        parts.append(rng.choice(FIRST).upper()[0] + ".")
+    parts.append(random_surname(rng))
+    if rng.random() < 0.1:
+        parts.append(random_surname(rng))
+    return " ".join(parts).title()
+
+
+def variant(rng, name):
+    """A query derived from a list name, as customers' names drift from it."""
+    words = name.split()
+    change = rng.randrange(7)
+    if change == 0:
+        rng.shuffle(words)
+    elif change == 1 and len(words) > 1:
+        words.pop(rng.randrange(len(words)))
+    elif change == 2:
+        words.append(rng.choice(FIRST).title())
+    elif change == 3:
+        i = rng.randrange(len(words))
+        words[i] = typo(rng, words[i])
+    elif change == 4:
+        words = [word.upper() + rng.choice(["", ",", "-", "'"]) for word in words]
+    elif change == 5:
+        words = words + words[:1]
+    return " ".join(words)
+
+
+def synthetic_list(rng, count):
+    names = []
+    while len(names) < count:
+        names.append(random_name(rng))
+        if rng.random() < 0.3:
+            names.append(variant(rng, names[-1]))
+    return names
+
+
+def queries_for(rng, names, count):
+    queries = ["", "   ", "123", "J.", "X Æ A-12"]
+    while len(queries) < count:
+        if rng.random() < 0.7:
+            queries.append(variant(rng, rng.choice(names)))
+        else:
+            queries.append(random_name(rng))
+    return queries
+
+
+def build_index(names, **kwargs):
+    return NameScreeningIndex(
+        [(name, position) for position, name in enumerate(names)], **kwargs
+    )
+
+
+def matches(index, query, threshold=0.85):
+    """``{list position: score}`` of the index's matches for ``query``"""
+    return {index.payloads[i]: score for i, score in index.query(query, threshold)}
+
+
+class TestPhoneticAndEditScores:
+    @pytest.mark.parametrize(
+        "word,keys",
+        [
+            ("Smith", ("SM0", "XMT")),
+            ("Schmidt", ("XMT", "SMT")),
+            ("Thomas", ("TMS", "TMS")),
+            ("Knight", ("NT", "NT")),
+            ("Xavier", ("SF", "SFR")),
+            ("Catherine", ("K0RN", "KTRN")),
+            ("Wasserman", ("ASRM", "FSRM")),
+            ("Jose", ("HS", "HS")),
+            ("Zhao", ("J", "J")),
+            ("Caesar", ("SSR", "SSR")),
+            ("", ("", "")),
+        ],
+    )
+    def test_double_metaphone(self, word, keys):
+        assert double_metaphone(word) == keys
+
+    def test_spelling_variants_share_a_key(self):
+        for a, b in [
+            ("mohammed", "muhammad"),
+            ("philip", "filip"),
+            ("kathryn", "catherine"),
+        ]:
+            assert set(double_metaphone(a)) & set(double_metaphone(b))
+
+    def test_jaro_winkler(self):
+        assert jaro_winkler("martha", "marhta") == pytest.approx(0.9611, abs=1e-4)
+        assert jaro_winkler("dwayne", "duane") == pytest.approx(0.84, abs=1e-4)
+        assert jaro_winkler("abc", "abc") == 1.0
+        assert jaro_winkler("abc", "") == 0.0
+        assert jaro_winkler("abc", "xyz") == 0.0
+
+
+class TestNameScreeningIndex:
+    """Every match of the brute-force token scan is still found"""
+
+    @pytest.mark.parametrize("threshold", [0.5, 0.66, 0.85, 1.0])
+    def test_token_matches_equal_brute_force_without_fuzzy(self, threshold):
+        rng = random.Random(21)
+        names = synthetic_list(rng, 3000)
+        index = build_index(names, fuzzy_threshold=None)
+        for query in queries_for(rng, names, 300):
+            found = matches(index, query, threshold)
+            assert found == brute_force(names, query, threshold), query
+
+    def test_fuzzy_index_loses_no_brute_force_match(self):
+        rng = random.Random(22)
+        names = synthetic_list(rng, 3000)
+        index = build_index(names)
+        fuzzy_only = 0
+        for query in queries_for(rng, names, 500):
+            found = matches(index, query)
+            expected = brute_force(names, query, 0.85)
+            for name_id, score in expected.items():
+                assert found.get(name_id, -1) >= score, (query, names[name_id])
+            fuzzy_only += len(found.keys() - expected.keys())
+        assert fuzzy_only > 0
+
+    def test_fuzzy_matches_misspellings_only(self):
+        index = build_index(["Mohammed Al Rashid", "Jane Smith", "Viktor Sokolov"])
+        assert list(matches(index, "Muhammad al Rashid")) == [0]
+        assert list(matches(index, "SOKOLOV, Victor")) == [2]
+        assert matches(index, "John Smith") == {}
+        assert matches(index, "Jane Smith") == {1: 1.0}
+
+    def test_results_in_insertion_order(self):
+        index = build_index(["b a", "a b", "c", "a  b"])
+        assert index.query("A B") == [(0, 1.0), (1, 1.0), (3, 1.0)]
+
+    def test_empty_names(self):
+        index = build_index(["", "42", "John Doe"])
+        assert len(index) == 2
+        assert matches(index, "") == {}
+        assert matches(index, "007") == {1: 1.0}
+
+
+def screen(engine, method, name):
+    return asyncio.run(getattr(engine, method)({"name": name}))
+
+
+def brute_force_pep(pep_lists, name, threshold=0.85):
+    """AMLEngine._screen_pep as it was, without the per-entry detail"""
+    matches = []
+    for list_name, pep_list in pep_lists.items():
+        for entry in pep_list["entries"]:
+            for match_type, names in (
+                ("family_member", entry.get("family_members", [])),
+                ("close_associate", entry.get("close_associates", [])),
+                ("direct_pep", [entry["name"]]),
+            ):
+                for other in names:
+                    score = jaccard_score(name, other)
+                    if score >= threshold:
+                        matches.append((entry["id"], match_type, other))
+    return matches
+
+
+class TestAMLEngineScreening:
+    def test_update_sanctions_lists_reindexes(self):
+        engine = AMLEngine(None)
+        assert screen(engine, "_screen_sanctions", "Doe, John")["matches"]
+        engine.update_sanctions_lists(
+            SanctionsListType.OFAC_SDN,
+            {
+                "name": "OFAC",
+                "entries": [
+                    {"id": "A", "name": "Viktor Sokolov", "aliases": ["V. Sokolov"]},
+                    {"id": "B", "name": "Amina Okafor", "aliases": []},
+                ],
+            },
+        )
+        assert screen(engine, "_screen_sanctions", "John Doe")["matches"] == []
+        (match,) = screen(engine, "_screen_sanctions", "Victor Sokolov")["matches"]
+        assert match["entry_id"] == "A"
+        assert match["matched_name"] == "Viktor Sokolov"
+        assert engine.get_aml_statistics()["screening_index_names"] == 9
+
+    def test_threshold_is_configurable(self):
+        strict = AMLEngine(None, {"fuzzy_name_match_threshold": None})
+        assert screen(strict, "_screen_sanctions", "Jon Doe")["matches"] == []
+        assert screen(strict, "_screen_sanctions", "Jane Quinn Smith")["matches"] == []
+        loose = AMLEngine(
+            None, {"name_match_threshold": 0.5, "fuzzy_name_match_threshold": None}
+        )
+        (match,) = screen(loose, "_screen_sanctions", "Jane Quinn Smith")["matches"]
+        assert match["name_match_score"] == pytest.approx(2 / 3)
+
+    def test_pep_matches_keep_brute_force_order(self):
+        rng = random.Random(23)
+        engine = AMLEngine(None)
+        entries = []
+        for i in range(300):
+            entries.append(
+                {
+                    "id": f"PEP-{i}",
+                    "name": random_name(rng),
+                    "position": "Minister",
+                    "country": "Country A",
+                    "risk_level": "HIGH",
+                    "family_members": [random_name(rng) for _ in range(2)],
+                    "close_associates": [random_name(rng)],
+                }
+            )
+        engine._pep_lists["global_peps"]["entries"] = entries
+        names = [
+            name
+            for entry in entries
+            for name in [entry["name"]] + entry["family_members"]
+        ]
+        for query in queries_for(rng, names, 200):
+            found = [
+                (match["entry_id"], match["match_type"], match["matched_name"])
+                for match in screen(engine, "_screen_pep", query)["matches"]
+            ]
+            expected = brute_force_pep(engine._pep_lists, query)
+            assert [match for match in found if match in expected] == expected
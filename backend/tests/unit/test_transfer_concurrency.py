@@ -0,0 +1,184 @@
+"""
+Concurrency stress test for the wallet transfer posting engine
+
+N threads run random transfers between a handful of hot accounts. Money
+must be conserved, no balance may go negative and every successful
+transfer must leave exactly two transaction rows. Runs against SQLite by
+default; set BENCHMARK_POSTGRES_URL to also run against PostgreSQL.
+"""
+
+import os
+import random
+import threading
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from src.models.account import Account, AccountStatus, AccountType
+from src.models.database import Base
+from src.models.transaction import Transaction
+from src.models.user import User
+from src.services.wallet_service import (
+    InsufficientFunds,
+    post_transfer,
+    run_in_transaction,
+)
+
+THREADS = 8
+TRANSFERS_PER_THREAD = 40
+HOT_ACCOUNTS = 4
+OPENING_BALANCE = Decimal("100.00")
+TABLES = [User.__table__, Account.__table__, Transaction.__table__]
+
+
+def sqlite_engine(tmp_path):
+    return create_engine(
+        f"sqlite:///{tmp_path / 'transfers.db'}",
+        connect_args={"timeout": 30, "check_same_thread": False},
+    )
+
+
+def postgres_engine(tmp_path):
+    url = os.environ.get("BENCHMARK_POSTGRES_URL")
+    if not url:
+        pytest.skip("BENCHMARK_POSTGRES_URL not set")
+    return create_engine(url, pool_size=THREADS)
+
+
+@pytest.fixture(params=[sqlite_engine, postgres_engine], ids=["sqlite", "postgres"])
+def engine(request, tmp_path):
+    engine = request.param(tmp_path)
+    Base.metadata.drop_all(engine, tables=list(reversed(TABLES)))
+    Base.metadata.create_all(engine, tables=TABLES)
+    yield engine
+    Base.metadata.drop_all(engine, tables=list(reversed(TABLES)))
+    engine.dispose()
+
+
+@pytest.fixture
+def account_ids(engine):
+    user_id = str(uuid.uuid4())
+    ids = sorted(str(uuid.uuid4()) for _ in range(HOT_ACCOUNTS))
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User.__table__),
+            [
+                {
+                    "id": user_id,
+                    "email": "bench@example.com",
+                    "password_hash": "x",
+                    "first_name": "Bench",
+                    "last_name": "User",
+                }
+            ],
+        )
+        connection.execute(
+            insert(Account.__table__),
+            [
+                {
+                    "id": account_id,
+                    "user_id": user_id,
+                    "account_name": f"Hot {i}",
+                    "account_number": f"90000000{i:02d}",
+                    "account_type": AccountType.CHECKING,
+                    "status": AccountStatus.ACTIVE,
+                    "currency": "USD",
+                    "balance": OPENING_BALANCE,
+                    "available_balance": OPENING_BALANCE,
+                }
+                for i, account_id in enumerate(ids)
+            ],
+        )
+    return ids
+
+
+class TestTransferConcurrency:
+    """Hot-account contention through post_transfer/run_in_transaction"""
+
+    def test_concurrent_transfers_conserve_money(self, engine, account_ids):
+        committed = []
+        rejected = []
+        errors = []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            with Session(engine) as session:
+                for _ in range(TRANSFERS_PER_THREAD):
+                    source, destination = rng.sample(account_ids, 2)
+                    amount = Decimal(rng.randint(1, 60))
+                    try:
+                        run_in_transaction(
+                            session,
+                            post_transfer,
+                            session,
+                            source,
+                            destination,
+                            amount,
+                            attempts=20,
+                        )
+                        committed.append(amount)
+                    except InsufficientFunds:
+                        rejected.append(amount)
+                    except Exception as e:
+                        errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors, errors[:3]
+        assert len(committed) + len(rejected) == THREADS * TRANSFERS_PER_THREAD
+        accounts = Account.__table__
+        with engine.connect() as connection:
+            balances = connection.execute(
+                select(accounts.c.balance, accounts.c.available_balance)
+            ).all()
+            transaction_rows = connection.execute(
+                select(func.count()).select_from(Transaction.__table__)
+            ).scalar_one()
+        assert sum(b for b, _ in balances) == OPENING_BALANCE * HOT_ACCOUNTS
+        assert all(b >= 0 and b == available for b, available in balances)
+        assert transaction_rows == 2 * len(committed)
+
+    def test_opposite_direction_transfers_do_not_deadlock(self, engine, account_ids):
+        first, second = account_ids[:2]
+        committed = []
+        errors = []
+
+        def worker(source, destination):
+            with Session(engine) as session:
+                for _ in range(TRANSFERS_PER_THREAD):
+                    try:
+                        run_in_transaction(
+                            session,
+                            post_transfer,
+                            session,
+                            source,
+                            destination,
+                            Decimal("1"),
+                            attempts=20,
+                        )
+                        committed.append(source)
+                    except InsufficientFunds:
+                        # One direction can drain its source before the
+                        # other refills it
+                        pass
+                    except Exception as e:
+                        errors.append(e)
+
+        threads = [
+            threading.Thread(target=worker, args=pair)
+            for pair in [(first, second), (second, first)] * (THREADS // 2)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=60)
+        assert not any(t.is_alive() for t in threads)
+        assert not errors, errors[:3]
+        assert committed